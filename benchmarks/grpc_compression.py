@@ -0,0 +1,168 @@
+"""
+Benchmark gRPC response compression for order list payloads.
+
+Builds ListOrdersResponse messages shaped like our typical traffic (a few
+items per order, full shipping addresses), then measures for each size:
+
+* serialized size and compressed size for gzip and deflate
+* CPU time to compress and decompress the payload
+* the link bandwidth below which compression is a net win
+  (bytes saved / bandwidth > CPU time spent)
+
+With ``--rpc`` it also times real ListOrders calls over a loopback channel
+with and without per-call compression.
+
+Usage:
+    python -m benchmarks.grpc_compression
+    python -m benchmarks.grpc_compression --bandwidth-mbps 100 --rpc
+"""
+
+import argparse
+import os
+import sys
+import time
+import zlib
+from concurrent import futures
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import grpc  # noqa: E402
+import orders_pb2  # noqa: E402
+import orders_pb2_grpc  # noqa: E402
+
+ORDER_COUNTS = [1, 2, 5, 10, 25, 50, 100, 250, 500]
+ITEMS_PER_ORDER = 3
+WBITS = {'gzip': 16 + zlib.MAX_WBITS, 'deflate': zlib.MAX_WBITS}
+
+
+def build_response(order_count, items_per_order=ITEMS_PER_ORDER):
+    """Build a ListOrdersResponse resembling production payloads."""
+    orders = []
+    for i in range(order_count):
+        items = [
+            orders_pb2.OrderItem(
+                product_id=1000 + j,
+                product_name=f'Wireless Noise Cancelling Headphones Model {j}',
+                quantity=1 + j % 3,
+                price=129.99 + j,
+                subtotal=(129.99 + j) * (1 + j % 3),
+            )
+            for j in range(items_per_order)
+        ]
+        orders.append(orders_pb2.Order(
+            id=i + 1,
+            customer_name=f'Customer {i}',
+            customer_email=f'customer{i}@example.com',
+            items=items,
+            total_amount=sum(item.subtotal for item in items),
+            status='processing',
+            shipping_address=f'{100 + i} Market Street, Apartment {i % 40}, San Francisco, CA 94103, USA',
+            created_at='2025-10-20T15:22:31.123456+00:00',
+            updated_at='2025-10-21T09:01:02.654321+00:00',
+        ))
+    return orders_pb2.ListOrdersResponse(
+        orders=orders, total_count=order_count, page=1, page_size=order_count
+    )
+
+
+def time_codec(payload, algorithm, repeat):
+    """Return (compressed_size, seconds per compress+decompress round)."""
+    wbits = WBITS[algorithm]
+    start = time.perf_counter()
+    for _ in range(repeat):
+        compressor = zlib.compressobj(wbits=wbits)
+        compressed = compressor.compress(payload) + compressor.flush()
+        zlib.decompress(compressed, wbits)
+    return len(compressed), (time.perf_counter() - start) / repeat
+
+
+def break_even_mbps(saved_bytes, cpu_seconds):
+    """Bandwidth (Mbit/s) below which the bytes saved outweigh the CPU cost."""
+    if cpu_seconds <= 0 or saved_bytes <= 0:
+        return 0.0
+    return saved_bytes * 8 / cpu_seconds / 1_000_000
+
+
+def run_codec_benchmark(bandwidth_mbps, repeat):
+    print(f"Link bandwidth for the win/lose column: {bandwidth_mbps} Mbit/s\n")
+    print(f"{'orders':>6} {'bytes':>9} {'algo':>8} {'compressed':>10} {'ratio':>6} "
+          f"{'cpu_us':>8} {'break_even_mbps':>16} {'wins':>5}")
+
+    crossover = {}
+    for order_count in ORDER_COUNTS:
+        payload = build_response(order_count).SerializeToString()
+        for algorithm in WBITS:
+            size, seconds = time_codec(payload, algorithm, repeat)
+            saved = len(payload) - size
+            even = break_even_mbps(saved, seconds)
+            wins = bandwidth_mbps < even
+            if wins and algorithm not in crossover:
+                crossover[algorithm] = len(payload)
+            print(f"{order_count:>6} {len(payload):>9} {algorithm:>8} {size:>10} "
+                  f"{size / len(payload):>6.2f} {seconds * 1e6:>8.1f} {even:>16.0f} {str(wins):>5}")
+
+    print()
+    for algorithm in WBITS:
+        if algorithm in crossover:
+            print(f"{algorithm}: compression pays off from ~{crossover[algorithm]} bytes "
+                  f"at {bandwidth_mbps} Mbit/s (GRPC_COMPRESSION_THRESHOLD)")
+        else:
+            print(f"{algorithm}: compression never pays off at {bandwidth_mbps} Mbit/s")
+
+
+class _FixedOrderService(orders_pb2_grpc.OrderServiceServicer):
+    """Serves a prebuilt response so only transport costs are measured."""
+
+    def __init__(self, response, compression):
+        self.response = response
+        self.compression = compression
+
+    def ListOrders(self, request, context):
+        context.set_compression(self.compression)
+        return self.response
+
+
+def run_rpc_benchmark(repeat):
+    print("\nLoopback ListOrders latency (ms per call)")
+    print(f"{'orders':>6} {'none':>8} {'gzip':>8} {'deflate':>8}")
+    compressions = [
+        ('none', grpc.Compression.NoCompression),
+        ('gzip', grpc.Compression.Gzip),
+        ('deflate', grpc.Compression.Deflate),
+    ]
+    for order_count in ORDER_COUNTS:
+        response = build_response(order_count)
+        row = []
+        for _, compression in compressions:
+            server = grpc.server(futures.ThreadPoolExecutor(max_workers=2))
+            orders_pb2_grpc.add_OrderServiceServicer_to_server(
+                _FixedOrderService(response, compression), server
+            )
+            port = server.add_insecure_port('127.0.0.1:0')
+            server.start()
+            with grpc.insecure_channel(f'127.0.0.1:{port}') as channel:
+                stub = orders_pb2_grpc.OrderServiceStub(channel)
+                stub.ListOrders(orders_pb2.ListOrdersRequest())
+                start = time.perf_counter()
+                for _ in range(repeat):
+                    stub.ListOrders(orders_pb2.ListOrdersRequest())
+                row.append((time.perf_counter() - start) / repeat * 1000)
+            server.stop(None)
+        print(f"{order_count:>6} " + ' '.join(f'{value:>8.3f}' for value in row))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--bandwidth-mbps', type=float, default=1000.0,
+                        help='Link bandwidth used to decide whether compression wins')
+    parser.add_argument('--repeat', type=int, default=200, help='Iterations per measurement')
+    parser.add_argument('--rpc', action='store_true', help='Also time real RPCs over loopback')
+    args = parser.parse_args()
+
+    run_codec_benchmark(args.bandwidth_mbps, args.repeat)
+    if args.rpc:
+        run_rpc_benchmark(args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""
+Benchmark concurrent stock reservation: single product row vs stock shards.
+
+Worker threads reserve one unit of the same product at a time, each in its
+own transaction held open for ``--hold-ms`` to stand in for the rest of
+CreateOrder (inserting the order and its items). On the single-row path
+every worker queues on that product's row lock; on the sharded path they
+spread across ``--shards`` counter rows.
+
+Row-level locking needs PostgreSQL. On SQLite the whole database is locked
+per write and both paths serialise, so run this against the configured
+PostgreSQL database. The benchmark creates its own products and deletes
+them (with their ledger rows) afterwards.
+
+Usage:
+    python -m benchmarks.stock_shards
+    python -m benchmarks.stock_shards --threads 1 8 32 --shards 16 --hold-ms 5
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent import futures
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ecommerce_grpc.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import DatabaseError, connection, transaction  # noqa: E402
+from products.models import Product  # noqa: E402
+from products.stock import apply_stock_deltas, set_stock_shard_count, take_sharded_stock  # noqa: E402
+
+INITIAL_STOCK = 10 ** 9
+
+
+def reserve_single_row(product):
+    return apply_stock_deltas({product.id: -1}, guard=True, reason='order', reference='benchmark') == 1
+
+
+def reserve_sharded(product):
+    return take_sharded_stock(
+        {product.id: 1}, {product.id: product.stock_shard_count}, reference='benchmark'
+    )
+
+
+def run_workers(reserve, product, threads, duration, hold):
+    """Return (reservations per second, errors) for ``threads`` concurrent workers."""
+    deadline = time.perf_counter() + duration
+    lock = threading.Lock()
+    totals = {'done': 0, 'errors': 0}
+
+    def worker():
+        done = errors = 0
+        try:
+            while time.perf_counter() < deadline:
+                try:
+                    with transaction.atomic():
+                        if not reserve(product):
+                            raise DatabaseError('out of stock')
+                        if hold:
+                            time.sleep(hold)
+                    done += 1
+                except DatabaseError:
+                    errors += 1
+        finally:
+            connection.close()
+            with lock:
+                totals['done'] += done
+                totals['errors'] += errors
+
+    start = time.perf_counter()
+    with futures.ThreadPoolExecutor(max_workers=threads) as pool:
+        for _ in range(threads):
+            pool.submit(worker)
+    return totals['done'] / (time.perf_counter() - start), totals['errors']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 4, 16, 32],
+                        help='Concurrent workers to measure')
+    parser.add_argument('--shards', type=int, default=8, help='Stock shards for the sharded path')
+    parser.add_argument('--duration', type=float, default=5.0, help='Seconds per measurement')
+    parser.add_argument('--hold-ms', type=float, default=2.0,
+                        help='Time each transaction stays open after reserving')
+    args = parser.parse_args()
+
+    print(f"Database: {connection.vendor}, shards: {args.shards}, hold: {args.hold_ms} ms\n")
+    print(f"{'threads':>7} {'single_row/s':>13} {'sharded/s':>10} {'speedup':>8} {'errors':>7}")
+
+    single = Product.objects.create(
+        name='Benchmark single row', description='', price=1, stock_quantity=INITIAL_STOCK
+    )
+    sharded = Product.objects.create(
+        name='Benchmark sharded', description='', price=1, stock_quantity=INITIAL_STOCK
+    )
+    try:
+        set_stock_shard_count(sharded.id, args.shards)
+        sharded.refresh_from_db()
+        hold = args.hold_ms / 1000
+        for threads in args.threads:
+            single_rate, single_errors = run_workers(reserve_single_row, single, threads, args.duration, hold)
+            sharded_rate, sharded_errors = run_workers(reserve_sharded, sharded, threads, args.duration, hold)
+            speedup = sharded_rate / single_rate if single_rate else 0.0
+            print(f"{threads:>7} {single_rate:>13.0f} {sharded_rate:>10.0f} {speedup:>7.2f}x "
+                  f"{single_errors + sharded_errors:>7}")
+    finally:
+        Product.objects.filter(id__in=[single.id, sharded.id]).delete()
+
+
+if __name__ == '__main__':
+    main()
@@ -20,6 +20,9 @@ class CartAdmin(admin.ModelAdmin):
     readonly_fields = ['created_at', 'updated_at', 'total_items', 'subtotal', 'total']
     inlines = [CartItemInline]
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_items()
+    
     def total_items(self, obj):
         return obj.total_items
     total_items.short_description = 'Total Items'
@@ -37,6 +40,7 @@ class CartItemAdmin(admin.ModelAdmin):
     list_filter = ['added_at', 'updated_at']
     search_fields = ['product__name', 'cart__user__username']
     readonly_fields = ['price', 'subtotal', 'added_at', 'updated_at']
+    list_select_related = ['cart', 'cart__user', 'product']
     
     def is_available(self, obj):
         return obj.is_available
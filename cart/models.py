@@ -3,10 +3,46 @@ Shopping cart models for managing user carts.
 """
 
 from django.db import models
+from django.db.models import Count, DecimalField, F, Prefetch, Sum
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator
+from django.utils import timezone
 from decimal import Decimal
-from products.models import Product
+from products.models import Product, with_product_live_stock
+
+
+class CartQuerySet(models.QuerySet):
+    """QuerySet for carts"""
+    
+    def with_items(self):
+        """Prefetch items with their products, so cart totals and serialization add no queries"""
+        return self.prefetch_related(
+            Prefetch('items', queryset=with_product_live_stock(CartItem.objects.all()))
+        )
+    
+    def touch(self, now=None):
+        """Bump ``updated_at``, once per request that changes the carts' lines"""
+        return self.update(updated_at=now or timezone.now())
+
+
+class CartItemQuerySet(models.QuerySet):
+    """QuerySet for cart items"""
+    
+    def totals(self):
+        """``total_items``, ``subtotal`` and ``items_count`` of these items, in one aggregate query"""
+        totals = self.aggregate(
+            total_items=Sum('quantity'),
+            subtotal=Sum(
+                F('quantity') * F('product__price'),
+                output_field=DecimalField(max_digits=12, decimal_places=2)
+            ),
+            items_count=Count('id'),
+        )
+        return {
+            'total_items': totals['total_items'] or 0,
+            'subtotal': totals['subtotal'] or Decimal('0'),
+            'items_count': totals['items_count'],
+        }
 
 
 class Cart(models.Model):
@@ -29,6 +65,8 @@ class Cart(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = CartQuerySet.as_manager()
+    
     class Meta:
         ordering = ['-updated_at']
         indexes = [
@@ -41,6 +79,10 @@ class Cart(models.Model):
             return f"Cart for {self.user.username}"
         return f"Anonymous cart {self.session_key}"
     
+    # The totals below read ``self.items.all()``; load carts with
+    # ``Cart.objects.with_items()`` so they come from the prefetched items
+    # instead of a query per total and per product
+    
     @property
     def total_items(self):
         """Get total number of items in cart."""
@@ -49,7 +91,7 @@ class Cart(models.Model):
     @property
     def subtotal(self):
         """Calculate cart subtotal."""
-        return sum(item.subtotal for item in self.items.all())
+        return sum((item.subtotal for item in self.items.all()), Decimal('0'))
     
     @property
     def total(self):
@@ -82,6 +124,8 @@ class CartItem(models.Model):
     added_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = CartItemQuerySet.as_manager()
+    
     class Meta:
         ordering = ['-added_at']
         unique_together = ['cart', 'product']
@@ -105,9 +149,4 @@ class CartItem(models.Model):
     @property
     def is_available(self):
         """Check if product is available in requested quantity."""
-        return self.product.stock_quantity >= self.quantity
-    
-    def save(self, *args, **kwargs):
-        """Override save to update cart's updated_at timestamp."""
-        super().save(*args, **kwargs)
-        self.cart.save()  # Update cart's updated_at
+        return self.product.available_stock >= self.quantity
@@ -64,10 +64,10 @@ class CartItemSerializer(serializers.ModelSerializer):
         from products.models import Product
         
         if 'product_id' in data and 'quantity' in data:
-            product = Product.objects.get(id=data['product_id'])
-            if product.stock_quantity < data['quantity']:
+            product = Product.objects.with_live_stock().get(id=data['product_id'])
+            if product.available_stock < data['quantity']:
                 raise serializers.ValidationError(
-                    f"Only {product.stock_quantity} units available."
+                    f"Only {product.available_stock} units available."
                 )
         
         return data
@@ -122,3 +122,27 @@ class UpdateCartItemSerializer(serializers.Serializer):
     """Serializer for updating cart item quantity."""
     
     quantity = serializers.IntegerField(min_value=1)
+
+
+class CartOperationSerializer(serializers.Serializer):
+    """Serializer for one operation of a batch cart update."""
+    
+    ACTION_CHOICES = ['add', 'update', 'remove']
+    
+    action = serializers.ChoiceField(choices=ACTION_CHOICES)
+    product_id = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=1, required=False)
+    
+    def validate(self, data):
+        """Default ``add`` to one unit and require a quantity for ``update``."""
+        if data['action'] == 'add':
+            data.setdefault('quantity', 1)
+        elif data['action'] == 'update' and 'quantity' not in data:
+            raise serializers.ValidationError({'quantity': 'This field is required to update a line.'})
+        return data
+
+
+class BatchCartSerializer(serializers.Serializer):
+    """Serializer for a batch of cart operations, applied in order."""
+    
+    operations = CartOperationSerializer(many=True, allow_empty=False, max_length=100)
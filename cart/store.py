@@ -0,0 +1,544 @@
+"""
+Cart line quantities, optionally kept in Redis with write-behind persistence.
+
+By default cart mutations write ``CartItem`` rows directly. With
+``CART_REDIS_STORE`` enabled each user's cart is also held in a Redis hash,
+which is authoritative for line quantities:
+
+- ``cart`` -> cart id, present once the cart has been loaded from the database
+- ``item:<item id>`` -> quantity
+- ``product:<product id>`` -> item id
+
+Quantity changes run as Lua scripts that check stock and update the line in
+one atomic step, so quick repeated taps never lose an increment. The user is
+added to a dirty set, and ``flush_cart_quantities`` later writes the
+quantities of all dirty carts to ``CartItem`` in bulk, touching each cart's
+``updated_at`` once. Reads merge the hash back into loaded items with
+``merge_cart_quantities``, so the serializers see live quantities.
+
+Lines themselves are still created and deleted in the database straight
+away, so every line keeps a real ``CartItem`` id for the item endpoints.
+
+A batch of operations (``apply_cart_operations``) holds the cart's lock,
+``cart:<user id>:lock``, from reading the live quantities until it has
+written its result back to the hash; the quantity scripts wait for it.
+
+Without the store, adding to a line is a single upsert (``UPSERT_ITEM_SQL``)
+and each change touches the cart's ``updated_at`` once.
+"""
+
+import time
+import uuid
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Case, IntegerField, Value, When
+from django.utils import timezone
+from products.models import Product
+from .models import Cart, CartItem
+
+CART_KEY = 'cart:{user_id}'
+CART_LOCK_KEY = 'cart:{user_id}:lock'
+# Longest a batch may hold a cart's lock; changes wait up to this long for it
+CART_LOCK_TIMEOUT = 5
+CART_LOCK_POLL_INTERVAL = 0.01
+# Users whose cart quantities changed since the last flush
+CART_DIRTY_KEY = 'cart:dirty'
+# Flushed carts expire from Redis after this long; a change removes the
+# expiry again until the next flush
+CART_KEY_TTL = 3600 * 24
+CART_FLUSH_BATCH_SIZE = 500
+
+# Creates a line or adds to its quantity in one statement, so quick repeated
+# adds neither lose an increment nor collide on the (cart, product)
+# constraint. The WHERE leaves a line that would exceed the stock unchanged,
+# in which case no row is returned.
+# Params: cart id, product id, quantity, added_at, updated_at, stock
+UPSERT_ITEM_SQL = (
+    'INSERT INTO cart_cartitem (cart_id, product_id, quantity, added_at, updated_at) '
+    'VALUES (%s, %s, %s, %s, %s) '
+    'ON CONFLICT (cart_id, product_id) DO UPDATE '
+    'SET quantity = cart_cartitem.quantity + excluded.quantity, updated_at = excluded.updated_at '
+    'WHERE cart_cartitem.quantity + excluded.quantity <= %s '
+    'RETURNING *'
+)
+
+# Results of ADJUST_SCRIPT
+NOT_LOADED = -1
+NO_LINE = -2
+LOCKED = -3
+OUT_OF_STOCK = 0
+UPDATED = 1
+
+# KEYS: cart hash, dirty set, cart lock
+# ARGV: user id, 'product' or 'item', product or item id, 'add' or 'set',
+#       quantity, stock
+# Returns {status, item id, quantity}, the quantity being the line's
+# unchanged one when there isn't enough stock
+ADJUST_SCRIPT = """
+if redis.call('EXISTS', KEYS[3]) == 1 then
+    return {-3, 0, 0}
+end
+if redis.call('HEXISTS', KEYS[1], 'cart') == 0 then
+    return {-1, 0, 0}
+end
+local item_id = ARGV[3]
+if ARGV[2] == 'product' then
+    item_id = redis.call('HGET', KEYS[1], 'product:' .. ARGV[3])
+    if not item_id then
+        return {-2, 0, 0}
+    end
+end
+local current = redis.call('HGET', KEYS[1], 'item:' .. item_id)
+if not current then
+    return {-2, 0, 0}
+end
+current = tonumber(current)
+local quantity = tonumber(ARGV[5])
+if ARGV[4] == 'add' then
+    quantity = current + quantity
+end
+if quantity > tonumber(ARGV[6]) then
+    return {0, tonumber(item_id), current}
+end
+redis.call('HSET', KEYS[1], 'item:' .. item_id, quantity)
+redis.call('PERSIST', KEYS[1])
+redis.call('SADD', KEYS[2], ARGV[1])
+return {1, tonumber(item_id), quantity}
+"""
+
+# KEYS: cart hash
+# ARGV: TTL, cart id, then item id, product id and quantity of each line
+# Does nothing if another request has loaded the cart first
+LOAD_SCRIPT = """
+if redis.call('HEXISTS', KEYS[1], 'cart') == 1 then
+    return 0
+end
+for i = 3, #ARGV, 3 do
+    redis.call('HSET', KEYS[1], 'item:' .. ARGV[i], ARGV[i + 2], 'product:' .. ARGV[i + 1], ARGV[i])
+end
+redis.call('HSET', KEYS[1], 'cart', ARGV[2])
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+return 1
+"""
+
+# KEYS: cart hash, dirty set, cart lock
+# ARGV: user id, lock token, number of removed lines, then item id and
+#       product id of each removed line, then item id, product id and
+#       quantity of each line written
+# Writes a batch's result and releases the lock. A cart cleared from Redis
+# meanwhile is left alone; it reloads the result from the database.
+BATCH_SCRIPT = """
+if redis.call('HEXISTS', KEYS[1], 'cart') == 1 then
+    local written = 4 + 2 * tonumber(ARGV[3])
+    for i = 4, written - 1, 2 do
+        redis.call('HDEL', KEYS[1], 'item:' .. ARGV[i], 'product:' .. ARGV[i + 1])
+    end
+    for i = written, #ARGV, 3 do
+        redis.call('HSET', KEYS[1], 'item:' .. ARGV[i], ARGV[i + 2], 'product:' .. ARGV[i + 1], ARGV[i])
+    end
+    redis.call('PERSIST', KEYS[1])
+    redis.call('SADD', KEYS[2], ARGV[1])
+end
+if redis.call('GET', KEYS[3]) == ARGV[2] then
+    redis.call('DEL', KEYS[3])
+end
+return 1
+"""
+
+# KEYS: cart lock; ARGV: lock token
+RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class InsufficientStock(Exception):
+    """A cart line would hold more units than are in stock."""
+
+    def __init__(self, in_cart, stock):
+        super().__init__(f'Only {stock - in_cart} more units available')
+        self.in_cart = in_cart
+        self.stock = stock
+
+
+class CartBatchError(Exception):
+    """Operations of a batch that can't be applied, so none of it is."""
+
+    def __init__(self, errors):
+        super().__init__(f'{len(errors)} cart operations failed')
+        self.errors = errors
+
+
+def get_redis():
+    """Return the Redis connection behind the default cache."""
+    from django_redis import get_redis_connection
+    return get_redis_connection('default')
+
+
+def cart_key(user_id):
+    return CART_KEY.format(user_id=user_id)
+
+
+def cart_lock_key(user_id):
+    return CART_LOCK_KEY.format(user_id=user_id)
+
+
+def lock_cart(redis, user_id):
+    """
+    Take the user's cart lock, waiting for a batch holding it.
+
+    Returns:
+        The token to release it with
+    """
+    token = uuid.uuid4().hex
+    deadline = time.monotonic() + CART_LOCK_TIMEOUT
+    while not redis.set(cart_lock_key(user_id), token, nx=True, ex=CART_LOCK_TIMEOUT):
+        if time.monotonic() > deadline:
+            raise TimeoutError(f'Cart {user_id} is locked')
+        time.sleep(CART_LOCK_POLL_INTERVAL)
+    return token
+
+
+def unlock_cart(redis, user_id, token):
+    redis.register_script(RELEASE_LOCK_SCRIPT)(keys=[cart_lock_key(user_id)], args=[token])
+
+
+def load_cart(redis, user):
+    """Copy a user's cart lines from the database into Redis, unless already there."""
+    cart, _ = Cart.objects.get_or_create(user=user)
+    args = [CART_KEY_TTL, cart.id]
+    for line in cart.items.values_list('id', 'product_id', 'quantity'):
+        args.extend(line)
+    redis.register_script(LOAD_SCRIPT)(keys=[cart_key(user.id)], args=args)
+
+
+def _register_line(redis, user_id, item):
+    """Add a line that exists in the database but not yet in the user's hash."""
+    key = cart_key(user_id)
+    pipe = redis.pipeline(transaction=True)
+    pipe.hsetnx(key, f'item:{item.id}', item.quantity)
+    pipe.hsetnx(key, f'product:{item.product_id}', item.id)
+    pipe.execute()
+
+
+def _adjust(redis, user, by, line_id, mode, quantity, stock):
+    """
+    Run ADJUST_SCRIPT, waiting out a batch holding the cart's lock and
+    loading the cart into Redis first if needed.
+
+    Returns:
+        ``(status, item_id, quantity)``
+    """
+    script = redis.register_script(ADJUST_SCRIPT)
+    keys = [cart_key(user.id), CART_DIRTY_KEY, cart_lock_key(user.id)]
+    args = [user.id, by, line_id, mode, quantity, stock]
+    status, item_id, quantity = script(keys=keys, args=args)
+    deadline = time.monotonic() + CART_LOCK_TIMEOUT
+    while status == LOCKED:
+        if time.monotonic() > deadline:
+            raise TimeoutError(f'Cart {user.id} is locked')
+        time.sleep(CART_LOCK_POLL_INTERVAL)
+        status, item_id, quantity = script(keys=keys, args=args)
+    if status == NOT_LOADED:
+        load_cart(redis, user)
+        status, item_id, quantity = script(keys=keys, args=args)
+    return status, item_id, quantity
+
+
+def add_item(user, product, quantity):
+    """
+    Add ``quantity`` units of a product to the user's cart.
+
+    Stock is the product's ``available_stock``, so load it
+    ``with_live_stock()`` to save a query for sharded products.
+
+    Returns:
+        ``(cart_item, created)``
+
+    Raises:
+        InsufficientStock: The line would exceed the product's stock
+    """
+    stock = product.available_stock
+    if not settings.CART_REDIS_STORE:
+        if quantity > stock:
+            raise InsufficientStock(0, stock)
+        cart, _ = Cart.objects.get_or_create(user=user)
+        now = timezone.now()
+        timestamp = connection.ops.adapt_datetimefield_value(now)
+        rows = list(CartItem.objects.raw(
+            UPSERT_ITEM_SQL, [cart.id, product.id, quantity, timestamp, timestamp, stock]
+        ))
+        if not rows:
+            in_cart = CartItem.objects.filter(cart=cart, product=product).values_list('quantity', flat=True).first()
+            raise InsufficientStock(in_cart or 0, stock)
+        Cart.objects.filter(id=cart.id).touch(now)
+        cart_item = rows[0]
+        cart_item.product = product
+        # Lines hold at least one unit, so only a new line ends up with exactly ``quantity``
+        return cart_item, cart_item.quantity == quantity
+
+    redis = get_redis()
+    status, item_id, current = _adjust(redis, user, 'product', product.id, 'add', quantity, stock)
+    if status == NO_LINE:
+        cart_id = int(redis.hget(cart_key(user.id), 'cart'))
+        cart_item, created = CartItem.objects.get_or_create(
+            cart_id=cart_id,
+            product=product,
+            defaults={'quantity': quantity}
+        )
+        _register_line(redis, user.id, cart_item)
+        if created:
+            return cart_item, True
+        # Added by a concurrent request: add to its quantity instead
+        status, item_id, current = _adjust(redis, user, 'product', product.id, 'add', quantity, stock)
+    if status == OUT_OF_STOCK:
+        raise InsufficientStock(current, stock)
+    return CartItem(id=item_id, product=product, quantity=current, updated_at=timezone.now()), False
+
+
+def set_item_quantity(user, cart_item, quantity):
+    """
+    Set the quantity of one of the user's cart lines, loaded with its product.
+
+    Raises:
+        InsufficientStock: ``quantity`` exceeds the product's stock
+    """
+    stock = cart_item.product.available_stock
+    if not settings.CART_REDIS_STORE:
+        if stock < quantity:
+            raise InsufficientStock(0, stock)
+        now = timezone.now()
+        CartItem.objects.filter(id=cart_item.id).update(quantity=quantity, updated_at=now)
+        Cart.objects.filter(id=cart_item.cart_id).touch(now)
+        cart_item.quantity = quantity
+        cart_item.updated_at = now
+        return cart_item
+
+    redis = get_redis()
+    status, _, current = _adjust(redis, user, 'item', cart_item.id, 'set', quantity, stock)
+    if status == NO_LINE:
+        _register_line(redis, user.id, cart_item)
+        status, _, current = _adjust(redis, user, 'item', cart_item.id, 'set', quantity, stock)
+    if status == OUT_OF_STOCK:
+        raise InsufficientStock(0, stock)
+    cart_item.quantity = current
+    cart_item.updated_at = timezone.now()
+    return cart_item
+
+
+def remove_item(user, cart_item):
+    """Delete one of the user's cart lines."""
+    fields = [f'item:{cart_item.id}', f'product:{cart_item.product_id}']
+    cart_item.delete()
+    if settings.CART_REDIS_STORE:
+        get_redis().hdel(cart_key(user.id), *fields)
+
+
+def clear_cart(user, cart):
+    """Delete every line of the user's cart."""
+    cart.clear()
+    if settings.CART_REDIS_STORE:
+        get_redis().delete(cart_key(user.id))
+
+
+def merge_cart_quantities(user, cart_items):
+    """Replace the quantities of loaded cart items with their live ones from Redis, in place."""
+    cart_items = list(cart_items)
+    if not settings.CART_REDIS_STORE or not cart_items:
+        return cart_items
+
+    quantities = get_redis().hmget(cart_key(user.id), [f'item:{item.id}' for item in cart_items])
+    for item, quantity in zip(cart_items, quantities):
+        if quantity is not None:
+            item.quantity = int(quantity)
+    return cart_items
+
+
+def cart_totals(user):
+    """``total_items``, ``subtotal`` and ``items_count`` of the user's cart."""
+    if not settings.CART_REDIS_STORE:
+        return CartItem.objects.filter(cart__user=user).totals()
+
+    cart = Cart.objects.with_items().filter(user=user).first()
+    cart_items = merge_cart_quantities(user, cart.items.all() if cart else [])
+    return {
+        'total_items': sum(item.quantity for item in cart_items),
+        'subtotal': sum((item.subtotal for item in cart_items), Decimal('0')),
+        'items_count': len(cart_items),
+    }
+
+
+def apply_cart_operations(user, operations):
+    """
+    Apply a batch of cart operations, in order, all or none.
+
+    Operations are ``{'action', 'product_id', 'quantity'}`` dicts as
+    validated by ``CartOperationSerializer``: ``add`` adds to a line,
+    creating it if needed, ``update`` sets an existing line's quantity and
+    ``remove`` deletes a line if present. The products are loaded in one
+    query and the operations run against the cart's current quantities in
+    memory. Only the final lines are written: one bulk insert, one bulk
+    update and one delete, then one touch of the cart.
+
+    With the Redis store the batch holds the cart's lock, so no quantity
+    change lands between reading the live quantities and writing the
+    result. The result goes to the database and, once committed, to the
+    hash, which stays authoritative; a flush that read the hash before the
+    batch is corrected by the next one.
+
+    Raises:
+        CartBatchError: With errors keyed by the index of each failing operation
+    """
+    products = Product.objects.with_live_stock().in_bulk({operation['product_id'] for operation in operations})
+    if not settings.CART_REDIS_STORE:
+        return _apply_cart_operations(user, operations, products)
+
+    redis = get_redis()
+    token = lock_cart(redis, user.id)
+    try:
+        load_cart(redis, user)
+        return _apply_cart_operations(user, operations, products, redis, token)
+    except BaseException:
+        unlock_cart(redis, user.id, token)
+        raise
+
+
+def _apply_cart_operations(user, operations, products, redis=None, token=None):
+    with transaction.atomic():
+        cart, _ = Cart.objects.get_or_create(user=user)
+        lines = {item.product_id: item for item in cart.items.select_for_update()}
+        merge_cart_quantities(user, lines.values())
+        quantities = _run_cart_operations(
+            operations, products, {product_id: item.quantity for product_id, item in lines.items()}
+        )
+        created, removed = _write_cart_lines(cart, lines, quantities)
+        if redis is not None:
+            _write_back_cart_lines(redis, user, token, lines, created, removed)
+    return cart
+
+
+def _run_cart_operations(operations, products, quantities):
+    """
+    Apply ``operations`` to a ``{product_id: quantity}`` dict of cart lines.
+
+    Raises:
+        CartBatchError: With errors keyed by the index of each failing operation
+    """
+    errors = {}
+    for index, operation in enumerate(operations):
+        action = operation['action']
+        product = products.get(operation['product_id'])
+        if product is None:
+            errors[index] = 'Product does not exist.'
+        elif action == 'remove':
+            quantities.pop(product.id, None)
+        elif action == 'update' and product.id not in quantities:
+            errors[index] = 'Product is not in the cart.'
+        else:
+            quantity = operation['quantity'] + (quantities.get(product.id, 0) if action == 'add' else 0)
+            if quantity > product.available_stock:
+                errors[index] = f'Only {product.available_stock} units available.'
+            else:
+                quantities[product.id] = quantity
+    if errors:
+        raise CartBatchError(errors)
+    return quantities
+
+
+def _write_cart_lines(cart, lines, quantities):
+    """Bring the cart's ``lines`` to ``quantities``; returns the (created, removed) items."""
+    now = timezone.now()
+    created = CartItem.objects.bulk_create([
+        CartItem(cart=cart, product_id=product_id, quantity=quantity)
+        for product_id, quantity in quantities.items() if product_id not in lines
+    ])
+    changed = []
+    for product_id, item in lines.items():
+        if product_id in quantities and quantities[product_id] != item.quantity:
+            item.quantity = quantities[product_id]
+            item.updated_at = now
+            changed.append(item)
+    CartItem.objects.bulk_update(changed, ['quantity', 'updated_at'])
+    removed = [item for product_id, item in lines.items() if product_id not in quantities]
+    if removed:
+        CartItem.objects.filter(id__in=[item.id for item in removed]).delete()
+    Cart.objects.filter(id=cart.id).touch(now)
+    return created, removed
+
+
+def _write_back_cart_lines(redis, user, token, lines, created, removed):
+    """Once committed, write the lines back to the cart's hash and release its lock."""
+    args = [user.id, token, len(removed)]
+    for item in removed:
+        args.extend([item.id, item.product_id])
+    for item in [*created, *(item for item in lines.values() if item not in removed)]:
+        args.extend([item.id, item.product_id, item.quantity])
+    transaction.on_commit(lambda: redis.register_script(BATCH_SCRIPT)(
+        keys=[cart_key(user.id), CART_DIRTY_KEY, cart_lock_key(user.id)], args=args
+    ))
+
+
+def _decode(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def flush_cart_quantities(batch_size=CART_FLUSH_BATCH_SIZE):
+    """
+    Write the quantities of up to ``batch_size`` changed carts to the database.
+
+    Every line of each cart is updated by one ``Case`` UPDATE per batch of
+    items, and the carts' ``updated_at`` by one more. If the database write
+    fails the carts are marked dirty again for the next flush.
+
+    Returns:
+        Number of carts flushed
+    """
+    redis = get_redis()
+    user_ids = redis.spop(CART_DIRTY_KEY, batch_size)
+    if not user_ids:
+        return 0
+
+    pipe = redis.pipeline(transaction=False)
+    for user_id in user_ids:
+        pipe.hgetall(cart_key(_decode(user_id)))
+    cart_ids = []
+    quantities = {}
+    for fields in pipe.execute():
+        fields = {_decode(field): int(value) for field, value in fields.items()}
+        if 'cart' not in fields:
+            # Cleared since it was changed
+            continue
+        cart_ids.append(fields['cart'])
+        quantities.update({
+            int(field.split(':')[1]): quantity for field, quantity in fields.items() if field.startswith('item:')
+        })
+
+    item_ids = list(quantities)
+    now = timezone.now()
+    try:
+        with transaction.atomic():
+            for start in range(0, len(item_ids), batch_size):
+                batch = item_ids[start:start + batch_size]
+                CartItem.objects.filter(id__in=batch).update(
+                    quantity=Case(
+                        *[When(id=item_id, then=Value(quantities[item_id])) for item_id in batch],
+                        output_field=IntegerField(),
+                    ),
+                    updated_at=now,
+                )
+            Cart.objects.filter(id__in=cart_ids).touch(now)
+    except Exception:
+        redis.sadd(CART_DIRTY_KEY, *user_ids)
+        raise
+
+    # Flushed carts may now expire; one changed meanwhile is dirty again and
+    # gets flushed by the next run, well before the TTL
+    pipe = redis.pipeline(transaction=False)
+    for user_id in user_ids:
+        pipe.expire(cart_key(_decode(user_id)), CART_KEY_TTL)
+    pipe.execute()
+    return len(cart_ids)
@@ -86,13 +86,14 @@ def check_cart_item_availability():
     """
     from .models import CartItem
     from core.tasks import send_email_notification
+    from products.models import with_product_live_stock
     
     try:
         # Find cart items where product is out of stock
-        unavailable_items = CartItem.objects.select_related(
-            'cart__user', 'product'
+        unavailable_items = with_product_live_stock(
+            CartItem.objects.select_related('cart__user')
         ).filter(
-            product__stock_quantity__lt=1,
+            product_live_stock__lt=1,
             cart__user__isnull=False
         )
         
@@ -189,3 +190,50 @@ def sync_cart_prices():
     except Exception as e:
         logger.error(f"Error syncing cart prices: {str(e)}")
         raise
+
+
+def sync_changed_cart_prices(events):
+    """
+    Change feed handler: touch only the carts holding repriced products.
+    
+    Incremental replacement for ``sync_cart_prices``; two UPDATEs per batch
+    instead of saving every cart item.
+    """
+    from .models import Cart, CartItem
+    
+    product_ids = {
+        event.aggregate_id for event in events
+        if event.event_type == 'product.updated' and 'price' in event.payload.get('fields', [])
+    }
+    if not product_ids:
+        return 0
+    
+    now = timezone.now()
+    updated_count = CartItem.objects.filter(product_id__in=product_ids).update(updated_at=now)
+    Cart.objects.filter(items__product_id__in=product_ids).update(updated_at=now)
+    
+    logger.info(f"Synced prices for {updated_count} cart items")
+    return updated_count
+
+
+@shared_task
+def flush_cart_quantities():
+    """
+    Write cart quantities changed in the Redis cart store to the database.
+    """
+    from .store import CART_FLUSH_BATCH_SIZE, flush_cart_quantities as flush_batch
+    
+    try:
+        total = 0
+        while True:
+            flushed = flush_batch(CART_FLUSH_BATCH_SIZE)
+            total += flushed
+            if flushed < CART_FLUSH_BATCH_SIZE:
+                break
+        
+        if total:
+            logger.info(f"Flushed quantities of {total} carts")
+        return f"Flushed {total} carts"
+    except Exception as e:
+        logger.error(f"Error flushing cart quantities: {str(e)}")
+        raise
@@ -0,0 +1,228 @@
+"""
+API tests for Shopping Cart endpoints.
+"""
+
+import pytest
+from decimal import Decimal
+from django.urls import reverse
+from rest_framework import status
+from cart.models import Cart, CartItem
+from products.stock import set_stock_shard_count
+from wishlist.models import WishlistItem
+
+
+@pytest.fixture
+def cart(user, products):
+    """A cart holding three of the test products."""
+    cart = Cart.objects.create(user=user)
+    for quantity, product in enumerate(products[:3], start=1):
+        CartItem.objects.create(cart=cart, product=product, quantity=quantity)
+    return cart
+
+
+@pytest.mark.django_db
+class TestCartTotals:
+    """Test cases for reading carts and their totals."""
+    
+    def test_get_cart_in_two_queries(self, authenticated_client, cart, django_assert_num_queries):
+        """Test the cart, its items and their products are loaded once for all totals."""
+        # The cart, then its items joined to their products
+        with django_assert_num_queries(2):
+            response = authenticated_client.get(reverse('cart-detail'))
+        
+        assert response.status_code == status.HTTP_200_OK
+        data = response.data['cart']
+        assert data['total_items'] == 6
+        # Products 1-3 cost 10, 20 and 30
+        assert Decimal(data['subtotal']) == Decimal('140.00')
+        assert Decimal(data['total']) == Decimal('140.00')
+        assert len(data['items']) == 3
+        assert all(item['is_available'] and item['product']['is_in_stock'] for item in data['items'])
+    
+    def test_get_cart_reads_sharded_stock(self, authenticated_client, cart, products, django_assert_num_queries):
+        """Test sharded products report their live stock without a query per product."""
+        set_stock_shard_count(products[0].id, 4)
+        
+        with django_assert_num_queries(2):
+            response = authenticated_client.get(reverse('cart-detail'))
+        
+        item = next(item for item in response.data['cart']['items'] if item['product']['id'] == products[0].id)
+        assert item['product']['stock_quantity'] == products[0].stock_quantity
+        assert item['is_available'] and item['product']['is_in_stock']
+    
+    def test_get_cart_creates_empty_cart(self, authenticated_client, user):
+        """Test a user without a cart gets an empty one."""
+        response = authenticated_client.get(reverse('cart-detail'))
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['cart']['total_items'] == 0
+        assert Decimal(response.data['cart']['subtotal']) == 0
+        assert Cart.objects.filter(user=user).exists()
+    
+    def test_summary_in_one_query(self, authenticated_client, cart, django_assert_num_queries):
+        """Test the summary is a single aggregate over the cart's items."""
+        with django_assert_num_queries(1):
+            response = authenticated_client.get(reverse('cart-summary'))
+        
+        assert response.data['summary'] == {
+            'total_items': 6, 'subtotal': 140.0, 'total': 140.0, 'items_count': 3
+        }
+    
+    def test_summary_without_cart(self, authenticated_client):
+        """Test a user without a cart gets zero totals."""
+        response = authenticated_client.get(reverse('cart-summary'))
+        
+        assert response.data['summary'] == {
+            'total_items': 0, 'subtotal': 0.0, 'total': 0.0, 'items_count': 0
+        }
+
+
+@pytest.mark.django_db
+class TestCartMutations:
+    """Test cases for changing cart lines."""
+    
+    def test_add_to_cart_twice(self, authenticated_client, product):
+        """Test adding a product already in the cart adds to its quantity."""
+        url = reverse('cart-add')
+        assert authenticated_client.post(url, {'product_id': product.id, 'quantity': 2}).status_code == 201
+        
+        response = authenticated_client.post(url, {'product_id': product.id, 'quantity': 3})
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['cart_item']['quantity'] == 5
+        assert CartItem.objects.get(product=product).quantity == 5
+    
+    def test_add_is_one_upsert(self, authenticated_client, cart, products, django_assert_num_queries):
+        """Test adding to a line is a single statement plus one cart touch."""
+        before = Cart.objects.get(id=cart.id).updated_at
+        
+        # The product's existence check and lookup, the cart, the upsert and the touch
+        with django_assert_num_queries(5):
+            response = authenticated_client.post(reverse('cart-add'), {'product_id': products[0].id, 'quantity': 2})
+        
+        assert response.data['cart_item']['quantity'] == 3
+        assert response.data['cart_item']['added_at'] is not None
+        assert Cart.objects.get(id=cart.id).updated_at > before
+    
+    def test_add_to_line_created_concurrently(self, authenticated_client, user, product):
+        """Test adding to a line another request has just created adds to it instead of colliding."""
+        CartItem.objects.create(cart=Cart.objects.create(user=user), product=product, quantity=1)
+        
+        response = authenticated_client.post(reverse('cart-add'), {'product_id': product.id, 'quantity': 1})
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert CartItem.objects.get(product=product).quantity == 2
+    
+    def test_move_from_wishlist(self, authenticated_client, user, cart, products):
+        """Test moving a wishlist item adds one unit, within stock."""
+        WishlistItem.objects.create(user=user, product=products[0])
+        
+        response = authenticated_client.post(reverse('wishlist-move-to-cart', args=[products[0].id]))
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert CartItem.objects.get(id=response.data['cart_item_id']).quantity == 2
+        assert not WishlistItem.objects.filter(user=user).exists()
+    
+    def test_add_beyond_stock(self, authenticated_client, cart, products):
+        """Test a line can't grow past the product's stock."""
+        # products[0] has 51 in stock and 1 in the cart
+        response = authenticated_client.post(reverse('cart-add'), {'product_id': products[0].id, 'quantity': 51})
+        
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data['error'] == 'Cannot add 51 more. Only 50 units available'
+    
+    def test_sharded_stock(self, authenticated_client, user, product):
+        """Test a sharded product's stock is checked across its shards."""
+        set_stock_shard_count(product.id, 4)
+        url = reverse('cart-add')
+        
+        assert authenticated_client.post(url, {'product_id': product.id, 'quantity': 100}).status_code == 201
+        response = authenticated_client.post(url, {'product_id': product.id, 'quantity': 1})
+        
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        batch = authenticated_client.post(reverse('cart-batch'), {'operations': [
+            {'action': 'update', 'product_id': product.id, 'quantity': 90},
+        ]}, format='json')
+        assert batch.status_code == status.HTTP_200_OK
+        assert CartItem.objects.get(cart__user=user).quantity == 90
+    
+    def test_update_and_remove(self, authenticated_client, cart):
+        """Test a line's quantity is set, checked against stock, and the line removed."""
+        item = cart.items.order_by('id').first()
+        url = reverse('cart-item-update', args=[item.id])
+        
+        assert authenticated_client.patch(url, {'quantity': 7}).data['cart_item']['quantity'] == 7
+        assert authenticated_client.patch(url, {'quantity': 99}).status_code == status.HTTP_400_BAD_REQUEST
+        assert CartItem.objects.get(id=item.id).quantity == 7
+        
+        assert authenticated_client.delete(reverse('cart-item-remove', args=[item.id])).status_code == 200
+        assert not CartItem.objects.filter(id=item.id).exists()
+
+
+@pytest.mark.django_db
+class TestCartBatch:
+    """Test cases for applying batches of cart operations."""
+    
+    def _batch(self, client, operations):
+        return client.post(reverse('cart-batch'), {'operations': operations}, format='json')
+    
+    def _quantities(self, user):
+        return dict(CartItem.objects.filter(cart__user=user).values_list('product_id', 'quantity'))
+    
+    def test_applies_operations_in_order(self, authenticated_client, user, cart, products):
+        """Test adds, updates and removes combine into the final lines, returned as the cart."""
+        response = self._batch(authenticated_client, [
+            {'action': 'add', 'product_id': products[3].id, 'quantity': 2},
+            {'action': 'add', 'product_id': products[3].id},
+            {'action': 'update', 'product_id': products[0].id, 'quantity': 5},
+            {'action': 'remove', 'product_id': products[1].id},
+            {'action': 'add', 'product_id': products[2].id},
+            {'action': 'remove', 'product_id': products[4].id},
+        ])
+        
+        assert response.status_code == status.HTTP_200_OK
+        expected = {products[0].id: 5, products[2].id: 4, products[3].id: 3}
+        assert self._quantities(user) == expected
+        assert {item['product']['id']: item['quantity'] for item in response.data['cart']['items']} == expected
+        assert response.data['cart']['total_items'] == 12
+    
+    def test_all_or_none(self, authenticated_client, user, cart, products):
+        """Test one failing operation leaves the whole cart untouched, with errors by index."""
+        before = self._quantities(user)
+        
+        response = self._batch(authenticated_client, [
+            {'action': 'add', 'product_id': products[3].id},
+            {'action': 'add', 'product_id': products[0].id, 'quantity': 60},
+            {'action': 'update', 'product_id': products[4].id, 'quantity': 1},
+            {'action': 'remove', 'product_id': 999},
+        ])
+        
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data['errors']['operations'] == {
+            1: 'Only 51 units available.',
+            2: 'Product is not in the cart.',
+            3: 'Product does not exist.',
+        }
+        assert self._quantities(user) == before
+    
+    def test_invalid_operations(self, authenticated_client):
+        """Test malformed operations are rejected before touching the cart."""
+        response = self._batch(authenticated_client, [{'action': 'update', 'product_id': 1}])
+        
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'quantity' in response.data['errors']['operations'][0]
+        assert self._batch(authenticated_client, []).status_code == status.HTTP_400_BAD_REQUEST
+    
+    def test_queries_independent_of_batch_size(self, authenticated_client, cart, products,
+                                               django_assert_num_queries):
+        """Test a batch costs the same queries however many operations and products it holds."""
+        operations = [{'action': 'add', 'product_id': product.id} for product in products] * 4
+        operations += [{'action': 'remove', 'product_id': products[0].id}]
+        
+        # Products, cart, lines, insert, update, delete and touch inside a
+        # savepoint, then the resulting cart and its items
+        with django_assert_num_queries(11):
+            response = self._batch(authenticated_client, operations)
+        
+        # Four more of each product on top of 1, 2 and 3, less the removed first line
+        assert response.data['cart']['total_items'] == (2 + 4) + (3 + 4) + 4 + 4
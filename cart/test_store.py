@@ -0,0 +1,189 @@
+"""
+Tests for the Redis cart store.
+"""
+
+import pytest
+from django.urls import reverse
+from rest_framework import status
+from cart.models import Cart, CartItem
+from cart.store import (
+    CART_DIRTY_KEY, cart_key, cart_lock_key, flush_cart_quantities, lock_cart, unlock_cart
+)
+from products.stock import set_stock_shard_count
+from wishlist.models import WishlistItem
+
+
+@pytest.fixture
+def cart_store(settings, monkeypatch):
+    """Enable the Redis cart store against an in-memory Redis."""
+    fakeredis = pytest.importorskip('fakeredis')
+    redis = fakeredis.FakeRedis()
+    settings.CART_REDIS_STORE = True
+    monkeypatch.setattr('cart.store.get_redis', lambda: redis)
+    return redis
+
+
+def _add(client, product, quantity=1):
+    return client.post(reverse('cart-add'), {'product_id': product.id, 'quantity': quantity})
+
+
+def _stored_quantities(user):
+    return dict(CartItem.objects.filter(cart__user=user).values_list('product_id', 'quantity'))
+
+
+@pytest.mark.django_db
+class TestRedisCartStore:
+    """Test cases for cart quantities kept in Redis."""
+    
+    def test_quantity_changes_are_written_behind(self, authenticated_client, user, product, cart_store,
+                                                 django_assert_num_queries):
+        """Test repeated adds only read the product until the flush writes them."""
+        _add(authenticated_client, product, 2)
+        
+        # The product's existence check and lookup; no cart or item queries
+        with django_assert_num_queries(2):
+            response = _add(authenticated_client, product, 3)
+        
+        assert response.data['cart_item']['quantity'] == 5
+        assert _stored_quantities(user) == {product.id: 2}
+        assert cart_store.smembers(CART_DIRTY_KEY) == {str(user.id).encode()}
+        
+        assert flush_cart_quantities() == 1
+        assert _stored_quantities(user) == {product.id: 5}
+        assert not cart_store.smembers(CART_DIRTY_KEY)
+        assert cart_store.ttl(cart_key(user.id)) > 0
+    
+    def test_reads_merge_live_quantities(self, authenticated_client, product, products, cart_store):
+        """Test the cart and its summary show quantities not flushed yet."""
+        _add(authenticated_client, product, 1)
+        _add(authenticated_client, products[0], 1)
+        _add(authenticated_client, products[0], 2)
+        
+        cart = authenticated_client.get(reverse('cart-detail')).data['cart']
+        summary = authenticated_client.get(reverse('cart-summary')).data['summary']
+        
+        assert {item['product']['id']: item['quantity'] for item in cart['items']} == {
+            product.id: 1, products[0].id: 3
+        }
+        assert cart['total_items'] == summary['total_items'] == 4
+        assert summary['subtotal'] == float(product.price) + 30.0
+    
+    def test_stock_checked_atomically(self, authenticated_client, user, products, cart_store):
+        """Test the script refuses a change past the stock and leaves the line as it was."""
+        # products[0] has 51 in stock
+        _add(authenticated_client, products[0], 50)
+        
+        response = _add(authenticated_client, products[0], 2)
+        
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data['error'] == 'Cannot add 2 more. Only 1 units available'
+        assert authenticated_client.get(reverse('cart-summary')).data['summary']['total_items'] == 50
+    
+    def test_sharded_stock(self, authenticated_client, user, product, cart_store):
+        """Test the script checks a sharded product's stock across its shards."""
+        set_stock_shard_count(product.id, 4)
+        _add(authenticated_client, product, 60)
+        
+        assert _add(authenticated_client, product, 40).data['cart_item']['quantity'] == 100
+        assert _add(authenticated_client, product, 1).status_code == status.HTTP_400_BAD_REQUEST
+    
+    def test_update_remove_and_clear(self, authenticated_client, user, product, products, cart_store):
+        """Test setting, removing and clearing lines keeps Redis and the database in step."""
+        _add(authenticated_client, product, 1)
+        _add(authenticated_client, products[0], 1)
+        item = CartItem.objects.get(product=product)
+        
+        response = authenticated_client.patch(reverse('cart-item-update', args=[item.id]), {'quantity': 4})
+        assert response.data['cart_item']['quantity'] == 4
+        
+        authenticated_client.delete(reverse('cart-item-remove', args=[item.id]))
+        assert not cart_store.hexists(cart_key(user.id), f'item:{item.id}')
+        flush_cart_quantities()
+        assert _stored_quantities(user) == {products[0].id: 1}
+        
+        authenticated_client.post(reverse('cart-clear'))
+        assert not cart_store.exists(cart_key(user.id))
+        assert _stored_quantities(user) == {}
+    
+    def test_loads_existing_cart(self, authenticated_client, user, product, cart_store):
+        """Test a cart saved before the store held it is loaded on its first change."""
+        cart = Cart.objects.create(user=user)
+        CartItem.objects.create(cart=cart, product=product, quantity=2)
+        
+        assert _add(authenticated_client, product, 1).data['cart_item']['quantity'] == 3
+    
+    def test_flush_batches_queries(self, api_client, products, cart_store, django_assert_num_queries):
+        """Test a flush costs the same queries however many carts changed."""
+        from django.contrib.auth.models import User
+        
+        for i in range(5):
+            api_client.force_authenticate(User.objects.create_user(username=f'shopper{i}'))
+            for product in products:
+                _add(api_client, product)
+                _add(api_client, product)
+        
+        # Savepoint, one UPDATE for the items, one for the carts, release
+        with django_assert_num_queries(4):
+            assert flush_cart_quantities() == 5
+        
+        assert set(CartItem.objects.values_list('quantity', flat=True)) == {2}
+    
+    def test_move_from_wishlist(self, authenticated_client, user, product, cart_store):
+        """Test moving a wishlist item to the cart goes through the store."""
+        _add(authenticated_client, product, 1)
+        WishlistItem.objects.create(user=user, product=product)
+        
+        response = authenticated_client.post(reverse('wishlist-move-to-cart', args=[product.id]))
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert authenticated_client.get(reverse('cart-summary')).data['summary']['total_items'] == 2
+    
+    def test_batch_starts_from_live_quantities(self, authenticated_client, user, product, products, cart_store,
+                                               django_capture_on_commit_callbacks):
+        """Test a batch applies to quantities not flushed yet and writes its result to Redis."""
+        _add(authenticated_client, product, 1)
+        _add(authenticated_client, product, 2)
+        
+        with django_capture_on_commit_callbacks(execute=True):
+            response = authenticated_client.post(reverse('cart-batch'), {'operations': [
+                {'action': 'add', 'product_id': product.id},
+                {'action': 'add', 'product_id': products[0].id},
+            ]}, format='json')
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert _stored_quantities(user) == {product.id: 4, products[0].id: 1}
+        assert not cart_store.exists(cart_lock_key(user.id))
+        assert _add(authenticated_client, product, 1).data['cart_item']['quantity'] == 5
+        assert _add(authenticated_client, products[0], 1).data['cart_item']['quantity'] == 2
+    
+    def test_batch_result_outlives_stale_flush(self, authenticated_client, user, product, cart_store,
+                                               django_capture_on_commit_callbacks):
+        """Test a flush that read the cart before a batch cannot undo the batch for good."""
+        _add(authenticated_client, product, 1)
+        _add(authenticated_client, product, 2)
+        
+        with django_capture_on_commit_callbacks(execute=True):
+            authenticated_client.post(reverse('cart-batch'), {'operations': [
+                {'action': 'update', 'product_id': product.id, 'quantity': 5},
+            ]}, format='json')
+        # What a flush that read the hash before the batch goes on to write
+        CartItem.objects.filter(cart__user=user).update(quantity=3)
+        
+        assert flush_cart_quantities() == 1
+        assert _stored_quantities(user) == {product.id: 5}
+    
+    def test_changes_wait_for_batch_lock(self, authenticated_client, user, product, cart_store, monkeypatch):
+        """Test a quantity change waits while a batch holds the cart's lock."""
+        _add(authenticated_client, product, 1)
+        token = lock_cart(cart_store, user.id)
+        waits = []
+        
+        def batch_finishes(seconds):
+            waits.append(seconds)
+            unlock_cart(cart_store, user.id, token)
+        
+        monkeypatch.setattr('cart.store.time.sleep', batch_finishes)
+        response = _add(authenticated_client, product, 1)
+        
+        assert waits
+        assert response.data['cart_item']['quantity'] == 2
@@ -12,4 +12,5 @@ urlpatterns = [
     path('item/<int:item_id>/remove/', views.remove_cart_item, name='cart-item-remove'),
     path('clear/', views.clear_cart, name='cart-clear'),
     path('summary/', views.cart_summary, name='cart-summary'),
+    path('batch/', views.batch_update_cart, name='cart-batch'),
 ]
@@ -8,13 +8,25 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from drf_spectacular.utils import extend_schema
 from .models import Cart, CartItem
+from .store import (
+    CartBatchError,
+    InsufficientStock,
+    add_item,
+    apply_cart_operations,
+    cart_totals,
+    clear_cart as clear_cart_items,
+    merge_cart_quantities,
+    remove_item,
+    set_item_quantity
+)
 from .serializers import (
     CartSerializer,
     CartItemSerializer,
     AddToCartSerializer,
-    UpdateCartItemSerializer
+    UpdateCartItemSerializer,
+    BatchCartSerializer
 )
-from products.models import Product
+from products.models import Product, with_product_live_stock
 
 
 @extend_schema(
@@ -26,7 +38,8 @@ from products.models import Product
 @permission_classes([IsAuthenticated])
 def get_cart(request):
     """Get user's shopping cart."""
-    cart, created = Cart.objects.get_or_create(user=request.user)
+    cart, created = Cart.objects.with_items().get_or_create(user=request.user)
+    merge_cart_quantities(request.user, cart.items.all())
     serializer = CartSerializer(cart)
     
     return Response({
@@ -57,7 +70,7 @@ def add_to_cart(request):
     quantity = serializer.validated_data['quantity']
     
     try:
-        product = Product.objects.get(id=product_id)
+        product = Product.objects.with_live_stock().get(id=product_id)
     except Product.DoesNotExist:
         return Response({
             'success': False,
@@ -65,35 +78,20 @@ def add_to_cart(request):
         }, status=status.HTTP_404_NOT_FOUND)
     
     # Check stock availability
-    if product.stock_quantity < quantity:
+    if product.available_stock < quantity:
         return Response({
             'success': False,
-            'error': f'Only {product.stock_quantity} units available'
+            'error': f'Only {product.available_stock} units available'
         }, status=status.HTTP_400_BAD_REQUEST)
     
-    # Get or create cart
-    cart, created = Cart.objects.get_or_create(user=request.user)
-    
-    # Get or create cart item
-    cart_item, created = CartItem.objects.get_or_create(
-        cart=cart,
-        product=product,
-        defaults={'quantity': quantity}
-    )
-    
-    if not created:
-        # If item already in cart, update quantity
-        new_quantity = cart_item.quantity + quantity
-        
-        # Check if new quantity exceeds stock
-        if product.stock_quantity < new_quantity:
-            return Response({
-                'success': False,
-                'error': f'Cannot add {quantity} more. Only {product.stock_quantity - cart_item.quantity} units available'
-            }, status=status.HTTP_400_BAD_REQUEST)
-        
-        cart_item.quantity = new_quantity
-        cart_item.save()
+    # Add to the cart, or to the quantity already in it
+    try:
+        cart_item, created = add_item(request.user, product, quantity)
+    except InsufficientStock as e:
+        return Response({
+            'success': False,
+            'error': f'Cannot add {quantity} more. Only {e.stock - e.in_cart} units available'
+        }, status=status.HTTP_400_BAD_REQUEST)
     
     cart_item_serializer = CartItemSerializer(cart_item)
     
@@ -115,9 +113,8 @@ def add_to_cart(request):
 def update_cart_item(request, item_id):
     """Update cart item quantity."""
     try:
-        cart = Cart.objects.get(user=request.user)
-        cart_item = CartItem.objects.get(id=item_id, cart=cart)
-    except (Cart.DoesNotExist, CartItem.DoesNotExist):
+        cart_item = with_product_live_stock(CartItem.objects.all()).get(id=item_id, cart__user=request.user)
+    except CartItem.DoesNotExist:
         return Response({
             'success': False,
             'error': 'Cart item not found'
@@ -133,16 +130,14 @@ def update_cart_item(request, item_id):
     
     quantity = serializer.validated_data['quantity']
     
-    # Check stock availability
-    if cart_item.product.stock_quantity < quantity:
+    try:
+        cart_item = set_item_quantity(request.user, cart_item, quantity)
+    except InsufficientStock as e:
         return Response({
             'success': False,
-            'error': f'Only {cart_item.product.stock_quantity} units available'
+            'error': f'Only {e.stock} units available'
         }, status=status.HTTP_400_BAD_REQUEST)
     
-    cart_item.quantity = quantity
-    cart_item.save()
-    
     cart_item_serializer = CartItemSerializer(cart_item)
     
     return Response({
@@ -162,15 +157,14 @@ def update_cart_item(request, item_id):
 def remove_cart_item(request, item_id):
     """Remove item from cart."""
     try:
-        cart = Cart.objects.get(user=request.user)
-        cart_item = CartItem.objects.get(id=item_id, cart=cart)
-    except (Cart.DoesNotExist, CartItem.DoesNotExist):
+        cart_item = CartItem.objects.get(id=item_id, cart__user=request.user)
+    except CartItem.DoesNotExist:
         return Response({
             'success': False,
             'error': 'Cart item not found'
         }, status=status.HTTP_404_NOT_FOUND)
     
-    cart_item.delete()
+    remove_item(request.user, cart_item)
     
     return Response({
         'success': True,
@@ -190,7 +184,7 @@ def clear_cart(request):
     try:
         cart = Cart.objects.get(user=request.user)
         deleted_count = cart.items.count()
-        cart.clear()
+        clear_cart_items(request.user, cart)
         
         return Response({
             'success': True,
@@ -214,25 +208,53 @@ def clear_cart(request):
 @permission_classes([IsAuthenticated])
 def cart_summary(request):
     """Get cart summary."""
-    try:
-        cart = Cart.objects.get(user=request.user)
-        
+    totals = cart_totals(request.user)
+    
+    return Response({
+        'success': True,
+        'summary': {
+            'total_items': totals['total_items'],
+            'subtotal': float(totals['subtotal']),
+            'total': float(totals['subtotal']),
+            'items_count': totals['items_count']
+        }
+    }, status=status.HTTP_200_OK)
+
+
+@extend_schema(
+    summary="Batch update cart",
+    description=(
+        "Apply a list of add, update and remove operations to the cart, in order, "
+        "and return the resulting cart. Either every operation is applied or none is."
+    ),
+    tags=["Shopping Cart"],
+    request=BatchCartSerializer
+)
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def batch_update_cart(request):
+    """Apply a batch of cart operations."""
+    serializer = BatchCartSerializer(data=request.data)
+    
+    if not serializer.is_valid():
         return Response({
-            'success': True,
-            'summary': {
-                'total_items': cart.total_items,
-                'subtotal': float(cart.subtotal),
-                'total': float(cart.total),
-                'items_count': cart.items.count()
-            }
-        }, status=status.HTTP_200_OK)
-    except Cart.DoesNotExist:
+            'success': False,
+            'errors': serializer.errors
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        apply_cart_operations(request.user, serializer.validated_data['operations'])
+    except CartBatchError as e:
         return Response({
-            'success': True,
-            'summary': {
-                'total_items': 0,
-                'subtotal': 0.0,
-                'total': 0.0,
-                'items_count': 0
-            }
-        }, status=status.HTTP_200_OK)
+            'success': False,
+            'errors': {'operations': e.errors}
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    cart = Cart.objects.with_items().get(user=request.user)
+    merge_cart_quantities(request.user, cart.items.all())
+    
+    return Response({
+        'success': True,
+        'message': f"Applied {len(serializer.validated_data['operations'])} cart operations",
+        'cart': CartSerializer(cart).data
+    }, status=status.HTTP_200_OK)
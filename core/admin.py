@@ -1,3 +1,14 @@
 from django.contrib import admin
+from core.models import ChangeEvent, ChangeFeedOffset
 
-# Register your models here.
+
+@admin.register(ChangeEvent)
+class ChangeEventAdmin(admin.ModelAdmin):
+    list_display = ['id', 'event_type', 'aggregate', 'aggregate_id', 'created_at']
+    list_filter = ['aggregate', 'event_type', 'created_at']
+    search_fields = ['aggregate_id']
+
+
+@admin.register(ChangeFeedOffset)
+class ChangeFeedOffsetAdmin(admin.ModelAdmin):
+    list_display = ['consumer', 'last_event_id', 'updated_at']
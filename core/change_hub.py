@@ -0,0 +1,150 @@
+"""
+In-process notification hub for the change feed.
+
+A hub tails the outbox for one aggregate type on a single background thread
+and fans each event out to the subscribers watching that aggregate ID, so
+any number of watchers in a process share one polling query instead of each
+polling the database.
+
+Events are delivered as soon as they are visible. The hub's cursor only
+advances past events older than CHANGE_FEED_SETTLE_SECONDS, so an event
+from a transaction that commits late is still picked up on a later poll;
+already-delivered IDs above the cursor are remembered to avoid duplicates.
+"""
+
+import logging
+import queue
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+from core.models import ChangeEvent
+from core.outbox import CHANGE_FEED_BATCH_SIZE, read_changes
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """Queue of change events for one watched aggregate"""
+
+    def __init__(self, hub, aggregate_id):
+        self._hub = hub
+        self._queue = queue.Queue()
+        self.aggregate_id = aggregate_id
+
+    def put(self, event):
+        self._queue.put(event)
+
+    def get(self, timeout=None):
+        """Return the next event, or None if none arrives within ``timeout`` seconds."""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self._hub.unsubscribe(self)
+
+
+class ChangeHub:
+    """Fan change events for one aggregate type out to in-process subscribers"""
+
+    def __init__(self, aggregate, poll_interval=None, batch_size=CHANGE_FEED_BATCH_SIZE):
+        self.aggregate = aggregate
+        self.batch_size = batch_size
+        self._poll_interval = poll_interval
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+        self._cursor = None
+        self._delivered = set()
+        self._thread = None
+
+    @property
+    def poll_interval(self):
+        """Seconds between polls; 0 disables the background thread (call ``poll`` directly)."""
+        if self._poll_interval is None:
+            return settings.CHANGE_HUB_POLL_INTERVAL
+        return self._poll_interval
+
+    def subscribe(self, aggregate_id):
+        """Start receiving events for ``aggregate_id``; close the subscription when done."""
+        subscription = Subscription(self, aggregate_id)
+        with self._lock:
+            if self._cursor is None:
+                self._cursor = self._latest_event_id()
+            self._subscribers[aggregate_id].add(subscription)
+            if self.poll_interval > 0 and self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name=f'change-hub-{self.aggregate}', daemon=True
+                )
+                self._thread.start()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.aggregate_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.aggregate_id]
+            if not self._subscribers:
+                self._cursor = None
+                self._delivered.clear()
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def poll(self):
+        """Read new events once and hand them to their subscribers; returns deliveries made."""
+        with self._lock:
+            cursor = self._cursor
+        if cursor is None:
+            return 0
+
+        events = read_changes(cursor, self.batch_size, [self.aggregate], settle_seconds=0, gap_timeout=0)
+        settled_before = timezone.now() - timedelta(seconds=settings.CHANGE_FEED_SETTLE_SECONDS)
+        delivered = 0
+        with self._lock:
+            if self._cursor != cursor:
+                return 0
+            advance = True
+            for event in events:
+                if event.id not in self._delivered:
+                    for subscription in self._subscribers.get(event.aggregate_id, ()):
+                        subscription.put(event)
+                        delivered += 1
+                    self._delivered.add(event.id)
+                if advance and event.created_at <= settled_before:
+                    self._cursor = event.id
+                    self._delivered.discard(event.id)
+                else:
+                    advance = False
+        return delivered
+
+    def _latest_event_id(self):
+        settled_before = timezone.now() - timedelta(seconds=settings.CHANGE_FEED_SETTLE_SECONDS)
+        latest = ChangeEvent.objects.filter(
+            aggregate=self.aggregate, created_at__lte=settled_before
+        ).order_by('-id').values_list('id', flat=True).first()
+        return latest or 0
+
+    def _run(self):
+        try:
+            while True:
+                with self._lock:
+                    if not self._subscribers:
+                        self._thread = None
+                        return
+                try:
+                    self.poll()
+                except Exception as e:
+                    logger.error(f"Change hub for {self.aggregate} failed to poll: {str(e)}")
+                    connection.close()
+                time.sleep(self.poll_interval)
+        finally:
+            connection.close()
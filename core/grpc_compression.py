@@ -0,0 +1,57 @@
+"""
+Per-call gRPC compression selection.
+
+Compression is only worth its CPU cost for large messages, so servers and
+clients pick an algorithm per call based on the serialized message size
+rather than compressing every message on the channel.
+"""
+
+import grpc
+from django.conf import settings
+
+COMPRESSION_ALGORITHMS = {
+    'gzip': grpc.Compression.Gzip,
+    'deflate': grpc.Compression.Deflate,
+    'none': grpc.Compression.NoCompression,
+}
+
+
+def get_compression_algorithm(name=None):
+    """Return the grpc.Compression value for a configured algorithm name."""
+    name = (name or settings.GRPC_COMPRESSION_ALGORITHM).lower()
+    try:
+        return COMPRESSION_ALGORITHMS[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown gRPC compression algorithm '{name}'. "
+            f"Must be one of: {', '.join(COMPRESSION_ALGORITHMS)}"
+        )
+
+
+def select_compression(message, threshold=None, algorithm=None):
+    """
+    Choose the compression for a protobuf message.
+
+    Args:
+        message: Protobuf message about to be sent
+        threshold: Minimum serialized size in bytes, defaults to
+            GRPC_COMPRESSION_THRESHOLD
+        algorithm: Algorithm name, defaults to GRPC_COMPRESSION_ALGORITHM
+
+    Returns:
+        grpc.Compression.NoCompression for messages below the threshold,
+        otherwise the configured algorithm.
+    """
+    if threshold is None:
+        threshold = settings.GRPC_COMPRESSION_THRESHOLD
+    if threshold < 0 or message.ByteSize() < threshold:
+        return grpc.Compression.NoCompression
+    return get_compression_algorithm(algorithm)
+
+
+def compress_response(context, response):
+    """Enable compression for this call if the response is large enough."""
+    compression = select_compression(response)
+    if compression != grpc.Compression.NoCompression:
+        context.set_compression(compression)
+    return response
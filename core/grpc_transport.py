@@ -0,0 +1,171 @@
+"""
+Transport helpers shared by the gRPC servers and clients.
+
+Servers and clients accept ``unix:`` targets so colocated services can talk
+over a Unix domain socket instead of TCP. Clients can also use an in-process
+transport that calls the servicer methods directly with the request objects,
+skipping serialization and the network entirely.
+"""
+
+import inspect
+
+import grpc
+
+TRANSPORT_NETWORK = 'network'
+TRANSPORT_IN_PROCESS = 'inprocess'
+
+
+def resolve_target(address, host, port):
+    """Return the channel target for a client (``host:port`` or ``unix:`` path)."""
+    return address or f'{host}:{port}'
+
+
+def resolve_bind_address(address, port):
+    """Return the address a server should bind to (``[::]:port`` or ``unix:`` path)."""
+    return address or f'[::]:{port}'
+
+
+class InProcessRpcError(grpc.RpcError):
+    """RpcError raised by the in-process transport for non-OK status codes."""
+
+    def __init__(self, code, details):
+        super().__init__(details)
+        self._code = code
+        self._details = details
+
+    def code(self):
+        return self._code
+
+    def details(self):
+        return self._details
+
+
+class InProcessContext:
+    """Minimal stand-in for grpc.ServicerContext used by in-process calls."""
+
+    def __init__(self, metadata=None):
+        self._code = grpc.StatusCode.OK
+        self._details = None
+        self._metadata = tuple(metadata or ())
+        self._active = True
+        self._callbacks = []
+        self.compression = None
+
+    def set_code(self, code):
+        self._code = code
+
+    def set_details(self, details):
+        self._details = details
+
+    def code(self):
+        return self._code
+
+    def details(self):
+        return self._details
+
+    def abort(self, code, details):
+        self._code = code
+        self._details = details
+        raise InProcessRpcError(code, details)
+
+    def invocation_metadata(self):
+        return self._metadata
+
+    def send_initial_metadata(self, metadata):
+        pass
+
+    def set_trailing_metadata(self, metadata):
+        pass
+
+    def set_compression(self, compression):
+        self.compression = compression
+
+    def disable_next_message_compression(self):
+        pass
+
+    def peer(self):
+        return 'inprocess'
+
+    def time_remaining(self):
+        return None
+
+    def is_active(self):
+        return self._active
+
+    def add_callback(self, callback):
+        self._callbacks.append(callback)
+        return True
+
+    def cancel(self):
+        self.terminate()
+
+    def terminate(self):
+        """Mark the RPC finished and run the registered termination callbacks."""
+        if not self._active:
+            return
+        self._active = False
+        for callback in self._callbacks:
+            callback()
+
+    def raise_for_status(self):
+        """Raise the RpcError a network client would see for a non-OK status."""
+        if self._code != grpc.StatusCode.OK:
+            raise InProcessRpcError(self._code, self._details)
+
+
+class InProcessChannel:
+    """Channel stand-in so in-process clients can be closed like real ones."""
+
+    def close(self):
+        pass
+
+
+class InProcessStub:
+    """Stub that dispatches each RPC straight to a servicer instance."""
+
+    def __init__(self, servicer):
+        self._servicer = servicer
+
+    def __getattr__(self, name):
+        method = getattr(self._servicer, name)
+
+        def call(request, timeout=None, metadata=None, **kwargs):
+            context = InProcessContext(metadata)
+            try:
+                response = method(request, context)
+            except Exception:
+                context.terminate()
+                raise
+            if inspect.isgenerator(response):
+                return _stream(response, context)
+            context.terminate()
+            context.raise_for_status()
+            return response
+
+        return call
+
+
+def _stream(responses, context):
+    """Yield a server-streaming response, raising once the servicer sets an error."""
+    try:
+        yield from responses
+    finally:
+        context.terminate()
+    context.raise_for_status()
+
+
+def create_channel_and_stub(stub_class, servicer_factory, target, transport=TRANSPORT_NETWORK):
+    """
+    Build the (channel, stub) pair for a client.
+
+    Args:
+        stub_class: Generated ``*Stub`` class used for network transports
+        servicer_factory: Callable returning the servicer for in-process calls
+        target: Channel target, ``host:port`` or ``unix:/path/to.sock``
+        transport: ``network`` or ``inprocess``
+    """
+    if transport == TRANSPORT_IN_PROCESS:
+        return InProcessChannel(), InProcessStub(servicer_factory())
+
+    channel = grpc.insecure_channel(target)
+    return channel, stub_class(channel)
@@ -1,3 +1,43 @@
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 
-# Create your models here.
+
+class ChangeEvent(models.Model):
+    """Outbox row describing a change to a product or order
+    
+    Written in the same transaction as the change itself, so an event exists
+    if and only if the change committed. Consumers read the table in ``id``
+    order from their stored ``ChangeFeedOffset``.
+    """
+    
+    AGGREGATE_CHOICES = [
+        ('product', 'Product'),
+        ('order', 'Order'),
+    ]
+    
+    aggregate = models.CharField(max_length=20, choices=AGGREGATE_CHOICES)
+    aggregate_id = models.BigIntegerField()
+    event_type = models.CharField(max_length=50)
+    payload = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['aggregate', 'id']),
+            models.Index(fields=['created_at']),
+        ]
+    
+    def __str__(self):
+        return f"#{self.id} {self.event_type} {self.aggregate}:{self.aggregate_id}"
+
+
+class ChangeFeedOffset(models.Model):
+    """Last change event processed by a change feed consumer"""
+    
+    consumer = models.CharField(max_length=100, unique=True)
+    last_event_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.consumer} @ {self.last_event_id}"
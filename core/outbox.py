@@ -0,0 +1,166 @@
+"""
+Transactional outbox and change feed.
+
+Services call ``record_change``/``record_changes`` inside the transaction
+that changes a product or order. The relay (``core.tasks.relay_change_feed``)
+then hands new events, in batches, to each consumer configured in
+``CHANGE_FEED_CONSUMERS``, tracking a per-consumer offset so every job only
+processes what changed since its last run.
+
+Event IDs are allocated at insert time but become visible at commit, so an
+event with a lower ID can appear after a higher one has been read. A missing
+ID below a visible event is a gap: a transaction still in flight, or one
+that rolled back and will never fill it. Readers stop below the lowest gap
+until the event after it is ``CHANGE_FEED_GAP_TIMEOUT_SECONDS`` old, and
+also only see events older than ``CHANGE_FEED_SETTLE_SECONDS``.
+
+Offsets therefore never move past an event still waiting to commit, unless
+its transaction commits more than ``CHANGE_FEED_GAP_TIMEOUT_SECONDS`` after
+a later event was written. Only such very long transactions can be skipped.
+"""
+
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from core.models import ChangeEvent, ChangeFeedOffset
+
+logger = logging.getLogger(__name__)
+
+CHANGE_FEED_BATCH_SIZE = 500
+
+
+def record_change(aggregate, aggregate_id, event_type, payload=None):
+    """Append one change event to the outbox."""
+    return ChangeEvent.objects.create(
+        aggregate=aggregate,
+        aggregate_id=aggregate_id,
+        event_type=event_type,
+        payload=payload or {},
+    )
+
+
+def record_changes(events):
+    """
+    Append many change events to the outbox in one bulk insert.
+
+    Args:
+        events: Iterable of ``(aggregate, aggregate_id, event_type, payload)``
+    """
+    return ChangeEvent.objects.bulk_create([
+        ChangeEvent(aggregate=aggregate, aggregate_id=aggregate_id, event_type=event_type, payload=payload)
+        for aggregate, aggregate_id, event_type, payload in events
+    ])
+
+
+def first_unsettled_gap(after_id, gap_timeout):
+    """
+    ID of the first event above ``after_id`` that follows a missing ID.
+
+    Only events written in the last ``gap_timeout`` seconds are considered;
+    gaps before older events are assumed to be rollbacks that never fill.
+    Returns None if there is no such event.
+    """
+    missing_previous = ~Exists(ChangeEvent.objects.filter(id=OuterRef('id') - 1))
+    return ChangeEvent.objects.filter(
+        missing_previous,
+        id__gt=after_id + 1,
+        created_at__gt=timezone.now() - timedelta(seconds=gap_timeout),
+    ).order_by('id').values_list('id', flat=True).first()
+
+
+def read_changes(after_id=0, limit=CHANGE_FEED_BATCH_SIZE, aggregates=None, settle_seconds=None,
+                 gap_timeout=None):
+    """
+    Return up to ``limit`` settled change events with an ID above ``after_id``.
+
+    Args:
+        after_id: Last event ID already seen
+        limit: Maximum number of events to return
+        aggregates: Optional list of aggregate types to include
+        settle_seconds: Ignore events younger than this, defaults to
+            CHANGE_FEED_SETTLE_SECONDS
+        gap_timeout: Stop below missing IDs until the event after them is
+            this old, defaults to CHANGE_FEED_GAP_TIMEOUT_SECONDS; 0 reads
+            past gaps
+    """
+    if settle_seconds is None:
+        settle_seconds = settings.CHANGE_FEED_SETTLE_SECONDS
+    if gap_timeout is None:
+        gap_timeout = settings.CHANGE_FEED_GAP_TIMEOUT_SECONDS
+    queryset = ChangeEvent.objects.filter(id__gt=after_id)
+    if aggregates:
+        queryset = queryset.filter(aggregate__in=aggregates)
+    if settle_seconds:
+        queryset = queryset.filter(created_at__lte=timezone.now() - timedelta(seconds=settle_seconds))
+    if gap_timeout:
+        gap = first_unsettled_gap(after_id, gap_timeout)
+        if gap is not None:
+            queryset = queryset.filter(id__lt=gap)
+    return list(queryset.order_by('id')[:limit])
+
+
+def consume_changes(consumer, handler, batch_size=CHANGE_FEED_BATCH_SIZE, aggregates=None):
+    """
+    Pass the next batch of events to ``handler`` and advance the consumer's offset.
+
+    The offset row is locked for the duration, so concurrent relays never
+    hand the same batch to a consumer twice, and it only advances if the
+    handler returns normally (at-least-once delivery).
+
+    Returns:
+        Number of events handled
+    """
+    with transaction.atomic():
+        ChangeFeedOffset.objects.get_or_create(consumer=consumer)
+        offset = ChangeFeedOffset.objects.select_for_update().get(consumer=consumer)
+        events = read_changes(offset.last_event_id, batch_size, aggregates)
+        if not events:
+            return 0
+
+        handler(events)
+        offset.last_event_id = events[-1].id
+        offset.save(update_fields=['last_event_id', 'updated_at'])
+    return len(events)
+
+
+def relay_changes(consumers=None, batch_size=CHANGE_FEED_BATCH_SIZE, max_batches=100):
+    """
+    Deliver pending events to every configured consumer.
+
+    Each consumer is drained independently, so one failing handler does not
+    hold up the others; its offset stays put and the batch is retried on the
+    next run.
+
+    Args:
+        consumers: Mapping of consumer name to handler path (or a dict with
+            ``handler`` and optional ``aggregates``), defaults to
+            CHANGE_FEED_CONSUMERS
+        batch_size: Events per handler call
+        max_batches: Upper bound on batches per consumer per run
+
+    Returns:
+        Mapping of consumer name to the number of events delivered
+    """
+    if consumers is None:
+        consumers = settings.CHANGE_FEED_CONSUMERS
+
+    delivered = {}
+    for name, config in consumers.items():
+        if isinstance(config, str):
+            config = {'handler': config}
+        handler = import_string(config['handler'])
+        delivered[name] = 0
+        try:
+            for _ in range(max_batches):
+                count = consume_changes(name, handler, batch_size, config.get('aggregates'))
+                delivered[name] += count
+                if count < batch_size:
+                    break
+        except Exception as e:
+            logger.error(f"Change feed consumer {name} failed: {str(e)}")
+    return delivered
@@ -0,0 +1,24 @@
+"""
+Custom DRF renderers.
+"""
+
+import json
+
+from rest_framework.renderers import BaseRenderer
+
+
+class EventStreamRenderer(BaseRenderer):
+    """
+    Lets views answer ``Accept: text/event-stream`` (as sent by EventSource).
+
+    Views stream events themselves with a StreamingHttpResponse; this renderer
+    only handles ordinary Responses, such as errors, sent as one SSE ``error``
+    event.
+    """
+
+    media_type = 'text/event-stream'
+    format = 'sse'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return f"event: error\ndata: {json.dumps(data)}\n\n".encode(self.charset)
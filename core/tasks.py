@@ -21,6 +21,21 @@ def cleanup_expired_sessions():
         raise
 
 
+@shared_task
+def relay_change_feed():
+    """Deliver new outbox change events to each change feed consumer."""
+    from core.outbox import relay_changes
+    
+    try:
+        delivered = relay_changes()
+        total = sum(delivered.values())
+        logger.info(f"Relayed {total} change events: {delivered}")
+        return f"Relayed {total} change events"
+    except Exception as e:
+        logger.error(f"Error relaying change feed: {str(e)}")
+        raise
+
+
 @shared_task
 def send_email_notification(subject, message, recipient_list):
     """
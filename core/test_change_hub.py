@@ -0,0 +1,62 @@
+"""
+Tests for the in-process change hub.
+"""
+
+import pytest
+from datetime import timedelta
+from django.utils import timezone
+from core.change_hub import ChangeHub
+from core.models import ChangeEvent
+from core.outbox import record_change
+
+
+@pytest.mark.django_db
+class TestChangeHub:
+    """Test cases for fanning change events out to subscribers."""
+
+    def test_delivers_only_to_watchers_of_the_aggregate(self):
+        """Test each subscriber only receives its own aggregate's events."""
+        hub = ChangeHub('order', poll_interval=0)
+        first = hub.subscribe(1)
+        second = hub.subscribe(2)
+        record_change('order', 1, 'order.status_changed', {'status': 'processing'})
+        record_change('product', 1, 'product.updated')
+
+        assert hub.poll() == 1
+        assert first.get(timeout=0).payload == {'status': 'processing'}
+        assert second.get(timeout=0) is None
+
+    def test_starts_from_subscription_time(self):
+        """Test events written before the first subscriber are not replayed."""
+        record_change('order', 1, 'order.created')
+        hub = ChangeHub('order', poll_interval=0)
+        subscription = hub.subscribe(1)
+
+        assert hub.poll() == 0
+        assert subscription.get(timeout=0) is None
+
+    def test_unsettled_events_delivered_once(self, settings):
+        """Test fresh events are delivered at once but the cursor waits for them to settle."""
+        settings.CHANGE_FEED_SETTLE_SECONDS = 60
+        hub = ChangeHub('order', poll_interval=0)
+        subscription = hub.subscribe(1)
+        event = record_change('order', 1, 'order.status_changed', {'status': 'processing'})
+
+        assert hub.poll() == 1
+        assert hub.poll() == 0
+        assert hub._cursor < event.id
+
+        ChangeEvent.objects.filter(id=event.id).update(created_at=timezone.now() - timedelta(minutes=5))
+        hub.poll()
+
+        assert hub._cursor == event.id
+        assert subscription.get(timeout=0).id == event.id
+        assert subscription.get(timeout=0) is None
+
+    def test_unsubscribe_resets_cursor(self):
+        """Test the hub forgets its position once nobody is watching."""
+        hub = ChangeHub('order', poll_interval=0)
+        hub.subscribe(1).close()
+
+        assert hub.subscriber_count() == 0
+        assert hub._cursor is None
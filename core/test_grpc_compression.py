@@ -0,0 +1,74 @@
+"""
+Tests for per-call gRPC compression selection.
+"""
+
+import grpc
+import pytest
+import orders_pb2
+from core.grpc_compression import compress_response, select_compression
+from core.grpc_transport import InProcessContext
+
+
+def _orders_response(order_count):
+    return orders_pb2.ListOrdersResponse(
+        orders=[
+            orders_pb2.Order(id=i, shipping_address='123 Test Street, Springfield')
+            for i in range(order_count)
+        ],
+        total_count=order_count,
+    )
+
+
+class TestSelectCompression:
+    """Test cases for choosing a compression algorithm."""
+
+    def test_small_message_is_not_compressed(self, settings):
+        """Test messages below the threshold skip compression."""
+        settings.GRPC_COMPRESSION_THRESHOLD = 1024
+
+        assert select_compression(_orders_response(1)) == grpc.Compression.NoCompression
+
+    def test_large_message_uses_configured_algorithm(self, settings):
+        """Test messages above the threshold are compressed."""
+        settings.GRPC_COMPRESSION_THRESHOLD = 1024
+        settings.GRPC_COMPRESSION_ALGORITHM = 'deflate'
+
+        assert select_compression(_orders_response(100)) == grpc.Compression.Deflate
+
+    def test_negative_threshold_disables(self, settings):
+        """Test a negative threshold turns compression off."""
+        settings.GRPC_COMPRESSION_THRESHOLD = -1
+
+        assert select_compression(_orders_response(100)) == grpc.Compression.NoCompression
+
+    def test_unknown_algorithm(self, settings):
+        """Test an unknown algorithm name is rejected."""
+        settings.GRPC_COMPRESSION_THRESHOLD = 0
+        settings.GRPC_COMPRESSION_ALGORITHM = 'brotli'
+
+        with pytest.raises(ValueError):
+            select_compression(_orders_response(1))
+
+
+class TestCompressResponse:
+    """Test cases for enabling compression on a call."""
+
+    def test_sets_compression_on_large_response(self, settings):
+        """Test the call context is switched to the configured algorithm."""
+        settings.GRPC_COMPRESSION_THRESHOLD = 1024
+        settings.GRPC_COMPRESSION_ALGORITHM = 'gzip'
+        context = InProcessContext()
+
+        response = _orders_response(100)
+
+        assert compress_response(context, response) is response
+        assert context.compression == grpc.Compression.Gzip
+
+    def test_leaves_small_response_alone(self, settings):
+        """Test small responses leave the call uncompressed."""
+        settings.GRPC_COMPRESSION_THRESHOLD = 1024
+        context = InProcessContext()
+
+        compress_response(context, _orders_response(1))
+
+        assert context.compression is None
@@ -0,0 +1,108 @@
+"""
+Tests for the gRPC transport helpers.
+"""
+
+import grpc
+import pytest
+from products.grpc_client import ProductGRPCClient
+from products.grpc_server import create_server
+from core.grpc_transport import (
+    InProcessContext,
+    InProcessRpcError,
+    resolve_bind_address,
+    resolve_target,
+)
+
+
+class TestTargets:
+    """Test cases for target resolution."""
+
+    def test_tcp_target(self):
+        """Test host and port are used when no address is configured."""
+        assert resolve_target('', 'localhost', 50051) == 'localhost:50051'
+        assert resolve_bind_address(None, 50051) == '[::]:50051'
+
+    def test_unix_target(self):
+        """Test a unix: address overrides host and port."""
+        address = 'unix:/run/ecommerce/products.sock'
+        assert resolve_target(address, 'localhost', 50051) == address
+        assert resolve_bind_address(address, 50051) == address
+
+
+class TestInProcessContext:
+    """Test cases for the in-process servicer context."""
+
+    def test_ok_status_does_not_raise(self):
+        """Test a context left at OK does not raise."""
+        InProcessContext().raise_for_status()
+
+    def test_error_status_raises_rpc_error(self):
+        """Test a non-OK status surfaces as a grpc.RpcError."""
+        context = InProcessContext()
+        context.set_code(grpc.StatusCode.NOT_FOUND)
+        context.set_details('Product not found')
+
+        with pytest.raises(grpc.RpcError) as exc_info:
+            context.raise_for_status()
+
+        assert exc_info.value.code() == grpc.StatusCode.NOT_FOUND
+        assert exc_info.value.details() == 'Product not found'
+
+
+@pytest.mark.django_db
+class TestInProcessTransport:
+    """Test cases for clients using the in-process transport."""
+
+    def test_get_product(self, product):
+        """Test an RPC is served without a channel."""
+        client = ProductGRPCClient(transport='inprocess')
+        response = client.get_product(product.id)
+        client.close()
+
+        assert response.success is True
+        assert response.product.name == product.name
+
+    def test_request_object_is_passed_through(self, product):
+        """Test the servicer receives the request object itself."""
+        client = ProductGRPCClient(transport='inprocess')
+        seen = []
+        original = client.stub._servicer.GetProduct
+
+        def spy(request, context):
+            seen.append(request)
+            return original(request, context)
+
+        client.stub._servicer.GetProduct = spy
+        client.get_product(product.id)
+
+        assert seen[0].id == product.id
+
+    def test_not_found_raises(self):
+        """Test error statuses raise like a network client would."""
+        client = ProductGRPCClient(transport='inprocess')
+
+        with pytest.raises(InProcessRpcError) as exc_info:
+            client.get_product(99999)
+
+        assert exc_info.value.code() == grpc.StatusCode.NOT_FOUND
+
+
+@pytest.mark.django_db(transaction=True)
+class TestUnixSocketTransport:
+    """Test cases for serving over a Unix domain socket."""
+
+    def test_roundtrip(self, tmp_path, product):
+        """Test a client reaches the server through a unix: target."""
+        address = f'unix:{tmp_path / "products.sock"}'
+        server, bind_address = create_server(address=address, max_workers=2)
+        server.start()
+
+        try:
+            client = ProductGRPCClient(address=address, transport='network')
+            response = client.get_product(product.id)
+            client.close()
+        finally:
+            server.stop(None)
+
+        assert bind_address == address
+        assert response.product.id == product.id
@@ -0,0 +1,178 @@
+"""
+Tests for the transactional outbox and change feed relay.
+"""
+
+from datetime import timedelta
+
+import grpc
+import pytest
+from django.utils import timezone
+from orders.grpc_client import OrderGRPCClient
+from products.grpc_client import ProductGRPCClient
+from products.models import Product
+from core.models import ChangeEvent, ChangeFeedOffset
+from core.outbox import consume_changes, read_changes, record_change, relay_changes
+from wishlist.models import WishlistItem
+from wishlist.tasks import notify_back_in_stock
+
+
+@pytest.fixture
+def order_client():
+    """Return an in-process Order gRPC client."""
+    client = OrderGRPCClient(transport='inprocess')
+    yield client
+    client.close()
+
+
+def _create_order(client, product, quantity=1):
+    return client.create_order(
+        customer_name='Test Customer',
+        customer_email='customer@example.com',
+        items=[{'product_id': product.id, 'quantity': quantity}],
+        shipping_address='123 Test St',
+    )
+
+
+@pytest.mark.django_db
+class TestChangeEvents:
+    """Test cases for events written by the services."""
+
+    def test_product_changes(self, product):
+        """Test creating and updating a product emit events with their fields."""
+        client = ProductGRPCClient(transport='inprocess')
+        response = client.create_product('Outbox Product', 'Desc', 5.0, 0, 'books')
+        client.update_product(response.product.id, price=7.5, stock_quantity=3)
+        client.close()
+
+        events = list(ChangeEvent.objects.filter(aggregate_id=response.product.id))
+        assert [e.event_type for e in events] == ['product.created', 'product.updated']
+        assert events[1].payload['fields'] == ['price', 'stock_quantity']
+        assert events[1].payload['previous_stock'] == 0
+        assert events[1].payload['stock_quantity'] == 3
+
+    def test_order_lifecycle(self, order_client, product):
+        """Test order creation, status changes and cancellation emit events."""
+        order_id = _create_order(order_client, product, 2).order.id
+        order_client.update_order_status(order_id, 'processing')
+        order_client.cancel_order(order_id)
+
+        events = list(ChangeEvent.objects.filter(aggregate='order', aggregate_id=order_id))
+        assert [e.event_type for e in events] == ['order.created', 'order.status_changed', 'order.cancelled']
+        assert events[2].payload['previous_status'] == 'processing'
+        assert events[2].payload['items'] == [{'product_id': product.id, 'quantity': 2}]
+
+    def test_bulk_cancellation(self, order_client, product):
+        """Test bulk cancellation writes one event per order with its lines."""
+        ids = [_create_order(order_client, product).order.id for _ in range(3)]
+
+        order_client.bulk_update_order_status(ids, 'cancelled')
+
+        events = ChangeEvent.objects.filter(event_type='order.cancelled')
+        assert sorted(events.values_list('aggregate_id', flat=True)) == sorted(ids)
+        assert all(e.payload['items'] == [{'product_id': product.id, 'quantity': 1}] for e in events)
+
+    def test_failed_change_writes_nothing(self, order_client, product):
+        """Test an order that rolls back leaves no event behind."""
+        with pytest.raises(grpc.RpcError):
+            _create_order(order_client, product, product.stock_quantity + 1)
+
+        assert not ChangeEvent.objects.exists()
+
+
+@pytest.mark.django_db
+class TestChangeFeed:
+    """Test cases for reading and consuming the feed."""
+
+    def test_read_filters_by_aggregate(self, db):
+        """Test readers can restrict the feed to some aggregates."""
+        record_change('product', 1, 'product.updated')
+        second = record_change('order', 1, 'order.created')
+
+        assert [e.id for e in read_changes(aggregates=['order'])] == [second.id]
+
+    def test_settle_window_holds_back_new_events(self, db, settings):
+        """Test events younger than the settle window are not read yet."""
+        settings.CHANGE_FEED_SETTLE_SECONDS = 60
+        record_change('product', 1, 'product.updated')
+
+        assert read_changes() == []
+
+    def test_stops_below_unsettled_gap(self, db):
+        """Test events after an ID still to commit wait for it, until the gap times out."""
+        first = record_change('product', 1, 'product.updated')
+        # An event whose transaction has not committed yet
+        ChangeEvent.objects.create(id=first.id + 2, aggregate='product', aggregate_id=3, event_type='product.updated')
+        ChangeEvent.objects.create(id=first.id + 3, aggregate='product', aggregate_id=4, event_type='product.updated')
+
+        assert [e.id for e in read_changes()] == [first.id]
+        assert [e.id for e in read_changes(first.id)] == []
+
+        late = ChangeEvent.objects.create(
+            id=first.id + 1, aggregate='product', aggregate_id=2, event_type='product.updated'
+        )
+        assert [e.id for e in read_changes(first.id)] == [late.id, first.id + 2, first.id + 3]
+
+    def test_gap_times_out(self, db):
+        """Test a gap left by a rollback stops holding back events once old enough."""
+        first = record_change('product', 1, 'product.updated')
+        after = ChangeEvent.objects.create(
+            id=first.id + 2, aggregate='product', aggregate_id=2, event_type='product.updated'
+        )
+        assert read_changes(first.id) == []
+
+        ChangeEvent.objects.filter(id=after.id).update(created_at=timezone.now() - timedelta(minutes=10))
+        assert [e.id for e in read_changes(first.id)] == [after.id]
+
+    def test_offsets_advance_per_consumer(self, db):
+        """Test each consumer sees each event once, in batches."""
+        for i in range(5):
+            record_change('product', i, 'product.updated')
+        batches = []
+
+        assert consume_changes('a', batches.append, batch_size=3) == 3
+        assert consume_changes('a', batches.append, batch_size=3) == 2
+        assert consume_changes('a', batches.append, batch_size=3) == 0
+        assert consume_changes('b', batches.append, batch_size=10) == 5
+
+        assert [len(b) for b in batches] == [3, 2, 5]
+        assert ChangeFeedOffset.objects.get(consumer='a').last_event_id == batches[1][-1].id
+
+    def test_failed_handler_keeps_offset(self, db):
+        """Test a batch is redelivered after its handler fails."""
+        record_change('product', 1, 'product.updated')
+
+        assert relay_changes({'flaky': 'core.test_outbox.failing_handler'}) == {'flaky': 0}
+
+        assert ChangeFeedOffset.objects.filter(consumer='flaky', last_event_id__gt=0).count() == 0
+        assert consume_changes('flaky', lambda events: None) == 1
+
+
+def failing_handler(events):
+    """Change feed handler that always fails."""
+    raise RuntimeError('downstream unavailable')
+
+
+@pytest.mark.django_db
+class TestConsumers:
+    """Test cases for the configured change feed consumers."""
+
+    def test_back_in_stock_only_checks_changed_products(self, user, product, products):
+        """Test only wishlisted products that were restocked are notified."""
+        Product.objects.filter(id=product.id).update(stock_quantity=0)
+        WishlistItem.objects.create(user=user, product=product)
+        WishlistItem.objects.create(user=user, product=products[0])
+        client = ProductGRPCClient(transport='inprocess')
+        client.update_product(product.id, stock_quantity=5)
+        client.update_product(products[0].id, stock_quantity=80)
+        client.close()
+
+        assert notify_back_in_stock(read_changes()) == 1
+
+    def test_relay_delivers_to_configured_consumers(self, order_client, product):
+        """Test the relay task drains the feed for every consumer."""
+        _create_order(order_client, product)
+
+        delivered = relay_changes()
+
+        assert delivered == {'wishlist-back-in-stock': 1, 'cart-price-sync': 0}
+        assert relay_changes() == {'wishlist-back-in-stock': 0, 'cart-price-sync': 0}
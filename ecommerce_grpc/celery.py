@@ -5,6 +5,7 @@ Celery configuration for ecommerce_grpc project.
 import os
 from celery import Celery
 from celery.schedules import crontab
+from celery.signals import worker_init, worker_process_shutdown
 
 # Set default Django settings module
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ecommerce_grpc.settings')
@@ -23,10 +24,42 @@ app.conf.beat_schedule = {
         'task': 'core.tasks.cleanup_expired_sessions',
         'schedule': crontab(hour=2, minute=0),  # Run daily at 2 AM
     },
+    'relay-change-feed': {
+        'task': 'core.tasks.relay_change_feed',
+        'schedule': crontab(minute='*'),  # Run every minute
+    },
     'update-product-analytics': {
         'task': 'products.tasks.update_product_analytics',
         'schedule': crontab(hour='*/6'),  # Run every 6 hours
     },
+    'flush-stock-deltas': {
+        'task': 'products.tasks.flush_stock_deltas',
+        'schedule': crontab(minute='*'),  # Run every minute
+    },
+    'rebalance-stock-shards': {
+        'task': 'products.tasks.rebalance_stock_shards',
+        'schedule': crontab(minute='*'),  # Run every minute
+    },
+    'take-inventory-snapshots': {
+        'task': 'products.tasks.take_inventory_snapshots',
+        'schedule': crontab(hour=3, minute=0),  # Run daily at 3 AM
+    },
+    'send-review-reminders': {
+        'task': 'reviews.tasks.send_review_reminder_emails',
+        'schedule': crontab(hour=10, minute=0),  # Run daily at 10 AM
+    },
+    'moderate-reviews': {
+        'task': 'reviews.tasks.moderate_reviews',
+        'schedule': crontab(minute='*/5'),  # Run every 5 minutes
+    },
+    'flush-review-votes': {
+        'task': 'reviews.tasks.flush_review_votes',
+        'schedule': 5.0,  # Run every 5 seconds
+    },
+    'flush-cart-quantities': {
+        'task': 'cart.tasks.flush_cart_quantities',
+        'schedule': 5.0,  # Run every 5 seconds
+    },
     'process-pending-orders': {
         'task': 'orders.tasks.process_pending_orders',
         'schedule': crontab(minute='*/30'),  # Run every 30 minutes
@@ -37,6 +70,36 @@ app.conf.beat_schedule = {
     },
 }
 
+
+@worker_init.connect
+def start_metrics_server(**kwargs):
+    """
+    Serve the worker's Prometheus metrics (e.g. stock delta flushes) on CELERY_METRICS_PORT.
+
+    Tasks run in prefork child processes, so their metrics are only complete
+    in multiprocess mode: PROMETHEUS_MULTIPROC_DIR must point at an empty
+    directory before the worker starts.
+    """
+    from django.conf import settings
+    
+    if not settings.CELERY_METRICS_PORT:
+        return
+    from prometheus_client import CollectorRegistry, multiprocess, start_http_server
+    
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    start_http_server(settings.CELERY_METRICS_PORT, registry=registry)
+
+
+@worker_process_shutdown.connect
+def mark_metrics_process_dead(pid=None, **kwargs):
+    """Drop a finished child's live gauges from the multiprocess metrics."""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        
+        multiprocess.mark_process_dead(pid)
+
+
 @app.task(bind=True, ignore_result=True)
 def debug_task(self):
     """Debug task for testing Celery."""
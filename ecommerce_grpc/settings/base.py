@@ -202,6 +202,9 @@ CELERY_TIMEZONE = TIME_ZONE
 CELERY_TASK_TRACK_STARTED = True
 CELERY_TASK_TIME_LIMIT = 30 * 60  # 30 minutes
 CELERY_BEAT_SCHEDULER = 'django_celery_beat.schedulers:DatabaseScheduler'
+# Port the worker serves its own Prometheus metrics on (0 disables); needs
+# PROMETHEUS_MULTIPROC_DIR set to an empty directory for the worker
+CELERY_METRICS_PORT = int(os.getenv('CELERY_METRICS_PORT', '0'))
 
 # Logging Configuration
 LOGGING = {
@@ -275,6 +278,80 @@ GRPC_PRODUCT_SERVER_HOST = os.getenv('GRPC_PRODUCT_SERVER_HOST', 'localhost')
 GRPC_PRODUCT_SERVER_PORT = int(os.getenv('GRPC_PRODUCT_SERVER_PORT', '50051'))
 GRPC_ORDER_SERVER_HOST = os.getenv('GRPC_ORDER_SERVER_HOST', 'localhost')
 GRPC_ORDER_SERVER_PORT = int(os.getenv('GRPC_ORDER_SERVER_PORT', '50052'))
+# Full targets such as unix:/run/ecommerce/products.sock; override host/port when set
+GRPC_PRODUCT_SERVER_ADDRESS = os.getenv('GRPC_PRODUCT_SERVER_ADDRESS', '')
+GRPC_ORDER_SERVER_ADDRESS = os.getenv('GRPC_ORDER_SERVER_ADDRESS', '')
+# 'network' dials the servers, 'inprocess' calls the servicers directly in this process
+GRPC_TRANSPORT = os.getenv('GRPC_TRANSPORT', 'network')
+# Per-call compression for large messages: gzip, deflate or none.
+# Messages smaller than the threshold (bytes) are sent uncompressed; -1 disables.
+GRPC_COMPRESSION_ALGORITHM = os.getenv('GRPC_COMPRESSION_ALGORITHM', 'gzip')
+GRPC_COMPRESSION_THRESHOLD = int(os.getenv('GRPC_COMPRESSION_THRESHOLD', '8192'))
+
+# Inventory
+# Number of counter shards used when stock sharding is enabled for a hot product
+STOCK_SHARD_COUNT = int(os.getenv('STOCK_SHARD_COUNT', '8'))
+
+# Change feed (transactional outbox)
+# Events younger than this are held back so late-committing transactions are not skipped
+CHANGE_FEED_SETTLE_SECONDS = int(os.getenv('CHANGE_FEED_SETTLE_SECONDS', '2'))
+# Readers stop below a missing event ID until the event after it is this old,
+# so transactions open up to this long are not skipped either
+CHANGE_FEED_GAP_TIMEOUT_SECONDS = int(os.getenv('CHANGE_FEED_GAP_TIMEOUT_SECONDS', '300'))
+# Seconds between outbox polls by in-process hubs feeding streaming RPCs such as WatchOrder
+CHANGE_HUB_POLL_INTERVAL = float(os.getenv('CHANGE_HUB_POLL_INTERVAL', '0.5'))
+# Order status streams (WatchOrder and its SSE endpoint) each hold a worker thread.
+# Streams end after this many seconds so clients reconnect and threads are recycled
+ORDER_WATCH_MAX_SECONDS = int(os.getenv('ORDER_WATCH_MAX_SECONDS', '300'))
+# Concurrent WatchOrder streams per order gRPC server (10 threads); the rest serve unary RPCs
+ORDER_WATCH_MAX_STREAMS = int(os.getenv('ORDER_WATCH_MAX_STREAMS', '4'))
+# Concurrent SSE streams per Django process (gunicorn --threads 2); the rest serve requests
+ORDER_WATCH_SSE_MAX_STREAMS = int(os.getenv('ORDER_WATCH_SSE_MAX_STREAMS', '1'))
+# Consumers the relay delivers events to: name -> handler path and aggregate types
+CHANGE_FEED_CONSUMERS = {
+    'wishlist-back-in-stock': {
+        'handler': 'wishlist.tasks.notify_back_in_stock',
+        'aggregates': ['product', 'order'],
+    },
+    'cart-price-sync': {
+        'handler': 'cart.tasks.sync_changed_cart_prices',
+        'aggregates': ['product'],
+    },
+}
+
+# Reviews
+# Accumulate helpful-vote counter changes in Redis and flush them to the
+# reviews table in bulk (reviews.tasks.flush_review_votes) instead of
+# updating the review row on every vote
+REVIEW_VOTE_BUFFERING = os.getenv('REVIEW_VOTE_BUFFERING', 'False') == 'True'
+# Terms that flag a review wherever they appear as a whole word, case-insensitively
+REVIEW_MODERATION_TERMS = [
+    term for term in os.getenv('REVIEW_MODERATION_TERMS', 'spam,fake,scam').split(',') if term
+]
+# Regular expressions that flag a review: name -> pattern
+REVIEW_MODERATION_PATTERNS = {
+    'link': r'https?://|www\.',
+    'email': r'[\w.+-]+@[\w-]+\.[\w.-]+',
+    'phone': r'\+?\d[\d\s().-]{7,}\d',
+}
+# Shingle similarity at or above which a review is flagged as a near-duplicate
+REVIEW_DUPLICATE_THRESHOLD = float(os.getenv('REVIEW_DUPLICATE_THRESHOLD', '0.8'))
+# Opt-in pool of processes scanning review chunks for the moderate_reviews command;
+# 0 scans in the calling process. The Celery task always does, as prefork children can't fork a pool
+REVIEW_MODERATION_WORKERS = int(os.getenv('REVIEW_MODERATION_WORKERS', '0'))
+# Reviews younger than this are left for the next run, as with CHANGE_FEED_SETTLE_SECONDS
+REVIEW_MODERATION_SETTLE_SECONDS = int(os.getenv('REVIEW_MODERATION_SETTLE_SECONDS', '5'))
+# Days after delivery that customers are asked to review what they bought
+REVIEW_REMINDER_DELAY_DAYS = int(os.getenv('REVIEW_REMINDER_DELAY_DAYS', '7'))
+# nginx internal location serving MEDIA_ROOT; when set, review image variants
+# are sent with X-Accel-Redirect instead of being streamed by Django
+REVIEW_IMAGE_ACCEL_REDIRECT_PREFIX = os.getenv('REVIEW_IMAGE_ACCEL_REDIRECT_PREFIX', '')
+
+# Cart
+# Keep cart line quantities in Redis, changed atomically by Lua scripts, and
+# write them to the cart tables in bulk (cart.tasks.flush_cart_quantities)
+# instead of on every change
+CART_REDIS_STORE = os.getenv('CART_REDIS_STORE', 'False') == 'True'
 
 # Sentry (Error Tracking)
 SENTRY_DSN = os.getenv('SENTRY_DSN', '')
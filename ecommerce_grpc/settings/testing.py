@@ -30,6 +30,17 @@ PASSWORD_HASHERS = [
 CELERY_TASK_ALWAYS_EAGER = True
 CELERY_TASK_EAGER_PROPAGATES = True
 
+# Call the gRPC servicers in-process instead of requiring running servers
+GRPC_TRANSPORT = 'inprocess'
+
+# Deliver change events as soon as they are written
+CHANGE_FEED_SETTLE_SECONDS = 0
+# Tests drive change hubs with poll() instead of a background thread
+CHANGE_HUB_POLL_INTERVAL = 0
+# Moderate reviews as soon as they are written, without a process pool
+REVIEW_MODERATION_SETTLE_SECONDS = 0
+REVIEW_MODERATION_WORKERS = 0
+
 # Email backend for tests
 EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
 
@@ -1,5 +1,8 @@
-from django.contrib import admin
-from orders.models import Order, OrderItem
+from django import forms
+from django.contrib import admin, messages
+from django.db import transaction
+from orders.models import Order, OrderEvent, OrderItem
+from orders.status import change_statuses
 
 
 class OrderItemInline(admin.TabularInline):
@@ -8,13 +11,51 @@ class OrderItemInline(admin.TabularInline):
     readonly_fields = ['subtotal']
 
 
+class OrderAdminForm(forms.ModelForm):
+    """Only offers status changes Order.STATUS_TRANSITIONS allows"""
+    
+    class Meta:
+        model = Order
+        fields = '__all__'
+    
+    def clean_status(self):
+        status = self.cleaned_data['status']
+        previous = self.initial.get('status')
+        if self.instance.pk and status != previous and not Order(status=previous).can_transition_to(status):
+            raise forms.ValidationError(f"Cannot change order status from {previous} to {status}")
+        return status
+
+
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
+    form = OrderAdminForm
     list_display = ['id', 'customer_name', 'customer_email', 'status', 'total_amount', 'created_at']
     list_filter = ['status', 'created_at']
     search_fields = ['customer_name', 'customer_email']
     ordering = ['-created_at']
     inlines = [OrderItemInline]
+    
+    def save_model(self, request, obj, form, change):
+        """Apply an edited status through orders.status.change_statuses
+        
+        The change is then logged as an OrderEvent and published to the change
+        feed like one made through the gRPC service, and a cancellation
+        restores stock.
+        """
+        if not change or 'status' not in form.changed_data:
+            return super().save_model(request, obj, form, change)
+        status = obj.status
+        with transaction.atomic():
+            previous = Order.objects.select_for_update().values_list('status', flat=True).get(id=obj.id)
+            obj.status = previous
+            super().save_model(request, obj, form, change)
+            if Order(status=previous).can_transition_to(status):
+                change_statuses({obj.id: previous}, status)
+                obj.status = status
+            else:
+                self.message_user(
+                    request, f"Status left at {previous}: it changed while the form was open.", messages.WARNING
+                )
 
 
 @admin.register(OrderItem)
@@ -22,3 +63,11 @@ class OrderItemAdmin(admin.ModelAdmin):
     list_display = ['id', 'order', 'product_name', 'quantity', 'price', 'subtotal']
     list_filter = ['order__status']
     search_fields = ['product_name', 'order__customer_name']
+
+
+@admin.register(OrderEvent)
+class OrderEventAdmin(admin.ModelAdmin):
+    list_display = ['id', 'order', 'event_type', 'from_status', 'to_status', 'created_at']
+    list_filter = ['event_type', 'to_status']
+    search_fields = ['order__customer_email']
+    readonly_fields = ['order', 'event_type', 'from_status', 'to_status', 'created_at']
@@ -1,14 +1,38 @@
-import grpc
+from django.conf import settings
 import orders_pb2
 import orders_pb2_grpc
+from core.grpc_compression import select_compression
+from core.grpc_transport import create_channel_and_stub, resolve_target
+
+
+def _order_servicer():
+    from orders.grpc_server import OrderServiceServicer
+    return OrderServiceServicer()
 
 
 class OrderGRPCClient:
     """Client for interacting with Order gRPC service"""
     
-    def __init__(self, host='localhost', port=50052):
-        self.channel = grpc.insecure_channel(f'{host}:{port}')
-        self.stub = orders_pb2_grpc.OrderServiceStub(self.channel)
+    def __init__(self, host=None, port=None, address=None, transport=None):
+        """
+        Args:
+            host: Server host, defaults to GRPC_ORDER_SERVER_HOST
+            port: Server port, defaults to GRPC_ORDER_SERVER_PORT
+            address: Full target such as ``unix:/run/ecommerce/orders.sock``;
+                overrides host/port, defaults to GRPC_ORDER_SERVER_ADDRESS
+            transport: ``network`` or ``inprocess``, defaults to GRPC_TRANSPORT
+        """
+        target = resolve_target(
+            address or settings.GRPC_ORDER_SERVER_ADDRESS,
+            host or settings.GRPC_ORDER_SERVER_HOST,
+            port or settings.GRPC_ORDER_SERVER_PORT,
+        )
+        self.channel, self.stub = create_channel_and_stub(
+            orders_pb2_grpc.OrderServiceStub,
+            _order_servicer,
+            target,
+            transport or settings.GRPC_TRANSPORT,
+        )
     
     def create_order(self, customer_name, customer_email, items, shipping_address):
         """Create a new order
@@ -33,7 +57,7 @@ class OrderGRPCClient:
             items=order_items,
             shipping_address=shipping_address
         )
-        return self.stub.CreateOrder(request)
+        return self.stub.CreateOrder(request, compression=select_compression(request))
     
     def get_order(self, order_id):
         """Get an order by ID"""
@@ -57,18 +81,61 @@ class OrderGRPCClient:
         )
         return self.stub.UpdateOrderStatus(request)
     
+    def bulk_update_order_status(self, order_ids, status):
+        """Update the status of many orders at once
+        
+        Returns a response with one OrderStatusResult per order ID.
+        """
+        request = orders_pb2.BulkUpdateOrderStatusRequest(
+            ids=order_ids,
+            status=status
+        )
+        return self.stub.BulkUpdateOrderStatus(request, compression=select_compression(request))
+    
     def cancel_order(self, order_id):
         """Cancel an order"""
         request = orders_pb2.CancelOrderRequest(id=order_id)
         return self.stub.CancelOrder(request)
     
-    def get_orders_by_customer(self, customer_email):
-        """Get all orders for a customer"""
+    def get_orders_by_customer(self, customer_email, page_size=0, cursor='',
+                               created_after='', created_before='', include_total=False):
+        """Get one page of a customer's orders
+        
+        Args:
+            customer_email: Customer's email
+            page_size: Orders per page (server default when 0)
+            cursor: ``next_cursor`` from the previous page
+            created_after: ISO-8601 lower bound on created_at (inclusive)
+            created_before: ISO-8601 upper bound on created_at (exclusive)
+            include_total: Also count all matching orders
+        """
         request = orders_pb2.GetOrdersByCustomerRequest(
-            customer_email=customer_email
+            customer_email=customer_email,
+            page_size=page_size,
+            cursor=cursor,
+            created_after=created_after,
+            created_before=created_before,
+            include_total=include_total
         )
         return self.stub.GetOrdersByCustomer(request)
     
+    def stream_orders_by_customer(self, customer_email, chunk_size=0, cursor='',
+                                  created_after='', created_before=''):
+        """Stream all of a customer's orders, yielding Order messages"""
+        request = orders_pb2.GetOrdersByCustomerRequest(
+            customer_email=customer_email,
+            page_size=chunk_size,
+            cursor=cursor,
+            created_after=created_after,
+            created_before=created_before
+        )
+        return self.stub.StreamOrdersByCustomer(request)
+    
+    def watch_order(self, order_id, timeout=None):
+        """Stream an order's status, yielding OrderStatusUpdate messages as it changes"""
+        request = orders_pb2.WatchOrderRequest(id=order_id)
+        return self.stub.WatchOrder(request, timeout=timeout)
+    
     def close(self):
         """Close the gRPC channel"""
         self.channel.close()
@@ -1,7 +1,11 @@
+import base64
 import grpc
+from collections import defaultdict
 from concurrent import futures
 import sys
 import os
+import threading
+import time
 import django
 
 # Setup Django
@@ -9,29 +13,90 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ecommerce_grpc.settings')
 django.setup()
 
-from orders.models import Order, OrderItem
+from django.conf import settings
+from orders.models import Order, OrderEvent, OrderItem
 from products.models import Product
+from products.stock import apply_stock_deltas, take_sharded_stock
 from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from core.grpc_compression import compress_response
+from core.change_hub import ChangeHub
+from core.outbox import record_change, record_changes
+from core.grpc_transport import resolve_bind_address
+from orders.status import change_statuses, status_change_event
 import orders_pb2
 import orders_pb2_grpc
 
 
+CUSTOMER_ORDERS_DEFAULT_PAGE_SIZE = 50
+CUSTOMER_ORDERS_MAX_PAGE_SIZE = 500
+BULK_STATUS_BATCH_SIZE = 500
+ORDER_WATCH_HEARTBEAT_SECONDS = 15
+
+# Shared by every WatchOrder stream in this process
+order_hub = ChangeHub('order')
+# Each stream holds a server thread; past this many, WatchOrder is RESOURCE_EXHAUSTED
+watch_slots = threading.BoundedSemaphore(settings.ORDER_WATCH_MAX_STREAMS)
+
+
+def _clamp_page_size(page_size):
+    """Apply the default and upper bound to a requested page size"""
+    if page_size <= 0:
+        return CUSTOMER_ORDERS_DEFAULT_PAGE_SIZE
+    return min(page_size, CUSTOMER_ORDERS_MAX_PAGE_SIZE)
+
+
+def _parse_timestamp(value):
+    """Parse an ISO-8601 timestamp from a request"""
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ValueError(f"Invalid timestamp: {value}")
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def _encode_cursor(order):
+    """Encode the keyset position after ``order`` as an opaque cursor"""
+    raw = f"{order.created_at.isoformat()}|{order.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor):
+    """Decode a cursor into its (created_at, id) keyset position"""
+    try:
+        created_at, order_id = base64.urlsafe_b64decode(cursor.encode()).decode().rsplit('|', 1)
+        return _parse_timestamp(created_at), int(order_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
+
+
 class OrderServiceServicer(orders_pb2_grpc.OrderServiceServicer):
     """gRPC service implementation for Order operations"""
     
     def _order_item_to_proto(self, order_item):
         """Convert Django OrderItem model to protobuf OrderItem message"""
         return orders_pb2.OrderItem(
-            product_id=order_item.product.id,
+            product_id=order_item.product_id,
             product_name=order_item.product_name,
             quantity=order_item.quantity,
             price=float(order_item.price),
             subtotal=float(order_item.subtotal),
         )
     
-    def _order_to_proto(self, order):
-        """Convert Django Order model to protobuf Order message"""
-        items = [self._order_item_to_proto(item) for item in order.items.all()]
+    def _order_to_proto(self, order, items=None):
+        """Convert Django Order model to protobuf Order message
+        
+        Items come from ``items`` when the caller already holds them, otherwise
+        from ``order.items.all()``, which uses the prefetch cache when present
+        and costs a single query when not. Only the denormalized item columns
+        are read, so products are never fetched.
+        """
+        if items is None:
+            items = order.items.all()
+        items = [self._order_item_to_proto(item) for item in items]
         
         return orders_pb2.Order(
             id=order.id,
@@ -46,7 +111,13 @@ class OrderServiceServicer(orders_pb2_grpc.OrderServiceServicer):
         )
     
     def CreateOrder(self, request, context):
-        """Create a new order"""
+        """Create a new order
+        
+        Products are loaded in one query and their stock is reserved with a
+        single guarded UPDATE, so concurrent orders can never oversell.
+        Products with stock shards are reserved from a shard instead, leaving
+        the hot product row unlocked.
+        """
         try:
             with transaction.atomic():
                 # Create order
@@ -57,36 +128,65 @@ class OrderServiceServicer(orders_pb2_grpc.OrderServiceServicer):
                     status='pending'
                 )
                 
-                # Create order items
+                quantities = defaultdict(int)
                 for item in request.items:
-                    try:
-                        product = Product.objects.get(id=item.product_id)
-                        
-                        # Check stock availability
-                        if product.stock_quantity < item.quantity:
-                            raise Exception(f"Insufficient stock for {product.name}")
-                        
-                        # Create order item
-                        OrderItem.objects.create(
-                            order=order,
-                            product=product,
-                            product_name=product.name,
-                            quantity=item.quantity,
-                            price=product.price,
-                        )
-                        
-                        # Update product stock
-                        product.stock_quantity -= item.quantity
-                        product.save()
-                        
-                    except Product.DoesNotExist:
-                        raise Exception(f"Product with ID {item.product_id} not found")
+                    quantities[item.product_id] += item.quantity
+                products = Product.objects.with_live_stock().in_bulk(list(quantities))
+                
+                for product_id, quantity in quantities.items():
+                    if product_id not in products:
+                        raise Exception(f"Product with ID {product_id} not found")
+                    if products[product_id].available_stock < quantity:
+                        raise Exception(f"Insufficient stock for {products[product_id].name}")
+                
+                # Create order items
+                order_items = OrderItem.objects.bulk_create([
+                    OrderItem(
+                        order=order,
+                        product_id=item.product_id,
+                        product_name=products[item.product_id].name,
+                        quantity=item.quantity,
+                        price=products[item.product_id].price,
+                        subtotal=products[item.product_id].price * item.quantity,
+                    )
+                    for item in request.items
+                ])
+                
+                # Reserve stock; a short count means another order got there first
+                shard_counts = {
+                    product_id: products[product_id].stock_shard_count
+                    for product_id in quantities if products[product_id].stock_shard_count
+                }
+                unsharded = {
+                    product_id: -quantity for product_id, quantity in quantities.items()
+                    if product_id not in shard_counts
+                }
+                reserved = apply_stock_deltas(unsharded, guard=True, reason='order', reference=order.id)
+                if reserved != len(unsharded):
+                    raise Exception("Insufficient stock for one or more products")
+                if shard_counts and not take_sharded_stock(
+                    {product_id: quantities[product_id] for product_id in shard_counts},
+                    shard_counts,
+                    reference=order.id
+                ):
+                    raise Exception("Insufficient stock for one or more products")
                 
                 # Calculate total
-                order.calculate_total()
+                order.calculate_total(order_items)
+                
+                record_change('order', order.id, 'order.created', {
+                    'id': order.id,
+                    'customer_email': order.customer_email,
+                    'status': order.status,
+                    'total_amount': float(order.total_amount),
+                    'items': [
+                        {'product_id': product_id, 'quantity': quantity}
+                        for product_id, quantity in quantities.items()
+                    ],
+                })
                 
                 return orders_pb2.OrderResponse(
-                    order=self._order_to_proto(order),
+                    order=self._order_to_proto(order, order_items),
                     success=True,
                     message="Order created successfully"
                 )
@@ -102,7 +202,7 @@ class OrderServiceServicer(orders_pb2_grpc.OrderServiceServicer):
     def GetOrder(self, request, context):
         """Get an order by ID"""
         try:
-            order = Order.objects.prefetch_related('items__product').get(id=request.id)
+            order = Order.objects.prefetch_related('items').get(id=request.id)
             return orders_pb2.OrderResponse(
                 order=self._order_to_proto(order),
                 success=True,
@@ -132,7 +232,7 @@ class OrderServiceServicer(orders_pb2_grpc.OrderServiceServicer):
             start = (page - 1) * page_size
             end = start + page_size
             
-            queryset = Order.objects.prefetch_related('items__product').all()
+            queryset = Order.objects.prefetch_related('items').all()
             
             # Filter by status if provided
             if request.status:
@@ -143,12 +243,12 @@ class OrderServiceServicer(orders_pb2_grpc.OrderServiceServicer):
             
             order_list = [self._order_to_proto(o) for o in orders]
             
-            return orders_pb2.ListOrdersResponse(
+            return compress_response(context, orders_pb2.ListOrdersResponse(
                 orders=order_list,
                 total_count=total_count,
                 page=page,
                 page_size=page_size
-            )
+            ))
         except Exception as e:
             context.set_code(grpc.StatusCode.INTERNAL)
             context.set_details(str(e))
@@ -160,23 +260,40 @@ class OrderServiceServicer(orders_pb2_grpc.OrderServiceServicer):
             )
     
     def UpdateOrderStatus(self, request, context):
-        """Update order status"""
+        """Move an order to a new status
+        
+        Follows Order.STATUS_TRANSITIONS and shares ``orders.status.change_statuses``
+        with BulkUpdateOrderStatus, so cancelling this way restores stock too.
+        """
         try:
-            order = Order.objects.get(id=request.id)
-            
-            # Validate status
-            valid_statuses = ['pending', 'processing', 'shipped', 'delivered', 'cancelled']
+            valid_statuses = [choice[0] for choice in Order.STATUS_CHOICES]
             if request.status not in valid_statuses:
-                raise Exception(f"Invalid status. Must be one of: {', '.join(valid_statuses)}")
+                raise ValueError(f"Invalid status. Must be one of: {', '.join(valid_statuses)}")
             
-            order.status = request.status
-            order.save()
+            with transaction.atomic():
+                order = Order.objects.select_for_update().get(id=request.id)
+                if not order.can_transition_to(request.status):
+                    context.set_code(grpc.StatusCode.FAILED_PRECONDITION)
+                    message = f"Cannot change order status from {order.status} to {request.status}"
+                    context.set_details(message)
+                    return orders_pb2.OrderResponse(success=False, message=message)
+                
+                change_statuses({order.id: order.status}, request.status)
+                order.status = request.status
+                order.updated_at = timezone.now()
             
             return orders_pb2.OrderResponse(
                 order=self._order_to_proto(order),
                 success=True,
                 message=f"Order status updated to {request.status}"
             )
+        except ValueError as e:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(str(e))
+            return orders_pb2.OrderResponse(
+                success=False,
+                message=str(e)
+            )
         except Order.DoesNotExist:
             context.set_code(grpc.StatusCode.NOT_FOUND)
             context.set_details("Order not found")
@@ -192,28 +309,121 @@ class OrderServiceServicer(orders_pb2_grpc.OrderServiceServicer):
                 message=f"Error updating order status: {str(e)}"
             )
     
+    def BulkUpdateOrderStatus(self, request, context):
+        """Move many orders to a new status with set-based statements
+        
+        Orders are only updated when Order.STATUS_TRANSITIONS allows moving
+        from their current status, enforced by a conditional
+        ``UPDATE ... WHERE status IN (...)`` per batch. Status events are
+        written with one bulk insert per batch, as are the outbox change
+        events, and cancelled orders have their stock restored. Returns one
+        result per requested order.
+        """
+        try:
+            valid_statuses = [choice[0] for choice in Order.STATUS_CHOICES]
+            if request.status not in valid_statuses:
+                raise ValueError(f"Invalid status. Must be one of: {', '.join(valid_statuses)}")
+            
+            order_ids = list(dict.fromkeys(request.ids))
+            sources = Order.source_statuses(request.status)
+            results = {}
+            updated_count = 0
+            
+            with transaction.atomic():
+                for start in range(0, len(order_ids), BULK_STATUS_BATCH_SIZE):
+                    batch = order_ids[start:start + BULK_STATUS_BATCH_SIZE]
+                    current = dict(
+                        Order.objects.select_for_update().filter(id__in=batch).values_list('id', 'status')
+                    )
+                    eligible = [order_id for order_id in batch if current.get(order_id) in sources]
+                    
+                    if eligible:
+                        updated_count += change_statuses(
+                            {order_id: current[order_id] for order_id in eligible}, request.status
+                        )
+                    
+                    for order_id in batch:
+                        results[order_id] = self._status_result(
+                            order_id, current.get(order_id), request.status, order_id in eligible
+                        )
+            
+            return orders_pb2.BulkUpdateOrderStatusResponse(
+                results=[results[order_id] for order_id in order_ids],
+                updated_count=updated_count,
+                success=True,
+                message=f"Updated {updated_count} of {len(order_ids)} orders to {request.status}"
+            )
+        except ValueError as e:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(str(e))
+            return orders_pb2.BulkUpdateOrderStatusResponse(
+                success=False,
+                message=str(e)
+            )
+        except Exception as e:
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(str(e))
+            return orders_pb2.BulkUpdateOrderStatusResponse(
+                success=False,
+                message=f"Error updating order statuses: {str(e)}"
+            )
+    
+    def _status_result(self, order_id, previous_status, status, updated):
+        """Build the per-order outcome of a bulk status update"""
+        if previous_status is None:
+            message = "Order not found"
+        elif updated:
+            message = f"Order status updated to {status}"
+        else:
+            message = f"Cannot change order status from {previous_status} to {status}"
+        return orders_pb2.OrderStatusResult(
+            id=order_id,
+            success=updated,
+            previous_status=previous_status or '',
+            message=message
+        )
+    
     def CancelOrder(self, request, context):
-        """Cancel an order and restore product stock"""
+        """Cancel an order and restore product stock
+        
+        The status change is a conditional UPDATE, so of two concurrent
+        cancellations only one restores stock; the other is rejected.
+        """
         try:
             with transaction.atomic():
-                order = Order.objects.prefetch_related('items__product').get(id=request.id)
+                order = Order.objects.get(id=request.id)
                 
-                # Check if order can be cancelled
-                if order.status in ['shipped', 'delivered', 'cancelled']:
-                    raise Exception(f"Cannot cancel order with status: {order.status}")
+                # Only move to cancelled from a status that allows it
+                now = timezone.now()
+                cancelled = Order.objects.filter(
+                    id=order.id,
+                    status__in=Order.source_statuses('cancelled')
+                ).update(status='cancelled', updated_at=now)
+                if not cancelled:
+                    current_status = Order.objects.values_list('status', flat=True).get(id=order.id)
+                    raise Exception(f"Cannot cancel order with status: {current_status}")
                 
                 # Restore product stock
-                for item in order.items.all():
-                    product = item.product
-                    product.stock_quantity += item.quantity
-                    product.save()
+                items = list(order.items.all())
+                quantities = defaultdict(int)
+                for item in items:
+                    quantities[item.product_id] += item.quantity
+                apply_stock_deltas(quantities, reason='cancellation', reference=order.id)
                 
-                # Update order status
+                OrderEvent.objects.create(
+                    order=order,
+                    from_status=order.status,
+                    to_status='cancelled'
+                )
+                record_changes([status_change_event(order.id, 'cancelled', order.status, [
+                    {'product_id': product_id, 'quantity': quantity}
+                    for product_id, quantity in quantities.items()
+                ])])
                 order.status = 'cancelled'
-                order.save()
+                order.updated_at = now
                 
                 return orders_pb2.OrderResponse(
-                    order=self._order_to_proto(order),
+                    order=self._order_to_proto(order, items),
                     success=True,
                     message="Order cancelled successfully"
                 )
@@ -232,20 +442,59 @@ class OrderServiceServicer(orders_pb2_grpc.OrderServiceServicer):
                 message=f"Error cancelling order: {str(e)}"
             )
     
+    def _customer_orders_queryset(self, request):
+        """Build the keyset-ordered queryset for a customer's orders"""
+        queryset = Order.objects.filter(
+            customer_email=request.customer_email
+        ).order_by('-created_at', '-id')
+        
+        if request.created_after:
+            queryset = queryset.filter(created_at__gte=_parse_timestamp(request.created_after))
+        if request.created_before:
+            queryset = queryset.filter(created_at__lt=_parse_timestamp(request.created_before))
+        if request.cursor:
+            created_at, order_id = _decode_cursor(request.cursor)
+            queryset = queryset.filter(
+                Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=order_id)
+            )
+        
+        return queryset
+    
     def GetOrdersByCustomer(self, request, context):
-        """Get all orders for a specific customer"""
+        """Get one page of a customer's orders, newest first
+        
+        Pages are keyed on (created_at, id); pass ``next_cursor`` back as
+        ``cursor`` to fetch the following page.
+        """
         try:
-            orders = Order.objects.prefetch_related('items__product').filter(
-                customer_email=request.customer_email
-            )
+            page_size = _clamp_page_size(request.page_size)
+            queryset = self._customer_orders_queryset(request)
+            
+            # Fetch one extra row to learn whether another page exists
+            orders = list(queryset.prefetch_related('items')[:page_size + 1])
+            next_cursor = ''
+            if len(orders) > page_size:
+                orders = orders[:page_size]
+                next_cursor = _encode_cursor(orders[-1])
             
             order_list = [self._order_to_proto(o) for o in orders]
+            total_count = queryset.count() if request.include_total else len(order_list)
             
-            return orders_pb2.ListOrdersResponse(
+            return compress_response(context, orders_pb2.ListOrdersResponse(
                 orders=order_list,
-                total_count=orders.count(),
+                total_count=total_count,
                 page=1,
-                page_size=len(order_list)
+                page_size=page_size,
+                next_cursor=next_cursor
+            ))
+        except ValueError as e:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(str(e))
+            return orders_pb2.ListOrdersResponse(
+                orders=[],
+                total_count=0,
+                page=0,
+                page_size=0
             )
         except Exception as e:
             context.set_code(grpc.StatusCode.INTERNAL)
@@ -256,19 +505,109 @@ class OrderServiceServicer(orders_pb2_grpc.OrderServiceServicer):
                 page=0,
                 page_size=0
             )
+    
+    def StreamOrdersByCustomer(self, request, context):
+        """Stream all of a customer's orders, newest first
+        
+        Orders are read with a server-side cursor in chunks of ``page_size``
+        and their items are prefetched per chunk, so memory stays bounded
+        however many orders the customer has.
+        """
+        try:
+            chunk_size = _clamp_page_size(request.page_size)
+            orders = self._customer_orders_queryset(request).prefetch_related('items').iterator(chunk_size=chunk_size)
+            
+            for order in orders:
+                if not context.is_active():
+                    return
+                yield self._order_to_proto(order)
+        except ValueError as e:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(str(e))
+        except Exception as e:
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(str(e))
+    
+    def WatchOrder(self, request, context):
+        """Stream an order's status changes as they commit
+        
+        The first message is the current status. Further updates come from
+        the process-wide ``order_hub``, so all watchers share one outbox poll,
+        with a heartbeat every ``ORDER_WATCH_HEARTBEAT_SECONDS`` while
+        nothing changes. The stream ends once the order reaches a status it
+        cannot leave, when the client goes away, or after
+        ``ORDER_WATCH_MAX_SECONDS`` so the client reconnects. At most
+        ``ORDER_WATCH_MAX_STREAMS`` streams run at once; further calls fail
+        with RESOURCE_EXHAUSTED.
+        """
+        if not watch_slots.acquire(blocking=False):
+            context.set_code(grpc.StatusCode.RESOURCE_EXHAUSTED)
+            context.set_details("Too many order watchers, retry later")
+            return
+        ends_at = time.monotonic() + settings.ORDER_WATCH_MAX_SECONDS
+        # Subscribe before reading the current status so no change is missed
+        subscription = order_hub.subscribe(request.id)
+        try:
+            order = Order.objects.only('status', 'updated_at').get(id=request.id)
+            status = order.status
+            yield orders_pb2.OrderStatusUpdate(
+                id=order.id,
+                status=status,
+                updated_at=order.updated_at.isoformat()
+            )
+            
+            while Order.STATUS_TRANSITIONS.get(status) and context.is_active():
+                remaining = ends_at - time.monotonic()
+                if remaining <= 0:
+                    break
+                event = subscription.get(timeout=min(ORDER_WATCH_HEARTBEAT_SECONDS, remaining))
+                if event is None:
+                    yield orders_pb2.OrderStatusUpdate(id=order.id, status=status, heartbeat=True)
+                    continue
+                if event.payload.get('status', status) == status:
+                    continue
+                yield orders_pb2.OrderStatusUpdate(
+                    id=order.id,
+                    status=event.payload['status'],
+                    previous_status=status,
+                    updated_at=event.created_at.isoformat()
+                )
+                status = event.payload['status']
+        except Order.DoesNotExist:
+            context.set_code(grpc.StatusCode.NOT_FOUND)
+            context.set_details("Order not found")
+        except Exception as e:
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(str(e))
+        finally:
+            subscription.close()
+            watch_slots.release()
 
+def create_server(port=50052, address=None, max_workers=10):
+    """Build an unstarted gRPC server and return it with its bind address
 
-def serve(port=50052):
-    """Start the gRPC server"""
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
+    ``address`` replaces the TCP port binding, e.g. ``unix:/run/ecommerce/orders.sock``
+    for Django and the gRPC servers running in the same pod.
+    """
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=max_workers))
     orders_pb2_grpc.add_OrderServiceServicer_to_server(
         OrderServiceServicer(), server
     )
-    server.add_insecure_port(f'[::]:{port}')
+    bind_address = resolve_bind_address(address, port)
+    server.add_insecure_port(bind_address)
+    return server, bind_address
+
+
+def serve(port=50052, address=None):
+    """Start the gRPC server"""
+    server, bind_address = create_server(port=port, address=address)
     server.start()
-    print(f"Order gRPC Server started on port {port}")
+    print(f"Order gRPC Server started on {bind_address}")
     server.wait_for_termination()
 
 
 if __name__ == '__main__':
-    serve()
+    serve(
+        port=settings.GRPC_ORDER_SERVER_PORT,
+        address=settings.GRPC_ORDER_SERVER_ADDRESS or None,
+    )
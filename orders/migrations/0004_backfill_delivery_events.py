@@ -0,0 +1,47 @@
+# Generated by Django 4.2.7 on 2026-10-19 00:13
+
+from datetime import timedelta
+
+from django.db import migrations
+from django.db.models import Exists, OuterRef, Subquery
+from django.utils import timezone
+
+# Older deliveries are past the point where a review reminder is useful
+BACKFILL_DAYS = 30
+
+
+def backfill_delivery_events(apps, schema_editor):
+    """
+    Log the delivery of orders marked delivered without an event, e.g. in the admin.
+
+    Review reminders read deliveries from the event log, so these orders were
+    never reminded about. The order's last update stands in for the delivery time.
+    """
+    Order = apps.get_model('orders', 'Order')
+    OrderEvent = apps.get_model('orders', 'OrderEvent')
+    delivered = OrderEvent.objects.filter(order_id=OuterRef('pk'), to_status='delivered')
+    order_ids = list(
+        Order.objects.filter(status='delivered', updated_at__gte=timezone.now() - timedelta(days=BACKFILL_DAYS))
+        .exclude(Exists(delivered))
+        .order_by('id')
+        .values_list('id', flat=True)
+    )
+    OrderEvent.objects.bulk_create(
+        [OrderEvent(order_id=order_id, from_status='shipped', to_status='delivered') for order_id in order_ids],
+        batch_size=1000,
+    )
+    # created_at is auto_now_add, so it is set from the order afterwards
+    OrderEvent.objects.filter(order_id__in=order_ids, to_status='delivered').update(
+        created_at=Subquery(Order.objects.filter(pk=OuterRef('order_id')).values('updated_at')[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0003_order_event'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_delivery_events, migrations.RunPython.noop),
+    ]
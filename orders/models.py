@@ -13,6 +13,15 @@ class Order(models.Model):
         ('cancelled', 'Cancelled'),
     ]
     
+    # Allowed status transitions; orders can be cancelled until they ship
+    STATUS_TRANSITIONS = {
+        'pending': ['processing', 'cancelled'],
+        'processing': ['shipped', 'cancelled'],
+        'shipped': ['delivered'],
+        'delivered': [],
+        'cancelled': [],
+    }
+    
     customer_name = models.CharField(max_length=255)
     customer_email = models.EmailField()
     total_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
@@ -26,14 +35,32 @@ class Order(models.Model):
         indexes = [
             models.Index(fields=['customer_email']),
             models.Index(fields=['status']),
+            models.Index(fields=['customer_email', '-created_at', '-id']),
         ]
     
     def __str__(self):
         return f"Order #{self.id} - {self.customer_name}"
     
-    def calculate_total(self):
-        """Calculate total amount from order items"""
-        total = sum(item.subtotal for item in self.items.all())
+    @classmethod
+    def source_statuses(cls, status):
+        """Return the statuses an order may move to ``status`` from"""
+        return [
+            source for source, targets in cls.STATUS_TRANSITIONS.items()
+            if status in targets
+        ]
+    
+    def can_transition_to(self, status):
+        """Check if the order may move from its current status to ``status``"""
+        return status in self.STATUS_TRANSITIONS.get(self.status, [])
+    
+    def calculate_total(self, items=None):
+        """Calculate total amount from order items
+        
+        Pass ``items`` when they are already loaded to skip re-fetching them.
+        """
+        if items is None:
+            items = self.items.all()
+        total = sum(item.subtotal for item in items)
         self.total_amount = total
         self.save()
         return total
@@ -59,3 +86,26 @@ class OrderItem(models.Model):
         """Calculate subtotal before saving"""
         self.subtotal = self.price * self.quantity
         super().save(*args, **kwargs)
+
+
+class OrderEvent(models.Model):
+    """Append-only log of order lifecycle events"""
+    
+    EVENT_TYPE_CHOICES = [
+        ('status_changed', 'Status Changed'),
+    ]
+    
+    order = models.ForeignKey(Order, related_name='events', on_delete=models.CASCADE)
+    event_type = models.CharField(max_length=30, choices=EVENT_TYPE_CHOICES, default='status_changed')
+    from_status = models.CharField(max_length=20, blank=True)
+    to_status = models.CharField(max_length=20, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['order', 'created_at']),
+        ]
+    
+    def __str__(self):
+        return f"Order #{self.order_id}: {self.from_status} -> {self.to_status}"
@@ -0,0 +1,85 @@
+"""
+Order status changes shared by the Order gRPC service, its admin and tasks.
+
+Every status change goes through ``change_statuses`` so it is logged as an
+``OrderEvent`` and published to the change feed, which the review reminders
+and ``WatchOrder`` streams read, and so cancellations return their stock.
+"""
+
+from collections import defaultdict
+
+from django.db.models import Sum
+from django.utils import timezone
+from core.outbox import record_changes
+from products.stock import apply_stock_deltas, record_movements
+from .models import Order, OrderEvent, OrderItem
+
+
+def status_change_event(order_id, status, previous_status, items=()):
+    """Build the outbox event for an order status change"""
+    event_type = 'order.cancelled' if status == 'cancelled' else 'order.status_changed'
+    return ('order', order_id, event_type, {
+        'id': order_id,
+        'status': status,
+        'previous_status': previous_status,
+        'items': list(items),
+    })
+
+
+def restore_stock(order_ids):
+    """Return the stock held by the given orders to their products
+    
+    Returns:
+        Mapping of order ID to its restored ``{'product_id', 'quantity'}`` lines
+    """
+    rows = list(OrderItem.objects.filter(order_id__in=order_ids).values(
+        'order_id', 'product_id'
+    ).annotate(quantity=Sum('quantity')).order_by())
+    
+    quantities = defaultdict(int)
+    for row in rows:
+        quantities[row['product_id']] += row['quantity']
+    apply_stock_deltas(quantities)
+    
+    # One ledger movement per order so each is traceable to its order
+    record_movements(
+        [(row['product_id'], row['quantity'], row['order_id']) for row in rows],
+        'cancellation'
+    )
+    
+    items = defaultdict(list)
+    for row in rows:
+        items[row['order_id']].append({'product_id': row['product_id'], 'quantity': row['quantity']})
+    return items
+
+
+def change_statuses(previous_statuses, status):
+    """Move locked orders that may make the transition to ``status``
+    
+    One conditional UPDATE, one bulk insert of status events and one of
+    outbox events; cancelled orders have their stock restored. Callers lock
+    the orders and pass only those Order.STATUS_TRANSITIONS allows to move.
+    
+    Args:
+        previous_statuses: Mapping of order ID to its current status
+    
+    Returns:
+        Number of orders updated
+    """
+    order_ids = list(previous_statuses)
+    updated = Order.objects.filter(
+        id__in=order_ids,
+        status__in=Order.source_statuses(status)
+    ).update(status=status, updated_at=timezone.now())
+    OrderEvent.objects.bulk_create([
+        OrderEvent(order_id=order_id, from_status=previous_status, to_status=status)
+        for order_id, previous_status in previous_statuses.items()
+    ])
+    items = {}
+    if status == 'cancelled':
+        items = restore_stock(order_ids)
+    record_changes([
+        status_change_event(order_id, status, previous_status, items.get(order_id, ()))
+        for order_id, previous_status in previous_statuses.items()
+    ])
+    return updated
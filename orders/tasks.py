@@ -13,25 +13,25 @@ logger = logging.getLogger(__name__)
 @shared_task
 def process_pending_orders():
     """Process orders that have been pending for too long."""
+    from django.db import transaction
     from orders.models import Order
+    from orders.status import change_statuses
     
     try:
         # Find orders pending for more than 24 hours
         threshold = timezone.now() - timedelta(hours=24)
-        pending_orders = Order.objects.filter(
-            status='pending',
-            created_at__lt=threshold
-        )
-        
-        count = 0
-        for order in pending_orders:
-            # Auto-update to processing or send reminder
-            order.status = 'processing'
-            order.save()
-            count += 1
-            
-            logger.info(f"Auto-processed order {order.id}")
+        with transaction.atomic():
+            order_ids = list(
+                Order.objects.select_for_update().filter(
+                    status='pending',
+                    created_at__lt=threshold
+                ).values_list('id', flat=True)
+            )
+            # Logged and published like any other status change, so
+            # watchers and the change feed see it
+            count = change_statuses(dict.fromkeys(order_ids, 'pending'), 'processing') if order_ids else 0
         
+        logger.info(f"Auto-processed {count} pending orders")
         return f"Processed {count} pending orders"
     except Exception as e:
         logger.error(f"Error processing pending orders: {str(e)}")
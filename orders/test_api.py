@@ -0,0 +1,101 @@
+"""
+Tests for Order API endpoints.
+"""
+
+import threading
+
+import pytest
+from django.urls import reverse
+from orders.models import Order
+
+
+@pytest.mark.django_db
+class TestOrderWatchAPI:
+    """Test cases for the order status SSE endpoint."""
+
+    def test_streams_status_events(self, api_client, order):
+        """Test the stream sends the current status as an SSE event."""
+        Order.objects.filter(id=order.id).update(status='delivered')
+        url = reverse('order-watch', kwargs={'order_id': order.id})
+
+        response = api_client.get(url, HTTP_ACCEPT='text/event-stream')
+
+        assert response.status_code == 200
+        assert response['Content-Type'] == 'text/event-stream'
+        body = b''.join(response.streaming_content).decode()
+        assert body.startswith('retry: 5000\n\nevent: status\ndata: {"id": %d, "status": "delivered"' % order.id)
+
+    def test_unknown_order(self, api_client):
+        """Test a missing order is a 404 before any event is streamed."""
+        url = reverse('order-watch', kwargs={'order_id': 99999})
+
+        response = api_client.get(url, HTTP_ACCEPT='text/event-stream')
+
+        assert response.status_code == 404
+        assert response.content.startswith(b'event: error')
+
+    def test_stream_releases_its_slot(self, api_client, order, monkeypatch):
+        """Test a finished stream frees its slot for the next watcher."""
+        monkeypatch.setattr('orders.views.order_watch_slots', threading.BoundedSemaphore(1))
+        Order.objects.filter(id=order.id).update(status='delivered')
+        url = reverse('order-watch', kwargs={'order_id': order.id})
+
+        for _ in range(2):
+            response = api_client.get(url, HTTP_ACCEPT='text/event-stream')
+            assert response.status_code == 200
+            b''.join(response.streaming_content)
+
+    def test_too_many_watchers(self, api_client, order, monkeypatch):
+        """Test the endpoint is a 503 with Retry-After once every slot is taken."""
+        monkeypatch.setattr('orders.views.order_watch_slots', threading.BoundedSemaphore(1))
+        url = reverse('order-watch', kwargs={'order_id': order.id})
+        streaming = api_client.get(url, HTTP_ACCEPT='text/event-stream')
+
+        response = api_client.get(url, HTTP_ACCEPT='text/event-stream')
+
+        assert response.status_code == 503
+        assert response['Retry-After'] == '5'
+        streaming.close()
+
+    def test_grpc_watchers_exhausted(self, api_client, order, monkeypatch):
+        """Test RESOURCE_EXHAUSTED from WatchOrder is a 503 as well."""
+        monkeypatch.setattr('orders.grpc_server.watch_slots', threading.BoundedSemaphore(0))
+        url = reverse('order-watch', kwargs={'order_id': order.id})
+
+        response = api_client.get(url, HTTP_ACCEPT='text/event-stream')
+
+        assert response.status_code == 503
+        assert response['Retry-After'] == '5'
+
+
+@pytest.mark.django_db
+class TestCustomerOrdersAPI:
+    """Test cases for the customer orders endpoint."""
+
+    def test_lists_orders(self, api_client, order):
+        """Test a customer's orders are returned with the total on the first page."""
+        url = reverse('customer-orders', kwargs={'customer_email': order.customer_email})
+
+        response = api_client.get(url, {'page_size': 10})
+
+        assert response.status_code == 200
+        assert [o['id'] for o in response.data['orders']] == [order.id]
+        assert response.data['total_count'] == 1
+
+    def test_invalid_page_size(self, api_client, order):
+        """Test a non-integer page_size is a 400."""
+        url = reverse('customer-orders', kwargs={'customer_email': order.customer_email})
+
+        response = api_client.get(url, {'page_size': 'ten'})
+
+        assert response.status_code == 400
+
+    @pytest.mark.parametrize('params', [{'cursor': 'not-a-cursor'}, {'created_after': 'yesterday'}])
+    def test_invalid_arguments(self, api_client, order, params):
+        """Test arguments the service rejects as INVALID_ARGUMENT are a 400."""
+        url = reverse('customer-orders', kwargs={'customer_email': order.customer_email})
+
+        response = api_client.get(url, params)
+
+        assert response.status_code == 400
+        assert response.data['error']
@@ -0,0 +1,396 @@
+"""
+Tests for the Order gRPC service.
+"""
+
+import threading
+
+import grpc
+import pytest
+from datetime import timedelta
+from django.utils import timezone
+from orders.grpc_client import OrderGRPCClient
+from orders.grpc_server import order_hub
+from orders.models import Order, OrderEvent, OrderItem
+from products.models import Product
+
+
+@pytest.fixture
+def client():
+    """Return an in-process Order gRPC client."""
+    client = OrderGRPCClient(transport='inprocess')
+    yield client
+    client.close()
+
+
+@pytest.fixture
+def customer_orders(db, product):
+    """Create orders for one customer, one day apart, oldest first."""
+    now = timezone.now()
+    orders = []
+    for i in range(7):
+        order = Order.objects.create(
+            customer_name='B2B Customer',
+            customer_email='b2b@example.com',
+            shipping_address='1 Warehouse Way',
+        )
+        OrderItem.objects.create(
+            order=order,
+            product=product,
+            product_name=product.name,
+            quantity=1,
+            price=product.price,
+        )
+        Order.objects.filter(id=order.id).update(created_at=now - timedelta(days=7 - i))
+        orders.append(order)
+    return orders
+
+
+@pytest.mark.django_db
+class TestGetOrdersByCustomer:
+    """Test cases for paginated GetOrdersByCustomer."""
+
+    def test_pages_follow_cursor(self, client, customer_orders):
+        """Test walking every page with next_cursor returns each order once."""
+        seen = []
+        cursor = ''
+        while True:
+            response = client.get_orders_by_customer('b2b@example.com', page_size=3, cursor=cursor)
+            seen.extend(o.id for o in response.orders)
+            cursor = response.next_cursor
+            if not cursor:
+                break
+
+        assert seen == [o.id for o in reversed(customer_orders)]
+
+    def test_total_only_when_requested(self, client, customer_orders):
+        """Test the count query only runs when include_total is set."""
+        response = client.get_orders_by_customer('b2b@example.com', page_size=2)
+        assert response.total_count == 2
+
+        response = client.get_orders_by_customer('b2b@example.com', page_size=2, include_total=True)
+        assert response.total_count == 7
+
+    def test_date_range(self, client, customer_orders):
+        """Test created_after is inclusive and created_before exclusive."""
+        after = Order.objects.get(id=customer_orders[2].id).created_at
+        before = Order.objects.get(id=customer_orders[5].id).created_at
+
+        response = client.get_orders_by_customer(
+            'b2b@example.com',
+            created_after=after.isoformat(),
+            created_before=before.isoformat(),
+        )
+
+        assert [o.id for o in response.orders] == [o.id for o in customer_orders[4:1:-1]]
+
+    def test_invalid_cursor(self, client, customer_orders):
+        """Test a malformed cursor is rejected as an invalid argument."""
+        with pytest.raises(grpc.RpcError) as exc_info:
+            client.get_orders_by_customer('b2b@example.com', cursor='not-a-cursor')
+
+        assert exc_info.value.code() == grpc.StatusCode.INVALID_ARGUMENT
+
+
+@pytest.mark.django_db
+class TestStreamOrdersByCustomer:
+    """Test cases for the streaming variant."""
+
+    def test_streams_all_orders(self, client, customer_orders):
+        """Test every order is streamed newest first with its items."""
+        orders = list(client.stream_orders_by_customer('b2b@example.com', chunk_size=2))
+
+        assert [o.id for o in orders] == [o.id for o in reversed(customer_orders)]
+        assert all(len(o.items) == 1 for o in orders)
+
+    def test_prefetches_items_per_chunk(self, client, customer_orders, django_assert_max_num_queries):
+        """Test queries grow with the number of chunks, not orders."""
+        with django_assert_max_num_queries(2 * 4):
+            list(client.stream_orders_by_customer('b2b@example.com', chunk_size=2))
+
+
+@pytest.mark.django_db
+class TestOrderQueryBudget:
+    """Query-count budgets for order conversion (orders + items, no products)."""
+
+    def test_get_order(self, client, order, django_assert_num_queries):
+        """Test GetOrder costs one order query and one item query."""
+        with django_assert_num_queries(2):
+            response = client.get_order(order.id)
+
+        assert response.order.items[0].product_id == order.items.get().product_id
+
+    def test_customer_orders_page(self, client, customer_orders, django_assert_num_queries):
+        """Test a page costs one order query and one item query."""
+        with django_assert_num_queries(2):
+            response = client.get_orders_by_customer('b2b@example.com', page_size=5)
+
+        assert len(response.orders) == 5
+
+    def test_list_orders_page(self, client, customer_orders, django_assert_num_queries):
+        """Test a page costs orders, items and the total count."""
+        with django_assert_num_queries(3):
+            response = client.list_orders(page=1, page_size=5)
+
+        assert len(response.orders) == 5
+
+    def test_update_status_fetches_items_once(self, client, order, django_assert_num_queries):
+        """Test the response is built with a single item fetch."""
+        # savepoint, locked order, update, event, change event, release, items
+        with django_assert_num_queries(7):
+            response = client.update_order_status(order.id, 'processing')
+
+        assert len(response.order.items) == 1
+
+    def test_create_order_reuses_created_items(self, client, products):
+        """Test CreateOrder builds its response without re-reading items or products."""
+        response = client.create_order(
+            customer_name='Test Customer',
+            customer_email='customer@example.com',
+            items=[{'product_id': p.id, 'quantity': 1} for p in products[:3]],
+            shipping_address='123 Test St',
+        )
+
+        assert [i.product_id for i in response.order.items] == [p.id for p in products[:3]]
+        assert response.order.total_amount == pytest.approx(sum(float(p.price) for p in products[:3]))
+
+
+@pytest.mark.django_db
+class TestUpdateOrderStatus:
+    """Test cases for UpdateOrderStatus."""
+
+    def test_rejects_disallowed_transition(self, client, order):
+        """Test an order cannot skip or leave a final status."""
+        Order.objects.filter(id=order.id).update(status='delivered')
+
+        with pytest.raises(grpc.RpcError) as exc_info:
+            client.update_order_status(order.id, 'pending')
+
+        assert exc_info.value.code() == grpc.StatusCode.FAILED_PRECONDITION
+        assert Order.objects.get(id=order.id).status == 'delivered'
+        assert not OrderEvent.objects.filter(order=order).exists()
+
+    def test_cancellation_restores_stock(self, client, order, product):
+        """Test cancelling through a status update returns the ordered stock."""
+        before = product.stock_quantity
+
+        response = client.update_order_status(order.id, 'cancelled')
+
+        product.refresh_from_db()
+        assert response.order.status == 'cancelled'
+        assert product.stock_quantity == before + 2
+
+    def test_invalid_status(self, client, order):
+        """Test unknown statuses are rejected."""
+        with pytest.raises(grpc.RpcError) as exc_info:
+            client.update_order_status(order.id, 'lost')
+
+        assert exc_info.value.code() == grpc.StatusCode.INVALID_ARGUMENT
+
+
+@pytest.mark.django_db
+class TestBulkUpdateOrderStatus:
+    """Test cases for BulkUpdateOrderStatus."""
+
+    def test_transitions_follow_state_machine(self, client, customer_orders):
+        """Test only orders allowed to make the transition are updated."""
+        Order.objects.filter(id=customer_orders[0].id).update(status='processing')
+        Order.objects.filter(id=customer_orders[1].id).update(status='delivered')
+        ids = [customer_orders[0].id, customer_orders[1].id, 99999]
+
+        response = client.bulk_update_order_status(ids, 'shipped')
+
+        assert response.updated_count == 1
+        assert [r.success for r in response.results] == [True, False, False]
+        assert response.results[1].previous_status == 'delivered'
+        assert response.results[2].message == 'Order not found'
+        assert Order.objects.get(id=customer_orders[0].id).status == 'shipped'
+        assert Order.objects.get(id=customer_orders[1].id).status == 'delivered'
+
+    def test_events_written_for_updated_orders(self, client, customer_orders):
+        """Test one status event is logged per updated order."""
+        ids = [o.id for o in customer_orders]
+
+        client.bulk_update_order_status(ids, 'processing')
+
+        events = OrderEvent.objects.filter(order_id__in=ids)
+        assert events.count() == len(ids)
+        assert set(events.values_list('from_status', 'to_status')) == {('pending', 'processing')}
+
+    def test_set_based_queries(self, client, customer_orders, django_assert_num_queries):
+        """Test a batch costs a fixed number of queries regardless of size."""
+        ids = [o.id for o in customer_orders]
+
+        # savepoint, select, update, event insert, change event insert, release
+        with django_assert_num_queries(6):
+            client.bulk_update_order_status(ids, 'processing')
+
+    def test_cancellation_restores_stock(self, client, customer_orders, product):
+        """Test bulk cancellation returns the ordered stock."""
+        before = product.stock_quantity
+
+        client.bulk_update_order_status([o.id for o in customer_orders[:3]], 'cancelled')
+
+        product.refresh_from_db()
+        assert product.stock_quantity == before + 3
+
+    def test_invalid_status(self, client, customer_orders):
+        """Test unknown statuses are rejected."""
+        with pytest.raises(grpc.RpcError) as exc_info:
+            client.bulk_update_order_status([customer_orders[0].id], 'lost')
+
+        assert exc_info.value.code() == grpc.StatusCode.INVALID_ARGUMENT
+
+
+@pytest.mark.django_db
+class TestCancelOrder:
+    """Test cases for set-based CancelOrder."""
+
+    def test_restores_stock(self, client, order, product):
+        """Test cancelling returns each line's quantity to stock."""
+        before = product.stock_quantity
+
+        response = client.cancel_order(order.id)
+
+        product.refresh_from_db()
+        assert response.order.status == 'cancelled'
+        assert product.stock_quantity == before + 2
+
+    def test_double_cancel_is_noop(self, client, order, product):
+        """Test a second cancel is rejected and restores nothing."""
+        client.cancel_order(order.id)
+        product.refresh_from_db()
+        after_first = product.stock_quantity
+
+        with pytest.raises(grpc.RpcError):
+            client.cancel_order(order.id)
+
+        product.refresh_from_db()
+        assert product.stock_quantity == after_first
+        assert OrderEvent.objects.filter(order=order, to_status='cancelled').count() == 1
+
+    def test_keeps_concurrent_stock_changes(self, client, order, product):
+        """Test restoration is relative to the current stock, not a stale read."""
+        Product.objects.filter(id=product.id).update(stock_quantity=5)
+
+        client.cancel_order(order.id)
+
+        product.refresh_from_db()
+        assert product.stock_quantity == 7
+
+    def test_query_count_independent_of_lines(self, client, products, django_assert_max_num_queries):
+        """Test cancelling a many-line order costs a fixed number of queries."""
+        response = client.create_order(
+            customer_name='Test Customer',
+            customer_email='customer@example.com',
+            items=[{'product_id': p.id, 'quantity': 1} for p in products],
+            shipping_address='123 Test St',
+        )
+
+        with django_assert_max_num_queries(9):
+            client.cancel_order(response.order.id)
+
+
+@pytest.mark.django_db
+class TestCreateOrder:
+    """Test cases for set-based CreateOrder."""
+
+    def test_reserves_stock(self, client, products):
+        """Test stock is decremented for every ordered product."""
+        client.create_order(
+            customer_name='Test Customer',
+            customer_email='customer@example.com',
+            items=[{'product_id': products[0].id, 'quantity': 2}, {'product_id': products[1].id, 'quantity': 3}],
+            shipping_address='123 Test St',
+        )
+
+        assert Product.objects.get(id=products[0].id).stock_quantity == products[0].stock_quantity - 2
+        assert Product.objects.get(id=products[1].id).stock_quantity == products[1].stock_quantity - 3
+
+    def test_insufficient_stock_rolls_back(self, client, product):
+        """Test an oversized order creates nothing and leaves stock alone."""
+        with pytest.raises(grpc.RpcError):
+            client.create_order(
+                customer_name='Test Customer',
+                customer_email='customer@example.com',
+                items=[{'product_id': product.id, 'quantity': product.stock_quantity + 1}],
+                shipping_address='123 Test St',
+            )
+
+        assert not Order.objects.exists()
+        assert Product.objects.get(id=product.id).stock_quantity == product.stock_quantity
+
+
+@pytest.mark.django_db
+class TestWatchOrder:
+    """Test cases for the WatchOrder stream."""
+
+    def test_streams_status_changes(self, client, order):
+        """Test the current status comes first, then each committed change."""
+        updates = client.watch_order(order.id)
+        assert next(updates).status == 'pending'
+
+        client.update_order_status(order.id, 'processing')
+        order_hub.poll()
+        update = next(updates)
+        assert (update.previous_status, update.status) == ('pending', 'processing')
+
+        client.cancel_order(order.id)
+        order_hub.poll()
+        assert next(updates).status == 'cancelled'
+        # cancelled is final, so the stream ends
+        assert list(updates) == []
+        assert order_hub.subscriber_count() == 0
+
+    def test_watchers_share_one_poll(self, client, order, django_assert_num_queries):
+        """Test one outbox query serves every watcher."""
+        watchers = [client.watch_order(order.id) for _ in range(3)]
+        for updates in watchers:
+            next(updates)
+        client.update_order_status(order.id, 'processing')
+
+        with django_assert_num_queries(1):
+            assert order_hub.poll() == 3
+
+        assert [next(updates).status for updates in watchers] == ['processing'] * 3
+        for updates in watchers:
+            updates.close()
+        assert order_hub.subscriber_count() == 0
+
+    def test_heartbeat_when_idle(self, client, order, monkeypatch):
+        """Test a heartbeat is sent while nothing changes."""
+        monkeypatch.setattr('orders.grpc_server.ORDER_WATCH_HEARTBEAT_SECONDS', 0)
+        updates = client.watch_order(order.id)
+        next(updates)
+
+        update = next(updates)
+
+        assert update.heartbeat and update.status == 'pending'
+        updates.close()
+
+    def test_unknown_order(self, client):
+        """Test watching a missing order fails with NOT_FOUND."""
+        with pytest.raises(grpc.RpcError) as exc_info:
+            list(client.watch_order(99999))
+
+        assert exc_info.value.code() == grpc.StatusCode.NOT_FOUND
+
+    def test_stream_expires(self, client, order, settings):
+        """Test a stream past ORDER_WATCH_MAX_SECONDS ends so the client reconnects."""
+        settings.ORDER_WATCH_MAX_SECONDS = 0
+
+        assert [update.status for update in client.watch_order(order.id)] == ['pending']
+        assert order_hub.subscriber_count() == 0
+
+    def test_too_many_watchers(self, client, order, monkeypatch):
+        """Test watchers past ORDER_WATCH_MAX_STREAMS fail with RESOURCE_EXHAUSTED."""
+        monkeypatch.setattr('orders.grpc_server.watch_slots', threading.BoundedSemaphore(1))
+        updates = client.watch_order(order.id)
+        next(updates)
+
+        with pytest.raises(grpc.RpcError) as exc_info:
+            next(client.watch_order(order.id))
+        assert exc_info.value.code() == grpc.StatusCode.RESOURCE_EXHAUSTED
+
+        # Closing a stream frees its slot
+        updates.close()
+        assert next(client.watch_order(order.id)).status == 'pending'
@@ -0,0 +1,88 @@
+"""
+Tests for status changes made outside the Order gRPC service.
+"""
+
+from datetime import timedelta
+
+import pytest
+from django.contrib import admin
+from django.utils import timezone
+from core.models import ChangeEvent
+from orders.admin import OrderAdmin
+from orders.models import Order, OrderEvent
+from orders.tasks import process_pending_orders
+from products.models import Product
+
+
+def _admin_form(rf, admin_user, order, status):
+    request = rf.post('/')
+    request.user = admin_user
+    model_admin = OrderAdmin(Order, admin.site)
+    data = {
+        'customer_name': order.customer_name,
+        'customer_email': order.customer_email,
+        'total_amount': order.total_amount,
+        'status': status,
+        'shipping_address': order.shipping_address,
+    }
+    return request, model_admin, model_admin.get_form(request, order)(data=data, instance=order)
+
+
+def _published(order):
+    return list(ChangeEvent.objects.filter(aggregate='order', aggregate_id=order.id).values_list(
+        'event_type', 'payload__status'
+    ))
+
+
+@pytest.mark.django_db
+class TestProcessPendingOrders:
+    """Test cases for auto-processing stale pending orders."""
+
+    def test_logs_and_publishes_changes(self, order):
+        """Test stale orders move to processing with an event and a change feed entry."""
+        Order.objects.filter(id=order.id).update(created_at=timezone.now() - timedelta(days=2))
+
+        assert process_pending_orders() == 'Processed 1 pending orders'
+
+        assert Order.objects.get(id=order.id).status == 'processing'
+        assert list(OrderEvent.objects.values_list('from_status', 'to_status')) == [('pending', 'processing')]
+        assert _published(order) == [('order.status_changed', 'processing')]
+
+    def test_leaves_recent_orders(self, order):
+        """Test orders pending for less than a day are left alone."""
+        assert process_pending_orders() == 'Processed 0 pending orders'
+        assert not OrderEvent.objects.exists()
+
+
+@pytest.mark.django_db
+class TestOrderAdminStatus:
+    """Test cases for editing an order's status in the admin."""
+
+    def test_delivery_is_logged(self, rf, admin_user, order):
+        """Test a status edited in the admin is logged and published."""
+        Order.objects.filter(id=order.id).update(status='shipped')
+        order.refresh_from_db()
+        request, model_admin, form = _admin_form(rf, admin_user, order, 'delivered')
+
+        assert form.is_valid()
+        model_admin.save_model(request, form.save(commit=False), form, change=True)
+
+        assert Order.objects.get(id=order.id).status == 'delivered'
+        assert list(OrderEvent.objects.values_list('from_status', 'to_status')) == [('shipped', 'delivered')]
+        assert _published(order) == [('order.status_changed', 'delivered')]
+
+    def test_cancellation_restores_stock(self, rf, admin_user, order, product):
+        """Test cancelling in the admin returns the ordered stock."""
+        request, model_admin, form = _admin_form(rf, admin_user, order, 'cancelled')
+
+        assert form.is_valid()
+        model_admin.save_model(request, form.save(commit=False), form, change=True)
+
+        assert Product.objects.get(id=product.id).stock_quantity == product.stock_quantity + 2
+
+    def test_rejects_disallowed_transition(self, rf, admin_user, order):
+        """Test the form refuses a status the order cannot move to."""
+        _, _, form = _admin_form(rf, admin_user, order, 'delivered')
+
+        assert not form.is_valid()
+        assert 'status' in form.errors
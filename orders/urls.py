@@ -2,7 +2,9 @@ from django.urls import path
 from orders.views import (
     OrderListCreateView,
     OrderDetailView,
+    OrderWatchView,
     OrderStatusUpdateView,
+    OrderBulkStatusUpdateView,
     OrderCancelView,
     CustomerOrdersView
 )
@@ -10,7 +12,9 @@ from orders.views import (
 urlpatterns = [
     path('', OrderListCreateView.as_view(), name='order-list-create'),
     path('<int:order_id>/', OrderDetailView.as_view(), name='order-detail'),
+    path('<int:order_id>/watch/', OrderWatchView.as_view(), name='order-watch'),
     path('<int:order_id>/status/', OrderStatusUpdateView.as_view(), name='order-status-update'),
+    path('status/bulk/', OrderBulkStatusUpdateView.as_view(), name='order-bulk-status-update'),
     path('<int:order_id>/cancel/', OrderCancelView.as_view(), name='order-cancel'),
     path('customer/<str:customer_email>/', CustomerOrdersView.as_view(), name='customer-orders'),
 ]
@@ -1,8 +1,26 @@
+import threading
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
 from rest_framework.views import APIView
 from rest_framework.response import Response
+from rest_framework.renderers import JSONRenderer
 from rest_framework import status
+from core.renderers import EventStreamRenderer
 from orders.grpc_client import OrderGRPCClient
 import grpc
+import json
+
+
+# Seconds an SSE client waits before reconnecting, sent as the stream's
+# ``retry`` field and as Retry-After when no stream slot is free
+ORDER_WATCH_RETRY_SECONDS = 5
+# Extra time past ORDER_WATCH_MAX_SECONDS before the WatchOrder deadline, so the
+# server ends the stream normally and the deadline only catches a stuck call
+ORDER_WATCH_DEADLINE_GRACE_SECONDS = 30
+
+# Each SSE stream holds a server thread; past this many, the endpoint is a 503
+order_watch_slots = threading.BoundedSemaphore(settings.ORDER_WATCH_SSE_MAX_STREAMS)
 
 
 class OrderListCreateView(APIView):
@@ -195,6 +213,102 @@ class OrderDetailView(APIView):
             )
 
 
+class OrderWatchView(APIView):
+    """Server-sent events stream of an order's status via gRPC WatchOrder"""
+    
+    renderer_classes = [EventStreamRenderer, JSONRenderer]
+    
+    def get(self, request, order_id):
+        """Stream status changes until the order reaches a final status or the stream expires"""
+        if not order_watch_slots.acquire(blocking=False):
+            return _watch_unavailable("Too many order watchers, retry later")
+        client = OrderGRPCClient()
+        try:
+            updates = client.watch_order(
+                order_id,
+                timeout=settings.ORDER_WATCH_MAX_SECONDS + ORDER_WATCH_DEADLINE_GRACE_SECONDS
+            )
+            # Read the current status first so a missing order is a plain 404
+            current = next(updates)
+        except grpc.RpcError as e:
+            client.close()
+            order_watch_slots.release()
+            if e.code() == grpc.StatusCode.RESOURCE_EXHAUSTED:
+                return _watch_unavailable(str(e.details()))
+            code = status.HTTP_404_NOT_FOUND if e.code() == grpc.StatusCode.NOT_FOUND \
+                else status.HTTP_500_INTERNAL_SERVER_ERROR
+            return Response({'error': str(e.details())}, status=code)
+        
+        response = StreamingHttpResponse(
+            OrderStatusEvents(client, current, updates),
+            content_type='text/event-stream'
+        )
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'  # Don't let nginx buffer the stream
+        return response
+
+
+def _watch_unavailable(error):
+    response = Response({'error': error}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    response['Retry-After'] = str(ORDER_WATCH_RETRY_SECONDS)
+    return response
+
+
+class OrderStatusEvents:
+    """
+    SSE body for one WatchOrder call.
+    
+    Django closes the response when the stream ends or the browser
+    disconnects, even if iteration never started, so ``close`` is where the
+    RPC is stopped and the stream slot given back.
+    """
+    
+    def __init__(self, client, current, updates):
+        self._client = client
+        self._updates = updates
+        self._events = _order_status_events(current, updates)
+        self._closed = False
+    
+    def __iter__(self):
+        return self._events
+    
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._events.close()
+        if hasattr(self._updates, 'cancel'):
+            self._updates.cancel()
+        else:
+            self._updates.close()
+        self._client.close()
+        order_watch_slots.release()
+
+
+def _order_status_events(current, updates):
+    """Format WatchOrder updates as SSE ``status`` events, heartbeats as comments"""
+    yield f"retry: {ORDER_WATCH_RETRY_SECONDS * 1000}\n\n"
+    yield _status_event(current)
+    try:
+        for update in updates:
+            if update.heartbeat:
+                yield ': heartbeat\n\n'
+            else:
+                yield _status_event(update)
+    except grpc.RpcError as e:
+        yield f"event: error\ndata: {json.dumps({'error': str(e.details())})}\n\n"
+
+
+def _status_event(update):
+    data = json.dumps({
+        'id': update.id,
+        'status': update.status,
+        'previous_status': update.previous_status,
+        'updated_at': update.updated_at,
+    })
+    return f"event: status\ndata: {data}\n\n"
+
+
 class OrderStatusUpdateView(APIView):
     """API view for updating order status via gRPC"""
     
@@ -246,6 +360,61 @@ class OrderStatusUpdateView(APIView):
             )
 
 
+class OrderBulkStatusUpdateView(APIView):
+    """API view for updating the status of many orders via gRPC"""
+    
+    def post(self, request):
+        """Move a batch of orders to a new status"""
+        try:
+            data = request.data
+            
+            if 'status' not in data or 'order_ids' not in data:
+                return Response(
+                    {'error': 'order_ids and status fields are required'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            if not isinstance(data['order_ids'], list) or len(data['order_ids']) == 0:
+                return Response(
+                    {'error': 'order_ids must be a non-empty list'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            client = OrderGRPCClient()
+            response = client.bulk_update_order_status(
+                [int(order_id) for order_id in data['order_ids']],
+                data['status']
+            )
+            client.close()
+            
+            return Response({
+                'success': True,
+                'message': response.message,
+                'updated_count': response.updated_count,
+                'results': [
+                    {
+                        'id': result.id,
+                        'success': result.success,
+                        'previous_status': result.previous_status or None,
+                        'message': result.message,
+                    }
+                    for result in response.results
+                ]
+            })
+        except grpc.RpcError as e:
+            error_status = (
+                status.HTTP_400_BAD_REQUEST
+                if e.code() == grpc.StatusCode.INVALID_ARGUMENT
+                else status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+            return Response({'error': str(e.details())}, status=error_status)
+        except Exception as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+
 class OrderCancelView(APIView):
     """API view for cancelling orders via gRPC"""
     
@@ -286,10 +455,27 @@ class CustomerOrdersView(APIView):
     """API view for retrieving customer orders via gRPC"""
     
     def get(self, request, customer_email):
-        """Get all orders for a customer"""
+        """Get a page of orders for a customer"""
         try:
+            page_size = int(request.query_params.get('page_size') or 0)
+        except ValueError:
+            return Response(
+                {'error': 'page_size must be an integer'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            cursor = request.query_params.get('cursor', '')
+            
             client = OrderGRPCClient()
-            response = client.get_orders_by_customer(customer_email)
+            response = client.get_orders_by_customer(
+                customer_email,
+                page_size=page_size,
+                cursor=cursor,
+                created_after=request.query_params.get('created_after', ''),
+                created_before=request.query_params.get('created_before', ''),
+                include_total=not cursor
+            )
             client.close()
             
             orders = [
@@ -319,11 +505,16 @@ class CustomerOrdersView(APIView):
             return Response({
                 'orders': orders,
                 'total_count': response.total_count,
+                'next_cursor': response.next_cursor or None,
             })
         except grpc.RpcError as e:
+            error_status = {
+                grpc.StatusCode.INVALID_ARGUMENT: status.HTTP_400_BAD_REQUEST,
+                grpc.StatusCode.NOT_FOUND: status.HTTP_404_NOT_FOUND,
+            }.get(e.code(), status.HTTP_500_INTERNAL_SERVER_ERROR)
             return Response(
                 {'error': str(e.details())},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                status=error_status
             )
         except Exception as e:
             return Response(
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+# Generated by the protocol buffer compiler.  DO NOT EDIT!
+# source: orders.proto
+"""Generated protocol buffer code."""
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import descriptor_pool as _descriptor_pool
+from google.protobuf import symbol_database as _symbol_database
+from google.protobuf.internal import builder as _builder
+# @@protoc_insertion_point(imports)
+
+_sym_db = _symbol_database.Default()
+
+
+
+
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x0corders.proto\x12\x06orders\"h\n\tOrderItem\x12\x12\n\nproduct_id\x18\x01 \x01(\x05\x12\x14\n\x0cproduct_name\x18\x02 \x01(\t\x12\x10\n\x08quantity\x18\x03 \x01(\x05\x12\r\n\x05price\x18\x04 \x01(\x01\x12\x10\n\x08subtotal\x18\x05 \x01(\x01\"\xcc\x01\n\x05Order\x12\n\n\x02id\x18\x01 \x01(\x05\x12\x15\n\rcustomer_name\x18\x02 \x01(\t\x12\x16\n\x0e\x63ustomer_email\x18\x03 \x01(\t\x12 \n\x05items\x18\x04 \x03(\x0b\x32\x11.orders.OrderItem\x12\x14\n\x0ctotal_amount\x18\x05 \x01(\x01\x12\x0e\n\x06status\x18\x06 \x01(\t\x12\x18\n\x10shipping_address\x18\x07 \x01(\t\x12\x12\n\ncreated_at\x18\x08 \x01(\t\x12\x12\n\nupdated_at\x18\t \x01(\t\"\x7f\n\x12\x43reateOrderRequest\x12\x15\n\rcustomer_name\x18\x01 \x01(\t\x12\x16\n\x0e\x63ustomer_email\x18\x02 \x01(\t\x12 \n\x05items\x18\x03 \x03(\x0b\x32\x11.orders.OrderItem\x12\x18\n\x10shipping_address\x18\x04 \x01(\t\"\x1d\n\x0fGetOrderRequest\x12\n\n\x02id\x18\x01 \x01(\x05\"D\n\x11ListOrdersRequest\x12\x0c\n\x04page\x18\x01 \x01(\x05\x12\x11\n\tpage_size\x18\x02 \x01(\x05\x12\x0e\n\x06status\x18\x03 \x01(\t\"~\n\x12ListOrdersResponse\x12\x1d\n\x06orders\x18\x01 \x03(\x0b\x32\r.orders.Order\x12\x13\n\x0btotal_count\x18\x02 \x01(\x05\x12\x0c\n\x04page\x18\x03 \x01(\x05\x12\x11\n\tpage_size\x18\x04 \x01(\x05\x12\x13\n\x0bnext_cursor\x18\x05 \x01(\t\"6\n\x18UpdateOrderStatusRequest\x12\n\n\x02id\x18\x01 \x01(\x05\x12\x0e\n\x06status\x18\x02 \x01(\t\";\n\x1c\x42ulkUpdateOrderStatusRequest\x12\x0b\n\x03ids\x18\x01 \x03(\x05\x12\x0e\n\x06status\x18\x02 \x01(\t\"Z\n\x11OrderStatusResult\x12\n\n\x02id\x18\x01 \x01(\x05\x12\x0f\n\x07success\x18\x02 \x01(\x08\x12\x17\n\x0fprevious_status\x18\x03 \x01(\t\x12\x0f\n\x07message\x18\x04 \x01(\t\"\x84\x01\n\x1d\x42ulkUpdateOrderStatusResponse\x12*\n\x07results\x18\x01 \x03(\x0b\x32\x19.orders.OrderStatusResult\x12\x15\n\rupdated_count\x18\x02 \x01(\x05\x12\x0f\n\x07success\x18\x03 \x01(\x08\x12\x0f\n\x07message\x18\x04 \x01(\t\"\x1f\n\x11WatchOrderRequest\x12\n\n\x02id\x18\x01 \x01(\x05\"o\n\x11OrderStatusUpdate\x12\n\n\x02id\x18\x01 \x01(\x05\x12\x0e\n\x06status\x18\x02 \x01(\t\x12\x17\n\x0fprevious_status\x18\x03 \x01(\t\x12\x12\n\nupdated_at\x18\x04 \x01(\t\x12\x11\n\theartbeat\x18\x05 \x01(\x08\" \n\x12\x43\x61ncelOrderRequest\x12\n\n\x02id\x18\x01 \x01(\x05\"\x9d\x01\n\x1aGetOrdersByCustomerRequest\x12\x16\n\x0e\x63ustomer_email\x18\x01 \x01(\t\x12\x11\n\tpage_size\x18\x02 \x01(\x05\x12\x0e\n\x06\x63ursor\x18\x03 \x01(\t\x12\x15\n\rcreated_after\x18\x04 \x01(\t\x12\x16\n\x0e\x63reated_before\x18\x05 \x01(\t\x12\x15\n\rinclude_total\x18\x06 \x01(\x08\"O\n\rOrderResponse\x12\x1c\n\x05order\x18\x01 \x01(\x0b\x32\r.orders.Order\x12\x0f\n\x07success\x18\x02 \x01(\x08\x12\x0f\n\x07message\x18\x03 \x01(\t2\xb3\x05\n\x0cOrderService\x12@\n\x0b\x43reateOrder\x12\x1a.orders.CreateOrderRequest\x1a\x15.orders.OrderResponse\x12:\n\x08GetOrder\x12\x17.orders.GetOrderRequest\x1a\x15.orders.OrderResponse\x12\x43\n\nListOrders\x12\x19.orders.ListOrdersRequest\x1a\x1a.orders.ListOrdersResponse\x12L\n\x11UpdateOrderStatus\x12 .orders.UpdateOrderStatusRequest\x1a\x15.orders.OrderResponse\x12@\n\x0b\x43\x61ncelOrder\x12\x1a.orders.CancelOrderRequest\x1a\x15.orders.OrderResponse\x12U\n\x13GetOrdersByCustomer\x12\".orders.GetOrdersByCustomerRequest\x1a\x1a.orders.ListOrdersResponse\x12M\n\x16StreamOrdersByCustomer\x12\".orders.GetOrdersByCustomerRequest\x1a\r.orders.Order0\x01\x12\x64\n\x15\x42ulkUpdateOrderStatus\x12$.orders.BulkUpdateOrderStatusRequest\x1a%.orders.BulkUpdateOrderStatusResponse\x12\x44\n\nWatchOrder\x12\x19.orders.WatchOrderRequest\x1a\x19.orders.OrderStatusUpdate0\x01\x62\x06proto3')
+
+_globals = globals()
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
+_builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'orders_pb2', _globals)
+if _descriptor._USE_C_DESCRIPTORS == False:
+  DESCRIPTOR._options = None
+  _globals['_ORDERITEM']._serialized_start=24
+  _globals['_ORDERITEM']._serialized_end=128
+  _globals['_ORDER']._serialized_start=131
+  _globals['_ORDER']._serialized_end=335
+  _globals['_CREATEORDERREQUEST']._serialized_start=337
+  _globals['_CREATEORDERREQUEST']._serialized_end=464
+  _globals['_GETORDERREQUEST']._serialized_start=466
+  _globals['_GETORDERREQUEST']._serialized_end=495
+  _globals['_LISTORDERSREQUEST']._serialized_start=497
+  _globals['_LISTORDERSREQUEST']._serialized_end=565
+  _globals['_LISTORDERSRESPONSE']._serialized_start=567
+  _globals['_LISTORDERSRESPONSE']._serialized_end=693
+  _globals['_UPDATEORDERSTATUSREQUEST']._serialized_start=695
+  _globals['_UPDATEORDERSTATUSREQUEST']._serialized_end=749
+  _globals['_BULKUPDATEORDERSTATUSREQUEST']._serialized_start=751
+  _globals['_BULKUPDATEORDERSTATUSREQUEST']._serialized_end=810
+  _globals['_ORDERSTATUSRESULT']._serialized_start=812
+  _globals['_ORDERSTATUSRESULT']._serialized_end=902
+  _globals['_BULKUPDATEORDERSTATUSRESPONSE']._serialized_start=905
+  _globals['_BULKUPDATEORDERSTATUSRESPONSE']._serialized_end=1037
+  _globals['_WATCHORDERREQUEST']._serialized_start=1039
+  _globals['_WATCHORDERREQUEST']._serialized_end=1070
+  _globals['_ORDERSTATUSUPDATE']._serialized_start=1072
+  _globals['_ORDERSTATUSUPDATE']._serialized_end=1183
+  _globals['_CANCELORDERREQUEST']._serialized_start=1185
+  _globals['_CANCELORDERREQUEST']._serialized_end=1217
+  _globals['_GETORDERSBYCUSTOMERREQUEST']._serialized_start=1220
+  _globals['_GETORDERSBYCUSTOMERREQUEST']._serialized_end=1377
+  _globals['_ORDERRESPONSE']._serialized_start=1379
+  _globals['_ORDERRESPONSE']._serialized_end=1458
+  _globals['_ORDERSERVICE']._serialized_start=1461
+  _globals['_ORDERSERVICE']._serialized_end=2152
+# @@protoc_insertion_point(module_scope)
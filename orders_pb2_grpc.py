@@ -0,0 +1,333 @@
+# Generated by the gRPC Python protocol compiler plugin. DO NOT EDIT!
+"""Client and server classes corresponding to protobuf-defined services."""
+import grpc
+
+import orders_pb2 as orders__pb2
+
+
+class OrderServiceStub(object):
+    """Order Service Definition
+    """
+
+    def __init__(self, channel):
+        """Constructor.
+
+        Args:
+            channel: A grpc.Channel.
+        """
+        self.CreateOrder = channel.unary_unary(
+                '/orders.OrderService/CreateOrder',
+                request_serializer=orders__pb2.CreateOrderRequest.SerializeToString,
+                response_deserializer=orders__pb2.OrderResponse.FromString,
+                )
+        self.GetOrder = channel.unary_unary(
+                '/orders.OrderService/GetOrder',
+                request_serializer=orders__pb2.GetOrderRequest.SerializeToString,
+                response_deserializer=orders__pb2.OrderResponse.FromString,
+                )
+        self.ListOrders = channel.unary_unary(
+                '/orders.OrderService/ListOrders',
+                request_serializer=orders__pb2.ListOrdersRequest.SerializeToString,
+                response_deserializer=orders__pb2.ListOrdersResponse.FromString,
+                )
+        self.UpdateOrderStatus = channel.unary_unary(
+                '/orders.OrderService/UpdateOrderStatus',
+                request_serializer=orders__pb2.UpdateOrderStatusRequest.SerializeToString,
+                response_deserializer=orders__pb2.OrderResponse.FromString,
+                )
+        self.CancelOrder = channel.unary_unary(
+                '/orders.OrderService/CancelOrder',
+                request_serializer=orders__pb2.CancelOrderRequest.SerializeToString,
+                response_deserializer=orders__pb2.OrderResponse.FromString,
+                )
+        self.GetOrdersByCustomer = channel.unary_unary(
+                '/orders.OrderService/GetOrdersByCustomer',
+                request_serializer=orders__pb2.GetOrdersByCustomerRequest.SerializeToString,
+                response_deserializer=orders__pb2.ListOrdersResponse.FromString,
+                )
+        self.StreamOrdersByCustomer = channel.unary_stream(
+                '/orders.OrderService/StreamOrdersByCustomer',
+                request_serializer=orders__pb2.GetOrdersByCustomerRequest.SerializeToString,
+                response_deserializer=orders__pb2.Order.FromString,
+                )
+        self.BulkUpdateOrderStatus = channel.unary_unary(
+                '/orders.OrderService/BulkUpdateOrderStatus',
+                request_serializer=orders__pb2.BulkUpdateOrderStatusRequest.SerializeToString,
+                response_deserializer=orders__pb2.BulkUpdateOrderStatusResponse.FromString,
+                )
+        self.WatchOrder = channel.unary_stream(
+                '/orders.OrderService/WatchOrder',
+                request_serializer=orders__pb2.WatchOrderRequest.SerializeToString,
+                response_deserializer=orders__pb2.OrderStatusUpdate.FromString,
+                )
+
+
+class OrderServiceServicer(object):
+    """Order Service Definition
+    """
+
+    def CreateOrder(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetOrder(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def ListOrders(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def UpdateOrderStatus(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def CancelOrder(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetOrdersByCustomer(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def StreamOrdersByCustomer(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def BulkUpdateOrderStatus(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def WatchOrder(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+
+def add_OrderServiceServicer_to_server(servicer, server):
+    rpc_method_handlers = {
+            'CreateOrder': grpc.unary_unary_rpc_method_handler(
+                    servicer.CreateOrder,
+                    request_deserializer=orders__pb2.CreateOrderRequest.FromString,
+                    response_serializer=orders__pb2.OrderResponse.SerializeToString,
+            ),
+            'GetOrder': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetOrder,
+                    request_deserializer=orders__pb2.GetOrderRequest.FromString,
+                    response_serializer=orders__pb2.OrderResponse.SerializeToString,
+            ),
+            'ListOrders': grpc.unary_unary_rpc_method_handler(
+                    servicer.ListOrders,
+                    request_deserializer=orders__pb2.ListOrdersRequest.FromString,
+                    response_serializer=orders__pb2.ListOrdersResponse.SerializeToString,
+            ),
+            'UpdateOrderStatus': grpc.unary_unary_rpc_method_handler(
+                    servicer.UpdateOrderStatus,
+                    request_deserializer=orders__pb2.UpdateOrderStatusRequest.FromString,
+                    response_serializer=orders__pb2.OrderResponse.SerializeToString,
+            ),
+            'CancelOrder': grpc.unary_unary_rpc_method_handler(
+                    servicer.CancelOrder,
+                    request_deserializer=orders__pb2.CancelOrderRequest.FromString,
+                    response_serializer=orders__pb2.OrderResponse.SerializeToString,
+            ),
+            'GetOrdersByCustomer': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetOrdersByCustomer,
+                    request_deserializer=orders__pb2.GetOrdersByCustomerRequest.FromString,
+                    response_serializer=orders__pb2.ListOrdersResponse.SerializeToString,
+            ),
+            'StreamOrdersByCustomer': grpc.unary_stream_rpc_method_handler(
+                    servicer.StreamOrdersByCustomer,
+                    request_deserializer=orders__pb2.GetOrdersByCustomerRequest.FromString,
+                    response_serializer=orders__pb2.Order.SerializeToString,
+            ),
+            'BulkUpdateOrderStatus': grpc.unary_unary_rpc_method_handler(
+                    servicer.BulkUpdateOrderStatus,
+                    request_deserializer=orders__pb2.BulkUpdateOrderStatusRequest.FromString,
+                    response_serializer=orders__pb2.BulkUpdateOrderStatusResponse.SerializeToString,
+            ),
+            'WatchOrder': grpc.unary_stream_rpc_method_handler(
+                    servicer.WatchOrder,
+                    request_deserializer=orders__pb2.WatchOrderRequest.FromString,
+                    response_serializer=orders__pb2.OrderStatusUpdate.SerializeToString,
+            ),
+    }
+    generic_handler = grpc.method_handlers_generic_handler(
+            'orders.OrderService', rpc_method_handlers)
+    server.add_generic_rpc_handlers((generic_handler,))
+
+
+ # This class is part of an EXPERIMENTAL API.
+class OrderService(object):
+    """Order Service Definition
+    """
+
+    @staticmethod
+    def CreateOrder(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/orders.OrderService/CreateOrder',
+            orders__pb2.CreateOrderRequest.SerializeToString,
+            orders__pb2.OrderResponse.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def GetOrder(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/orders.OrderService/GetOrder',
+            orders__pb2.GetOrderRequest.SerializeToString,
+            orders__pb2.OrderResponse.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def ListOrders(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/orders.OrderService/ListOrders',
+            orders__pb2.ListOrdersRequest.SerializeToString,
+            orders__pb2.ListOrdersResponse.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def UpdateOrderStatus(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/orders.OrderService/UpdateOrderStatus',
+            orders__pb2.UpdateOrderStatusRequest.SerializeToString,
+            orders__pb2.OrderResponse.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def CancelOrder(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/orders.OrderService/CancelOrder',
+            orders__pb2.CancelOrderRequest.SerializeToString,
+            orders__pb2.OrderResponse.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def GetOrdersByCustomer(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/orders.OrderService/GetOrdersByCustomer',
+            orders__pb2.GetOrdersByCustomerRequest.SerializeToString,
+            orders__pb2.ListOrdersResponse.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def StreamOrdersByCustomer(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(request, target, '/orders.OrderService/StreamOrdersByCustomer',
+            orders__pb2.GetOrdersByCustomerRequest.SerializeToString,
+            orders__pb2.Order.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def BulkUpdateOrderStatus(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/orders.OrderService/BulkUpdateOrderStatus',
+            orders__pb2.BulkUpdateOrderStatusRequest.SerializeToString,
+            orders__pb2.BulkUpdateOrderStatusResponse.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def WatchOrder(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(request, target, '/orders.OrderService/WatchOrder',
+            orders__pb2.WatchOrderRequest.SerializeToString,
+            orders__pb2.OrderStatusUpdate.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
@@ -1,10 +1,61 @@
+from django.conf import settings
 from django.contrib import admin
-from products.models import Product
+from django.db import transaction
+from products.models import InventoryMovement, InventorySnapshot, Product
+from products.stock import record_movements, set_stock_shard_count
 
 
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
-    list_display = ['id', 'name', 'category', 'price', 'stock_quantity', 'created_at']
+    list_display = ['id', 'name', 'category', 'price', 'available_stock', 'stock_shard_count', 'created_at']
     list_filter = ['category', 'created_at']
     search_fields = ['name', 'description']
     ordering = ['-created_at']
+    readonly_fields = ['stock_shard_count']
+    actions = ['enable_stock_sharding', 'disable_stock_sharding']
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_live_stock()
+    
+    def save_model(self, request, obj, form, change):
+        """Record an edited stock level in the ledger as an adjustment.
+        
+        The difference is taken from the locked row rather than the form's
+        initial value, so stock sold while the form was open is not counted
+        as part of the adjustment. New products get their opening balance
+        from the ``post_save`` handler in products.signals.
+        """
+        if not change:
+            return super().save_model(request, obj, form, change)
+        with transaction.atomic():
+            current = Product.objects.select_for_update().values_list('stock_quantity', flat=True).get(id=obj.id)
+            if obj.stock_quantity != current:
+                record_movements([(obj.id, obj.stock_quantity - current, 'admin')], 'adjustment')
+            super().save_model(request, obj, form, change)
+    
+    @admin.action(description="Enable stock sharding for hot products")
+    def enable_stock_sharding(self, request, queryset):
+        for product_id in queryset.values_list('id', flat=True):
+            set_stock_shard_count(product_id, settings.STOCK_SHARD_COUNT)
+        self.message_user(request, f"Stock split across {settings.STOCK_SHARD_COUNT} shards.")
+    
+    @admin.action(description="Disable stock sharding")
+    def disable_stock_sharding(self, request, queryset):
+        for product_id in queryset.values_list('id', flat=True):
+            set_stock_shard_count(product_id, 0)
+        self.message_user(request, "Stock shards merged back into the product.")
+
+
+@admin.register(InventoryMovement)
+class InventoryMovementAdmin(admin.ModelAdmin):
+    list_display = ['id', 'product', 'quantity', 'reason', 'reference', 'created_at']
+    list_filter = ['reason', 'created_at']
+    search_fields = ['reference']
+    raw_id_fields = ['product']
+
+
+@admin.register(InventorySnapshot)
+class InventorySnapshotAdmin(admin.ModelAdmin):
+    list_display = ['id', 'product', 'stock_quantity', 'taken_at']
+    list_filter = ['taken_at']
+    raw_id_fields = ['product']
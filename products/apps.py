@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class ProductsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'products'
+    
+    def ready(self):
+        from prometheus_client import REGISTRY
+        from . import signals  # noqa: F401
+        from .stock import StockDeltaBufferCollector
+        
+        REGISTRY.register(StockDeltaBufferCollector())
@@ -1,14 +1,37 @@
-import grpc
+from django.conf import settings
 import products_pb2
 import products_pb2_grpc
+from core.grpc_transport import create_channel_and_stub, resolve_target
+
+
+def _product_servicer():
+    from products.grpc_server import ProductServiceServicer
+    return ProductServiceServicer()
 
 
 class ProductGRPCClient:
     """Client for interacting with Product gRPC service"""
     
-    def __init__(self, host='localhost', port=50051):
-        self.channel = grpc.insecure_channel(f'{host}:{port}')
-        self.stub = products_pb2_grpc.ProductServiceStub(self.channel)
+    def __init__(self, host=None, port=None, address=None, transport=None):
+        """
+        Args:
+            host: Server host, defaults to GRPC_PRODUCT_SERVER_HOST
+            port: Server port, defaults to GRPC_PRODUCT_SERVER_PORT
+            address: Full target such as ``unix:/run/ecommerce/products.sock``;
+                overrides host/port, defaults to GRPC_PRODUCT_SERVER_ADDRESS
+            transport: ``network`` or ``inprocess``, defaults to GRPC_TRANSPORT
+        """
+        target = resolve_target(
+            address or settings.GRPC_PRODUCT_SERVER_ADDRESS,
+            host or settings.GRPC_PRODUCT_SERVER_HOST,
+            port or settings.GRPC_PRODUCT_SERVER_PORT,
+        )
+        self.channel, self.stub = create_channel_and_stub(
+            products_pb2_grpc.ProductServiceStub,
+            _product_servicer,
+            target,
+            transport or settings.GRPC_TRANSPORT,
+        )
     
     def create_product(self, name, description, price, stock_quantity, category):
         """Create a new product"""
@@ -9,8 +9,14 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ecommerce_grpc.settings')
 django.setup()
 
-from products.models import Product
+from django.conf import settings
+from products.models import Product, StockShard
+from products.stock import rebalance_stock_shards, record_movements
+from django.db import transaction
 from django.db.models import Q
+from core.grpc_compression import compress_response
+from core.outbox import record_change
+from core.grpc_transport import resolve_bind_address
 import products_pb2
 import products_pb2_grpc
 
@@ -25,22 +31,35 @@ class ProductServiceServicer(products_pb2_grpc.ProductServiceServicer):
             name=product.name,
             description=product.description,
             price=float(product.price),
-            stock_quantity=product.stock_quantity,
+            stock_quantity=product.available_stock,
             category=product.category,
             created_at=product.created_at.isoformat(),
             updated_at=product.updated_at.isoformat(),
         )
     
+    def _change_payload(self, product, **extra):
+        """Build the outbox event payload for a product"""
+        return {
+            'id': product.id,
+            'name': product.name,
+            'price': float(product.price),
+            'category': product.category,
+            'stock_quantity': product.available_stock,
+            **extra,
+        }
+    
     def CreateProduct(self, request, context):
         """Create a new product"""
         try:
-            product = Product.objects.create(
-                name=request.name,
-                description=request.description,
-                price=request.price,
-                stock_quantity=request.stock_quantity,
-                category=request.category,
-            )
+            with transaction.atomic():
+                product = Product.objects.create(
+                    name=request.name,
+                    description=request.description,
+                    price=request.price,
+                    stock_quantity=request.stock_quantity,
+                    category=request.category,
+                )
+                record_change('product', product.id, 'product.created', self._change_payload(product))
             return products_pb2.ProductResponse(
                 product=self._product_to_proto(product),
                 success=True,
@@ -57,7 +76,7 @@ class ProductServiceServicer(products_pb2_grpc.ProductServiceServicer):
     def GetProduct(self, request, context):
         """Get a product by ID"""
         try:
-            product = Product.objects.get(id=request.id)
+            product = Product.objects.with_live_stock().get(id=request.id)
             return products_pb2.ProductResponse(
                 product=self._product_to_proto(product),
                 success=True,
@@ -87,17 +106,17 @@ class ProductServiceServicer(products_pb2_grpc.ProductServiceServicer):
             start = (page - 1) * page_size
             end = start + page_size
             
-            products = Product.objects.all()[start:end]
+            products = Product.objects.with_live_stock()[start:end]
             total_count = Product.objects.count()
             
             product_list = [self._product_to_proto(p) for p in products]
             
-            return products_pb2.ListProductsResponse(
+            return compress_response(context, products_pb2.ListProductsResponse(
                 products=product_list,
                 total_count=total_count,
                 page=page,
                 page_size=page_size
-            )
+            ))
         except Exception as e:
             context.set_code(grpc.StatusCode.INTERNAL)
             context.set_details(str(e))
@@ -108,23 +127,58 @@ class ProductServiceServicer(products_pb2_grpc.ProductServiceServicer):
                 page_size=0
             )
     
+    def _overwrite_stock(self, product, stock_quantity):
+        """Save a locked product with its total stock set to ``stock_quantity``
+        
+        The difference is recorded as an adjustment. A sharded product's
+        shards are emptied into the total and refilled by a rebalance, so
+        the overwrite covers the stock they held. Returns the previous total.
+        """
+        previous_stock = product.stock_quantity
+        if product.stock_shard_count:
+            shards = StockShard.objects.select_for_update().filter(product=product)
+            previous_stock += sum(shards.values_list('quantity', flat=True))
+            shards.update(quantity=0)
+        record_movements([(product.id, stock_quantity - previous_stock, '')], 'adjustment')
+        product.stock_quantity = stock_quantity
+        product.save()
+        
+        if product.stock_shard_count:
+            rebalance_stock_shards(product.id)
+            product.refresh_from_db()
+        return previous_stock
+    
     def UpdateProduct(self, request, context):
         """Update an existing product"""
         try:
-            product = Product.objects.get(id=request.id)
-            
-            if request.name:
-                product.name = request.name
-            if request.description:
-                product.description = request.description
-            if request.price > 0:
-                product.price = request.price
-            if request.stock_quantity >= 0:
-                product.stock_quantity = request.stock_quantity
-            if request.category:
-                product.category = request.category
-            
-            product.save()
+            with transaction.atomic():
+                # Lock the row so the recorded movement matches the overwrite
+                product = Product.objects.select_for_update().get(id=request.id)
+                
+                fields = []
+                previous_stock = None
+                if request.name:
+                    product.name = request.name
+                    fields.append('name')
+                if request.description:
+                    product.description = request.description
+                    fields.append('description')
+                if request.price > 0:
+                    product.price = request.price
+                    fields.append('price')
+                if request.category:
+                    product.category = request.category
+                    fields.append('category')
+                
+                if request.stock_quantity >= 0:
+                    previous_stock = self._overwrite_stock(product, request.stock_quantity)
+                    fields.append('stock_quantity')
+                else:
+                    product.save()
+                
+                record_change('product', product.id, 'product.updated', self._change_payload(
+                    product, fields=fields, previous_stock=previous_stock
+                ))
             
             return products_pb2.ProductResponse(
                 product=self._product_to_proto(product),
@@ -174,7 +228,7 @@ class ProductServiceServicer(products_pb2_grpc.ProductServiceServicer):
     def SearchProducts(self, request, context):
         """Search products by query, category, and price range"""
         try:
-            queryset = Product.objects.all()
+            queryset = Product.objects.with_live_stock()
             
             # Apply filters
             if request.query:
@@ -195,12 +249,12 @@ class ProductServiceServicer(products_pb2_grpc.ProductServiceServicer):
             products = queryset[:50]  # Limit to 50 results
             product_list = [self._product_to_proto(p) for p in products]
             
-            return products_pb2.ListProductsResponse(
+            return compress_response(context, products_pb2.ListProductsResponse(
                 products=product_list,
                 total_count=queryset.count(),
                 page=1,
                 page_size=len(product_list)
-            )
+            ))
         except Exception as e:
             context.set_code(grpc.StatusCode.INTERNAL)
             context.set_details(str(e))
@@ -212,17 +266,31 @@ class ProductServiceServicer(products_pb2_grpc.ProductServiceServicer):
             )
 
 
-def serve(port=50051):
-    """Start the gRPC server"""
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
+def create_server(port=50051, address=None, max_workers=10):
+    """Build an unstarted gRPC server and return it with its bind address
+
+    ``address`` replaces the TCP port binding, e.g. ``unix:/run/ecommerce/products.sock``
+    for Django and the gRPC servers running in the same pod.
+    """
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=max_workers))
     products_pb2_grpc.add_ProductServiceServicer_to_server(
         ProductServiceServicer(), server
     )
-    server.add_insecure_port(f'[::]:{port}')
+    bind_address = resolve_bind_address(address, port)
+    server.add_insecure_port(bind_address)
+    return server, bind_address
+
+
+def serve(port=50051, address=None):
+    """Start the gRPC server"""
+    server, bind_address = create_server(port=port, address=address)
     server.start()
-    print(f"Product gRPC Server started on port {port}")
+    print(f"Product gRPC Server started on {bind_address}")
     server.wait_for_termination()
 
 
 if __name__ == '__main__':
-    serve()
+    serve(
+        port=settings.GRPC_PRODUCT_SERVER_PORT,
+        address=settings.GRPC_PRODUCT_SERVER_ADDRESS or None,
+    )
@@ -0,0 +1,36 @@
+"""
+Check every product's stock_quantity against the inventory ledger.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from products.stock import iter_ledger_stock
+
+
+class Command(BaseCommand):
+    help = "Compare Product.stock_quantity with the inventory ledger, in chunks"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Products per query')
+        parser.add_argument('--fail-on-drift', action='store_true', help='Exit non-zero if any product drifts')
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be positive')
+
+        checked = 0
+        drifted = 0
+        for rows in iter_ledger_stock(chunk_size=options['chunk_size']):
+            checked += len(rows)
+            for product_id, stock_quantity, ledger_stock in rows:
+                if stock_quantity != ledger_stock:
+                    drifted += 1
+                    self.stdout.write(
+                        f"Product {product_id}: stock_quantity={stock_quantity} "
+                        f"ledger={ledger_stock} drift={stock_quantity - ledger_stock:+d}"
+                    )
+
+        summary = f"Checked {checked} products, {drifted} out of balance"
+        if drifted and options['fail_on_drift']:
+            raise CommandError(summary)
+        style = self.style.WARNING if drifted else self.style.SUCCESS
+        self.stdout.write(style(summary))
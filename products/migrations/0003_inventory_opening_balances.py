@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-18 22:28
+
+from django.db import migrations
+
+
+def record_opening_balances(apps, schema_editor):
+    """Seed the ledger with each existing product's current stock."""
+    Product = apps.get_model('products', 'Product')
+    InventoryMovement = apps.get_model('products', 'InventoryMovement')
+    products = Product.objects.exclude(stock_quantity=0).values_list('id', 'stock_quantity')
+    InventoryMovement.objects.bulk_create(
+        (
+            InventoryMovement(product_id=product_id, quantity=stock_quantity, reason='initial')
+            for product_id, stock_quantity in products.iterator(chunk_size=1000)
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0002_inventory_ledger'),
+    ]
+
+    operations = [
+        migrations.RunPython(record_opening_balances, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.7 on 2026-10-18 22:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0003_inventory_opening_balances'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingStockDelta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.IntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pending_stock_deltas', to='products.product')),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+    ]
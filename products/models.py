@@ -1,4 +1,51 @@
 from django.db import models
+from django.db.models import F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.db.models.query import ModelIterable
+from django.utils import timezone
+
+
+def live_stock_expression(prefix=''):
+    """
+    A product's stock row plus its stock shards, as an expression.
+    
+    Args:
+        prefix: Path to the product from the queried model, e.g. ``'product__'``
+    """
+    shards = StockShard.objects.filter(product=OuterRef(f'{prefix}pk')).order_by().values(
+        'product'
+    ).annotate(total=Sum('quantity')).values('total')
+    return F(f'{prefix}stock_quantity') + Coalesce(Subquery(shards), Value(0))
+
+
+class ProductLiveStockIterable(ModelIterable):
+    """Yields rows whose selected ``product`` carries the ``product_live_stock`` annotation"""
+    
+    def __iter__(self):
+        for obj in super().__iter__():
+            obj.product.live_stock = obj.product_live_stock
+            yield obj
+
+
+def with_product_live_stock(queryset):
+    """
+    Select each row's ``product`` along with its live stock.
+    
+    For querysets of models with a ``product`` foreign key, such as cart and
+    wishlist items. The rows get a ``product_live_stock`` annotation to filter
+    on, and their products' ``available_stock`` costs no further queries.
+    """
+    queryset = queryset.select_related('product').annotate(product_live_stock=live_stock_expression('product__'))
+    queryset._iterable_class = ProductLiveStockIterable
+    return queryset
+
+
+class ProductQuerySet(models.QuerySet):
+    """QuerySet for products"""
+    
+    def with_live_stock(self):
+        """Annotate ``live_stock``: the product row's stock plus its stock shards"""
+        return self.annotate(live_stock=live_stock_expression())
 
 
 class Product(models.Model):
@@ -18,10 +65,16 @@ class Product(models.Model):
     description = models.TextField()
     price = models.DecimalField(max_digits=10, decimal_places=2)
     stock_quantity = models.IntegerField(default=0)
+    stock_shard_count = models.PositiveSmallIntegerField(
+        default=0,
+        help_text="Split stock across this many counter shards for hot products; 0 disables"
+    )
     category = models.CharField(max_length=50, choices=CATEGORY_CHOICES, default='other')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = ProductQuerySet.as_manager()
+    
     class Meta:
         ordering = ['-created_at']
         indexes = [
@@ -32,5 +85,92 @@ class Product(models.Model):
     def __str__(self):
         return self.name
     
+    @property
+    def available_stock(self):
+        """Sellable stock: ``stock_quantity`` plus any stock shards"""
+        if hasattr(self, 'live_stock'):
+            return self.live_stock
+        if not self.stock_shard_count:
+            return self.stock_quantity
+        shards = self.stock_shards.aggregate(total=Sum('quantity'))['total']
+        return self.stock_quantity + (shards or 0)
+    
     def is_in_stock(self):
-        return self.stock_quantity > 0
+        return self.available_stock > 0
+
+
+class StockShard(models.Model):
+    """One slice of a hot product's stock
+    
+    Orders for a sharded product decrement a random shard instead of the
+    product row, spreading lock contention across ``stock_shard_count`` rows.
+    The product row's ``stock_quantity`` holds whatever is not yet sharded.
+    """
+    
+    product = models.ForeignKey(Product, related_name='stock_shards', on_delete=models.CASCADE)
+    shard = models.PositiveSmallIntegerField()
+    quantity = models.IntegerField(default=0)
+    
+    class Meta:
+        ordering = ['product', 'shard']
+        unique_together = ['product', 'shard']
+    
+    def __str__(self):
+        return f"{self.product_id}[{self.shard}]: {self.quantity}"
+
+
+class InventoryMovement(models.Model):
+    """Append-only ledger entry for a change in a product's stock"""
+    
+    REASON_CHOICES = [
+        ('initial', 'Initial Stock'),
+        ('order', 'Order'),
+        ('cancellation', 'Order Cancellation'),
+        ('adjustment', 'Adjustment'),
+    ]
+    
+    product = models.ForeignKey(Product, related_name='inventory_movements', on_delete=models.CASCADE)
+    quantity = models.IntegerField(help_text="Stock change, negative for removals")
+    reason = models.CharField(max_length=20, choices=REASON_CHOICES)
+    reference = models.CharField(max_length=64, blank=True, help_text="e.g. the order ID")
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['product', 'created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.quantity:+d} {self.product_id} ({self.reason})"
+
+
+class InventorySnapshot(models.Model):
+    """Ledger-derived stock level of a product at a point in time"""
+    
+    product = models.ForeignKey(Product, related_name='inventory_snapshots', on_delete=models.CASCADE)
+    stock_quantity = models.IntegerField()
+    taken_at = models.DateTimeField()
+    
+    class Meta:
+        ordering = ['-taken_at']
+        indexes = [
+            models.Index(fields=['product', '-taken_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.product_id}: {self.stock_quantity} at {self.taken_at}"
+
+
+class PendingStockDelta(models.Model):
+    """Buffered stock change waiting to be coalesced into Product.stock_quantity"""
+    
+    product = models.ForeignKey(Product, related_name='pending_stock_deltas', on_delete=models.CASCADE)
+    quantity = models.IntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['id']
+    
+    def __str__(self):
+        return f"{self.quantity:+d} {self.product_id} (pending)"
@@ -9,6 +9,10 @@ from .models import Product
 class ProductSerializer(serializers.ModelSerializer):
     """Serializer for Product model."""
     
+    # Sellable stock, stock shards included; querysets should annotate
+    # ``live_stock`` (``with_live_stock``/``with_product_live_stock``) so this
+    # costs no query per sharded product
+    stock_quantity = serializers.IntegerField(source='available_stock', read_only=True)
     is_in_stock = serializers.SerializerMethodField()
     
     class Meta:
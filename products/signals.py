@@ -0,0 +1,16 @@
+"""
+Signal handlers recording products' opening stock in the inventory ledger.
+"""
+
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from .models import Product
+from .stock import record_movements
+
+
+@receiver(post_save, sender=Product)
+def record_opening_balance(sender, instance, created, raw=False, **kwargs):
+    """Start a new product's ledger with its opening stock, however it was created."""
+    if raw or not created or not instance.stock_quantity:
+        return
+    record_movements([(instance.id, instance.stock_quantity, '')], 'initial')
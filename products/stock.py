@@ -0,0 +1,363 @@
+"""
+Set-based stock updates for products.
+
+Every stock change is also appended to the ``InventoryMovement`` ledger, and
+``InventorySnapshot`` rows checkpoint the ledger so the stock level at any
+point in time is the latest snapshot plus the sum of the movements after it.
+
+Stock changes that do not need to be visible immediately can instead be
+buffered as ``PendingStockDelta`` rows and coalesced by a periodic flush.
+
+Hot products can have their stock split across ``StockShard`` rows so that
+concurrent orders decrement different rows; see ``take_sharded_stock``.
+"""
+
+import random
+from collections import defaultdict
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import DatabaseError, transaction
+from django.db.models import Case, DateTimeField, F, IntegerField, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from prometheus_client import Counter, Histogram
+from prometheus_client.core import GaugeMetricFamily
+from products.models import InventoryMovement, InventorySnapshot, PendingStockDelta, Product, StockShard
+
+LEDGER_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+STOCK_DELTA_FLUSH_BATCH_SIZE = 1000
+# The buffer depth gauge counts at most this many rows
+STOCK_DELTA_BUFFER_DEPTH_CAP = 100000
+
+# Observed by the flush task, so served from the Celery worker (CELERY_METRICS_PORT)
+STOCK_DELTA_FLUSH_SECONDS = Histogram(
+    'stock_delta_flush_seconds', 'Time spent flushing one batch of buffered stock deltas'
+)
+STOCK_DELTAS_FLUSHED = Counter(
+    'stock_deltas_flushed_total', 'Buffered stock deltas applied to products'
+)
+
+
+def apply_stock_deltas(deltas, guard=False, reason=None, reference=''):
+    """
+    Apply stock changes to many products in a single UPDATE.
+
+    Each product's ``stock_quantity`` is adjusted relative to its current
+    value with ``F()``, so concurrent changes are never overwritten.
+
+    Args:
+        deltas: Mapping of product ID to the amount to add (negative to remove)
+        guard: Only update products whose stock would stay non-negative;
+            compare the return value with ``len(deltas)`` to detect shortfalls
+        reason: Ledger reason; when given, one movement per product is
+            recorded in the same bulk insert (skipped on a guarded shortfall)
+        reference: Ledger reference for the movements, e.g. an order ID
+
+    Returns:
+        Number of product rows updated
+    """
+    deltas = {product_id: delta for product_id, delta in deltas.items() if delta}
+    if not deltas:
+        return 0
+
+    queryset = Product.objects.filter(id__in=deltas)
+    if guard:
+        condition = Q()
+        for product_id, delta in deltas.items():
+            condition |= Q(id=product_id, stock_quantity__gte=max(-delta, 0))
+        queryset = queryset.filter(condition)
+
+    change = Case(
+        *[When(id=product_id, then=Value(delta)) for product_id, delta in deltas.items()],
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+    updated = queryset.update(
+        stock_quantity=F('stock_quantity') + change,
+        updated_at=timezone.now(),
+    )
+
+    if reason and updated == len(deltas):
+        record_movements(
+            [(product_id, delta, reference) for product_id, delta in deltas.items()],
+            reason
+        )
+    return updated
+
+
+def record_movements(movements, reason):
+    """
+    Append stock movements to the ledger in one bulk insert.
+
+    Args:
+        movements: Iterable of ``(product_id, quantity, reference)`` tuples
+        reason: One of ``InventoryMovement.REASON_CHOICES``
+    """
+    now = timezone.now()
+    return InventoryMovement.objects.bulk_create([
+        InventoryMovement(
+            product_id=product_id,
+            quantity=quantity,
+            reason=reason,
+            reference=str(reference),
+            created_at=now,
+        )
+        for product_id, quantity, reference in movements
+        if quantity
+    ])
+
+
+def ledger_stock_queryset(at=None, product_ids=None):
+    """
+    Annotate products with their ledger stock level as of ``at``.
+
+    The level is the latest snapshot taken at or before ``at`` plus the
+    movements recorded after that snapshot, so each product costs one index
+    lookup on the snapshots and one range sum on the movements.
+
+    Returns:
+        Product queryset annotated with ``ledger_stock``
+    """
+    at = at or timezone.now()
+    products = Product.objects.with_live_stock().order_by('id')
+    if product_ids is not None:
+        products = products.filter(id__in=product_ids)
+
+    snapshots = InventorySnapshot.objects.filter(
+        product=OuterRef('pk'), taken_at__lte=at
+    ).order_by('-taken_at')
+    products = products.annotate(
+        snapshot_quantity=Coalesce(Subquery(snapshots.values('stock_quantity')[:1]), Value(0)),
+        snapshot_at=Coalesce(
+            Subquery(snapshots.values('taken_at')[:1]),
+            Value(LEDGER_EPOCH),
+            output_field=DateTimeField(),
+        ),
+    )
+
+    delta = InventoryMovement.objects.filter(
+        product=OuterRef('pk'),
+        created_at__gt=OuterRef('snapshot_at'),
+        created_at__lte=at,
+    ).order_by().values('product').annotate(total=Sum('quantity')).values('total')
+    return products.annotate(
+        ledger_stock=F('snapshot_quantity') + Coalesce(Subquery(delta), Value(0))
+    )
+
+
+def stock_as_of(at, product_ids=None):
+    """Return ``{product_id: stock}`` as recorded by the ledger at time ``at``."""
+    return dict(ledger_stock_queryset(at, product_ids).values_list('id', 'ledger_stock'))
+
+
+def iter_ledger_stock(at=None, chunk_size=1000):
+    """
+    Walk the catalog in primary-key chunks comparing stock with the ledger.
+
+    Yields:
+        Lists of ``(product_id, live_stock, ledger_stock)`` tuples, where
+        ``live_stock`` includes any stock shards
+    """
+    queryset = ledger_stock_queryset(at).values_list('id', 'live_stock', 'ledger_stock')
+    last_id = 0
+    while True:
+        rows = list(queryset.filter(id__gt=last_id)[:chunk_size])
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1][0]
+
+
+def enqueue_stock_delta(product_id, quantity):
+    """Buffer a stock change for the next flush instead of updating the product row."""
+    if quantity:
+        PendingStockDelta.objects.create(product_id=product_id, quantity=quantity)
+
+
+def buffer_depth():
+    """Count the buffered stock deltas, capped so a large backlog stays cheap to count."""
+    return PendingStockDelta.objects.order_by().values('id')[:STOCK_DELTA_BUFFER_DEPTH_CAP].count()
+
+
+class StockDeltaBufferCollector:
+    """
+    Reports ``stock_delta_buffer_depth`` from ``buffer_depth`` at scrape time.
+
+    Deltas are enqueued by the web and gRPC processes and flushed by Celery, so
+    no single process could keep a gauge current; Django's /metrics reads the
+    count from the table on each scrape instead.
+    """
+
+    def describe(self):
+        return [self._metric()]
+
+    def collect(self):
+        try:
+            depth = buffer_depth()
+        except DatabaseError:
+            return []  # Leave the gauge out rather than fail the whole scrape
+        return [self._metric(depth)]
+
+    def _metric(self, depth=None):
+        return GaugeMetricFamily(
+            'stock_delta_buffer_depth', 'Buffered stock deltas waiting to be flushed', value=depth
+        )
+
+
+def flush_stock_deltas(batch_size=STOCK_DELTA_FLUSH_BATCH_SIZE):
+    """
+    Apply one batch of buffered stock deltas.
+
+    Deltas are summed per product and applied with a single ``F()`` update,
+    so the order in which they were buffered does not matter. Rows locked
+    by a concurrent flush are skipped rather than waited on.
+
+    Returns:
+        Number of buffered deltas applied
+    """
+    with STOCK_DELTA_FLUSH_SECONDS.time(), transaction.atomic():
+        pending = list(
+            PendingStockDelta.objects.select_for_update(skip_locked=True)
+            .order_by('id')
+            .values_list('id', 'product_id', 'quantity')[:batch_size]
+        )
+        if not pending:
+            return 0
+
+        deltas = defaultdict(int)
+        for _, product_id, quantity in pending:
+            deltas[product_id] += quantity
+        apply_stock_deltas(deltas, reason='adjustment')
+        PendingStockDelta.objects.filter(id__in=[row[0] for row in pending]).delete()
+
+    STOCK_DELTAS_FLUSHED.inc(len(pending))
+    return len(pending)
+
+
+def take_sharded_stock(quantities, shard_counts, reason='order', reference=''):
+    """
+    Remove stock from sharded products without touching their product rows.
+
+    For each product a random shard is decremented with a guarded ``F()``
+    update; if it cannot cover the quantity the other shards are tried in
+    turn. Only when no single shard is large enough are all shards and the
+    product's unsharded stock locked and drained together.
+
+    Args:
+        quantities: Mapping of sharded product ID to the quantity to remove
+        shard_counts: Mapping of product ID to its ``stock_shard_count``
+        reason: Ledger reason for the movements
+        reference: Ledger reference, e.g. an order ID
+
+    Returns:
+        True if every quantity was taken; False on a shortfall, in which
+        case the caller must roll back the transaction
+    """
+    for product_id, quantity in sorted(quantities.items()):
+        if quantity and not _take_from_shards(product_id, shard_counts[product_id], quantity):
+            return False
+    record_movements(
+        [(product_id, -quantity, reference) for product_id, quantity in quantities.items()],
+        reason
+    )
+    return True
+
+
+def _take_from_shards(product_id, shard_count, quantity):
+    shards = list(range(shard_count))
+    random.shuffle(shards)
+    for shard in shards:
+        taken = StockShard.objects.filter(
+            product_id=product_id, shard=shard, quantity__gte=quantity
+        ).update(quantity=F('quantity') - quantity)
+        if taken:
+            return True
+    return _drain_shards(product_id, quantity)
+
+
+def _drain_shards(product_id, quantity):
+    """Take ``quantity`` across all shards and the unsharded stock, under lock"""
+    reserve = Product.objects.select_for_update().values_list(
+        'stock_quantity', flat=True
+    ).get(id=product_id)
+    shards = list(
+        StockShard.objects.select_for_update().filter(product_id=product_id)
+        .order_by('shard').values_list('id', 'quantity')
+    )
+    if max(reserve, 0) + sum(max(q, 0) for _, q in shards) < quantity:
+        return False
+
+    remaining = quantity
+    taken = {}
+    for shard_id, shard_quantity in shards:
+        take = min(max(shard_quantity, 0), remaining)
+        if take:
+            taken[shard_id] = take
+            remaining -= take
+    if taken:
+        StockShard.objects.filter(id__in=taken).update(quantity=F('quantity') - Case(
+            *[When(id=shard_id, then=Value(take)) for shard_id, take in taken.items()],
+            default=Value(0),
+            output_field=IntegerField(),
+        ))
+    if remaining:
+        Product.objects.filter(id=product_id).update(
+            stock_quantity=F('stock_quantity') - remaining,
+            updated_at=timezone.now(),
+        )
+    return True
+
+
+def rebalance_stock_shards(product_id):
+    """
+    Spread a sharded product's stock evenly over its shards.
+
+    Moves the unsharded ``stock_quantity`` (restocks, cancellations) into
+    the shards and evens out shards drained by orders. The total is
+    unchanged, so nothing is written to the ledger.
+    """
+    with transaction.atomic():
+        product = Product.objects.select_for_update().get(id=product_id)
+        shards = list(
+            StockShard.objects.select_for_update().filter(product_id=product_id)
+            .order_by('shard').values_list('id', 'quantity')
+        )
+        if not shards:
+            return
+
+        total = product.stock_quantity + sum(quantity for _, quantity in shards)
+        base, extra = divmod(max(total, 0), len(shards))
+        StockShard.objects.filter(product_id=product_id).update(quantity=Case(
+            *[When(id=shard_id, then=Value(base + (1 if i < extra else 0)))
+              for i, (shard_id, _) in enumerate(shards)],
+            default=Value(0),
+            output_field=IntegerField(),
+        ))
+        # Keep a negative total on the product row so it is not lost
+        Product.objects.filter(id=product_id).update(stock_quantity=min(total, 0))
+
+
+def set_stock_shard_count(product_id, shard_count):
+    """
+    Enable, resize or (with ``shard_count=0``) disable stock sharding.
+
+    Shards being removed are folded back into ``stock_quantity`` before the
+    remaining shards are rebalanced, so the product's total never changes.
+    """
+    with transaction.atomic():
+        product = Product.objects.select_for_update().get(id=product_id)
+        removed = StockShard.objects.select_for_update().filter(
+            product_id=product_id, shard__gte=shard_count
+        )
+        folded = removed.aggregate(total=Sum('quantity'))['total'] or 0
+        removed.delete()
+        StockShard.objects.bulk_create(
+            [StockShard(product_id=product_id, shard=shard) for shard in range(shard_count)],
+            ignore_conflicts=True,
+        )
+        Product.objects.filter(id=product_id).update(
+            stock_quantity=F('stock_quantity') + folded,
+            stock_shard_count=shard_count,
+        )
+        if shard_count:
+            rebalance_stock_shards(product.id)
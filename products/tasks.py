@@ -5,10 +5,18 @@ Celery tasks for products app.
 from celery import shared_task
 from django.core.cache import cache
 from django.db.models import Count, Avg
+from django.utils import timezone
+from datetime import timedelta
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
+# Snapshots stop short of "now" so movements from transactions that are
+# still open when the snapshot runs are not left out of it.
+INVENTORY_SNAPSHOT_LAG = timedelta(minutes=5)
+INVENTORY_CHUNK_SIZE = 1000
+
 
 @shared_task
 def update_product_analytics():
@@ -19,7 +27,7 @@ def update_product_analytics():
         # Calculate analytics
         total_products = Product.objects.count()
         avg_price = Product.objects.aggregate(Avg('price'))['price__avg']
-        low_stock_count = Product.objects.filter(stock_quantity__lt=10).count()
+        low_stock_count = Product.objects.with_live_stock().filter(live_stock__lt=10).count()
         
         # Cache the results
         cache.set('product_analytics', {
@@ -38,21 +46,25 @@ def update_product_analytics():
 @shared_task
 def update_product_stock(product_id, quantity_change):
     """
-    Update product stock asynchronously.
+    Queue a product stock change.
+    
+    The change is buffered and applied by ``flush_stock_deltas``, which
+    coalesces all pending changes per product into one update.
     
     Args:
         product_id: ID of the product
         quantity_change: Amount to change stock by (positive or negative)
     """
     from products.models import Product
+    from products.stock import enqueue_stock_delta
     
     try:
-        product = Product.objects.get(id=product_id)
-        product.stock_quantity += quantity_change
-        product.save()
+        if not Product.objects.filter(id=product_id).exists():
+            raise Product.DoesNotExist(f"Product {product_id} not found")
+        enqueue_stock_delta(product_id, quantity_change)
         
-        logger.info(f"Updated stock for product {product_id}: {quantity_change}")
-        return f"Stock updated for product {product_id}"
+        logger.info(f"Queued stock change for product {product_id}: {quantity_change}")
+        return f"Stock change queued for product {product_id}"
     except Product.DoesNotExist:
         logger.error(f"Product {product_id} not found")
         raise
@@ -61,6 +73,28 @@ def update_product_stock(product_id, quantity_change):
         raise
 
 
+@shared_task
+def flush_stock_deltas(batch_size=None):
+    """Apply buffered stock changes in coalesced batches until the buffer is drained."""
+    from products.stock import STOCK_DELTA_FLUSH_BATCH_SIZE, flush_stock_deltas as flush_batch
+    
+    batch_size = batch_size or STOCK_DELTA_FLUSH_BATCH_SIZE
+    try:
+        start = time.perf_counter()
+        total = 0
+        while True:
+            flushed = flush_batch(batch_size)
+            total += flushed
+            if flushed < batch_size:
+                break
+        
+        logger.info(f"Flushed {total} stock changes in {time.perf_counter() - start:.3f}s")
+        return f"Flushed {total} stock changes"
+    except Exception as e:
+        logger.error(f"Error flushing stock changes: {str(e)}")
+        raise
+
+
 @shared_task
 def check_low_stock_products():
     """Check for low stock products and send notifications."""
@@ -68,11 +102,11 @@ def check_low_stock_products():
     from core.tasks import send_email_notification
     
     try:
-        low_stock_products = Product.objects.filter(stock_quantity__lt=10)
+        low_stock_products = Product.objects.with_live_stock().filter(live_stock__lt=10)
         
         if low_stock_products.exists():
             product_list = '\n'.join([
-                f"- {p.name}: {p.stock_quantity} units remaining"
+                f"- {p.name}: {p.live_stock} units remaining"
                 for p in low_stock_products
             ])
             
@@ -92,3 +126,46 @@ def check_low_stock_products():
     except Exception as e:
         logger.error(f"Error checking low stock: {str(e)}")
         raise
+
+
+@shared_task
+def rebalance_stock_shards():
+    """Even out the stock shards of every sharded product."""
+    from products.models import Product
+    from products.stock import rebalance_stock_shards as rebalance
+    
+    try:
+        product_ids = list(
+            Product.objects.filter(stock_shard_count__gt=0).values_list('id', flat=True)
+        )
+        for product_id in product_ids:
+            rebalance(product_id)
+        
+        logger.info(f"Rebalanced stock shards for {len(product_ids)} products")
+        return f"Rebalanced {len(product_ids)} products"
+    except Exception as e:
+        logger.error(f"Error rebalancing stock shards: {str(e)}")
+        raise
+
+
+@shared_task
+def take_inventory_snapshots(chunk_size=INVENTORY_CHUNK_SIZE):
+    """Checkpoint the inventory ledger with one snapshot row per product."""
+    from products.models import InventorySnapshot
+    from products.stock import iter_ledger_stock
+    
+    try:
+        taken_at = timezone.now() - INVENTORY_SNAPSHOT_LAG
+        count = 0
+        for rows in iter_ledger_stock(taken_at, chunk_size):
+            InventorySnapshot.objects.bulk_create([
+                InventorySnapshot(product_id=product_id, stock_quantity=ledger_stock, taken_at=taken_at)
+                for product_id, _, ledger_stock in rows
+            ])
+            count += len(rows)
+        
+        logger.info(f"Took inventory snapshots for {count} products")
+        return f"Snapshotted {count} products"
+    except Exception as e:
+        logger.error(f"Error taking inventory snapshots: {str(e)}")
+        raise
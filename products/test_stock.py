@@ -0,0 +1,323 @@
+"""
+Tests for the inventory ledger and snapshots.
+"""
+
+import grpc
+import pytest
+from datetime import timedelta
+from io import StringIO
+from django.contrib import admin
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.utils import timezone
+from orders.grpc_client import OrderGRPCClient
+from products.grpc_client import ProductGRPCClient
+from prometheus_client import REGISTRY
+from products.admin import ProductAdmin
+from products.models import InventoryMovement, InventorySnapshot, PendingStockDelta, Product, StockShard
+from products.stock import (
+    enqueue_stock_delta, flush_stock_deltas as flush_batch, set_stock_shard_count, stock_as_of
+)
+from products.tasks import flush_stock_deltas, rebalance_stock_shards, take_inventory_snapshots, update_product_stock
+
+
+def _ledger_matches(product):
+    product.refresh_from_db()
+    return stock_as_of(timezone.now(), [product.id])[product.id] == product.available_stock
+
+
+@pytest.mark.django_db
+class TestInventoryMovements:
+    """Test cases for recording stock changes in the ledger."""
+
+    def test_order_and_cancellation(self, product):
+        """Test reserving and restoring stock both append movements."""
+        client = OrderGRPCClient(transport='inprocess')
+        response = client.create_order(
+            customer_name='Test Customer',
+            customer_email='customer@example.com',
+            items=[{'product_id': product.id, 'quantity': 3}],
+            shipping_address='123 Test St',
+        )
+        client.cancel_order(response.order.id)
+        client.close()
+
+        movements = InventoryMovement.objects.filter(product=product).exclude(reason='initial')
+        assert list(movements.values_list('reason', 'quantity', 'reference')) == [
+            ('order', -3, str(response.order.id)),
+            ('cancellation', 3, str(response.order.id)),
+        ]
+        assert _ledger_matches(product)
+
+    def test_update_product_records_difference(self, product):
+        """Test overwriting the stock level records the difference."""
+        client = ProductGRPCClient(transport='inprocess')
+        client.update_product(product.id, stock_quantity=40)
+        client.close()
+
+        movement = InventoryMovement.objects.filter(product=product).last()
+        assert (movement.reason, movement.quantity) == ('adjustment', -60)
+        assert _ledger_matches(product)
+
+    def test_create_product_records_opening_balance(self, db):
+        """Test new products start with an initial movement."""
+        client = ProductGRPCClient(transport='inprocess')
+        response = client.create_product('Ledger Product', 'Desc', 5.0, 12, 'books')
+        client.close()
+
+        movement = InventoryMovement.objects.get(product_id=response.product.id)
+        assert (movement.reason, movement.quantity) == ('initial', 12)
+
+    def test_orm_created_product_records_opening_balance(self, db):
+        """Test products created outside the RPC, e.g. in the admin, start their ledger too."""
+        product = Product.objects.create(name='Admin Product', description='', price=1, stock_quantity=7)
+
+        assert list(product.inventory_movements.values_list('reason', 'quantity')) == [('initial', 7)]
+        assert _ledger_matches(product)
+
+    def test_admin_edit_records_adjustment(self, product, admin_user, rf):
+        """Test the admin records the change from the current row, not the form's stale value."""
+        product.stock_quantity = 80
+        # Sold while the change form was open
+        Product.objects.filter(id=product.id).update(stock_quantity=95)
+        request = rf.post('/')
+        request.user = admin_user
+
+        ProductAdmin(Product, admin.site).save_model(request, product, None, change=True)
+
+        movement = InventoryMovement.objects.filter(product=product).last()
+        assert (movement.reason, movement.quantity) == ('adjustment', -15)
+
+
+@pytest.mark.django_db
+class TestStockDeltaBuffer:
+    """Test cases for buffered, coalesced stock changes."""
+
+    def test_task_buffers_until_flush(self, product):
+        """Test queued changes only reach the product when flushed."""
+        update_product_stock(product.id, -5)
+        update_product_stock(product.id, 2)
+
+        assert Product.objects.get(id=product.id).stock_quantity == 100
+        assert PendingStockDelta.objects.count() == 2
+
+        flush_stock_deltas()
+
+        assert not PendingStockDelta.objects.exists()
+        assert _ledger_matches(product)
+        assert product.stock_quantity == 97
+
+    def test_flush_coalesces_per_product(self, products, django_assert_num_queries):
+        """Test a batch costs a fixed number of queries and one movement per product."""
+        for p in products:
+            for quantity in (3, -1, 4):
+                enqueue_stock_delta(p.id, quantity)
+
+        # savepoint, select, update, ledger insert, delete, release
+        with django_assert_num_queries(6):
+            assert flush_batch() == 15
+
+        for p in products:
+            assert Product.objects.get(id=p.id).stock_quantity == p.stock_quantity + 6
+        assert InventoryMovement.objects.filter(reason='adjustment').count() == len(products)
+
+    def test_flush_drains_in_batches(self, product):
+        """Test the task keeps flushing until the buffer is empty."""
+        for _ in range(5):
+            enqueue_stock_delta(product.id, 1)
+
+        flush_stock_deltas(batch_size=2)
+
+        assert not PendingStockDelta.objects.exists()
+        assert Product.objects.get(id=product.id).stock_quantity == 105
+
+    def test_missing_product(self, db):
+        """Test an unknown product is reported as missing."""
+        with pytest.raises(Product.DoesNotExist):
+            update_product_stock(99999, 1)
+
+    def test_buffer_depth_metric(self, product, django_assert_num_queries, monkeypatch):
+        """Test a scrape reads the capped depth of the buffer."""
+        enqueue_stock_delta(product.id, 1)
+        enqueue_stock_delta(product.id, 2)
+
+        # One capped count per scrape
+        with django_assert_num_queries(1):
+            assert REGISTRY.get_sample_value('stock_delta_buffer_depth') == 2
+
+        flush_stock_deltas(batch_size=1)
+        assert REGISTRY.get_sample_value('stock_delta_buffer_depth') == 0
+
+        monkeypatch.setattr('products.stock.STOCK_DELTA_BUFFER_DEPTH_CAP', 1)
+        enqueue_stock_delta(product.id, 1)
+        enqueue_stock_delta(product.id, 1)
+        assert REGISTRY.get_sample_value('stock_delta_buffer_depth') == 1
+
+
+@pytest.mark.django_db
+class TestStockAsOf:
+    """Test cases for point-in-time stock queries."""
+
+    def test_replays_movements(self, product):
+        """Test stock at a past time ignores later movements."""
+        now = timezone.now()
+        # The opening balance of 100
+        InventoryMovement.objects.filter(product=product).update(created_at=now - timedelta(days=3))
+        InventoryMovement.objects.bulk_create([
+            InventoryMovement(product=product, quantity=-10, reason='order', created_at=now - timedelta(days=2)),
+            InventoryMovement(product=product, quantity=-5, reason='order', created_at=now - timedelta(days=1)),
+        ])
+
+        assert stock_as_of(now - timedelta(days=4), [product.id]) == {product.id: 0}
+        assert stock_as_of(now - timedelta(days=2), [product.id]) == {product.id: 90}
+        assert stock_as_of(now, [product.id]) == {product.id: 85}
+
+    def test_starts_from_latest_snapshot(self, product):
+        """Test only movements after the snapshot are summed."""
+        now = timezone.now()
+        InventoryMovement.objects.filter(product=product).update(created_at=now - timedelta(days=3))
+        InventorySnapshot.objects.create(product=product, stock_quantity=70, taken_at=now - timedelta(days=2))
+        InventoryMovement.objects.create(product=product, quantity=-4, reason='order', created_at=now - timedelta(days=1))
+
+        assert stock_as_of(now, [product.id]) == {product.id: 66}
+
+    def test_query_count_independent_of_products(self, products, django_assert_num_queries):
+        """Test the whole catalog is resolved in a single query."""
+        with django_assert_num_queries(1):
+            stock_as_of(timezone.now())
+
+
+@pytest.mark.django_db
+class TestInventorySnapshots:
+    """Test cases for the snapshot task."""
+
+    def test_snapshot_matches_ledger(self, product):
+        """Test snapshots store the ledger level and keep stock_as_of unchanged."""
+        InventoryMovement.objects.update(created_at=timezone.now() - timedelta(hours=1))
+
+        take_inventory_snapshots(chunk_size=1)
+
+        snapshot = InventorySnapshot.objects.get(product=product)
+        assert snapshot.stock_quantity == product.stock_quantity
+        assert _ledger_matches(product)
+
+
+@pytest.mark.django_db
+class TestReconcileInventory:
+    """Test cases for the reconcile_inventory command."""
+
+    def test_reports_drift(self, product, products):
+        """Test products whose stock disagrees with the ledger are listed."""
+        Product.objects.filter(id=product.id).update(stock_quantity=90)
+        out = StringIO()
+
+        call_command('reconcile_inventory', chunk_size=2, stdout=out)
+
+        assert f"Product {product.id}: stock_quantity=90 ledger=100 drift=-10" in out.getvalue()
+        assert "Checked 6 products, 1 out of balance" in out.getvalue()
+
+    def test_fail_on_drift(self, product):
+        """Test --fail-on-drift turns drift into an error."""
+        Product.objects.filter(id=product.id).update(stock_quantity=90)
+        with pytest.raises(CommandError):
+            call_command('reconcile_inventory', fail_on_drift=True, stdout=StringIO())
+
+
+@pytest.mark.django_db
+class TestStockShards:
+    """Test cases for sharded hot-product stock."""
+
+    @pytest.fixture
+    def hot_product(self, product):
+        """Return the stocked product split across four shards."""
+        set_stock_shard_count(product.id, 4)
+        product.refresh_from_db()
+        return product
+
+    def _order(self, product, quantity):
+        client = OrderGRPCClient(transport='inprocess')
+        try:
+            return client.create_order(
+                customer_name='Test Customer',
+                customer_email='customer@example.com',
+                items=[{'product_id': product.id, 'quantity': quantity}],
+                shipping_address='123 Test St',
+            )
+        finally:
+            client.close()
+
+    def _shards(self, product):
+        return list(StockShard.objects.filter(product=product).values_list('quantity', flat=True))
+
+    def test_enable_splits_stock(self, hot_product):
+        """Test enabling moves all stock into even shards."""
+        assert hot_product.stock_quantity == 0
+        assert self._shards(hot_product) == [25, 25, 25, 25]
+        assert hot_product.available_stock == 100
+
+    def test_order_takes_from_one_shard(self, hot_product):
+        """Test an order decrements a single shard and leaves the product row alone."""
+        updated_at = hot_product.updated_at
+
+        self._order(hot_product, 3)
+
+        hot_product.refresh_from_db()
+        assert sorted(self._shards(hot_product)) == [22, 25, 25, 25]
+        assert hot_product.updated_at == updated_at
+        assert _ledger_matches(hot_product)
+        assert hot_product.available_stock == 97
+
+    def test_read_path_sums_shards(self, hot_product):
+        """Test GetProduct and ListProducts report the summed stock."""
+        self._order(hot_product, 3)
+        client = ProductGRPCClient(transport='inprocess')
+
+        assert client.get_product(hot_product.id).product.stock_quantity == 97
+        assert client.list_products().products[0].stock_quantity == 97
+        client.close()
+
+    def test_falls_back_across_shards(self, hot_product):
+        """Test an order larger than any shard is drained from several."""
+        response = self._order(hot_product, 60)
+
+        assert response.success
+        assert sum(self._shards(hot_product)) == 40
+
+    def test_insufficient_stock_rolls_back(self, hot_product):
+        """Test an order above the summed stock fails and takes nothing."""
+        with pytest.raises(grpc.RpcError):
+            self._order(hot_product, 101)
+
+        assert self._shards(hot_product) == [25, 25, 25, 25]
+
+    def test_cancellation_is_rebalanced(self, hot_product):
+        """Test restored stock lands on the product row until rebalanced."""
+        response = self._order(hot_product, 10)
+        OrderGRPCClient(transport='inprocess').cancel_order(response.order.id)
+
+        rebalance_stock_shards()
+
+        hot_product.refresh_from_db()
+        assert hot_product.stock_quantity == 0
+        assert self._shards(hot_product) == [25, 25, 25, 25]
+
+    def test_update_product_sets_total(self, hot_product):
+        """Test overwriting stock on a sharded product replaces the summed total."""
+        client = ProductGRPCClient(transport='inprocess')
+        response = client.update_product(hot_product.id, stock_quantity=40)
+        client.close()
+
+        assert response.product.stock_quantity == 40
+        assert self._shards(hot_product) == [10, 10, 10, 10]
+        assert stock_as_of(timezone.now(), [hot_product.id])[hot_product.id] == 40
+
+    def test_disable_folds_shards_back(self, hot_product):
+        """Test disabling returns shard stock to the product row."""
+        self._order(hot_product, 5)
+
+        set_stock_shard_count(hot_product.id, 0)
+
+        assert _ledger_matches(hot_product)
+        assert hot_product.stock_quantity == 95
+        assert hot_product.stock_shard_count == 0
+        assert not StockShard.objects.filter(product=hot_product).exists()
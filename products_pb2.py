@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+# Generated by the protocol buffer compiler.  DO NOT EDIT!
+# source: products.proto
+"""Generated protocol buffer code."""
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import descriptor_pool as _descriptor_pool
+from google.protobuf import symbol_database as _symbol_database
+from google.protobuf.internal import builder as _builder
+# @@protoc_insertion_point(imports)
+
+_sym_db = _symbol_database.Default()
+
+
+
+
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x0eproducts.proto\x12\x08products\"\x99\x01\n\x07Product\x12\n\n\x02id\x18\x01 \x01(\x05\x12\x0c\n\x04name\x18\x02 \x01(\t\x12\x13\n\x0b\x64\x65scription\x18\x03 \x01(\t\x12\r\n\x05price\x18\x04 \x01(\x01\x12\x16\n\x0estock_quantity\x18\x05 \x01(\x05\x12\x10\n\x08\x63\x61tegory\x18\x06 \x01(\t\x12\x12\n\ncreated_at\x18\x07 \x01(\t\x12\x12\n\nupdated_at\x18\x08 \x01(\t\"r\n\x14\x43reateProductRequest\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\x13\n\x0b\x64\x65scription\x18\x02 \x01(\t\x12\r\n\x05price\x18\x03 \x01(\x01\x12\x16\n\x0estock_quantity\x18\x04 \x01(\x05\x12\x10\n\x08\x63\x61tegory\x18\x05 \x01(\t\"\x1f\n\x11GetProductRequest\x12\n\n\x02id\x18\x01 \x01(\x05\"6\n\x13ListProductsRequest\x12\x0c\n\x04page\x18\x01 \x01(\x05\x12\x11\n\tpage_size\x18\x02 \x01(\x05\"q\n\x14ListProductsResponse\x12#\n\x08products\x18\x01 \x03(\x0b\x32\x11.products.Product\x12\x13\n\x0btotal_count\x18\x02 \x01(\x05\x12\x0c\n\x04page\x18\x03 \x01(\x05\x12\x11\n\tpage_size\x18\x04 \x01(\x05\"~\n\x14UpdateProductRequest\x12\n\n\x02id\x18\x01 \x01(\x05\x12\x0c\n\x04name\x18\x02 \x01(\t\x12\x13\n\x0b\x64\x65scription\x18\x03 \x01(\t\x12\r\n\x05price\x18\x04 \x01(\x01\x12\x16\n\x0estock_quantity\x18\x05 \x01(\x05\x12\x10\n\x08\x63\x61tegory\x18\x06 \x01(\t\"\"\n\x14\x44\x65leteProductRequest\x12\n\n\x02id\x18\x01 \x01(\x05\"9\n\x15\x44\x65leteProductResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x0f\n\x07message\x18\x02 \x01(\t\"^\n\x15SearchProductsRequest\x12\r\n\x05query\x18\x01 \x01(\t\x12\x10\n\x08\x63\x61tegory\x18\x02 \x01(\t\x12\x11\n\tmin_price\x18\x03 \x01(\x01\x12\x11\n\tmax_price\x18\x04 \x01(\x01\"W\n\x0fProductResponse\x12\"\n\x07product\x18\x01 \x01(\x0b\x32\x11.products.Product\x12\x0f\n\x07success\x18\x02 \x01(\x08\x12\x0f\n\x07message\x18\x03 \x01(\t2\xe2\x03\n\x0eProductService\x12J\n\rCreateProduct\x12\x1e.products.CreateProductRequest\x1a\x19.products.ProductResponse\x12\x44\n\nGetProduct\x12\x1b.products.GetProductRequest\x1a\x19.products.ProductResponse\x12M\n\x0cListProducts\x12\x1d.products.ListProductsRequest\x1a\x1e.products.ListProductsResponse\x12J\n\rUpdateProduct\x12\x1e.products.UpdateProductRequest\x1a\x19.products.ProductResponse\x12P\n\rDeleteProduct\x12\x1e.products.DeleteProductRequest\x1a\x1f.products.DeleteProductResponse\x12Q\n\x0eSearchProducts\x12\x1f.products.SearchProductsRequest\x1a\x1e.products.ListProductsResponseb\x06proto3')
+
+_globals = globals()
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
+_builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'products_pb2', _globals)
+if _descriptor._USE_C_DESCRIPTORS == False:
+  DESCRIPTOR._options = None
+  _globals['_PRODUCT']._serialized_start=29
+  _globals['_PRODUCT']._serialized_end=182
+  _globals['_CREATEPRODUCTREQUEST']._serialized_start=184
+  _globals['_CREATEPRODUCTREQUEST']._serialized_end=298
+  _globals['_GETPRODUCTREQUEST']._serialized_start=300
+  _globals['_GETPRODUCTREQUEST']._serialized_end=331
+  _globals['_LISTPRODUCTSREQUEST']._serialized_start=333
+  _globals['_LISTPRODUCTSREQUEST']._serialized_end=387
+  _globals['_LISTPRODUCTSRESPONSE']._serialized_start=389
+  _globals['_LISTPRODUCTSRESPONSE']._serialized_end=502
+  _globals['_UPDATEPRODUCTREQUEST']._serialized_start=504
+  _globals['_UPDATEPRODUCTREQUEST']._serialized_end=630
+  _globals['_DELETEPRODUCTREQUEST']._serialized_start=632
+  _globals['_DELETEPRODUCTREQUEST']._serialized_end=666
+  _globals['_DELETEPRODUCTRESPONSE']._serialized_start=668
+  _globals['_DELETEPRODUCTRESPONSE']._serialized_end=725
+  _globals['_SEARCHPRODUCTSREQUEST']._serialized_start=727
+  _globals['_SEARCHPRODUCTSREQUEST']._serialized_end=821
+  _globals['_PRODUCTRESPONSE']._serialized_start=823
+  _globals['_PRODUCTRESPONSE']._serialized_end=910
+  _globals['_PRODUCTSERVICE']._serialized_start=913
+  _globals['_PRODUCTSERVICE']._serialized_end=1395
+# @@protoc_insertion_point(module_scope)
@@ -0,0 +1,234 @@
+# Generated by the gRPC Python protocol compiler plugin. DO NOT EDIT!
+"""Client and server classes corresponding to protobuf-defined services."""
+import grpc
+
+import products_pb2 as products__pb2
+
+
+class ProductServiceStub(object):
+    """Product Service Definition
+    """
+
+    def __init__(self, channel):
+        """Constructor.
+
+        Args:
+            channel: A grpc.Channel.
+        """
+        self.CreateProduct = channel.unary_unary(
+                '/products.ProductService/CreateProduct',
+                request_serializer=products__pb2.CreateProductRequest.SerializeToString,
+                response_deserializer=products__pb2.ProductResponse.FromString,
+                )
+        self.GetProduct = channel.unary_unary(
+                '/products.ProductService/GetProduct',
+                request_serializer=products__pb2.GetProductRequest.SerializeToString,
+                response_deserializer=products__pb2.ProductResponse.FromString,
+                )
+        self.ListProducts = channel.unary_unary(
+                '/products.ProductService/ListProducts',
+                request_serializer=products__pb2.ListProductsRequest.SerializeToString,
+                response_deserializer=products__pb2.ListProductsResponse.FromString,
+                )
+        self.UpdateProduct = channel.unary_unary(
+                '/products.ProductService/UpdateProduct',
+                request_serializer=products__pb2.UpdateProductRequest.SerializeToString,
+                response_deserializer=products__pb2.ProductResponse.FromString,
+                )
+        self.DeleteProduct = channel.unary_unary(
+                '/products.ProductService/DeleteProduct',
+                request_serializer=products__pb2.DeleteProductRequest.SerializeToString,
+                response_deserializer=products__pb2.DeleteProductResponse.FromString,
+                )
+        self.SearchProducts = channel.unary_unary(
+                '/products.ProductService/SearchProducts',
+                request_serializer=products__pb2.SearchProductsRequest.SerializeToString,
+                response_deserializer=products__pb2.ListProductsResponse.FromString,
+                )
+
+
+class ProductServiceServicer(object):
+    """Product Service Definition
+    """
+
+    def CreateProduct(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetProduct(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def ListProducts(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def UpdateProduct(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def DeleteProduct(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def SearchProducts(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+
+def add_ProductServiceServicer_to_server(servicer, server):
+    rpc_method_handlers = {
+            'CreateProduct': grpc.unary_unary_rpc_method_handler(
+                    servicer.CreateProduct,
+                    request_deserializer=products__pb2.CreateProductRequest.FromString,
+                    response_serializer=products__pb2.ProductResponse.SerializeToString,
+            ),
+            'GetProduct': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetProduct,
+                    request_deserializer=products__pb2.GetProductRequest.FromString,
+                    response_serializer=products__pb2.ProductResponse.SerializeToString,
+            ),
+            'ListProducts': grpc.unary_unary_rpc_method_handler(
+                    servicer.ListProducts,
+                    request_deserializer=products__pb2.ListProductsRequest.FromString,
+                    response_serializer=products__pb2.ListProductsResponse.SerializeToString,
+            ),
+            'UpdateProduct': grpc.unary_unary_rpc_method_handler(
+                    servicer.UpdateProduct,
+                    request_deserializer=products__pb2.UpdateProductRequest.FromString,
+                    response_serializer=products__pb2.ProductResponse.SerializeToString,
+            ),
+            'DeleteProduct': grpc.unary_unary_rpc_method_handler(
+                    servicer.DeleteProduct,
+                    request_deserializer=products__pb2.DeleteProductRequest.FromString,
+                    response_serializer=products__pb2.DeleteProductResponse.SerializeToString,
+            ),
+            'SearchProducts': grpc.unary_unary_rpc_method_handler(
+                    servicer.SearchProducts,
+                    request_deserializer=products__pb2.SearchProductsRequest.FromString,
+                    response_serializer=products__pb2.ListProductsResponse.SerializeToString,
+            ),
+    }
+    generic_handler = grpc.method_handlers_generic_handler(
+            'products.ProductService', rpc_method_handlers)
+    server.add_generic_rpc_handlers((generic_handler,))
+
+
+ # This class is part of an EXPERIMENTAL API.
+class ProductService(object):
+    """Product Service Definition
+    """
+
+    @staticmethod
+    def CreateProduct(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/products.ProductService/CreateProduct',
+            products__pb2.CreateProductRequest.SerializeToString,
+            products__pb2.ProductResponse.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def GetProduct(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/products.ProductService/GetProduct',
+            products__pb2.GetProductRequest.SerializeToString,
+            products__pb2.ProductResponse.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def ListProducts(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/products.ProductService/ListProducts',
+            products__pb2.ListProductsRequest.SerializeToString,
+            products__pb2.ListProductsResponse.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def UpdateProduct(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/products.ProductService/UpdateProduct',
+            products__pb2.UpdateProductRequest.SerializeToString,
+            products__pb2.ProductResponse.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def DeleteProduct(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/products.ProductService/DeleteProduct',
+            products__pb2.DeleteProductRequest.SerializeToString,
+            products__pb2.DeleteProductResponse.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def SearchProducts(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/products.ProductService/SearchProducts',
+            products__pb2.SearchProductsRequest.SerializeToString,
+            products__pb2.ListProductsResponse.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
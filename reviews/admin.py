@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import Review, ReviewHelpful, ReviewImage
+from .models import (
+    ProductRatingSummary, Review, ReviewerStats, ReviewFlag, ReviewHelpful, ReviewImage, ReviewReminder
+)
 
 
 class ReviewImageInline(admin.TabularInline):
@@ -65,3 +67,60 @@ class ReviewImageAdmin(admin.ModelAdmin):
     list_filter = ['uploaded_at']
     search_fields = ['review__title', 'caption']
     readonly_fields = ['uploaded_at']
+
+
+@admin.register(ProductRatingSummary)
+class ProductRatingSummaryAdmin(admin.ModelAdmin):
+    """Admin interface for ProductRatingSummary."""
+    
+    list_display = [
+        'product',
+        'review_count',
+        'average_rating',
+        'verified_count',
+        'updated_at'
+    ]
+    search_fields = ['product__name']
+    readonly_fields = [
+        'product',
+        'review_count',
+        'rating_sum',
+        'rating_1_count',
+        'rating_2_count',
+        'rating_3_count',
+        'rating_4_count',
+        'rating_5_count',
+        'verified_count',
+        'updated_at'
+    ]
+
+
+@admin.register(ReviewFlag)
+class ReviewFlagAdmin(admin.ModelAdmin):
+    """Admin interface for ReviewFlag."""
+    
+    list_display = ['id', 'review', 'reason', 'detail', 'created_at']
+    list_filter = ['reason', 'created_at']
+    search_fields = ['review__title', 'detail']
+    readonly_fields = ['created_at']
+    list_select_related = ['review']
+
+
+@admin.register(ReviewerStats)
+class ReviewerStatsAdmin(admin.ModelAdmin):
+    """Admin interface for ReviewerStats."""
+    
+    list_display = ['user', 'review_count', 'helpful_votes', 'updated_at']
+    search_fields = ['user__username']
+    ordering = ['-helpful_votes', '-review_count']
+    readonly_fields = ['user', 'review_count', 'helpful_votes', 'updated_at']
+
+
+@admin.register(ReviewReminder)
+class ReviewReminderAdmin(admin.ModelAdmin):
+    """Admin interface for ReviewReminder."""
+    
+    list_display = ['customer_email', 'product', 'sent_at']
+    search_fields = ['customer_email', 'product__name']
+    readonly_fields = ['sent_at']
+    list_select_related = ['product']
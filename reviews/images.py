@@ -0,0 +1,198 @@
+"""
+Processing of review image uploads.
+
+Uploads are often multi-megabyte phone photos carrying EXIF metadata, GPS
+coordinates included. ``process_review_image`` runs off-request, queued by
+reviews.signals when an image is added. It:
+
+1. decodes the upload once and applies its EXIF orientation;
+2. rewrites the stored original without any metadata;
+3. records the image's dimensions;
+4. renders every REVIEW_IMAGE_VARIANTS size in every VARIANT_FORMATS
+   format, each size downscaled from the next larger one.
+
+Listings link to ``review-image-variant`` URLs rather than to files, so
+they never serve originals. A variant the pipeline hasn't produced yet is
+generated by ``get_variant_path`` on the first request for it. Variant
+paths are cached, so later requests cost no queries before the file is
+handed to nginx.
+"""
+
+import io
+import logging
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from PIL import ExifTags, Image, ImageOps
+from .models import ReviewImage, ReviewImageVariant
+
+logger = logging.getLogger(__name__)
+
+# Longest side, in pixels, of each variant
+REVIEW_IMAGE_VARIANTS = {
+    'thumb': 160,
+    'medium': 640,
+    'large': 1280,
+}
+# Format -> (Pillow format, content type, file extension, encoder options)
+VARIANT_FORMATS = {
+    'webp': ('WEBP', 'image/webp', 'webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', 'image/jpeg', 'jpg', {'quality': 85, 'optimize': True, 'progressive': True}),
+}
+VARIANT_CACHE_TIMEOUT = 3600 * 24
+ORIGINAL_JPEG_QUALITY = 92
+# EXIF orientations that rotate the image by 90 or 270 degrees
+TRANSPOSED_ORIENTATIONS = {5, 6, 7, 8}
+
+
+def variant_cache_key(image_id, name, fmt):
+    return f'review_image_variant:{image_id}:{name}:{fmt}'
+
+
+def variant_path(image_id, name, fmt):
+    return f'review_images/variants/{image_id}/{name}.{VARIANT_FORMATS[fmt][2]}'
+
+
+def variant_size(width, height, max_side):
+    """Dimensions of a ``width`` x ``height`` image scaled to fit ``max_side``, never enlarged."""
+    scale = min(1, max_side / max(width, height))
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def _upright_size(image):
+    """Size of an opened image once its EXIF orientation is applied."""
+    width, height = image.size
+    if image.getexif().get(ExifTags.Base.Orientation) in TRANSPOSED_ORIENTATIONS:
+        return height, width
+    return width, height
+
+
+def _encodable(image, fmt):
+    """Convert to a mode ``fmt`` can encode, flattening transparency onto white for JPEG."""
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        if fmt != 'jpeg':
+            return image
+        flattened = Image.new('RGB', image.size, 'white')
+        flattened.paste(image, mask=image.getchannel('A'))
+        return flattened
+    return image if image.mode == 'RGB' else image.convert('RGB')
+
+
+def render_variant(image, size, fmt):
+    """
+    Resize an upright image and encode it, without metadata.
+
+    Returns:
+        ``(resized, content)``: the resized image, for rendering smaller
+        variants from, and the encoded bytes
+    """
+    pil_format, _, _, options = VARIANT_FORMATS[fmt]
+    if image.size != size:
+        image = image.resize(size, Image.Resampling.LANCZOS, reducing_gap=3.0)
+    buffer = io.BytesIO()
+    # Pillow only writes EXIF when it is passed in explicitly
+    _encodable(image, fmt).save(buffer, pil_format, **options)
+    return image, buffer.getvalue()
+
+
+def _store_variant(review_image, name, fmt, content, size):
+    path = variant_path(review_image.id, name, fmt)
+    if default_storage.exists(path):
+        default_storage.delete(path)
+    default_storage.save(path, ContentFile(content))
+    variant, _ = ReviewImageVariant.objects.update_or_create(
+        image=review_image,
+        name=name,
+        format=fmt,
+        defaults={'file': path, 'width': size[0], 'height': size[1]},
+    )
+    cache.set(variant_cache_key(review_image.id, name, fmt), path, VARIANT_CACHE_TIMEOUT)
+    return variant
+
+
+def generate_variant(review_image, name, fmt):
+    """
+    Render a single variant straight from the original.
+
+    JPEG originals are decoded at the smallest of 1/2, 1/4 or 1/8 scale that
+    still covers the variant, which is far quicker than a full decode of a
+    large photo.
+    """
+    max_side = REVIEW_IMAGE_VARIANTS[name]
+    with review_image.image.open('rb') as file:
+        image = Image.open(file)
+        width, height = _upright_size(image)
+        image.draft('RGB', (max_side, max_side))
+        image = ImageOps.exif_transpose(image)
+    size = variant_size(width, height, max_side)
+    _, content = render_variant(image, size, fmt)
+    return _store_variant(review_image, name, fmt, content, size)
+
+
+def process_review_image(review_image):
+    """
+    Strip the original's metadata, record its dimensions and render every variant.
+
+    Returns:
+        Number of variants rendered
+    """
+    with review_image.image.open('rb') as file:
+        original = Image.open(file)
+        original_format = original.format
+        image = ImageOps.exif_transpose(original)
+
+    # Rewrite the original upright and without EXIF, in its own format
+    # where Pillow can write it
+    buffer = io.BytesIO()
+    if original_format == 'JPEG':
+        _encodable(image, 'jpeg').save(buffer, 'JPEG', quality=ORIGINAL_JPEG_QUALITY)
+    else:
+        image.save(buffer, original_format if original_format in Image.SAVE else 'PNG')
+    name = review_image.image.name
+    default_storage.delete(name)
+    default_storage.save(name, ContentFile(buffer.getvalue()))
+
+    width, height = image.size
+    rendered = 0
+    for name, max_side in sorted(REVIEW_IMAGE_VARIANTS.items(), key=lambda item: -item[1]):
+        size = variant_size(width, height, max_side)
+        resized = image
+        for fmt in VARIANT_FORMATS:
+            resized, content = render_variant(image, size, fmt)
+            _store_variant(review_image, name, fmt, content, size)
+            rendered += 1
+        # Each smaller size is downscaled from this one instead of the original
+        image = resized
+
+    # update() rather than save(), which would queue the image for processing again
+    ReviewImage.objects.filter(id=review_image.id).update(
+        width=width, height=height, processed_at=timezone.now()
+    )
+    return rendered
+
+
+def get_variant_path(image_id, name, fmt):
+    """
+    Storage path of a variant, rendering it first if it doesn't exist yet.
+
+    Raises:
+        ReviewImage.DoesNotExist: No such image
+        OSError: The original is missing or can't be decoded
+    """
+    key = variant_cache_key(image_id, name, fmt)
+    path = cache.get(key)
+    if path:
+        return path
+
+    path = ReviewImageVariant.objects.filter(
+        image_id=image_id, name=name, format=fmt
+    ).values_list('file', flat=True).first()
+    if path is None:
+        logger.info(f"Rendering {name} {fmt} variant of review image {image_id} on request")
+        return generate_variant(ReviewImage.objects.get(id=image_id), name, fmt).file.name
+
+    cache.set(key, path, VARIANT_CACHE_TIMEOUT)
+    return path
@@ -0,0 +1,27 @@
+"""
+Moderate new reviews, optionally over a process pool.
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from reviews.moderation import MODERATION_CHUNK_SIZE, moderate_new_reviews
+
+
+class Command(BaseCommand):
+    help = "Flag reviews written since the last moderation run, scanning chunks over worker processes"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=settings.REVIEW_MODERATION_WORKERS,
+            help='Scanner processes; 0 scans in this process'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=MODERATION_CHUNK_SIZE, help='Reviews scanned per worker task'
+        )
+        parser.add_argument('--max-batches', type=int, default=100, help='Upper bound on batches')
+
+    def handle(self, *args, **options):
+        scanned, flagged = moderate_new_reviews(
+            chunk_size=options['chunk_size'], workers=options['workers'], max_batches=options['max_batches']
+        )
+        self.stdout.write(self.style.SUCCESS(f"Moderated {scanned} reviews, flagged {flagged}"))
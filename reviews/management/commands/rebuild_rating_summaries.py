@@ -0,0 +1,18 @@
+"""
+Recompute the denormalized product rating summaries from the reviews table.
+"""
+
+from django.core.management.base import BaseCommand
+from reviews.ratings import rebuild_rating_summaries
+
+
+class Command(BaseCommand):
+    help = "Rebuild ProductRatingSummary rows with a single aggregate pass over reviews"
+
+    def add_arguments(self, parser):
+        parser.add_argument('product_ids', nargs='*', type=int, help='Only rebuild these products')
+
+    def handle(self, *args, **options):
+        product_ids = options['product_ids'] or None
+        count = rebuild_rating_summaries(product_ids)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} rating summaries"))
@@ -0,0 +1,21 @@
+"""
+Recompute the denormalized reviewer stats from the reviews table.
+"""
+
+from django.core.management.base import BaseCommand
+from reviews.reviewers import REBUILD_CHUNK_SIZE, rebuild_reviewer_stats
+
+
+class Command(BaseCommand):
+    help = "Rebuild ReviewerStats rows with chunked aggregate passes over reviews"
+
+    def add_arguments(self, parser):
+        parser.add_argument('user_ids', nargs='*', type=int, help='Only rebuild these users')
+        parser.add_argument(
+            '--chunk-size', type=int, default=REBUILD_CHUNK_SIZE, help='Reviewers aggregated per query'
+        )
+
+    def handle(self, *args, **options):
+        user_ids = options['user_ids'] or None
+        count = rebuild_reviewer_stats(user_ids, chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt stats for {count} reviewers"))
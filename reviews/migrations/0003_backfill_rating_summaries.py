@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-18 22:44
+
+from django.db import migrations
+from django.db.models import Count, Q, Sum
+
+
+def backfill_rating_summaries(apps, schema_editor):
+    """Build a rating summary for every product that already has reviews."""
+    Review = apps.get_model('reviews', 'Review')
+    ProductRatingSummary = apps.get_model('reviews', 'ProductRatingSummary')
+    rows = Review.objects.order_by().values('product_id').annotate(
+        review_count=Count('id'),
+        rating_sum=Sum('rating'),
+        verified_count=Count('id', filter=Q(is_verified_purchase=True)),
+        **{f'rating_{i}_count': Count('id', filter=Q(rating=i)) for i in range(1, 6)},
+    )
+    ProductRatingSummary.objects.bulk_create(
+        (ProductRatingSummary(**row) for row in rows.iterator(chunk_size=1000)),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0002_product_rating_summary'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_rating_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.7 on 2026-10-18 22:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0003_backfill_rating_summaries'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='review',
+            name='reviews_rev_product_d800fc_idx',
+        ),
+        migrations.AddField(
+            model_name='review',
+            name='helpfulness_score',
+            field=models.FloatField(default=0, help_text='Wilson lower bound of the helpful vote share, used for ranking'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['product', '-created_at', '-id'], name='reviews_rev_product_38ece6_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['product', '-helpfulness_score', '-id'], name='reviews_rev_product_29b053_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['product', '-rating', '-created_at', '-id'], name='reviews_rev_product_91f260_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['product', 'rating', '-created_at', '-id'], name='reviews_rev_product_9a27d3_idx'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.7 on 2026-10-18 22:52
+
+import math
+
+from django.db import migrations
+
+
+def wilson_lower_bound(helpful, not_helpful, z=1.96):
+    total = helpful + not_helpful
+    p = helpful / total
+    return (
+        p + z * z / (2 * total) - z * math.sqrt((p * (1 - p) + z * z / (4 * total)) / total)
+    ) / (1 + z * z / total)
+
+
+def backfill_helpfulness_scores(apps, schema_editor):
+    """Score every review that already has votes."""
+    Review = apps.get_model('reviews', 'Review')
+    batch = []
+    voted = Review.objects.exclude(helpful_count=0, not_helpful_count=0).only('id', 'helpful_count', 'not_helpful_count')
+    for review in voted.iterator(chunk_size=1000):
+        review.helpfulness_score = wilson_lower_bound(review.helpful_count, review.not_helpful_count)
+        batch.append(review)
+        if len(batch) == 1000:
+            Review.objects.bulk_update(batch, ['helpfulness_score'])
+            batch = []
+    Review.objects.bulk_update(batch, ['helpfulness_score'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0004_review_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_helpfulness_scores, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,99 @@
+# Generated by Django 4.2.7 on 2026-10-18 22:58
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+SQLITE_CREATE = [
+    """
+    CREATE VIRTUAL TABLE reviews_review_fts USING fts5(
+        title, comment, product_id,
+        content='reviews_review', content_rowid='id',
+        tokenize='porter unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER reviews_review_fts_insert AFTER INSERT ON reviews_review BEGIN
+        INSERT INTO reviews_review_fts(rowid, title, comment, product_id)
+        VALUES (new.id, new.title, new.comment, new.product_id);
+    END
+    """,
+    """
+    CREATE TRIGGER reviews_review_fts_delete AFTER DELETE ON reviews_review BEGIN
+        INSERT INTO reviews_review_fts(reviews_review_fts, rowid, title, comment, product_id)
+        VALUES ('delete', old.id, old.title, old.comment, old.product_id);
+    END
+    """,
+    """
+    CREATE TRIGGER reviews_review_fts_update AFTER UPDATE OF title, comment, product_id ON reviews_review BEGIN
+        INSERT INTO reviews_review_fts(reviews_review_fts, rowid, title, comment, product_id)
+        VALUES ('delete', old.id, old.title, old.comment, old.product_id);
+        INSERT INTO reviews_review_fts(rowid, title, comment, product_id)
+        VALUES (new.id, new.title, new.comment, new.product_id);
+    END
+    """,
+    # Rank title matches above comment matches; the product_id column is only a filter
+    "INSERT INTO reviews_review_fts(reviews_review_fts, rank) VALUES ('rank', 'bm25(2.0, 1.0, 0.0)')",
+    # Index the reviews that already exist
+    "INSERT INTO reviews_review_fts(reviews_review_fts) VALUES ('rebuild')",
+]
+
+SQLITE_DROP = [
+    "DROP TRIGGER IF EXISTS reviews_review_fts_insert",
+    "DROP TRIGGER IF EXISTS reviews_review_fts_delete",
+    "DROP TRIGGER IF EXISTS reviews_review_fts_update",
+    "DROP TABLE IF EXISTS reviews_review_fts",
+]
+
+POSTGRES_CREATE = [
+    "CREATE INDEX reviews_review_search_idx ON reviews_review "
+    "USING GIN (to_tsvector('english', reviews_review.title || ' ' || reviews_review.comment))",
+]
+
+POSTGRES_DROP = [
+    "DROP INDEX IF EXISTS reviews_review_search_idx",
+]
+
+
+def _run(schema_editor, statements):
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def create_search_index(apps, schema_editor):
+    """Index review titles and comments for full-text search."""
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        _run(schema_editor, SQLITE_CREATE)
+    elif vendor == 'postgresql':
+        _run(schema_editor, POSTGRES_CREATE)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        _run(schema_editor, SQLITE_DROP)
+    elif vendor == 'postgresql':
+        _run(schema_editor, POSTGRES_DROP)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0005_backfill_helpfulness_scores'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+        migrations.CreateModel(
+            name='ReviewSearchIndex',
+            fields=[
+                ('review', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_index', serialize=False, to='reviews.review')),
+                ('document', models.TextField(db_column='reviews_review_fts')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'reviews_review_fts',
+                'managed': False,
+            },
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 4.2.7 on 2026-10-18 23:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0006_review_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReviewModerationOffset',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_review_id', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ReviewFingerprint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.BigIntegerField(db_index=True)),
+                ('review', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fingerprints', to='reviews.review')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ReviewFlag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('reason', models.CharField(choices=[('term', 'Blocked term'), ('pattern', 'Suspicious pattern'), ('duplicate', 'Near-duplicate')], max_length=20)),
+                ('detail', models.CharField(max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('review', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='flags', to='reviews.review')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['reason', '-created_at'], name='reviews_rev_reason_d80b08_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='reviewflag',
+            constraint=models.UniqueConstraint(fields=('review', 'reason', 'detail'), name='unique_review_flag'),
+        ),
+    ]
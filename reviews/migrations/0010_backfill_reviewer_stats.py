@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-18 23:21
+
+from django.db import migrations
+from django.db.models import Count, Sum
+
+
+def backfill_reviewer_stats(apps, schema_editor):
+    """Build stats for every user who has already written reviews."""
+    Review = apps.get_model('reviews', 'Review')
+    ReviewerStats = apps.get_model('reviews', 'ReviewerStats')
+    rows = Review.objects.order_by().values('user_id').annotate(
+        review_count=Count('id'),
+        helpful_votes=Sum('helpful_count'),
+    )
+    ReviewerStats.objects.bulk_create(
+        (ReviewerStats(**row) for row in rows.iterator(chunk_size=1000)),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0009_reviewer_stats'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_reviewer_stats, migrations.RunPython.noop),
+    ]
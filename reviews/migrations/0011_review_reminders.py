@@ -0,0 +1,36 @@
+# Generated by Django 4.2.7 on 2026-10-18 23:23
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0005_stock_shards'),
+        ('reviews', '0010_backfill_reviewer_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReviewReminderOffset',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_event_id', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ReviewReminder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('customer_email', models.EmailField(max_length=254)),
+                ('sent_at', models.DateTimeField(auto_now_add=True)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='review_reminders', to='products.product')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='reviewreminder',
+            constraint=models.UniqueConstraint(fields=('customer_email', 'product'), name='unique_review_reminder'),
+        ),
+    ]
@@ -34,14 +34,22 @@ class Review(models.Model):
     )
     helpful_count = models.IntegerField(default=0)
     not_helpful_count = models.IntegerField(default=0)
+    helpfulness_score = models.FloatField(
+        default=0,
+        help_text="Wilson lower bound of the helpful vote share, used for ranking"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['-created_at']
         unique_together = ['product', 'user']
+        # One index per review sort order, ending in id for keyset pagination
         indexes = [
-            models.Index(fields=['product', '-created_at']),
+            models.Index(fields=['product', '-created_at', '-id']),
+            models.Index(fields=['product', '-helpfulness_score', '-id']),
+            models.Index(fields=['product', '-rating', '-created_at', '-id']),
+            models.Index(fields=['product', 'rating', '-created_at', '-id']),
             models.Index(fields=['user', '-created_at']),
             models.Index(fields=['rating']),
         ]
@@ -49,6 +57,14 @@ class Review(models.Model):
     def __str__(self):
         return f"{self.user.username}'s review of {self.product.name} - {self.rating}★"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember what the rating summary currently counts for this review
+        if 'rating' in instance.__dict__ and 'is_verified_purchase' in instance.__dict__:
+            instance._rating_state = (instance.rating, instance.is_verified_purchase)
+        return instance
+    
     @property
     def helpful_percentage(self):
         """Calculate percentage of helpful votes."""
@@ -58,6 +74,30 @@ class Review(models.Model):
         return (self.helpful_count / total_votes) * 100
 
 
+class ReviewSearchIndex(models.Model):
+    """
+    The ``reviews_review_fts`` full-text index, on SQLite only.
+    
+    Created and kept in sync with reviews by migration 0006; queried
+    through reviews.search.
+    """
+    review = models.OneToOneField(
+        Review,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column='rowid',
+        related_name='search_index'
+    )
+    # FTS5's hidden column named after the table, the target of MATCH
+    document = models.TextField(db_column='reviews_review_fts')
+    # FTS5's hidden bm25 rank of the match, lower is better
+    rank = models.FloatField()
+    
+    class Meta:
+        managed = False
+        db_table = 'reviews_review_fts'
+
+
 class ReviewHelpful(models.Model):
     """
     Model to track which users found reviews helpful.
@@ -97,6 +137,10 @@ class ReviewImage(models.Model):
     )
     image = models.ImageField(upload_to='review_images/')
     caption = models.CharField(max_length=200, blank=True)
+    # Filled in by reviews.images once the upload has been processed
+    width = models.PositiveIntegerField(null=True, blank=True)
+    height = models.PositiveIntegerField(null=True, blank=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
@@ -104,3 +148,208 @@ class ReviewImage(models.Model):
     
     def __str__(self):
         return f"Image for review {self.review.id}"
+
+
+class ReviewImageVariant(models.Model):
+    """
+    A resized, metadata-free rendition of a review image.
+    
+    Generated by reviews.images, in the background after upload or on the
+    first request for it.
+    """
+    FORMAT_CHOICES = [
+        ('webp', 'WebP'),
+        ('jpeg', 'JPEG'),
+    ]
+    
+    image = models.ForeignKey(
+        ReviewImage,
+        on_delete=models.CASCADE,
+        related_name='variants'
+    )
+    name = models.CharField(max_length=20)
+    format = models.CharField(max_length=10, choices=FORMAT_CHOICES)
+    file = models.FileField(upload_to='review_images/variants/', max_length=255)
+    width = models.PositiveIntegerField()
+    height = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['image', 'name', 'format'], name='unique_review_image_variant'),
+        ]
+    
+    def __str__(self):
+        return f"{self.name} {self.format} of review image {self.image_id}"
+
+
+class ProductRatingSummary(models.Model):
+    """
+    Denormalized rating aggregates for a product.
+    
+    Kept up to date with F() increments as reviews are created, edited and
+    deleted (see reviews.signals); ``rebuild_rating_summaries`` recomputes
+    them from scratch.
+    """
+    product = models.OneToOneField(
+        Product,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='rating_summary'
+    )
+    review_count = models.IntegerField(default=0)
+    rating_sum = models.IntegerField(default=0)
+    rating_1_count = models.IntegerField(default=0)
+    rating_2_count = models.IntegerField(default=0)
+    rating_3_count = models.IntegerField(default=0)
+    rating_4_count = models.IntegerField(default=0)
+    rating_5_count = models.IntegerField(default=0)
+    verified_count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"Ratings for product {self.product_id}: {self.average_rating}★ ({self.review_count})"
+    
+    @property
+    def average_rating(self):
+        """Mean rating, rounded to two decimals."""
+        if not self.review_count:
+            return 0
+        return round(self.rating_sum / self.review_count, 2)
+    
+    @property
+    def rating_distribution(self):
+        """Number of reviews per star, keyed ``1_star`` to ``5_star``."""
+        return {f'{i}_star': getattr(self, f'rating_{i}_count') for i in range(1, 6)}
+
+
+class ReviewFlag(models.Model):
+    """
+    A reason a review needs a moderator's attention.
+    
+    Written in bulk by reviews.moderation as new reviews are scanned.
+    """
+    REASON_CHOICES = [
+        ('term', 'Blocked term'),
+        ('pattern', 'Suspicious pattern'),
+        ('duplicate', 'Near-duplicate'),
+    ]
+    
+    review = models.ForeignKey(
+        Review,
+        on_delete=models.CASCADE,
+        related_name='flags'
+    )
+    reason = models.CharField(max_length=20, choices=REASON_CHOICES)
+    detail = models.CharField(max_length=255)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(fields=['review', 'reason', 'detail'], name='unique_review_flag'),
+        ]
+        indexes = [
+            models.Index(fields=['reason', '-created_at']),
+        ]
+    
+    def __str__(self):
+        return f"Review {self.review_id} flagged ({self.reason}): {self.detail}"
+
+
+class ReviewFingerprint(models.Model):
+    """
+    One MinHash LSH bucket of a scanned review.
+    
+    Reviews sharing a bucket are near-duplicate candidates, so a new review
+    is compared only against the reviews found in its buckets.
+    """
+    review = models.ForeignKey(
+        Review,
+        on_delete=models.CASCADE,
+        related_name='fingerprints'
+    )
+    bucket = models.BigIntegerField(db_index=True)
+    
+    def __str__(self):
+        return f"Review {self.review_id} in bucket {self.bucket}"
+
+
+class ReviewModerationOffset(models.Model):
+    """Last review scanned by reviews.moderation"""
+    
+    last_review_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"Moderated up to review {self.last_review_id}"
+
+
+class ReviewerStats(models.Model):
+    """
+    Denormalized review totals for a user, ranking the reviewer leaderboard.
+    
+    Kept up to date with F() increments as reviews are written, deleted and
+    voted on (see reviews.reviewers); ``rebuild_reviewer_stats`` recomputes
+    them from scratch.
+    """
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='review_stats'
+    )
+    review_count = models.IntegerField(default=0)
+    # Sum of helpful_count over the user's reviews
+    helpful_votes = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name_plural = 'reviewer stats'
+        indexes = [
+            # Leaderboard order, so the top N is read straight off the index
+            models.Index(fields=['-helpful_votes', '-review_count', 'user']),
+        ]
+    
+    def __str__(self):
+        return f"Reviewer {self.user_id}: {self.review_count} reviews, {self.helpful_votes} helpful votes"
+
+
+class ReviewReminder(models.Model):
+    """A customer who has been asked to review a product they received"""
+    
+    customer_email = models.EmailField()
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='review_reminders'
+    )
+    sent_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['customer_email', 'product'], name='unique_review_reminder'),
+        ]
+    
+    def __str__(self):
+        return f"Reminded {self.customer_email} to review product {self.product_id}"
+
+
+class ReviewReminderOffset(models.Model):
+    """Last delivered-order event handled by reviews.reminders"""
+    
+    last_event_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"Reminders sent up to order event {self.last_event_id}"
+
+
+class ReviewVoteFlush(models.Model):
+    """A batch of buffered helpful votes applied by reviews.votes.flush_vote_deltas"""
+    
+    flush_id = models.CharField(max_length=32, unique=True)
+    applied_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    
+    def __str__(self):
+        return f"Vote flush {self.flush_id} applied at {self.applied_at}"
@@ -0,0 +1,331 @@
+"""
+Incremental moderation of new reviews.
+
+``moderate_new_reviews`` reads reviews above the stored
+``ReviewModerationOffset`` in ``id`` order and scans them in chunks,
+optionally spread over a process pool (the ``moderate_reviews`` command;
+the Celery task scans in its own process). Each review's title and comment are checked
+for:
+
+- blocked terms (``REVIEW_MODERATION_TERMS``), all found in one pass over
+  the text by an Aho-Corasick automaton built once per worker;
+- regular expressions (``REVIEW_MODERATION_PATTERNS``) such as links,
+  e-mail addresses and phone numbers;
+- near-duplicates of earlier reviews. A MinHash signature of the review's
+  word shingles is split into LSH bands whose hashes are stored as
+  ``ReviewFingerprint`` buckets, so a review is only compared against the
+  reviews sharing a bucket with it rather than against every review.
+
+Findings are written to ``ReviewFlag`` in bulk and the offset advances in
+the same transaction. As with the change feed, review IDs become visible at
+commit rather than in order, so reviews younger than
+``REVIEW_MODERATION_SETTLE_SECONDS`` are left for the next run.
+"""
+
+import hashlib
+import multiprocessing
+import random
+import re
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from .models import Review, ReviewFingerprint, ReviewFlag, ReviewModerationOffset
+
+MODERATION_CHUNK_SIZE = 500
+SHINGLE_SIZE = 3
+# Reviews shorter than this are too generic ("Great product, works fine")
+# to call copies of each other
+DUPLICATE_MIN_WORDS = 8
+MINHASH_PERMUTATIONS = 64
+# 16 bands of 4 rows: reviews at 0.8 similarity share a band 99.9% of the time
+LSH_BANDS = 16
+LSH_ROWS = MINHASH_PERMUTATIONS // LSH_BANDS
+# Largest number of parameters put in one IN (...) list
+LOOKUP_BATCH_SIZE = 500
+
+_MERSENNE_PRIME = (1 << 61) - 1
+# Fixed seed so signatures are comparable across processes and runs
+_rng = random.Random(1)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(MINHASH_PERMUTATIONS)
+]
+
+
+class AhoCorasick:
+    """
+    Automaton matching a fixed set of terms against a text in a single pass.
+
+    Matching is case-insensitive and only whole words count, so "fake"
+    matches "FAKE!" but not "fakery".
+    """
+
+    def __init__(self, terms):
+        self.transitions = [{}]
+        self.fail = [0]
+        self.outputs = [[]]
+        for term in {term.strip().casefold() for term in terms} - {''}:
+            self._add(term)
+        self._link()
+
+    def _add(self, term):
+        state = 0
+        for char in term:
+            if char not in self.transitions[state]:
+                self.transitions.append({})
+                self.fail.append(0)
+                self.outputs.append([])
+                self.transitions[state][char] = len(self.transitions) - 1
+            state = self.transitions[state][char]
+        self.outputs[state].append(term)
+
+    def _link(self):
+        # Breadth-first, so every fail target is complete before it is used
+        queue = deque(self.transitions[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self.transitions[state].items():
+                queue.append(child)
+                fallback = self.fail[state]
+                while fallback and char not in self.transitions[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.transitions[fallback].get(char, 0)
+                self.outputs[child] = self.outputs[child] + self.outputs[self.fail[child]]
+
+    def find(self, text):
+        """Return the set of terms occurring in ``text`` as whole words."""
+        text = text.casefold()
+        found = set()
+        state = 0
+        for end, char in enumerate(text):
+            while state and char not in self.transitions[state]:
+                state = self.fail[state]
+            state = self.transitions[state].get(char, 0)
+            for term in self.outputs[state]:
+                start = end - len(term) + 1
+                if not _is_word_char(text, start - 1) and not _is_word_char(text, end + 1):
+                    found.add(term)
+        return found
+
+
+def _is_word_char(text, index):
+    return 0 <= index < len(text) and (text[index].isalnum() or text[index] == '_')
+
+
+def _hash64(value):
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), 'big')
+
+
+def minhash_signature(text):
+    """
+    MinHash signature of the word shingles of ``text``.
+
+    Returns:
+        Tuple of MINHASH_PERMUTATIONS ints, or None if the text has fewer
+        than DUPLICATE_MIN_WORDS words
+    """
+    words = re.findall(r'\w+', text.casefold())
+    if len(words) < DUPLICATE_MIN_WORDS:
+        return None
+    shingles = {
+        _hash64(' '.join(words[i:i + SHINGLE_SIZE])) for i in range(len(words) - SHINGLE_SIZE + 1)
+    }
+    return tuple(
+        min((a * shingle + b) % _MERSENNE_PRIME for shingle in shingles)
+        for a, b in _PERMUTATIONS
+    )
+
+
+def signature_similarity(first, second):
+    """Estimated Jaccard similarity of the shingle sets behind two signatures."""
+    return sum(x == y for x, y in zip(first, second)) / len(first)
+
+
+def lsh_buckets(signature):
+    """Bucket IDs of a signature's LSH bands, as signed 64-bit ints."""
+    buckets = []
+    for band in range(LSH_BANDS):
+        rows = signature[band * LSH_ROWS:(band + 1) * LSH_ROWS]
+        digest = hashlib.blake2b(repr((band,) + rows).encode(), digest_size=8).digest()
+        buckets.append(int.from_bytes(digest, 'big', signed=True))
+    return buckets
+
+
+def review_text(title, comment):
+    return f'{title}\n{comment}'
+
+
+class ReviewScanner:
+    """Blocked-term and pattern checks plus the MinHash signature for reviews."""
+
+    def __init__(self, terms, patterns):
+        self.automaton = AhoCorasick(terms)
+        self.patterns = {name: re.compile(pattern, re.IGNORECASE) for name, pattern in patterns.items()}
+
+    def scan(self, text):
+        """
+        Returns:
+            ``(flags, signature)`` where flags is a sorted list of
+            ``(reason, detail)`` pairs
+        """
+        flags = [('term', term) for term in self.automaton.find(text)]
+        flags += [('pattern', name) for name, pattern in self.patterns.items() if pattern.search(text)]
+        return sorted(flags), minhash_signature(text)
+
+    def scan_chunk(self, rows):
+        """Scan ``(review_id, title, comment)`` rows into ``(review_id, flags, signature)``."""
+        return [
+            (review_id, *self.scan(review_text(title, comment)))
+            for review_id, title, comment in rows
+        ]
+
+
+# The scanner of a pool worker process, built once by _init_worker
+_worker_scanner = None
+
+
+def _init_worker(terms, patterns):
+    global _worker_scanner
+    _worker_scanner = ReviewScanner(terms, patterns)
+
+
+def _scan_in_worker(rows):
+    return _worker_scanner.scan_chunk(rows)
+
+
+def duplicate_flags(scanned, threshold):
+    """
+    Find near-duplicates among scanned reviews and previously fingerprinted ones.
+
+    Args:
+        scanned: ``(review_id, signature)`` pairs in ascending ID order;
+            reviews without a signature are skipped
+        threshold: Minimum estimated similarity to flag
+
+    Returns:
+        ``(flags, fingerprints)``: ``(review_id, detail)`` pairs naming the
+        earliest review each one duplicates, and the unsaved
+        ReviewFingerprint rows for the scanned reviews
+    """
+    buckets = {review_id: lsh_buckets(signature) for review_id, signature in scanned if signature}
+    all_buckets = list({bucket for review_buckets in buckets.values() for bucket in review_buckets})
+
+    members = defaultdict(set)
+    for start in range(0, len(all_buckets), LOOKUP_BATCH_SIZE):
+        for bucket, review_id in ReviewFingerprint.objects.filter(
+            bucket__in=all_buckets[start:start + LOOKUP_BATCH_SIZE]
+        ).values_list('bucket', 'review_id'):
+            members[bucket].add(review_id)
+
+    # Signatures are not stored, so candidates from earlier runs are re-signed
+    earlier_ids = list(set().union(*members.values()) - set(buckets)) if members else []
+    signatures = dict(scanned)
+    for start in range(0, len(earlier_ids), LOOKUP_BATCH_SIZE):
+        for review_id, title, comment in Review.objects.filter(
+            id__in=earlier_ids[start:start + LOOKUP_BATCH_SIZE]
+        ).values_list('id', 'title', 'comment'):
+            signatures[review_id] = minhash_signature(review_text(title, comment))
+
+    flags = []
+    fingerprints = []
+    for review_id, signature in scanned:
+        if review_id not in buckets:
+            continue
+        candidates = set().union(*(members[bucket] for bucket in buckets[review_id]))
+        for candidate in sorted(candidates):
+            other = signatures.get(candidate)
+            if other and signature_similarity(signature, other) >= threshold:
+                flags.append((review_id, f'review #{candidate}'))
+                break
+        # Later reviews in this batch are compared against this one too
+        for bucket in buckets[review_id]:
+            members[bucket].add(review_id)
+            fingerprints.append(ReviewFingerprint(review_id=review_id, bucket=bucket))
+    return flags, fingerprints
+
+
+def moderate_new_reviews(chunk_size=MODERATION_CHUNK_SIZE, workers=None, max_batches=100):
+    """
+    Scan reviews written since the last run and flag the suspicious ones.
+
+    Each batch holds one chunk per worker. The offset row is locked while a
+    batch is scanned and only advances once its flags and fingerprints are
+    saved, so concurrent runs never scan the same reviews twice.
+
+    Args:
+        chunk_size: Reviews scanned per worker task
+        workers: Pool size, defaults to REVIEW_MODERATION_WORKERS; 0 scans
+            in this process, as it must in a daemonic process
+        max_batches: Upper bound on batches per run
+
+    Returns:
+        ``(scanned, flagged)`` review counts
+    """
+    if workers is None:
+        workers = settings.REVIEW_MODERATION_WORKERS
+    if workers and multiprocessing.current_process().daemon:
+        # Daemonic processes, such as Celery prefork children, can't start a pool
+        raise ValueError("Can't start a moderation process pool in a daemonic process; use workers=0")
+
+    terms = settings.REVIEW_MODERATION_TERMS
+    patterns = settings.REVIEW_MODERATION_PATTERNS
+    threshold = settings.REVIEW_DUPLICATE_THRESHOLD
+    settle = timedelta(seconds=settings.REVIEW_MODERATION_SETTLE_SECONDS)
+
+    if workers:
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(terms, patterns))
+        scan_chunk = _scan_in_worker
+    else:
+        pool = None
+        scan_chunk = ReviewScanner(terms, patterns).scan_chunk
+
+    scanned_count = 0
+    flagged = set()
+    try:
+        for _ in range(max_batches):
+            with transaction.atomic():
+                ReviewModerationOffset.objects.get_or_create(pk=1)
+                offset = ReviewModerationOffset.objects.select_for_update().get(pk=1)
+                reviews = Review.objects.filter(id__gt=offset.last_review_id)
+                if settle:
+                    reviews = reviews.filter(created_at__lte=timezone.now() - settle)
+                batch_size = chunk_size * max(workers, 1)
+                rows = list(reviews.order_by('id').values_list('id', 'title', 'comment')[:batch_size])
+                if not rows:
+                    break
+
+                chunks = [rows[i:i + chunk_size] for i in range(0, len(rows), chunk_size)]
+                results = [
+                    row for result in (pool.map(scan_chunk, chunks) if pool else map(scan_chunk, chunks))
+                    for row in result
+                ]
+                flags = [
+                    ReviewFlag(review_id=review_id, reason=reason, detail=detail)
+                    for review_id, review_flags, _ in results
+                    for reason, detail in review_flags
+                ]
+                duplicates, fingerprints = duplicate_flags(
+                    [(review_id, signature) for review_id, _, signature in results], threshold
+                )
+                flags += [
+                    ReviewFlag(review_id=review_id, reason='duplicate', detail=detail)
+                    for review_id, detail in duplicates
+                ]
+                ReviewFlag.objects.bulk_create(flags, batch_size=LOOKUP_BATCH_SIZE, ignore_conflicts=True)
+                ReviewFingerprint.objects.bulk_create(fingerprints, batch_size=LOOKUP_BATCH_SIZE)
+
+                offset.last_review_id = rows[-1][0]
+                offset.save(update_fields=['last_review_id', 'updated_at'])
+
+            scanned_count += len(rows)
+            flagged.update(flag.review_id for flag in flags)
+            if len(rows) < batch_size:
+                break
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return scanned_count, len(flagged)
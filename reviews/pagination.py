@@ -0,0 +1,128 @@
+"""
+Keyset pagination for review listings.
+"""
+
+import base64
+import json
+from datetime import datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginate on the values of the queryset's ordering fields.
+
+    Each page continues from the last row of the previous one with a
+    ``WHERE (a, b, id) < (...)`` style condition instead of an OFFSET, so
+    deep pages cost the same as the first one when an index matches the
+    ordering. The ordering must end in a unique field such as ``-id``.
+    """
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = [
+            (field.lstrip('-'), field.startswith('-')) for field in queryset.query.order_by
+        ]
+        # Ordering on annotations such as a search rank works too
+        self.fields = [
+            queryset.query.annotations[name].output_field if name in queryset.query.annotations
+            else queryset.model._meta.get_field(name)
+            for name, _ in self.ordering
+        ]
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            queryset = queryset.filter(self._after(self.decode_cursor(cursor)))
+
+        # Fetch one extra row to learn whether another page exists
+        rows = list(queryset[:self.page_size + 1])
+        self.next_position = None
+        if len(rows) > self.page_size:
+            rows = rows[:self.page_size]
+            self.next_position = [getattr(rows[-1], name) for name, _ in self.ordering]
+        return rows
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def _after(self, position):
+        """Condition selecting rows that sort after ``position``."""
+        condition = Q()
+        for index, ((name, descending), value) in enumerate(zip(self.ordering, position)):
+            equal = {prefix: prefix_value for (prefix, _), prefix_value in zip(self.ordering[:index], position)}
+            condition |= Q(**equal, **{f"{name}__{'lt' if descending else 'gt'}": value})
+        return condition
+
+    def encode_cursor(self, position):
+        """Encode a keyset position as an opaque cursor."""
+        raw = json.dumps({
+            'fields': [name for name, _ in self.ordering],
+            # Full-precision timestamps; ties are broken by exact equality
+            'values': [value.isoformat() if isinstance(value, datetime) else value for value in position],
+        })
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    def decode_cursor(self, cursor):
+        """Decode a cursor, which must have been issued for the same ordering."""
+        try:
+            data = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+            if data['fields'] != [name for name, _ in self.ordering]:
+                raise ValueError(cursor)
+            return [field.to_python(value) for field, value in zip(self.fields, data['values'])]
+        except (ValueError, TypeError, KeyError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'The pagination cursor value.',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.page_size_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Number of results to return per page.',
+                'schema': {'type': 'integer'},
+            },
+        ]
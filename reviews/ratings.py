@@ -0,0 +1,100 @@
+"""
+Maintenance of the denormalized ProductRatingSummary rows.
+"""
+
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+from .models import ProductRatingSummary, Review
+
+SUMMARY_FIELDS = [
+    'review_count',
+    'rating_sum',
+    'rating_1_count',
+    'rating_2_count',
+    'rating_3_count',
+    'rating_4_count',
+    'rating_5_count',
+    'verified_count',
+]
+
+
+def _contribution(rating, is_verified_purchase, sign):
+    """Summary field deltas for adding (sign=1) or removing (sign=-1) one review."""
+    return {
+        'review_count': sign,
+        'rating_sum': sign * rating,
+        f'rating_{rating}_count': sign,
+        'verified_count': sign if is_verified_purchase else 0,
+    }
+
+
+def adjust_rating_summary(product_id, old=None, new=None):
+    """
+    Move one review's contribution in the product's summary with F() updates.
+
+    Args:
+        product_id: Product the review belongs to
+        old: ``(rating, is_verified_purchase)`` currently counted, or None
+        new: ``(rating, is_verified_purchase)`` to count instead, or None
+    """
+    deltas = {}
+    for state, sign in ((old, -1), (new, 1)):
+        if state is not None:
+            for field, delta in _contribution(*state, sign).items():
+                deltas[field] = deltas.get(field, 0) + delta
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if not deltas:
+        return
+
+    updates = {field: F(field) + delta for field, delta in deltas.items()}
+    updated = ProductRatingSummary.objects.filter(product_id=product_id).update(
+        updated_at=timezone.now(), **updates
+    )
+    # Only create a missing summary to count a review in; when a product is
+    # deleted its summary may already be gone by the time its reviews are
+    if not updated and new is not None:
+        ProductRatingSummary.objects.get_or_create(product_id=product_id)
+        ProductRatingSummary.objects.filter(product_id=product_id).update(
+            updated_at=timezone.now(), **updates
+        )
+
+
+def summary_rows(product_ids=None):
+    """Compute summary values per product with a single GROUP BY over reviews."""
+    queryset = Review.objects.order_by()
+    if product_ids is not None:
+        queryset = queryset.filter(product_id__in=product_ids)
+    return queryset.values('product_id').annotate(
+        review_count=Count('id'),
+        rating_sum=Sum('rating'),
+        verified_count=Count('id', filter=Q(is_verified_purchase=True)),
+        **{f'rating_{i}_count': Count('id', filter=Q(rating=i)) for i in range(1, 6)},
+    )
+
+
+def rebuild_rating_summaries(product_ids=None):
+    """
+    Recompute summaries from the reviews table.
+
+    One aggregate query over the reviews, one upsert for the results, and
+    one delete for summaries of products that no longer have reviews.
+
+    Returns:
+        Number of summaries written
+    """
+    now = timezone.now()
+    summaries = [
+        ProductRatingSummary(updated_at=now, **row) for row in summary_rows(product_ids)
+    ]
+    ProductRatingSummary.objects.bulk_create(
+        summaries,
+        update_conflicts=True,
+        unique_fields=['product'],
+        update_fields=SUMMARY_FIELDS + ['updated_at'],
+    )
+
+    stale = ProductRatingSummary.objects.exclude(product_id__in=[s.product_id for s in summaries])
+    if product_ids is not None:
+        stale = stale.filter(product_id__in=product_ids)
+    stale.delete()
+    return len(summaries)
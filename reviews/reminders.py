@@ -0,0 +1,126 @@
+"""
+Review reminders for delivered orders.
+
+Deliveries are read from the ``delivered`` status events in the order event
+log, from the stored ``ReviewReminderOffset`` onwards, once they are
+``REVIEW_REMINDER_DELAY_DAYS`` old. Each run therefore only looks at orders
+delivered since the previous one.
+
+For those orders a single query finds the (customer, product) pairs still
+worth a reminder: it anti-joins the reviews already written by the
+customer's account and the reminders already sent, recorded in
+``ReviewReminder``. Each customer then gets one e-mail covering all their
+products, sent in batches over one mail connection once the reminders and
+the offset are committed. Delivery is at most once: a batch whose e-mails
+fail to send is not retried.
+"""
+
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from orders.models import OrderEvent, OrderItem
+from .models import Review, ReviewReminder, ReviewReminderOffset
+
+logger = logging.getLogger(__name__)
+
+REMINDER_EVENT_BATCH_SIZE = 1000
+REMINDER_SEND_BATCH_SIZE = 100
+
+
+def reminder_pairs(order_ids):
+    """
+    (customer_email, product_id, product_name) to remind about, for delivered orders.
+
+    Pairs the customer has reviewed, or been reminded about, are left out
+    by the same query; duplicates across orders collapse with DISTINCT.
+    """
+    reviewed = Review.objects.filter(
+        product_id=OuterRef('product_id'),
+        user__email=OuterRef('order__customer_email'),
+    )
+    reminded = ReviewReminder.objects.filter(
+        product_id=OuterRef('product_id'),
+        customer_email=OuterRef('order__customer_email'),
+    )
+    return list(
+        OrderItem.objects.filter(order_id__in=order_ids, order__status='delivered')
+        .exclude(Exists(reviewed))
+        .exclude(Exists(reminded))
+        .values_list('order__customer_email', 'product_id', 'product__name')
+        .order_by('order__customer_email', 'product_id')
+        .distinct()
+    )
+
+
+def reminder_message(customer_email, product_names):
+    """One reminder e-mail asking a customer to review everything they received."""
+    if len(product_names) == 1:
+        subject = f'Review your purchase: {product_names[0]}'
+    else:
+        subject = f'Review your {len(product_names)} recent purchases'
+    body = 'How was your experience with:\n\n' + '\n'.join(f'- {name}' for name in product_names)
+    return EmailMessage(subject, body, settings.DEFAULT_FROM_EMAIL, [customer_email])
+
+
+def send_reminder_messages(messages, batch_size=REMINDER_SEND_BATCH_SIZE):
+    """Send e-mails over one connection, ``batch_size`` at a time."""
+    sent = 0
+    with get_connection() as connection:
+        for start in range(0, len(messages), batch_size):
+            sent += connection.send_messages(messages[start:start + batch_size]) or 0
+    return sent
+
+
+def send_review_reminders(batch_size=REMINDER_EVENT_BATCH_SIZE, max_batches=100):
+    """
+    Remind customers to review the products of orders delivered since the last run.
+
+    The offset row is locked for each batch of delivery events while the
+    reminders are recorded and the offset advanced. The e-mails are sent
+    after that commits, so the lock is never held over the mail server and
+    no e-mail goes out for reminders that were rolled back.
+
+    Returns:
+        ``(customers, products)`` reminded
+    """
+    cutoff = timezone.now() - timedelta(days=settings.REVIEW_REMINDER_DELAY_DAYS)
+    customers = 0
+    products = 0
+    for _ in range(max_batches):
+        with transaction.atomic():
+            ReviewReminderOffset.objects.get_or_create(pk=1)
+            offset = ReviewReminderOffset.objects.select_for_update().get(pk=1)
+            events = list(
+                OrderEvent.objects.filter(
+                    id__gt=offset.last_event_id, to_status='delivered', created_at__lte=cutoff
+                ).order_by('id').values_list('id', 'order_id')[:batch_size]
+            )
+            if not events:
+                break
+
+            pairs = reminder_pairs({order_id for _, order_id in events})
+            by_customer = defaultdict(list)
+            for customer_email, _, product_name in pairs:
+                by_customer[customer_email].append(product_name)
+
+            ReviewReminder.objects.bulk_create(
+                [ReviewReminder(customer_email=email, product_id=product_id) for email, product_id, _ in pairs],
+                ignore_conflicts=True,
+            )
+            offset.last_event_id = events[-1][0]
+            offset.save(update_fields=['last_event_id', 'updated_at'])
+
+            messages = [reminder_message(email, names) for email, names in by_customer.items()]
+            transaction.on_commit(lambda messages=messages: send_reminder_messages(messages))
+
+        customers += len(by_customer)
+        products += len(pairs)
+        if len(events) < batch_size:
+            break
+    return customers, products
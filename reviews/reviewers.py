@@ -0,0 +1,123 @@
+"""
+Maintenance of the denormalized ReviewerStats rows behind the reviewer
+leaderboard.
+
+A reviewer's ``review_count`` moves as their reviews are created and
+deleted (reviews.signals). ``helpful_votes``, the sum of their reviews'
+``helpful_count``, moves by the same deltas as those counters wherever
+reviews.votes applies them. ``rebuild_reviewer_stats`` recomputes both
+from the reviews table.
+"""
+
+from collections import defaultdict
+
+from django.db.models import Case, Count, F, IntegerField, Sum, Value, When
+from django.utils import timezone
+from .models import Review, ReviewerStats
+
+STATS_FIELDS = ['review_count', 'helpful_votes']
+REBUILD_CHUNK_SIZE = 1000
+LEADERBOARD_SIZE = 10
+
+
+def adjust_reviewer_stats(user_id, review_count=0, helpful_votes=0):
+    """Add deltas to a reviewer's stats with F() updates."""
+    updates = {
+        field: F(field) + delta
+        for field, delta in (('review_count', review_count), ('helpful_votes', helpful_votes))
+        if delta
+    }
+    if not updates:
+        return
+
+    updated = ReviewerStats.objects.filter(user_id=user_id).update(updated_at=timezone.now(), **updates)
+    # Only create missing stats to count a review in; when a user is deleted
+    # their stats may already be gone by the time their reviews are
+    if not updated and review_count > 0:
+        ReviewerStats.objects.get_or_create(user_id=user_id)
+        ReviewerStats.objects.filter(user_id=user_id).update(updated_at=timezone.now(), **updates)
+
+
+def adjust_helpful_votes(review_deltas):
+    """
+    Apply helpful-count changes of reviews to their authors' stats.
+
+    One query finds the authors and one UPDATE applies the per-author sums.
+    Authors always have stats, created with their first review.
+
+    Args:
+        review_deltas: ``{review_id: helpful_count_delta}``
+    """
+    review_deltas = {review_id: delta for review_id, delta in review_deltas.items() if delta}
+    if not review_deltas:
+        return
+
+    author_deltas = defaultdict(int)
+    for review_id, user_id in Review.objects.filter(id__in=review_deltas).values_list('id', 'user_id'):
+        author_deltas[user_id] += review_deltas[review_id]
+    author_deltas = {user_id: delta for user_id, delta in author_deltas.items() if delta}
+    if not author_deltas:
+        return
+
+    ReviewerStats.objects.filter(user_id__in=author_deltas).update(
+        helpful_votes=F('helpful_votes') + Case(
+            *[When(user_id=user_id, then=Value(delta)) for user_id, delta in author_deltas.items()],
+            default=Value(0),
+            output_field=IntegerField(),
+        ),
+        updated_at=timezone.now(),
+    )
+
+
+def rebuild_reviewer_stats(user_ids=None, chunk_size=REBUILD_CHUNK_SIZE):
+    """
+    Recompute reviewer stats from the reviews table.
+
+    Works through reviewers in ``user_id`` order, ``chunk_size`` at a time:
+    one aggregate query over their reviews, one upsert, and one delete for
+    stats in the same ID range whose users no longer have reviews.
+
+    Returns:
+        Number of stats rows written
+    """
+    reviews = Review.objects.order_by('user_id')
+    stats = ReviewerStats.objects.all()
+    if user_ids is not None:
+        reviews = reviews.filter(user_id__in=user_ids)
+        stats = stats.filter(user_id__in=user_ids)
+
+    written = 0
+    last_id = 0
+    while True:
+        rows = list(
+            reviews.filter(user_id__gt=last_id).values('user_id').annotate(
+                review_count=Count('id'),
+                helpful_votes=Sum('helpful_count'),
+            )[:chunk_size]
+        )
+        if not rows:
+            stats.filter(user_id__gt=last_id).delete()
+            return written
+
+        now = timezone.now()
+        ReviewerStats.objects.bulk_create(
+            [ReviewerStats(updated_at=now, **row) for row in rows],
+            update_conflicts=True,
+            unique_fields=['user'],
+            update_fields=STATS_FIELDS + ['updated_at'],
+        )
+        chunk_last_id = rows[-1]['user_id']
+        stats.filter(user_id__gt=last_id, user_id__lte=chunk_last_id).exclude(
+            user_id__in=[row['user_id'] for row in rows]
+        ).delete()
+        written += len(rows)
+        last_id = chunk_last_id
+
+
+def top_reviewers(limit=LEADERBOARD_SIZE):
+    """The reviewers with the most helpful votes, read in index order."""
+    return list(
+        ReviewerStats.objects.filter(review_count__gt=0)
+        .select_related('user')
+        .order_by('-helpful_votes', '-review_count', 'user')[:limit]
+    )
@@ -0,0 +1,127 @@
+"""
+Full-text search over review titles and comments.
+
+The indexes are created by migration 0006. On SQLite the reviews are
+indexed by the ``reviews_review_fts`` FTS5 table, an external-content index
+kept in sync with ``reviews_review`` by triggers.
+The product ID is indexed as a token too, so a search within one product
+intersects its posting list with the query terms instead of matching
+across every product's reviews. Matches are ranked by bm25, weighting
+title above comment, through the table's ``rank`` column and joined to the
+reviews via the unmanaged ``ReviewSearchIndex`` model. On PostgreSQL a GIN index over the
+``tsvector`` of title and comment is used.
+
+Both backends expose the same interface: ``search_reviews`` filters and
+ranks a review queryset, ``review_snippets`` builds highlighted snippets
+for the reviews on a page.
+"""
+
+import html
+import re
+
+from django.db import connection
+from django.db.models import BooleanField, F, FloatField, Lookup
+from django.db.models.expressions import RawSQL
+from .models import ReviewSearchIndex
+
+FTS_TABLE = 'reviews_review_fts'
+SEARCH_CONFIG = 'english'
+HIGHLIGHT_START = '<mark>'
+HIGHLIGHT_END = '</mark>'
+# Private-use characters the database wraps matches in, swapped for the
+# highlight tags once the rest of the snippet has been HTML-escaped
+MATCH_START = '\ue000'
+MATCH_END = '\ue001'
+SNIPPET_TOKENS = 16
+
+POSTGRES_DOCUMENT = f"to_tsvector('{SEARCH_CONFIG}', reviews_review.title || ' ' || reviews_review.comment)"
+POSTGRES_QUERY = f"websearch_to_tsquery('{SEARCH_CONFIG}', %s)"
+
+
+def fts_terms(query):
+    """
+    Turn free text into an FTS5 query matching all of its words.
+
+    Each word is quoted so FTS5 operators and punctuation in user input
+    are treated as plain text. Returns '' if the text has no words.
+    """
+    return ' '.join(f'"{word}"' for word in re.findall(r'\w+', query))
+
+
+class FullTextMatch(Lookup):
+    """``document__match``: an FTS5 ``MATCH`` against the whole index."""
+    lookup_name = 'match'
+    
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', lhs_params + rhs_params
+
+
+ReviewSearchIndex._meta.get_field('document').register_lookup(FullTextMatch)
+
+
+def search_reviews(queryset, product_id, query):
+    """
+    Restrict a product's reviews to those matching ``query``.
+    
+    The queryset is annotated with ``search_rank``, where lower is a better
+    match, and ordered by it. Ranks are computed in the same pass over the
+    index that finds the matches.
+    
+    Args:
+        queryset: Reviews of ``product_id``, possibly further filtered
+        product_id: Product whose reviews are searched
+        query: Free text entered by the shopper
+    
+    Returns:
+        The filtered queryset ordered by ``('search_rank', 'id')``, or an
+        empty queryset if the text contains nothing searchable
+    """
+    if connection.vendor == 'postgresql':
+        match = RawSQL(f'{POSTGRES_DOCUMENT} @@ {POSTGRES_QUERY}', [query], output_field=BooleanField())
+        rank = RawSQL(f'-ts_rank_cd({POSTGRES_DOCUMENT}, {POSTGRES_QUERY})', [query], output_field=FloatField())
+        return queryset.filter(match).annotate(search_rank=rank).order_by('search_rank', 'id')
+    
+    terms = fts_terms(query)
+    if not terms:
+        return queryset.none()
+    return queryset.filter(
+        search_index__document__match=f'product_id:"{int(product_id)}" AND ({terms})'
+    ).annotate(search_rank=F('search_index__rank')).order_by('search_rank', 'id')
+
+
+def review_snippets(reviews, query):
+    """
+    Highlighted excerpts of where ``query`` matched, for one page of reviews.
+
+    Returns:
+        Mapping of review ID to an HTML-escaped excerpt with matches
+        wrapped in ``<mark>`` tags
+    """
+    review_ids = [review.id for review in reviews]
+    if not review_ids:
+        return {}
+
+    placeholders = ', '.join(['%s'] * len(review_ids))
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                f"SELECT id, ts_headline('{SEARCH_CONFIG}', title || ' — ' || comment, {POSTGRES_QUERY}, %s) "
+                f"FROM reviews_review WHERE id IN ({placeholders})",
+                [query, f'StartSel={MATCH_START}, StopSel={MATCH_END}, MaxWords={SNIPPET_TOKENS}']
+                + review_ids,
+            )
+        else:
+            # Match the query terms alone so the product column is never the excerpt
+            cursor.execute(
+                f"SELECT rowid, snippet({FTS_TABLE}, -1, %s, %s, '…', {SNIPPET_TOKENS}) FROM {FTS_TABLE} "
+                f"WHERE {FTS_TABLE} MATCH %s AND rowid IN ({placeholders})",
+                [MATCH_START, MATCH_END, fts_terms(query)] + review_ids,
+            )
+        return {review_id: highlight(snippet) for review_id, snippet in cursor.fetchall()}
+
+
+def highlight(snippet):
+    """Escape review text for HTML, turning the match delimiters into highlight tags."""
+    return html.escape(snippet).replace(MATCH_START, HIGHLIGHT_START).replace(MATCH_END, HIGHLIGHT_END)
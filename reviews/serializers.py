@@ -4,6 +4,8 @@ Serializers for Reviews app.
 
 from rest_framework import serializers
 from django.contrib.auth.models import User
+from django.urls import reverse
+from .images import REVIEW_IMAGE_VARIANTS, VARIANT_FORMATS, variant_size
 from .models import Review, ReviewHelpful, ReviewImage
 
 
@@ -18,10 +20,30 @@ class UserSerializer(serializers.ModelSerializer):
 class ReviewImageSerializer(serializers.ModelSerializer):
     """Serializer for review images."""
     
+    variants = serializers.SerializerMethodField()
+    
     class Meta:
         model = ReviewImage
-        fields = ['id', 'image', 'caption', 'uploaded_at']
-        read_only_fields = ['id', 'uploaded_at']
+        fields = ['id', 'image', 'caption', 'width', 'height', 'variants', 'uploaded_at']
+        read_only_fields = ['id', 'width', 'height', 'uploaded_at']
+    
+    def get_variants(self, obj):
+        """
+        Get the resized renditions of the image, keyed by variant name.
+        
+        URLs point at the variant endpoint, which renders a variant on first
+        request if the background processing hasn't yet. Dimensions are
+        null until the original has been processed.
+        """
+        request = self.context.get('request')
+        variants = {}
+        for name, max_side in REVIEW_IMAGE_VARIANTS.items():
+            width, height = variant_size(obj.width, obj.height, max_side) if obj.width and obj.height else (None, None)
+            variants[name] = {'width': width, 'height': height}
+            for fmt in VARIANT_FORMATS:
+                url = reverse('review-image-variant', args=[obj.id, name, fmt])
+                variants[name][fmt] = request.build_absolute_uri(url) if request else url
+        return variants
 
 
 class ReviewSerializer(serializers.ModelSerializer):
@@ -46,6 +68,7 @@ class ReviewSerializer(serializers.ModelSerializer):
             'helpful_count',
             'not_helpful_count',
             'helpful_percentage',
+            'helpfulness_score',
             'user_vote',
             'images',
             'created_at',
@@ -57,12 +80,18 @@ class ReviewSerializer(serializers.ModelSerializer):
             'is_verified_purchase',
             'helpful_count',
             'not_helpful_count',
+            'helpfulness_score',
             'created_at',
             'updated_at'
         ]
     
     def get_user_vote(self, obj):
         """Get current user's vote on this review."""
+        # Listings pass the votes for the whole page in the context
+        user_votes = self.context.get('user_votes')
+        if user_votes is not None:
+            return user_votes.get(obj.id)
+        
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             try:
@@ -125,6 +154,19 @@ class ReviewSerializer(serializers.ModelSerializer):
         return review
 
 
+class ReviewSearchResultSerializer(ReviewSerializer):
+    """Serializer for review search results with a highlighted excerpt."""
+    
+    snippet = serializers.SerializerMethodField()
+    
+    class Meta(ReviewSerializer.Meta):
+        fields = ReviewSerializer.Meta.fields + ['snippet']
+    
+    def get_snippet(self, obj):
+        """Get the excerpt around the matched terms, passed in by the view."""
+        return self.context.get('snippets', {}).get(obj.id)
+
+
 class ReviewSummarySerializer(serializers.Serializer):
     """Serializer for review statistics."""
     
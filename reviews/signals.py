@@ -0,0 +1,57 @@
+"""
+Signal handlers keeping ProductRatingSummary and ReviewerStats in step with
+reviews, and queueing uploaded review images for processing.
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .models import Review, ReviewImage
+from .ratings import adjust_rating_summary, rebuild_rating_summaries
+from .reviewers import adjust_reviewer_stats
+
+
+@receiver(post_save, sender=Review)
+def update_rating_summary_on_save(sender, instance, created, raw=False, **kwargs):
+    """Count a new review, or move an edited one between stars."""
+    if raw:
+        return
+    new = (instance.rating, instance.is_verified_purchase)
+    if created:
+        adjust_rating_summary(instance.product_id, new=new)
+    elif hasattr(instance, '_rating_state'):
+        adjust_rating_summary(instance.product_id, old=instance._rating_state, new=new)
+    else:
+        # Saved without being loaded first, so what was counted is unknown
+        rebuild_rating_summaries([instance.product_id])
+    instance._rating_state = new
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_summary_on_delete(sender, instance, **kwargs):
+    """Remove a deleted review, including ones removed by cascades."""
+    state = getattr(instance, '_rating_state', (instance.rating, instance.is_verified_purchase))
+    adjust_rating_summary(instance.product_id, old=state)
+
+
+@receiver(post_save, sender=Review)
+def update_reviewer_stats_on_create(sender, instance, created, raw=False, **kwargs):
+    """Count a new review towards its author's stats."""
+    if raw or not created:
+        return
+    adjust_reviewer_stats(instance.user_id, review_count=1, helpful_votes=instance.helpful_count)
+
+
+@receiver(post_delete, sender=Review)
+def update_reviewer_stats_on_delete(sender, instance, **kwargs):
+    """Remove a deleted review, and the helpful votes it had, from its author's stats."""
+    adjust_reviewer_stats(instance.user_id, review_count=-1, helpful_votes=-instance.helpful_count)
+
+
+@receiver(post_save, sender=ReviewImage)
+def queue_review_image_processing(sender, instance, created, raw=False, **kwargs):
+    """Process new uploads in the background once they are committed."""
+    if raw or not created:
+        return
+    from .tasks import process_review_image
+    transaction.on_commit(lambda: process_review_image.delay(instance.id))
@@ -4,41 +4,60 @@ Celery tasks for Reviews app.
 
 from celery import shared_task
 from django.core.cache import cache
-from django.db.models import Avg, Count
+from django.db.models import Sum
 from django.utils import timezone
 from datetime import timedelta
 import logging
 
 logger = logging.getLogger(__name__)
 
+PRODUCT_RATINGS_CHUNK_SIZE = 1000
+PRODUCT_RATINGS_WATERMARK_KEY = 'product_ratings_watermark'
+# Each run re-reads a little before the previous one started, so summaries
+# written by transactions that were still open at the time are not skipped.
+PRODUCT_RATINGS_WATERMARK_LAG = timedelta(minutes=1)
+
 
 @shared_task
-def calculate_product_ratings():
+def calculate_product_ratings(chunk_size=PRODUCT_RATINGS_CHUNK_SIZE):
     """
-    Calculate and cache average ratings for all products.
+    Calculate and cache average ratings for products whose reviews changed.
+    
+    Reads the pre-grouped ProductRatingSummary rows in keyset chunks and
+    writes each chunk to the cache with a single set_many. Only summaries
+    touched since the previous run's watermark are read; without a watermark
+    (first run, or the cache was flushed along with the ratings) every
+    product is recomputed.
     """
-    from products.models import Product
-    from .models import Review
+    from .models import ProductRatingSummary
     
     try:
-        products = Product.objects.all()
-        updated_count = 0
+        started_at = timezone.now()
+        watermark = cache.get(PRODUCT_RATINGS_WATERMARK_KEY)
+        summaries = ProductRatingSummary.objects.order_by('product_id')
+        if watermark is not None:
+            summaries = summaries.filter(updated_at__gt=watermark)
         
-        for product in products:
-            reviews = Review.objects.filter(product=product)
-            stats = reviews.aggregate(
-                average_rating=Avg('rating'),
-                total_reviews=Count('id')
+        updated_count = 0
+        last_id = 0
+        while True:
+            rows = list(
+                summaries.filter(product_id__gt=last_id)
+                .values_list('product_id', 'rating_sum', 'review_count')[:chunk_size]
             )
-            
-            # Cache the rating
-            cache_key = f'product_rating_{product.id}'
-            cache.set(cache_key, {
-                'average_rating': round(stats['average_rating'] or 0, 2),
-                'total_reviews': stats['total_reviews']
+            if not rows:
+                break
+            cache.set_many({
+                f'product_rating_{product_id}': {
+                    'average_rating': round(rating_sum / review_count, 2) if review_count else 0,
+                    'total_reviews': review_count
+                }
+                for product_id, rating_sum, review_count in rows
             }, timeout=3600 * 24)  # Cache for 24 hours
-            
-            updated_count += 1
+            updated_count += len(rows)
+            last_id = rows[-1][0]
+        
+        cache.set(PRODUCT_RATINGS_WATERMARK_KEY, started_at - PRODUCT_RATINGS_WATERMARK_LAG, timeout=None)
         
         logger.info(f"Updated ratings for {updated_count} products")
         return f"Updated {updated_count} product ratings"
@@ -50,40 +69,15 @@ def calculate_product_ratings():
 @shared_task
 def send_review_reminder_emails():
     """
-    Send review reminder emails to users who purchased but haven't reviewed.
+    Ask customers to review products delivered a week ago that they
+    haven't reviewed or been reminded about yet (see reviews.reminders).
     """
-    from orders.models import OrderItem
-    from .models import Review
-    from core.tasks import send_email_notification
+    from .reminders import send_review_reminders
     
     try:
-        # Find orders from 7 days ago
-        seven_days_ago = timezone.now() - timedelta(days=7)
-        
-        # Get order items from completed orders
-        order_items = OrderItem.objects.filter(
-            order__status='delivered',
-            order__created_at__date=seven_days_ago.date()
-        ).select_related('order', 'product')
-        
-        reminders_sent = 0
-        
-        for item in order_items:
-            # Check if user has already reviewed this product
-            if not Review.objects.filter(
-                product=item.product,
-                user=item.order.user if hasattr(item.order, 'user') else None
-            ).exists():
-                # Send reminder email
-                # send_email_notification.delay(
-                #     f'Review your purchase: {item.product.name}',
-                #     f'How was your experience with {item.product.name}?',
-                #     [item.order.customer_email]
-                # )
-                reminders_sent += 1
-                logger.info(f"Sent review reminder for order {item.order.id}")
-        
-        return f"Sent {reminders_sent} review reminders"
+        customers, products = send_review_reminders()
+        logger.info(f"Sent review reminders to {customers} customers for {products} products")
+        return f"Sent {customers} review reminders"
     except Exception as e:
         logger.error(f"Error sending review reminders: {str(e)}")
         raise
@@ -92,68 +86,74 @@ def send_review_reminder_emails():
 @shared_task
 def moderate_reviews():
     """
-    Auto-moderate reviews for spam or inappropriate content.
-    This is a placeholder for future ML-based moderation.
+    Flag new reviews containing blocked terms, suspicious patterns or
+    near-duplicate text (see reviews.moderation).
+    
+    Prefork children are daemonic and can't start a process pool, so this
+    always scans in the worker process; run the ``moderate_reviews``
+    command for a pool of REVIEW_MODERATION_WORKERS processes.
     """
-    from .models import Review
+    from .moderation import moderate_new_reviews
     
     try:
-        # Get recent reviews (last 24 hours)
-        yesterday = timezone.now() - timedelta(days=1)
-        recent_reviews = Review.objects.filter(created_at__gte=yesterday)
-        
-        flagged_count = 0
-        
-        for review in recent_reviews:
-            # Simple spam detection (placeholder)
-            spam_keywords = ['spam', 'fake', 'scam']
-            comment_lower = review.comment.lower()
-            
-            if any(keyword in comment_lower for keyword in spam_keywords):
-                # Flag for manual review
-                logger.warning(f"Review {review.id} flagged for moderation")
-                flagged_count += 1
-        
-        logger.info(f"Moderated {recent_reviews.count()} reviews, flagged {flagged_count}")
-        return f"Moderated {recent_reviews.count()} reviews"
+        scanned, flagged = moderate_new_reviews(workers=0)
+        logger.info(f"Moderated {scanned} reviews, flagged {flagged}")
+        return f"Moderated {scanned} reviews"
     except Exception as e:
         logger.error(f"Error moderating reviews: {str(e)}")
         raise
 
 
+@shared_task
+def process_review_image(image_id):
+    """
+    Strip metadata from an uploaded review image and render its variants.
+    """
+    from .images import process_review_image as process
+    from .models import ReviewImage
+    
+    try:
+        review_image = ReviewImage.objects.get(id=image_id)
+        rendered = process(review_image)
+        logger.info(f"Rendered {rendered} variants of review image {image_id}")
+        return f"Rendered {rendered} variants"
+    except ReviewImage.DoesNotExist:
+        # Deleted before it was processed
+        return "Image no longer exists"
+    except Exception as e:
+        logger.error(f"Error processing review image {image_id}: {str(e)}")
+        raise
+
+
 @shared_task
 def calculate_review_statistics():
     """
     Calculate and cache review statistics.
+    
+    Totals are summed from the per-product rating summaries and the top
+    reviewers are read from the materialized reviewer stats, so neither
+    scans reviews or votes.
     """
-    from .models import Review
+    from .models import ProductRatingSummary
+    from .reviewers import top_reviewers
     
     try:
-        # Overall statistics
-        total_reviews = Review.objects.count()
-        avg_rating = Review.objects.aggregate(Avg('rating'))['rating__avg'] or 0
-        verified_reviews = Review.objects.filter(is_verified_purchase=True).count()
-        
-        # Rating distribution
-        rating_dist = {}
-        for i in range(1, 6):
-            rating_dist[f'{i}_star'] = Review.objects.filter(rating=i).count()
-        
-        # Most helpful reviewers
-        from django.contrib.auth.models import User
-        top_reviewers = User.objects.annotate(
-            review_count=Count('reviews'),
-            total_helpful=Count('reviews__helpful_votes', filter=models.Q(reviews__helpful_votes__is_helpful=True))
-        ).order_by('-total_helpful')[:10]
+        totals = ProductRatingSummary.objects.aggregate(
+            total_reviews=Sum('review_count'),
+            rating_sum=Sum('rating_sum'),
+            verified_reviews=Sum('verified_count'),
+            **{f'{i}_star': Sum(f'rating_{i}_count') for i in range(1, 6)}
+        )
+        total_reviews = totals['total_reviews'] or 0
         
         stats = {
             'total_reviews': total_reviews,
-            'average_rating': round(avg_rating, 2),
-            'verified_reviews': verified_reviews,
-            'rating_distribution': rating_dist,
+            'average_rating': round(totals['rating_sum'] / total_reviews, 2) if total_reviews else 0,
+            'verified_reviews': totals['verified_reviews'] or 0,
+            'rating_distribution': {f'{i}_star': totals[f'{i}_star'] or 0 for i in range(1, 6)},
             'top_reviewers': [
-                {'username': r.username, 'review_count': r.review_count, 'helpful_votes': r.total_helpful}
-                for r in top_reviewers
+                {'username': r.user.username, 'review_count': r.review_count, 'helpful_votes': r.helpful_votes}
+                for r in top_reviewers()
             ]
         }
         
@@ -167,6 +167,23 @@ def calculate_review_statistics():
         raise
 
 
+@shared_task
+def flush_review_votes():
+    """
+    Apply helpful-vote counter changes buffered in Redis to the reviews.
+    """
+    from .votes import flush_vote_deltas
+    
+    try:
+        flushed = flush_vote_deltas()
+        if flushed:
+            logger.info(f"Flushed vote counts for {flushed} reviews")
+        return f"Flushed {flushed} reviews"
+    except Exception as e:
+        logger.error(f"Error flushing review votes: {str(e)}")
+        raise
+
+
 @shared_task
 def cleanup_old_review_votes():
     """
@@ -0,0 +1,135 @@
+"""
+Tests for the Reviews API.
+"""
+
+import pytest
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.utils import timezone
+from reviews.models import Review, ReviewHelpful, ReviewImage
+from reviews.views import ProductReviewListView
+
+
+def _create_reviews(product, count, voter=None):
+    """Create reviews with an image each, voted on alternately by ``voter``."""
+    reviews = []
+    for i in range(count):
+        author = User.objects.create_user(username=f'author{product.id}-{i}', password='testpass123')
+        review = Review.objects.create(
+            product=product, user=author, rating=i % 5 + 1, title=f'Review {i}', comment='Comment'
+        )
+        ReviewImage.objects.create(review=review, image=f'review_images/{i}.jpg')
+        if voter is not None:
+            ReviewHelpful.objects.create(review=review, user=voter, is_helpful=i % 2 == 0)
+        reviews.append(review)
+    return reviews
+
+
+@pytest.mark.django_db
+class TestProductReviewListAPI:
+    """Test cases for listing a product's reviews."""
+
+    def test_includes_current_users_votes(self, authenticated_client, user, product):
+        """Test each review carries the requesting user's vote."""
+        reviews = _create_reviews(product, 3, voter=user)
+
+        response = authenticated_client.get(f'/api/v1/reviews/product/{product.id}/?sort_by=rating_low')
+
+        votes = {r['id']: r['user_vote'] for r in response.json()['results']}
+        assert votes == {reviews[0].id: 'helpful', reviews[1].id: 'not_helpful', reviews[2].id: 'helpful'}
+        assert all(len(r['images']) == 1 for r in response.json()['results'])
+
+    @pytest.mark.parametrize('count', [2, 20])
+    def test_constant_queries(self, authenticated_client, user, product, count, django_assert_num_queries):
+        """Test a page costs reviews with authors, images and votes."""
+        _create_reviews(product, count, voter=user)
+
+        with django_assert_num_queries(3):
+            response = authenticated_client.get(f'/api/v1/reviews/product/{product.id}/')
+
+        assert len(response.json()['results']) == count
+
+    def test_anonymous_skips_vote_query(self, api_client, product, django_assert_num_queries):
+        """Test anonymous listings don't look up votes at all."""
+        _create_reviews(product, 5)
+
+        with django_assert_num_queries(2):
+            response = api_client.get(f'/api/v1/reviews/product/{product.id}/')
+
+        assert all(r['user_vote'] is None for r in response.json()['results'])
+
+
+@pytest.mark.django_db
+class TestReviewKeysetPagination:
+    """Test cases for cursor pagination of product reviews."""
+
+    @pytest.fixture
+    def tied_reviews(self, product):
+        """Create reviews sharing ratings, timestamps and scores so only id breaks ties."""
+        reviews = _create_reviews(product, 11)
+        created_at = timezone.now()
+        for i, review in enumerate(reviews):
+            Review.objects.filter(id=review.id).update(
+                created_at=created_at - timedelta(minutes=i % 3),
+                helpfulness_score=(i % 4) / 4,
+            )
+        return reviews
+
+    def _walk(self, client, url):
+        ids = []
+        while url:
+            data = client.get(url).json()
+            ids.extend(r['id'] for r in data['results'])
+            url = data['next']
+        return ids
+
+    @pytest.mark.parametrize('sort_by', list(ProductReviewListView.SORT_ORDERINGS))
+    def test_pages_cover_every_review_once(self, api_client, product, tied_reviews, sort_by):
+        """Test following next links returns the full ordering without gaps or repeats."""
+        ordering = ProductReviewListView.SORT_ORDERINGS[sort_by]
+        expected = list(Review.objects.filter(product=product).order_by(*ordering).values_list('id', flat=True))
+
+        ids = self._walk(api_client, f'/api/v1/reviews/product/{product.id}/?sort_by={sort_by}&page_size=3')
+
+        assert ids == expected
+
+    def test_helpful_sort_uses_score(self, api_client, product, tied_reviews):
+        """Test the most helpful sort ranks by helpfulness score."""
+        top = tied_reviews[5]
+        Review.objects.filter(id=top.id).update(helpfulness_score=0.9)
+
+        response = api_client.get(f'/api/v1/reviews/product/{product.id}/?sort_by=helpful')
+
+        assert response.json()['results'][0]['id'] == top.id
+
+    def test_cursor_tied_to_sort(self, api_client, product, tied_reviews):
+        """Test a cursor from one sort order is rejected by another."""
+        next_url = api_client.get(f'/api/v1/reviews/product/{product.id}/?page_size=3').json()['next']
+        cursor = next_url.split('cursor=')[1].split('&')[0]
+
+        response = api_client.get(f'/api/v1/reviews/product/{product.id}/?sort_by=rating_high&cursor={cursor}')
+
+        assert response.status_code == 404
+
+    def test_invalid_cursor(self, api_client, product):
+        """Test a malformed cursor is rejected."""
+        response = api_client.get(f'/api/v1/reviews/product/{product.id}/?cursor=not-a-cursor')
+
+        assert response.status_code == 404
+
+
+@pytest.mark.django_db
+class TestUserReviewsAPI:
+    """Test cases for listing the current user's reviews."""
+
+    @pytest.mark.parametrize('count', [1, 5])
+    def test_constant_queries(self, authenticated_client, user, products, count, django_assert_num_queries):
+        """Test the listing costs reviews, images and votes regardless of size."""
+        for p in products[:count]:
+            review = Review.objects.create(product=p, user=user, rating=4, title='Mine', comment='Comment')
+            ReviewImage.objects.create(review=review, image='review_images/mine.jpg')
+
+        with django_assert_num_queries(3):
+            response = authenticated_client.get('/api/v1/reviews/my-reviews/')
+
+        assert response.json()['count'] == count
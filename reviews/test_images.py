@@ -0,0 +1,133 @@
+"""
+Tests for the review image pipeline.
+"""
+
+import io
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import ExifTags, Image
+from reviews import tasks
+from reviews.images import get_variant_path, process_review_image
+from reviews.models import Review, ReviewImage, ReviewImageVariant
+
+
+def _photo(width=1600, height=1200, orientation=6):
+    """A JPEG with EXIF orientation and camera metadata, like a phone photo."""
+    exif = Image.Exif()
+    exif[ExifTags.Base.Orientation] = orientation
+    exif[ExifTags.Base.Make] = 'PhoneCo'
+    buffer = io.BytesIO()
+    Image.new('RGB', (width, height), 'red').save(buffer, 'JPEG', exif=exif)
+    return SimpleUploadedFile('photo.jpg', buffer.getvalue(), content_type='image/jpeg')
+
+
+@pytest.fixture
+def media(settings, tmp_path):
+    """Store uploads and variants in a temporary MEDIA_ROOT."""
+    settings.MEDIA_ROOT = tmp_path
+    return tmp_path
+
+
+@pytest.fixture
+def variant_cache(monkeypatch):
+    """Cache variant paths in memory instead of the test DummyCache."""
+    local_cache = LocMemCache('review-image-variants', {})
+    monkeypatch.setattr('reviews.images.cache', local_cache)
+    return local_cache
+
+
+@pytest.fixture
+def review_image(media, product):
+    author = User.objects.create_user(username='photographer')
+    review = Review.objects.create(product=product, user=author, rating=5, title='Pics', comment='See photo')
+    return ReviewImage.objects.create(review=review, image=_photo())
+
+
+@pytest.mark.django_db
+class TestProcessReviewImage:
+    """Test cases for background processing of uploads."""
+
+    def test_strips_metadata_and_orients_original(self, media, review_image):
+        """Test the stored original is upright and carries no EXIF."""
+        process_review_image(review_image)
+
+        original = Image.open(media / review_image.image.name)
+        assert original.size == (1200, 1600)
+        assert not original.getexif()
+
+        review_image.refresh_from_db()
+        assert (review_image.width, review_image.height) == (1200, 1600)
+        assert review_image.processed_at is not None
+
+    def test_renders_every_variant(self, media, review_image):
+        """Test each size is rendered in each format with its dimensions stored."""
+        assert process_review_image(review_image) == 6
+
+        variants = {(v.name, v.format): v for v in ReviewImageVariant.objects.filter(image=review_image)}
+        assert (variants['thumb', 'webp'].width, variants['thumb', 'webp'].height) == (120, 160)
+        assert (variants['large', 'jpeg'].width, variants['large', 'jpeg'].height) == (960, 1280)
+        for (name, fmt), variant in variants.items():
+            rendered = Image.open(media / variant.file.name)
+            assert rendered.format == fmt.upper()
+            assert rendered.size == (variant.width, variant.height)
+            assert not rendered.getexif()
+
+    def test_queued_on_upload(self, media, review_image, monkeypatch, django_capture_on_commit_callbacks):
+        """Test a new image is processed once its transaction commits."""
+        # Run the task in-process rather than sending it to a broker
+        monkeypatch.setattr(tasks.process_review_image, 'delay', tasks.process_review_image)
+        with django_capture_on_commit_callbacks(execute=True):
+            image = ReviewImage.objects.create(review=review_image.review, image=_photo())
+
+        assert ReviewImageVariant.objects.filter(image=image).count() == 6
+
+
+@pytest.mark.django_db
+class TestReviewImageVariantAPI:
+    """Test cases for serving variants."""
+
+    def _url(self, image, variant='medium', fmt='webp'):
+        return f'/api/v1/reviews/images/{image.id}/{variant}.{fmt}'
+
+    def test_rendered_on_first_request(self, api_client, review_image, variant_cache, django_assert_num_queries):
+        """Test a missing variant is rendered once, then served from the cached path."""
+        response = api_client.get(self._url(review_image))
+
+        assert response.status_code == 200
+        assert response['Content-Type'] == 'image/webp'
+        assert Image.open(io.BytesIO(b''.join(response.streaming_content))).size == (480, 640)
+        assert ReviewImageVariant.objects.filter(image=review_image).count() == 1
+
+        with django_assert_num_queries(0):
+            assert api_client.get(self._url(review_image)).status_code == 200
+
+    def test_accel_redirect(self, api_client, settings, review_image):
+        """Test nginx is told where the file is instead of Django sending it."""
+        settings.REVIEW_IMAGE_ACCEL_REDIRECT_PREFIX = '/protected-media/'
+
+        response = api_client.get(self._url(review_image, 'thumb', 'jpeg'))
+
+        path = get_variant_path(review_image.id, 'thumb', 'jpeg')
+        assert response['X-Accel-Redirect'] == f'/protected-media/{path}'
+        assert response['Content-Type'] == 'image/jpeg'
+        assert 'max-age' in response['Cache-Control']
+        assert response.content == b''
+
+    def test_not_found(self, api_client, review_image):
+        """Test unknown variants, formats and images are 404s."""
+        assert api_client.get(self._url(review_image, 'huge')).status_code == 404
+        assert api_client.get(self._url(review_image, fmt='gif')).status_code == 404
+        assert api_client.get(f'/api/v1/reviews/images/{review_image.id + 1}/thumb.webp').status_code == 404
+
+    def test_listing_links_variants(self, api_client, product, review_image):
+        """Test review listings carry variant URLs and dimensions rather than just the original."""
+        process_review_image(review_image)
+
+        response = api_client.get(f'/api/v1/reviews/product/{product.id}/')
+
+        image = response.json()['results'][0]['images'][0]
+        assert image['variants']['thumb']['webp'].endswith(self._url(review_image, 'thumb', 'webp'))
+        assert (image['variants']['large']['width'], image['variants']['large']['height']) == (960, 1280)
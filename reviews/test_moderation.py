@@ -0,0 +1,133 @@
+"""
+Tests for incremental review moderation.
+"""
+
+import multiprocessing
+from io import StringIO
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from reviews.models import Review, ReviewFingerprint, ReviewFlag, ReviewModerationOffset
+from reviews.moderation import AhoCorasick, minhash_signature, moderate_new_reviews, signature_similarity
+
+ORIGINAL = 'The battery lasts two full days and the screen is bright enough to read outside in the sun.'
+NEAR_COPY = 'The battery lasts two full days and the screen is bright enough to read outside in the sun!!'
+UNRELATED = 'Shipping took a week but support answered quickly and replaced the broken charger for free.'
+
+
+def _review(product, comment, title='Review'):
+    count = Review.objects.count()
+    user = User.objects.create_user(username=f'reviewer{count}')
+    return Review.objects.create(product=product, user=user, rating=3, title=title, comment=comment)
+
+
+def _flags(review):
+    return sorted(ReviewFlag.objects.filter(review=review).values_list('reason', 'detail'))
+
+
+class TestAhoCorasick:
+    """Test cases for the blocked-term automaton."""
+
+    def test_finds_overlapping_terms_in_one_pass(self):
+        """Test terms sharing prefixes and suffixes are all found."""
+        automaton = AhoCorasick(['he', 'she', 'his', 'hers'])
+
+        assert automaton.find('ushers he his') == {'he', 'his'}
+        assert automaton.find('she hers') == {'she', 'hers'}
+
+    def test_whole_words_case_insensitive(self):
+        """Test matches must be whole words, in any case."""
+        automaton = AhoCorasick(['fake', 'free money'])
+
+        assert automaton.find('Totally FAKE! Free money inside') == {'fake', 'free money'}
+        assert automaton.find('fakery and freedom') == set()
+
+
+class TestMinHash:
+    """Test cases for near-duplicate signatures."""
+
+    def test_similarity_estimates(self):
+        """Test copies score high and unrelated texts low."""
+        original = minhash_signature(ORIGINAL)
+
+        assert signature_similarity(original, minhash_signature(ORIGINAL)) == 1
+        assert signature_similarity(original, minhash_signature(NEAR_COPY)) >= 0.8
+        assert signature_similarity(original, minhash_signature(UNRELATED)) < 0.2
+
+    def test_short_texts_not_signed(self):
+        """Test generic one-liners are never treated as duplicates."""
+        assert minhash_signature('Great product, works fine') is None
+
+
+@pytest.mark.django_db
+class TestModerateNewReviews:
+    """Test cases for the moderation pipeline."""
+
+    def test_flags_terms_and_patterns(self, product):
+        """Test blocked terms and patterns are written as flags."""
+        spam = _review(product, 'Total scam, order the real one at www.example.com', title='FAKE')
+        clean = _review(product, 'Does what it says.')
+
+        assert moderate_new_reviews() == (2, 1)
+
+        assert _flags(spam) == [('pattern', 'link'), ('term', 'fake'), ('term', 'scam')]
+        assert _flags(clean) == []
+
+    def test_only_scans_new_reviews(self, product):
+        """Test each run picks up from the stored offset."""
+        _review(product, 'spam')
+        moderate_new_reviews()
+
+        assert moderate_new_reviews() == (0, 0)
+
+        later = _review(product, 'call me on +1 555 010 9999')
+        assert moderate_new_reviews() == (1, 1)
+        assert _flags(later) == [('pattern', 'phone')]
+        assert ReviewModerationOffset.objects.get().last_review_id == later.id
+
+    def test_near_duplicates_across_runs(self, product, products):
+        """Test copies are flagged against earlier runs and within a batch."""
+        original = _review(product, ORIGINAL)
+        _review(product, UNRELATED)
+        moderate_new_reviews()
+
+        copy = _review(products[0], NEAR_COPY)
+        second_copy = _review(products[1], ORIGINAL)
+        moderate_new_reviews(chunk_size=1)
+
+        assert _flags(copy) == [('duplicate', f'review #{original.id}')]
+        assert _flags(second_copy) == [('duplicate', f'review #{original.id}')]
+        assert ReviewFingerprint.objects.filter(review=copy).count() == 16
+
+    def test_batches_queries(self, product, django_assert_max_num_queries):
+        """Test a batch costs a fixed number of queries however many reviews it holds."""
+        for i in range(30):
+            _review(product, f'{UNRELATED} Variant {i} with spam.')
+
+        with django_assert_max_num_queries(12):
+            assert moderate_new_reviews() == (30, 30)
+
+    def test_process_pool(self, product):
+        """Test chunks scanned by worker processes give the same flags."""
+        reviews = [_review(product, f'fake review number {i}') for i in range(5)]
+
+        assert moderate_new_reviews(chunk_size=2, workers=2) == (5, 5)
+
+        assert all(_flags(review) == [('term', 'fake')] for review in reviews)
+
+    def test_no_pool_in_daemonic_process(self, product, monkeypatch):
+        """Test asking for a pool inside a daemonic process fails instead of falling back."""
+        monkeypatch.setattr(multiprocessing.current_process(), 'daemon', True, raising=False)
+
+        with pytest.raises(ValueError):
+            moderate_new_reviews(workers=2)
+
+    def test_command(self, product):
+        """Test the command scans over the requested pool and reports the counts."""
+        _review(product, 'fake review')
+        out = StringIO()
+
+        call_command('moderate_reviews', '--workers', '2', stdout=out)
+
+        assert 'Moderated 1 reviews, flagged 1' in out.getvalue()
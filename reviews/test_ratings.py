@@ -0,0 +1,246 @@
+"""
+Tests for the denormalized product rating summaries.
+"""
+
+import pytest
+from datetime import timedelta
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management import call_command
+from django.utils import timezone
+from reviews.models import ProductRatingSummary, Review
+from reviews.ratings import rebuild_rating_summaries
+from reviews.tasks import PRODUCT_RATINGS_WATERMARK_KEY, calculate_product_ratings
+
+
+@pytest.fixture
+def reviewers(db):
+    """Create users to write reviews."""
+    return [
+        User.objects.create_user(username=f'reviewer{i}', password='testpass123')
+        for i in range(5)
+    ]
+
+
+@pytest.fixture
+def reviews(product, reviewers):
+    """Create reviews rated 1 to 5, the last two from verified purchases."""
+    return [
+        Review.objects.create(
+            product=product,
+            user=user,
+            rating=i + 1,
+            title=f'Review {i}',
+            comment='Comment',
+            is_verified_purchase=i >= 3,
+        )
+        for i, user in enumerate(reviewers)
+    ]
+
+
+@pytest.fixture
+def rating_cache(monkeypatch):
+    """Give the ratings task a real in-memory cache instead of the dummy one."""
+    cache = LocMemCache('product-ratings', {})
+    monkeypatch.setattr('reviews.tasks.cache', cache)
+    return cache
+
+
+def _summary(product):
+    return ProductRatingSummary.objects.get(product=product)
+
+
+def _recomputed(product):
+    """Return the summary field values rebuilt from the reviews table."""
+    summary = _summary(product)
+    live = (summary.review_count, summary.rating_sum, summary.rating_distribution, summary.verified_count)
+    ProductRatingSummary.objects.filter(product=product).delete()
+    rebuild_rating_summaries()
+    summary = _summary(product)
+    return live, (summary.review_count, summary.rating_sum, summary.rating_distribution, summary.verified_count)
+
+
+@pytest.mark.django_db
+class TestRatingSummaryMaintenance:
+    """Test cases for keeping summaries in step with reviews."""
+
+    def test_created_reviews_are_counted(self, product, reviews):
+        """Test each new review increments its star and the totals."""
+        summary = _summary(product)
+
+        assert summary.review_count == 5
+        assert summary.rating_sum == 15
+        assert summary.average_rating == 3
+        assert summary.verified_count == 2
+        assert summary.rating_distribution == {f'{i}_star': 1 for i in range(1, 6)}
+
+    def test_edit_moves_review_between_stars(self, product, reviews):
+        """Test changing a rating moves it rather than counting it twice."""
+        review = Review.objects.get(id=reviews[0].id)
+        review.rating = 5
+        review.is_verified_purchase = True
+        review.save()
+
+        summary = _summary(product)
+        assert summary.review_count == 5
+        assert summary.rating_distribution['1_star'] == 0
+        assert summary.rating_distribution['5_star'] == 2
+        assert summary.verified_count == 3
+
+        live, rebuilt = _recomputed(product)
+        assert live == rebuilt
+
+    def test_repeated_saves_are_idempotent(self, product, reviews):
+        """Test saving the same instance twice only applies the change once."""
+        review = Review.objects.get(id=reviews[1].id)
+        review.rating = 4
+        review.save()
+        review.save()
+
+        live, rebuilt = _recomputed(product)
+        assert live == rebuilt
+
+    def test_deferred_rating_falls_back_to_rebuild(self, product, reviews):
+        """Test saving an instance loaded without its rating recomputes the product."""
+        review = Review.objects.only('id', 'product', 'title').get(id=reviews[2].id)
+        review.rating = 1
+        review.save()
+
+        live, rebuilt = _recomputed(product)
+        assert live == rebuilt
+
+    def test_delete_and_cascade(self, product, reviews, reviewers):
+        """Test deleting a review, or its author, removes it from the summary."""
+        Review.objects.get(id=reviews[4].id).delete()
+        reviewers[3].delete()
+
+        summary = _summary(product)
+        assert summary.review_count == 3
+        assert summary.rating_sum == 6
+        assert summary.verified_count == 0
+
+    def test_product_delete(self, product, reviews):
+        """Test deleting a product doesn't recreate the summary removed with it."""
+        product_id = product.id
+        product.delete()
+
+        assert not ProductRatingSummary.objects.filter(product_id=product_id).exists()
+
+    def test_bulk_queryset_delete(self, product, reviews):
+        """Test queryset deletes are subtracted too."""
+        Review.objects.filter(product=product, rating__gte=3).delete()
+
+        assert _summary(product).rating_distribution == {
+            '1_star': 1, '2_star': 1, '3_star': 0, '4_star': 0, '5_star': 0
+        }
+
+
+@pytest.mark.django_db
+class TestRebuildRatingSummaries:
+    """Test cases for rebuilding summaries from scratch."""
+
+    def test_repairs_drift_and_removes_stale_rows(self, product, products, reviews):
+        """Test a rebuild fixes wrong counts and drops products without reviews."""
+        ProductRatingSummary.objects.filter(product=product).update(review_count=99, rating_5_count=0)
+        ProductRatingSummary.objects.create(product=products[0], review_count=3)
+
+        assert rebuild_rating_summaries() == 1
+
+        summary = _summary(product)
+        assert summary.review_count == 5
+        assert summary.rating_5_count == 1
+        assert not ProductRatingSummary.objects.filter(product=products[0]).exists()
+
+    def test_single_aggregate_query(self, product, reviews, django_assert_num_queries):
+        """Test the rebuild costs one aggregate, one upsert and one delete."""
+        with django_assert_num_queries(3):
+            rebuild_rating_summaries()
+
+    def test_command(self, product, reviews):
+        """Test the management command reports what it rebuilt."""
+        out = StringIO()
+        call_command('rebuild_rating_summaries', product.id, stdout=out)
+
+        assert 'Rebuilt 1 rating summaries' in out.getvalue()
+
+
+@pytest.mark.django_db
+class TestReviewStatisticsAPI:
+    """Test cases for the statistics endpoint."""
+
+    def test_reads_summary_in_one_query(self, api_client, product, reviews, django_assert_num_queries):
+        """Test statistics come from the summary with a single query."""
+        with django_assert_num_queries(1):
+            response = api_client.get(f'/api/v1/reviews/product/{product.id}/statistics/')
+
+        statistics = response.json()['statistics']
+        assert statistics['average_rating'] == 3
+        assert statistics['total_reviews'] == 5
+        assert statistics['verified_purchase_count'] == 2
+        assert statistics['rating_distribution']['4_star'] == 1
+
+    def test_product_without_reviews(self, api_client, product):
+        """Test a product with no reviews reports empty statistics."""
+        response = api_client.get(f'/api/v1/reviews/product/{product.id}/statistics/')
+
+        assert response.json()['statistics'] == {
+            'average_rating': 0,
+            'total_reviews': 0,
+            'rating_distribution': {f'{i}_star': 0 for i in range(1, 6)},
+            'verified_purchase_count': 0,
+        }
+
+    def test_api_edit_updates_summary(self, authenticated_client, product, reviews, user):
+        """Test reviews written through the API keep the summary current."""
+        response = authenticated_client.post(
+            '/api/v1/reviews/create/',
+            {'product_id': product.id, 'rating': 5, 'title': 'Great', 'comment': 'Loved it'},
+        )
+        review_id = response.json()['review']['id']
+        authenticated_client.patch(f'/api/v1/reviews/{review_id}/', {'rating': 2})
+
+        summary = _summary(product)
+        assert summary.review_count == 6
+        assert summary.rating_2_count == 2
+
+        authenticated_client.delete(f'/api/v1/reviews/{review_id}/delete/')
+        assert _summary(product).review_count == 5
+
+
+@pytest.mark.django_db
+class TestCalculateProductRatings:
+    """Test cases for caching product ratings from the summaries."""
+
+    def test_caches_every_product_on_first_run(self, rating_cache, product, products, reviews):
+        """Test a run without a watermark caches all rated products."""
+        Review.objects.create(product=products[0], user=reviews[0].user, rating=4, title='t', comment='c')
+
+        calculate_product_ratings(chunk_size=1)
+
+        assert rating_cache.get(f'product_rating_{product.id}') == {'average_rating': 3, 'total_reviews': 5}
+        assert rating_cache.get(f'product_rating_{products[0].id}') == {'average_rating': 4, 'total_reviews': 1}
+        assert rating_cache.get(PRODUCT_RATINGS_WATERMARK_KEY) is not None
+
+    def test_skips_unchanged_products(self, rating_cache, product, products, reviews):
+        """Test later runs only touch products changed since the watermark."""
+        other = Review.objects.create(product=products[0], user=reviews[0].user, rating=4, title='t', comment='c')
+        calculate_product_ratings()
+        past = timezone.now() - timedelta(hours=1)
+        ProductRatingSummary.objects.update(updated_at=past)
+        rating_cache.set(PRODUCT_RATINGS_WATERMARK_KEY, past)
+
+        Review.objects.get(id=other.id).delete()
+        rating_cache.delete(f'product_rating_{product.id}')
+
+        assert calculate_product_ratings() == 'Updated 1 product ratings'
+        assert rating_cache.get(f'product_rating_{products[0].id}') == {'average_rating': 0, 'total_reviews': 0}
+        assert rating_cache.get(f'product_rating_{product.id}') is None
+
+    def test_queries_per_chunk(self, rating_cache, product, products, reviews, django_assert_num_queries):
+        """Test the run costs one query per chunk plus the terminating one."""
+        for p in products[:3]:
+            Review.objects.create(product=p, user=reviews[0].user, rating=2, title='t', comment='c')
+
+        with django_assert_num_queries(3):
+            calculate_product_ratings(chunk_size=2)
@@ -0,0 +1,146 @@
+"""
+Tests for review reminders.
+"""
+
+from datetime import timedelta
+
+import pytest
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core import mail
+from django.test import TestCase
+from django.utils import timezone
+from reviews import reminders
+from orders.admin import OrderAdmin
+from orders.models import Order, OrderEvent, OrderItem
+from reviews.models import Review, ReviewReminder, ReviewReminderOffset
+from reviews.reminders import send_review_reminders
+from reviews.tasks import send_review_reminder_emails
+
+
+def _delivered_order(email, products, days_ago=8):
+    """An order delivered ``days_ago`` days ago, with its delivery event."""
+    order = Order.objects.create(
+        customer_name='Customer', customer_email=email, shipping_address='1 Test St', status='delivered'
+    )
+    for product in products:
+        OrderItem.objects.create(order=order, product=product, product_name=product.name, quantity=1,
+                                 price=product.price)
+    event = OrderEvent.objects.create(order=order, from_status='shipped', to_status='delivered')
+    OrderEvent.objects.filter(id=event.id).update(created_at=timezone.now() - timedelta(days=days_ago))
+    return order
+
+
+def _send(task=send_review_reminders):
+    """Run ``task``, sending the e-mails queued for after each batch commits."""
+    with TestCase.captureOnCommitCallbacks(execute=True):
+        return task()
+
+
+def _reminded():
+    return sorted(ReviewReminder.objects.values_list('customer_email', 'product__name'))
+
+
+@pytest.mark.django_db
+class TestSendReviewReminders:
+    """Test cases for reminding customers about delivered orders."""
+
+    def test_one_email_per_customer(self, product, products):
+        """Test a customer's products across orders are listed in a single e-mail."""
+        _delivered_order('alice@example.com', [product, products[0]])
+        _delivered_order('alice@example.com', [products[0], products[1]])
+        _delivered_order('bob@example.com', [product])
+
+        assert _send() == (2, 4)
+
+        assert sorted(message.to[0] for message in mail.outbox) == ['alice@example.com', 'bob@example.com']
+        alice = next(message for message in mail.outbox if message.to == ['alice@example.com'])
+        assert alice.subject == 'Review your 3 recent purchases'
+        assert all(f'- {p.name}' in alice.body for p in (product, products[0], products[1]))
+
+    def test_skips_reviewed_products(self, product, products):
+        """Test products the customer's account has already reviewed are left out."""
+        user = User.objects.create_user(username='alice', email='alice@example.com')
+        Review.objects.create(product=product, user=user, rating=5, title='Great', comment='Great')
+        _delivered_order('alice@example.com', [product, products[0]])
+
+        _send()
+
+        assert _reminded() == [('alice@example.com', products[0].name)]
+        assert mail.outbox[0].subject == f'Review your purchase: {products[0].name}'
+
+    def test_reminds_once_and_reads_new_deliveries_only(self, product, products):
+        """Test each run starts after the last delivery handled and never repeats a reminder."""
+        _delivered_order('alice@example.com', [product])
+        _send()
+
+        assert _send() == (0, 0)
+
+        _delivered_order('alice@example.com', [product, products[0]])
+        assert _send() == (1, 1)
+        assert _reminded() == sorted([('alice@example.com', product.name), ('alice@example.com', products[0].name)])
+        assert len(mail.outbox) == 2
+        assert ReviewReminderOffset.objects.get().last_event_id == OrderEvent.objects.latest('id').id
+
+    def test_waits_for_delay(self, product):
+        """Test recent deliveries are left until they are old enough."""
+        _delivered_order('alice@example.com', [product], days_ago=2)
+
+        assert _send() == (0, 0)
+        assert ReviewReminderOffset.objects.get().last_event_id == 0
+
+    def test_batches_queries(self, products, django_assert_max_num_queries):
+        """Test a batch of deliveries costs a fixed number of queries however many it holds."""
+        for i in range(20):
+            _delivered_order(f'customer{i}@example.com', products)
+
+        # Offset lock, events, pairs, reminders insert and offset update, plus
+        # creating the offset on this first run and the savepoints around it
+        with django_assert_max_num_queries(11):
+            assert _send() == (20, 100)
+
+        assert len(mail.outbox) == 20
+
+    def test_sends_after_commit_at_most_once(self, product, monkeypatch):
+        """Test e-mails go out only once the batch commits, and a failed send is not repeated."""
+        def fail(messages):
+            assert ReviewReminder.objects.exists()
+            raise ConnectionRefusedError('Mail server down')
+
+        monkeypatch.setattr(reminders, 'send_reminder_messages', fail)
+        _delivered_order('alice@example.com', [product])
+        with pytest.raises(ConnectionRefusedError):
+            _send()
+        monkeypatch.undo()
+
+        assert _send() == (0, 0)
+        assert _reminded() == [('alice@example.com', product.name)]
+        assert mail.outbox == []
+
+    def test_task(self, product):
+        """Test the task reports the customers reminded."""
+        _delivered_order('alice@example.com', [product])
+
+        assert _send(send_review_reminder_emails) == 'Sent 1 review reminders'
+
+    def test_delivered_in_admin(self, rf, admin_user, order, product):
+        """Test an order marked delivered in the admin is logged, so its customer is reminded."""
+        Order.objects.filter(id=order.id).update(status='shipped')
+        order.refresh_from_db()
+        request = rf.post('/')
+        request.user = admin_user
+        model_admin = OrderAdmin(Order, admin.site)
+        form = model_admin.get_form(request, order)(data={
+            'customer_name': order.customer_name,
+            'customer_email': order.customer_email,
+            'total_amount': order.total_amount,
+            'status': 'delivered',
+            'shipping_address': order.shipping_address,
+        }, instance=order)
+        assert form.is_valid()
+        model_admin.save_model(request, form.save(commit=False), form, change=True)
+        OrderEvent.objects.update(created_at=timezone.now() - timedelta(days=8))
+
+        assert _send() == (1, 1)
+
+        assert _reminded() == [(order.customer_email, product.name)]
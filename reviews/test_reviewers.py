@@ -0,0 +1,144 @@
+"""
+Tests for the materialized reviewer stats and leaderboard.
+"""
+
+import pytest
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management import call_command
+from reviews.models import Review, ReviewerStats
+from reviews.reviewers import rebuild_reviewer_stats, top_reviewers
+from reviews.tasks import calculate_review_statistics
+
+
+@pytest.fixture
+def authors(db):
+    """Create users to write reviews."""
+    return [User.objects.create_user(username=f'author{i}', password='testpass123') for i in range(3)]
+
+
+def _review(product, author, helpful_count=0, rating=4):
+    return Review.objects.create(
+        product=product, user=author, rating=rating, title='Title', comment='Comment', helpful_count=helpful_count
+    )
+
+
+def _stats(user):
+    stats = ReviewerStats.objects.get(user=user)
+    return stats.review_count, stats.helpful_votes
+
+
+def _vote(client, review, is_helpful):
+    return client.post(f'/api/v1/reviews/{review.id}/helpful/', {'is_helpful': is_helpful}, format='json')
+
+
+@pytest.mark.django_db
+class TestReviewerStatsMaintenance:
+    """Test cases for keeping reviewer stats in step with reviews and votes."""
+
+    def test_reviews_are_counted(self, product, products, authors):
+        """Test new reviews and their existing helpful counts are added."""
+        _review(product, authors[0], helpful_count=2)
+        _review(products[0], authors[0])
+
+        assert _stats(authors[0]) == (2, 2)
+
+    def test_votes_move_helpful_votes(self, authenticated_client, product, authors):
+        """Test helpful votes, and votes changed away from helpful, reach the author."""
+        review = _review(product, authors[0])
+
+        _vote(authenticated_client, review, True)
+        assert _stats(authors[0]) == (1, 1)
+
+        _vote(authenticated_client, review, False)
+        assert _stats(authors[0]) == (1, 0)
+
+    def test_deleting_review_subtracts_it(self, product, products, authors):
+        """Test a deleted review takes its helpful votes with it."""
+        _review(product, authors[0], helpful_count=3)
+        second = _review(products[0], authors[0], helpful_count=4)
+
+        second.delete()
+
+        assert _stats(authors[0]) == (1, 3)
+
+    def test_deleting_user_leaves_no_stats(self, product, authors):
+        """Test deleting an author doesn't recreate the stats removed with them."""
+        _review(product, authors[0])
+        user_id = authors[0].id
+
+        authors[0].delete()
+
+        assert not ReviewerStats.objects.filter(user_id=user_id).exists()
+
+
+@pytest.mark.django_db
+class TestRebuildReviewerStats:
+    """Test cases for rebuilding reviewer stats from scratch."""
+
+    def test_repairs_drift_and_removes_stale_rows_in_chunks(self, product, products, authors,
+                                                            django_assert_num_queries):
+        """Test each chunk of reviewers costs an aggregate, an upsert and a delete."""
+        for author in authors:
+            _review(product, author, helpful_count=author.id)
+        _review(products[0], authors[0])
+        ReviewerStats.objects.filter(user=authors[1]).update(review_count=9, helpful_votes=9)
+        idle = User.objects.create_user(username='idle')
+        ReviewerStats.objects.create(user=idle, review_count=1)
+
+        # Two chunks of (aggregate, upsert, delete), then the final aggregate and delete
+        with django_assert_num_queries(8):
+            assert rebuild_reviewer_stats(chunk_size=2) == 3
+
+        assert [_stats(author) for author in authors] == [
+            (2, authors[0].id), (1, authors[1].id), (1, authors[2].id)
+        ]
+        assert not ReviewerStats.objects.filter(user=idle).exists()
+
+    def test_command(self, product, authors):
+        """Test the management command rebuilds the given users."""
+        _review(product, authors[0])
+        ReviewerStats.objects.all().delete()
+        out = StringIO()
+
+        call_command('rebuild_reviewer_stats', authors[0].id, '--chunk-size', '1', stdout=out)
+
+        assert 'Rebuilt stats for 1 reviewers' in out.getvalue()
+        assert _stats(authors[0]) == (1, 0)
+
+
+@pytest.mark.django_db
+class TestLeaderboard:
+    """Test cases for reading the top reviewers."""
+
+    def test_ordered_by_helpful_votes_in_one_query(self, product, products, authors, django_assert_num_queries):
+        """Test the leaderboard ranks by helpful votes, then review count."""
+        _review(product, authors[0], helpful_count=5)
+        _review(product, authors[1], helpful_count=9)
+        _review(product, authors[2], helpful_count=3)
+        _review(products[0], authors[2], helpful_count=2)
+
+        with django_assert_num_queries(1):
+            leaders = [(stats.user.username, stats.helpful_votes) for stats in top_reviewers(limit=2)]
+
+        assert leaders == [('author1', 9), ('author2', 5)]
+
+    def test_review_statistics_task(self, monkeypatch, product, products, authors):
+        """Test site-wide statistics come from the summaries and reviewer stats."""
+        cache = LocMemCache('review-statistics', {})
+        monkeypatch.setattr('reviews.tasks.cache', cache)
+        _review(product, authors[0], helpful_count=1, rating=5)
+        _review(products[0], authors[0], rating=3)
+        _review(product, authors[1], helpful_count=4, rating=1)
+
+        calculate_review_statistics()
+
+        stats = cache.get('review_statistics')
+        assert stats['total_reviews'] == 3
+        assert stats['average_rating'] == 3.0
+        assert stats['rating_distribution'] == {'1_star': 1, '2_star': 0, '3_star': 1, '4_star': 0, '5_star': 1}
+        assert stats['top_reviewers'] == [
+            {'username': 'author1', 'review_count': 1, 'helpful_votes': 4},
+            {'username': 'author0', 'review_count': 2, 'helpful_votes': 1},
+        ]
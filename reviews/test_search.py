@@ -0,0 +1,124 @@
+"""
+Tests for full-text search within a product's reviews.
+"""
+
+import pytest
+from django.contrib.auth.models import User
+from reviews.models import Review
+from reviews.search import fts_terms
+
+
+@pytest.fixture
+def searchable_reviews(product, products):
+    """Create reviews about batteries and screens, plus one for another product."""
+    texts = [
+        ('Great battery', 'The battery life lasts two full days.'),
+        ('Decent', 'Battery is fine but the screen scratches easily.'),
+        ('Bright screen', 'Lovely display, no complaints.'),
+        ('Long lasting', 'I barely think about battery life, it lasts forever and the battery life is superb.'),
+    ]
+    reviews = [
+        Review.objects.create(
+            product=product,
+            user=User.objects.create_user(username=f'searcher{i}'),
+            rating=4,
+            title=title,
+            comment=comment,
+        )
+        for i, (title, comment) in enumerate(texts)
+    ]
+    Review.objects.create(
+        product=products[0],
+        user=User.objects.create_user(username='elsewhere'),
+        rating=5,
+        title='Battery life',
+        comment='Battery life is amazing.',
+    )
+    return reviews
+
+
+def _search(client, product, query, **params):
+    params = ''.join(f'&{key}={value}' for key, value in params.items())
+    return client.get(f'/api/v1/reviews/product/{product.id}/?q={query}{params}').json()
+
+
+class TestFtsTerms:
+    """Test cases for turning user input into an FTS5 query."""
+
+    def test_quotes_words(self):
+        """Test operators and punctuation are neutralized."""
+        assert fts_terms('battery life') == '"battery" "life"'
+        assert fts_terms('NOT "screen" OR-*') == '"NOT" "screen" "OR"'
+        assert fts_terms('  ?! ') == ''
+
+
+@pytest.mark.django_db
+class TestReviewSearch:
+    """Test cases for the q parameter on product review listings."""
+
+    def test_matches_all_terms_within_product(self, api_client, product, searchable_reviews):
+        """Test only this product's reviews containing every term are returned."""
+        results = _search(api_client, product, 'battery life')['results']
+
+        assert {r['id'] for r in results} == {searchable_reviews[0].id, searchable_reviews[3].id}
+
+    def test_ranked_by_relevance(self, api_client, product, searchable_reviews):
+        """Test a match in the title outranks matches only in the comment."""
+        results = _search(api_client, product, 'battery life')['results']
+
+        assert [r['id'] for r in results] == [searchable_reviews[0].id, searchable_reviews[3].id]
+
+    def test_stemming(self, api_client, product, searchable_reviews):
+        """Test word forms match their stem."""
+        results = _search(api_client, product, 'scratch')['results']
+
+        assert [r['id'] for r in results] == [searchable_reviews[1].id]
+
+    def test_highlighted_snippets(self, api_client, product, searchable_reviews):
+        """Test each result carries an excerpt with the matches marked."""
+        results = _search(api_client, product, 'screen')['results']
+
+        snippets = {r['id']: r['snippet'] for r in results}
+        assert '<mark>screen</mark>' in snippets[searchable_reviews[1].id]
+        assert '<mark>screen</mark>' in snippets[searchable_reviews[2].id].lower()
+
+    def test_snippets_escape_review_markup(self, api_client, product):
+        """Test markup written in a review is escaped, leaving only the highlight tags as HTML."""
+        Review.objects.create(
+            product=product,
+            user=User.objects.create_user(username='mallory'),
+            rating=1,
+            title='<script>alert("screen")</script>',
+            comment='Screen <img src=x onerror=alert(1)>',
+        )
+
+        snippet = _search(api_client, product, 'screen')['results'][0]['snippet']
+
+        assert snippet == '&lt;script&gt;alert(&quot;<mark>screen</mark>&quot;)&lt;/script&gt;'
+
+    def test_index_follows_writes(self, api_client, product, searchable_reviews):
+        """Test edits and deletes are reflected in search results."""
+        review = Review.objects.get(id=searchable_reviews[2].id)
+        review.comment = 'Battery drains quickly.'
+        review.save()
+        Review.objects.filter(id=searchable_reviews[0].id).delete()
+
+        results = _search(api_client, product, 'battery')['results']
+
+        assert {r['id'] for r in results} == {searchable_reviews[1].id, searchable_reviews[2].id, searchable_reviews[3].id}
+        assert _search(api_client, product, 'display')['results'] == []
+
+    def test_combines_with_filters_and_pages(self, api_client, product, searchable_reviews):
+        """Test filters still apply and pages follow the ranking."""
+        Review.objects.filter(id=searchable_reviews[1].id).update(rating=2)
+
+        first = _search(api_client, product, 'battery', rating=4, page_size=1)
+        second = api_client.get(first['next']).json()
+
+        ids = [r['id'] for r in first['results'] + second['results']]
+        assert ids == [searchable_reviews[0].id, searchable_reviews[3].id]
+        assert second['next'] is None
+
+    def test_unsearchable_query(self, api_client, product, searchable_reviews):
+        """Test a query without words matches nothing instead of failing."""
+        assert _search(api_client, product, '%22%2A%22')['results'] == []
@@ -0,0 +1,200 @@
+"""
+Tests for helpful-vote counters.
+"""
+
+import pytest
+from django.contrib.auth.models import User
+from redis.exceptions import ConnectionError
+from reviews.models import Review, ReviewerStats, ReviewHelpful, ReviewVoteFlush
+from reviews.votes import (
+    VOTE_DELTAS_FLUSHING_KEY, VOTE_DELTAS_KEY, VOTE_FLUSH_LOCK_KEY, buffer_vote_deltas, flush_vote_deltas,
+    pending_vote_deltas, record_vote, vote_deltas, wilson_lower_bound
+)
+
+
+@pytest.fixture
+def review(product):
+    """Create a review written by someone other than the test user."""
+    author = User.objects.create_user(username='author', password='testpass123')
+    return Review.objects.create(product=product, user=author, rating=4, title='Solid', comment='Works')
+
+
+@pytest.fixture
+def vote_buffer(settings, monkeypatch):
+    """Enable vote buffering against an in-memory Redis."""
+    fakeredis = pytest.importorskip('fakeredis')
+    redis = fakeredis.FakeRedis()
+    settings.REVIEW_VOTE_BUFFERING = True
+    monkeypatch.setattr('reviews.votes.get_redis', lambda: redis)
+    return redis
+
+
+def _vote(client, review, is_helpful):
+    return client.post(f'/api/v1/reviews/{review.id}/helpful/', {'is_helpful': is_helpful}, format='json')
+
+
+def _counts(review):
+    return tuple(Review.objects.filter(id=review.id).values_list('helpful_count', 'not_helpful_count').get())
+
+
+class TestVoteDeltas:
+    """Test cases for translating votes into counter changes."""
+
+    def test_wilson_lower_bound(self):
+        """Test more votes at the same ratio rank higher, and no votes score zero."""
+        assert wilson_lower_bound(0, 0) == 0
+        assert wilson_lower_bound(1, 0) < wilson_lower_bound(10, 0) < 1
+        assert wilson_lower_bound(8, 2) < wilson_lower_bound(80, 20)
+
+    @pytest.mark.parametrize('previous, is_helpful, expected', [
+        (None, True, (1, 0)),
+        (None, False, (0, 1)),
+        (False, True, (1, -1)),
+        (True, False, (-1, 1)),
+        (True, True, (0, 0)),
+        (False, False, (0, 0)),
+    ])
+    def test_deltas(self, previous, is_helpful, expected):
+        """Test each vote transition moves the right counters."""
+        assert vote_deltas(previous, is_helpful) == expected
+
+
+@pytest.mark.django_db
+class TestMarkReviewHelpful:
+    """Test cases for voting with atomic counter updates."""
+
+    def test_vote_then_change(self, authenticated_client, user, review):
+        """Test a new vote counts once and changing it moves the count."""
+        response = _vote(authenticated_client, review, True)
+        assert response.json()['message'] == 'Vote recorded'
+        assert (response.json()['helpful_count'], response.json()['not_helpful_count']) == (1, 0)
+
+        response = _vote(authenticated_client, review, False)
+        assert response.json()['message'] == 'Vote updated'
+        assert _counts(review) == (0, 1)
+        assert not ReviewHelpful.objects.get(review=review, user=user).is_helpful
+
+    def test_repeated_vote_is_noop(self, authenticated_client, review):
+        """Test casting the same vote twice counts it once."""
+        _vote(authenticated_client, review, True)
+        _vote(authenticated_client, review, True)
+
+        assert _counts(review) == (1, 0)
+
+    def test_keeps_concurrent_increments(self, review):
+        """Test counters are adjusted relative to the stored value."""
+        Review.objects.filter(id=review.id).update(helpful_count=10)
+
+        record_vote(review.id, None, True)
+
+        assert _counts(review) == (11, 0)
+
+    def test_maintains_helpfulness_score(self, review):
+        """Test the score is recomputed from the new counts in the same update."""
+        Review.objects.filter(id=review.id).update(helpful_count=7, not_helpful_count=2)
+
+        record_vote(review.id, None, False)
+
+        score = Review.objects.get(id=review.id).helpfulness_score
+        assert score == pytest.approx(wilson_lower_bound(7, 3))
+        assert 0 < score < 0.7
+
+    def test_cannot_vote_on_own_review(self, api_client, review):
+        """Test authors cannot vote on their own reviews."""
+        api_client.force_authenticate(user=review.user)
+
+        assert _vote(api_client, review, True).status_code == 400
+        assert _counts(review) == (0, 0)
+
+
+@pytest.mark.django_db
+class TestBufferedVotes:
+    """Test cases for buffering counter changes in Redis."""
+
+    def test_buffered_until_flushed(self, authenticated_client, review, vote_buffer,
+                                    django_capture_on_commit_callbacks):
+        """Test votes reach the review row only when flushed, but read as live."""
+        # Buffered on commit, which inside the test transaction is only when this block exits
+        with django_capture_on_commit_callbacks(execute=True):
+            _vote(authenticated_client, review, True)
+
+        assert _counts(review) == (0, 0)
+        listed = authenticated_client.get(f'/api/v1/reviews/product/{review.product_id}/').json()['results']
+        assert listed[0]['helpful_count'] == 1
+
+        assert flush_vote_deltas() == 1
+        assert _counts(review) == (1, 0)
+        assert not vote_buffer.keys(f'{VOTE_DELTAS_KEY}*')
+
+    def test_buffered_only_on_commit(self, review, vote_buffer, django_capture_on_commit_callbacks):
+        """Test the delta waits for the vote's transaction to commit."""
+        with django_capture_on_commit_callbacks() as callbacks:
+            record_vote(review.id, None, True)
+
+        assert not vote_buffer.exists(VOTE_DELTAS_KEY)
+        assert len(callbacks) == 1
+
+    def test_flush_coalesces_in_batches(self, product, review, vote_buffer, django_assert_num_queries):
+        """Test many deltas become one UPDATE per batch of reviews."""
+        others = [
+            Review.objects.create(
+                product=product, user=User.objects.create_user(username=f'u{i}'), rating=3, title='t', comment='c'
+            )
+            for i in range(3)
+        ]
+        for _ in range(5):
+            buffer_vote_deltas({r.id: (1, 0) for r in [review] + others})
+        buffer_vote_deltas({review.id: (-1, 1)})
+
+        # savepoint; flush id check, insert and pruning; counter and score
+        # UPDATEs, author lookup and stats UPDATE per batch of two reviews; release
+        with django_assert_num_queries(13):
+            assert flush_vote_deltas(batch_size=2) == 4
+
+        assert _counts(review) == (4, 1)
+        assert all(_counts(r) == (5, 0) for r in others)
+        assert ReviewerStats.objects.get(user=review.user).helpful_votes == 4
+        assert Review.objects.get(id=review.id).helpfulness_score == pytest.approx(wilson_lower_bound(4, 1))
+
+    def test_resumes_interrupted_flush(self, review, vote_buffer):
+        """Test deltas left behind by a failed flush are applied by the next one."""
+        buffer_vote_deltas({review.id: (2, 0)})
+        vote_buffer.rename(VOTE_DELTAS_KEY, f'{VOTE_DELTAS_KEY}:dead')
+        vote_buffer.set(VOTE_DELTAS_FLUSHING_KEY, f'{VOTE_DELTAS_KEY}:dead')
+        buffer_vote_deltas({review.id: (0, 3)})
+        assert pending_vote_deltas([review.id]) == {review.id: [2, 3]}
+
+        flush_vote_deltas()
+        assert _counts(review) == (2, 0)
+        flush_vote_deltas()
+        assert _counts(review) == (2, 3)
+
+    def test_failure_after_commit_applies_once(self, review, vote_buffer, monkeypatch):
+        """Test a flush that committed but failed to clear Redis is not applied again."""
+        buffer_vote_deltas({review.id: (2, 1)})
+        delete = vote_buffer.delete
+
+        def fail_once(*keys):
+            monkeypatch.setattr(vote_buffer, 'delete', delete)
+            raise ConnectionError('Connection lost')
+
+        monkeypatch.setattr(vote_buffer, 'delete', fail_once)
+        with pytest.raises(ConnectionError):
+            flush_vote_deltas()
+        assert _counts(review) == (2, 1)
+        assert not vote_buffer.exists(VOTE_FLUSH_LOCK_KEY)
+
+        assert flush_vote_deltas() == 0
+        assert _counts(review) == (2, 1)
+        assert ReviewerStats.objects.get(user=review.user).helpful_votes == 2
+        assert not vote_buffer.keys(f'{VOTE_DELTAS_KEY}*')
+
+    def test_waits_for_running_flush(self, review, vote_buffer):
+        """Test a flush started while another holds the lock leaves the buffer alone."""
+        buffer_vote_deltas({review.id: (1, 0)})
+        vote_buffer.set(VOTE_FLUSH_LOCK_KEY, 'other')
+
+        assert flush_vote_deltas() == 0
+        assert _counts(review) == (0, 0)
+        assert vote_buffer.exists(VOTE_DELTAS_KEY)
+        assert not ReviewVoteFlush.objects.exists()
@@ -18,6 +18,13 @@ urlpatterns = [
     # Review interactions
     path('<int:review_id>/helpful/', views.mark_review_helpful, name='review-helpful'),
     
+    # Review images
+    path(
+        'images/<int:image_id>/<slug:variant>.<slug:fmt>',
+        views.get_review_image_variant,
+        name='review-image-variant'
+    ),
+    
     # User reviews
     path('my-reviews/', views.get_user_reviews, name='user-reviews'),
 ]
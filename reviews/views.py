@@ -3,17 +3,26 @@ Views for Reviews app.
 """
 
 from rest_framework import status, generics
-from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
+from rest_framework.permissions import AllowAny, IsAuthenticated, IsAuthenticatedOrReadOnly
 from rest_framework.response import Response
 from drf_spectacular.utils import extend_schema, OpenApiParameter
-from django.db.models import Avg, Count, Q
-from .models import Review, ReviewHelpful
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import patch_cache_control
+from .images import REVIEW_IMAGE_VARIANTS, VARIANT_FORMATS, get_variant_path
+from .models import ProductRatingSummary, Review, ReviewHelpful, ReviewImage
+from .pagination import KeysetPagination
+from .search import review_snippets, search_reviews
 from .serializers import (
     ReviewSerializer,
+    ReviewSearchResultSerializer,
     ReviewSummarySerializer,
     MarkHelpfulSerializer
 )
+from .votes import merge_pending_votes, record_vote
 from products.models import Product
 
 
@@ -23,10 +32,20 @@ class ProductReviewListView(generics.ListAPIView):
     """
     serializer_class = ReviewSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    pagination_class = KeysetPagination
+    
+    # Each ordering has a matching index on Review and ends in id so pages
+    # can be continued with a keyset cursor
+    SORT_ORDERINGS = {
+        'recent': ('-created_at', '-id'),
+        'helpful': ('-helpfulness_score', '-id'),
+        'rating_high': ('-rating', '-created_at', '-id'),
+        'rating_low': ('rating', '-created_at', '-id'),
+    }
     
     def get_queryset(self):
         product_id = self.kwargs['product_id']
-        queryset = Review.objects.filter(product_id=product_id).select_related('user')
+        queryset = Review.objects.filter(product_id=product_id).select_related('user').prefetch_related('images')
         
         # Filter by rating if specified
         rating = self.request.query_params.get('rating')
@@ -38,18 +57,19 @@ class ProductReviewListView(generics.ListAPIView):
         if verified_only == 'true':
             queryset = queryset.filter(is_verified_purchase=True)
         
+        # Full-text search results are ordered by relevance
+        query = self.request.query_params.get('q', '').strip()
+        if query:
+            return search_reviews(queryset, product_id, query)
+        
         # Sort options
         sort_by = self.request.query_params.get('sort_by', 'recent')
-        if sort_by == 'helpful':
-            queryset = queryset.order_by('-helpful_count')
-        elif sort_by == 'rating_high':
-            queryset = queryset.order_by('-rating', '-created_at')
-        elif sort_by == 'rating_low':
-            queryset = queryset.order_by('rating', '-created_at')
-        else:  # recent
-            queryset = queryset.order_by('-created_at')
-        
-        return queryset
+        return queryset.order_by(*self.SORT_ORDERINGS.get(sort_by, self.SORT_ORDERINGS['recent']))
+    
+    def get_serializer_class(self):
+        if self.request.query_params.get('q', '').strip():
+            return ReviewSearchResultSerializer
+        return super().get_serializer_class()
     
     @extend_schema(
         summary="Get product reviews",
@@ -59,6 +79,7 @@ class ProductReviewListView(generics.ListAPIView):
             OpenApiParameter('rating', int, description='Filter by rating (1-5)'),
             OpenApiParameter('verified_only', bool, description='Show only verified purchases'),
             OpenApiParameter('sort_by', str, description='Sort by: recent, helpful, rating_high, rating_low'),
+            OpenApiParameter('q', str, description='Search titles and comments; results are ordered by relevance'),
         ]
     )
     def get(self, request, *args, **kwargs):
@@ -66,15 +87,47 @@ class ProductReviewListView(generics.ListAPIView):
         page = self.paginate_queryset(queryset)
         
         if page is not None:
+            merge_pending_votes(page)
+            self.user_votes = _user_votes(request.user, page)
+            query = request.query_params.get('q', '').strip()
+            if query:
+                self.snippets = review_snippets(page, query)
             serializer = self.get_serializer(page, many=True)
             return self.get_paginated_response(serializer.data)
         
-        serializer = self.get_serializer(queryset, many=True)
+        reviews = merge_pending_votes(list(queryset))
+        self.user_votes = _user_votes(request.user, reviews)
+        serializer = self.get_serializer(reviews, many=True)
         return Response({
             'success': True,
             'reviews': serializer.data,
-            'count': queryset.count()
+            'count': len(reviews)
         })
+    
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['user_votes'] = getattr(self, 'user_votes', {})
+        context['snippets'] = getattr(self, 'snippets', {})
+        return context
+
+
+def _user_votes(user, reviews):
+    """
+    Map review id to the user's vote for the given reviews, in one query.
+    
+    Passed to ReviewSerializer as ``user_votes`` so it doesn't look up
+    each review's vote separately.
+    """
+    if not user.is_authenticated or not reviews:
+        return {}
+    votes = ReviewHelpful.objects.filter(
+        user=user,
+        review_id__in=[review.id for review in reviews]
+    ).values_list('review_id', 'is_helpful')
+    return {
+        review_id: 'helpful' if is_helpful else 'not_helpful'
+        for review_id, is_helpful in votes
+    }
 
 
 @extend_schema(
@@ -90,7 +143,9 @@ def create_review(request):
     serializer = ReviewSerializer(data=request.data, context={'request': request})
     
     if serializer.is_valid():
-        serializer.save()
+        # Saved together with the product's rating summary
+        with transaction.atomic():
+            serializer.save()
         return Response({
             'success': True,
             'message': 'Review created successfully',
@@ -130,7 +185,8 @@ def update_review(request, review_id):
     )
     
     if serializer.is_valid():
-        serializer.save()
+        with transaction.atomic():
+            serializer.save()
         return Response({
             'success': True,
             'message': 'Review updated successfully',
@@ -160,7 +216,8 @@ def delete_review(request, review_id):
             'error': 'Review not found or you do not have permission to delete it'
         }, status=status.HTTP_404_NOT_FOUND)
     
-    review.delete()
+    with transaction.atomic():
+        review.delete()
     
     return Response({
         'success': True,
@@ -177,36 +234,26 @@ def delete_review(request, review_id):
 def get_review_statistics(request, product_id):
     """Get review statistics for a product."""
     try:
-        product = Product.objects.get(id=product_id)
+        product = Product.objects.select_related('rating_summary').get(id=product_id)
     except Product.DoesNotExist:
         return Response({
             'success': False,
             'error': 'Product not found'
         }, status=status.HTTP_404_NOT_FOUND)
     
-    reviews = Review.objects.filter(product=product)
-    
-    # Calculate statistics
-    stats = reviews.aggregate(
-        average_rating=Avg('rating'),
-        total_reviews=Count('id')
-    )
-    
-    # Rating distribution
-    rating_distribution = {}
-    for i in range(1, 6):
-        rating_distribution[f'{i}_star'] = reviews.filter(rating=i).count()
-    
-    # Verified purchase count
-    verified_count = reviews.filter(is_verified_purchase=True).count()
+    # Products without reviews have no summary row yet
+    try:
+        summary = product.rating_summary
+    except ProductRatingSummary.DoesNotExist:
+        summary = ProductRatingSummary(product=product)
     
     return Response({
         'success': True,
         'statistics': {
-            'average_rating': round(stats['average_rating'] or 0, 2),
-            'total_reviews': stats['total_reviews'],
-            'rating_distribution': rating_distribution,
-            'verified_purchase_count': verified_count
+            'average_rating': summary.average_rating,
+            'total_reviews': summary.review_count,
+            'rating_distribution': summary.rating_distribution,
+            'verified_purchase_count': summary.verified_count
         }
     })
 
@@ -230,7 +277,7 @@ def mark_review_helpful(request, review_id):
         }, status=status.HTTP_404_NOT_FOUND)
     
     # Prevent users from voting on their own reviews
-    if review.user == request.user:
+    if review.user_id == request.user.id:
         return Response({
             'success': False,
             'error': 'You cannot vote on your own review'
@@ -246,43 +293,24 @@ def mark_review_helpful(request, review_id):
     
     is_helpful = serializer.validated_data['is_helpful']
     
-    # Check if user has already voted
-    vote, created = ReviewHelpful.objects.get_or_create(
-        review=review,
-        user=request.user,
-        defaults={'is_helpful': is_helpful}
-    )
+    with transaction.atomic():
+        # Lock the user's existing vote so concurrent changes see each other
+        vote, created = ReviewHelpful.objects.select_for_update().get_or_create(
+            review=review,
+            user=request.user,
+            defaults={'is_helpful': is_helpful}
+        )
+        previous = None if created else vote.is_helpful
+        if previous is not None and previous != is_helpful:
+            ReviewHelpful.objects.filter(id=vote.id).update(is_helpful=is_helpful)
+        record_vote(review.id, previous, is_helpful)
     
-    if not created:
-        # Update existing vote
-        old_vote = vote.is_helpful
-        vote.is_helpful = is_helpful
-        vote.save()
-        
-        # Update counts
-        if old_vote != is_helpful:
-            if old_vote:
-                review.helpful_count -= 1
-                review.not_helpful_count += 1
-            else:
-                review.helpful_count += 1
-                review.not_helpful_count -= 1
-            review.save()
-        
-        message = 'Vote updated'
-    else:
-        # New vote
-        if is_helpful:
-            review.helpful_count += 1
-        else:
-            review.not_helpful_count += 1
-        review.save()
-        
-        message = 'Vote recorded'
+    review.refresh_from_db(fields=['helpful_count', 'not_helpful_count'])
+    merge_pending_votes([review])
     
     return Response({
         'success': True,
-        'message': message,
+        'message': 'Vote recorded' if created else 'Vote updated',
         'helpful_count': review.helpful_count,
         'not_helpful_count': review.not_helpful_count
     })
@@ -297,11 +325,53 @@ def mark_review_helpful(request, review_id):
 @permission_classes([IsAuthenticated])
 def get_user_reviews(request):
     """Get all reviews by the current user."""
-    reviews = Review.objects.filter(user=request.user).select_related('product')
-    serializer = ReviewSerializer(reviews, many=True, context={'request': request})
+    reviews = merge_pending_votes(list(
+        Review.objects.filter(user=request.user)
+        .select_related('product', 'user')
+        .prefetch_related('images')
+    ))
+    serializer = ReviewSerializer(reviews, many=True, context={
+        'request': request,
+        'user_votes': _user_votes(request.user, reviews)
+    })
     
     return Response({
         'success': True,
         'reviews': serializer.data,
-        'count': reviews.count()
+        'count': len(reviews)
     })
+
+
+@extend_schema(
+    summary="Get a review image variant",
+    description="Serve a resized WebP or JPEG rendition of a review image, rendering it on first request.",
+    tags=["Reviews"]
+)
+@api_view(['GET'])
+@permission_classes([AllowAny])
+@throttle_classes([])
+def get_review_image_variant(request, image_id, variant, fmt):
+    """Serve a review image variant, through nginx when X-Accel-Redirect is configured."""
+    if variant not in REVIEW_IMAGE_VARIANTS or fmt not in VARIANT_FORMATS:
+        return Response({
+            'success': False,
+            'error': 'Unknown image variant'
+        }, status=status.HTTP_404_NOT_FOUND)
+    
+    try:
+        path = get_variant_path(image_id, variant, fmt)
+    except (ReviewImage.DoesNotExist, OSError):
+        return Response({
+            'success': False,
+            'error': 'Image not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+    
+    content_type = VARIANT_FORMATS[fmt][1]
+    if settings.REVIEW_IMAGE_ACCEL_REDIRECT_PREFIX:
+        # nginx serves the file from its internal location; Django only looks it up
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = settings.REVIEW_IMAGE_ACCEL_REDIRECT_PREFIX + path
+    else:
+        response = FileResponse(default_storage.open(path), content_type=content_type)
+    patch_cache_control(response, public=True, max_age=3600 * 24 * 30)
+    return response
@@ -0,0 +1,271 @@
+"""
+Helpful-vote counters for reviews.
+
+Votes adjust ``Review.helpful_count`` and ``not_helpful_count`` with atomic
+``F()`` updates, so concurrent votes never overwrite each other. The same
+update recomputes ``helpfulness_score``, the lower bound of the Wilson score
+interval for the share of helpful votes, which the "most helpful" sort uses.
+Changes to helpful counts are passed on to the authors' ReviewerStats.
+
+With ``REVIEW_VOTE_BUFFERING`` enabled the counter changes are instead added
+to a Redis hash and applied to the reviews table in bulk by
+``flush_vote_deltas``, so a review receiving a burst of votes does not make
+every request wait on its row. Reads merge the buffered deltas back in with
+``merge_pending_votes`` so counts still look live.
+"""
+
+import math
+import uuid
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, FloatField, IntegerField, Value, When
+from django.db.models.functions import Cast, Sqrt
+from django.db.models.lookups import GreaterThan
+from django.utils import timezone
+from .models import Review, ReviewVoteFlush
+from .reviewers import adjust_helpful_votes
+
+VOTE_DELTAS_KEY = 'review_vote_deltas'
+# Name of the hash of deltas being applied by a flush. VOTE_DELTAS_KEY is
+# renamed to a key unique to the flush, so new votes start a fresh hash while
+# it runs and the flush can be recognised once applied.
+VOTE_DELTAS_FLUSHING_KEY = 'review_vote_deltas:flushing'
+VOTE_FLUSH_LOCK_KEY = 'review_vote_deltas:lock'
+# Longer than any flush should take; an expired lock lets the next flush in
+VOTE_FLUSH_LOCK_TIMEOUT = 300
+VOTE_FLUSH_BATCH_SIZE = 500
+# How long applied flush ids are remembered
+VOTE_FLUSH_RETENTION = timedelta(days=1)
+
+# KEYS: deltas hash, flushing pointer; ARGV: key for this flush.
+# Resumes an unfinished flush, else moves the buffer aside for this one.
+START_FLUSH_SCRIPT = """
+local flushing = redis.call('GET', KEYS[2])
+if flushing then
+    return flushing
+end
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return false
+end
+redis.call('RENAME', KEYS[1], ARGV[1])
+redis.call('SET', KEYS[2], ARGV[1])
+return ARGV[1]
+"""
+
+# KEYS: lock; ARGV: token. Releases the lock only if this flush still holds it.
+RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+COUNTERS = ('helpful', 'not_helpful')
+# z for a 95% confidence interval
+HELPFULNESS_Z = 1.96
+
+
+def get_redis():
+    """Return the Redis connection behind the default cache."""
+    from django_redis import get_redis_connection
+    return get_redis_connection('default')
+
+
+def wilson_lower_bound(helpful, not_helpful, z=HELPFULNESS_Z):
+    """Lower bound of the Wilson score interval for helpful / total votes."""
+    total = helpful + not_helpful
+    if not total:
+        return 0.0
+    p = helpful / total
+    return (
+        p + z * z / (2 * total) - z * math.sqrt((p * (1 - p) + z * z / (4 * total)) / total)
+    ) / (1 + z * z / total)
+
+
+def helpfulness_score_expression(helpful, not_helpful, z=HELPFULNESS_Z):
+    """
+    ``wilson_lower_bound`` as a database expression.
+
+    Args:
+        helpful: Expression for the helpful vote count, e.g. ``F('helpful_count')``
+        not_helpful: Expression for the not-helpful vote count
+    """
+    total = Cast(helpful + not_helpful, FloatField())
+    p = Cast(helpful, FloatField()) / total
+    z2 = Value(z * z)
+    score = (
+        p + z2 / (Value(2.0) * total)
+        - Value(z) * Sqrt((p * (Value(1.0) - p) + z2 / (Value(4.0) * total)) / total)
+    ) / (Value(1.0) + z2 / total)
+    return Case(
+        When(GreaterThan(helpful + not_helpful, 0), then=score),
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+
+
+def vote_deltas(previous, is_helpful):
+    """
+    Counter changes for a user's vote.
+
+    Args:
+        previous: The user's earlier vote on the review, or None if new
+        is_helpful: The vote being cast
+
+    Returns:
+        ``(helpful_delta, not_helpful_delta)``
+    """
+    helpful = int(is_helpful) - int(previous is True)
+    not_helpful = int(not is_helpful) - int(previous is False)
+    return helpful, not_helpful
+
+
+def record_vote(review_id, previous, is_helpful):
+    """
+    Apply a vote's counter changes to a review.
+
+    Updates the review with ``F()`` expressions, or with buffering enabled
+    adds the changes to Redis once the surrounding transaction commits.
+    """
+    helpful, not_helpful = vote_deltas(previous, is_helpful)
+    if not (helpful or not_helpful):
+        return
+
+    if settings.REVIEW_VOTE_BUFFERING:
+        transaction.on_commit(lambda: buffer_vote_deltas({review_id: (helpful, not_helpful)}))
+        return
+
+    # Both sides of SET see the old column values, so the score is computed
+    # from the new counts in the same statement
+    helpful_count = F('helpful_count') + helpful
+    not_helpful_count = F('not_helpful_count') + not_helpful
+    Review.objects.filter(id=review_id).update(
+        helpful_count=helpful_count,
+        not_helpful_count=not_helpful_count,
+        helpfulness_score=helpfulness_score_expression(helpful_count, not_helpful_count),
+    )
+    adjust_helpful_votes({review_id: helpful})
+
+
+def buffer_vote_deltas(deltas):
+    """Add ``{review_id: (helpful, not_helpful)}`` changes to the Redis buffer."""
+    pipe = get_redis().pipeline(transaction=False)
+    for review_id, changes in deltas.items():
+        for counter, delta in zip(COUNTERS, changes):
+            if delta:
+                pipe.hincrby(VOTE_DELTAS_KEY, f'{review_id}:{counter}', delta)
+    pipe.execute()
+
+
+def _parse_deltas(fields):
+    deltas = defaultdict(lambda: [0, 0])
+    for field, value in fields.items():
+        review_id, counter = (field.decode() if isinstance(field, bytes) else field).split(':')
+        deltas[int(review_id)][COUNTERS.index(counter)] += int(value)
+    return deltas
+
+
+def pending_vote_deltas(review_ids):
+    """
+    Buffered counter changes not yet flushed, including any being flushed.
+
+    Returns:
+        ``{review_id: [helpful, not_helpful]}`` for reviews with pending changes;
+        always empty when buffering is disabled
+    """
+    if not settings.REVIEW_VOTE_BUFFERING or not review_ids:
+        return {}
+
+    fields = [f'{review_id}:{counter}' for review_id in review_ids for counter in COUNTERS]
+    redis = get_redis()
+    pipe = redis.pipeline(transaction=False)
+    pipe.hmget(VOTE_DELTAS_KEY, fields)
+    pipe.get(VOTE_DELTAS_FLUSHING_KEY)
+    results = pipe.execute()
+    if results[1]:
+        results.append(redis.hmget(results[1], fields))
+    buffered = {}
+    for values in (results[0], *results[2:]):
+        for field, value in zip(fields, values):
+            if value is not None:
+                buffered[field] = buffered.get(field, 0) + int(value)
+    return dict(_parse_deltas(buffered))
+
+
+def merge_pending_votes(reviews):
+    """Add buffered counter changes to loaded reviews in place."""
+    pending = pending_vote_deltas([review.id for review in reviews])
+    for review in reviews:
+        if review.id in pending:
+            helpful, not_helpful = pending[review.id]
+            review.helpful_count += helpful
+            review.not_helpful_count += not_helpful
+    return reviews
+
+
+def flush_vote_deltas(batch_size=VOTE_FLUSH_BATCH_SIZE):
+    """
+    Apply the buffered counter changes to the reviews table.
+
+    Flushes take turns under a Redis lock. The buffer is swapped out with an
+    atomic RENAME to a key unique to the flush, so votes arriving during the
+    flush go to a new hash. Each batch of reviews is updated with a single
+    ``F()`` UPDATE, followed by one recomputing their ``helpfulness_score``
+    and two moving their authors' helpful votes.
+
+    The flush's id is recorded in ``ReviewVoteFlush`` in the same transaction
+    as the updates. A flush that died before finishing is picked up again by
+    the next one, which skips the updates if the id shows they were already
+    committed, so deltas are applied exactly once.
+
+    Returns:
+        Number of reviews updated
+    """
+    redis = get_redis()
+    token = uuid.uuid4().hex
+    if not redis.set(VOTE_FLUSH_LOCK_KEY, token, nx=True, ex=VOTE_FLUSH_LOCK_TIMEOUT):
+        # Another flush is running
+        return 0
+    try:
+        flushing_key = redis.register_script(START_FLUSH_SCRIPT)(
+            keys=[VOTE_DELTAS_KEY, VOTE_DELTAS_FLUSHING_KEY], args=[f'{VOTE_DELTAS_KEY}:{token}']
+        )
+        if not flushing_key:
+            # Nothing buffered
+            return 0
+        flushing_key = flushing_key.decode() if isinstance(flushing_key, bytes) else flushing_key
+        flush_id = flushing_key.rsplit(':', 1)[1]
+
+        deltas = {
+            review_id: changes
+            for review_id, changes in _parse_deltas(redis.hgetall(flushing_key)).items()
+            if any(changes)
+        }
+        review_ids = list(deltas)
+        with transaction.atomic():
+            if ReviewVoteFlush.objects.filter(flush_id=flush_id).exists():
+                # Committed by a flush that died before clearing Redis
+                review_ids = []
+            else:
+                ReviewVoteFlush.objects.create(flush_id=flush_id)
+                ReviewVoteFlush.objects.filter(applied_at__lt=timezone.now() - VOTE_FLUSH_RETENTION).delete()
+            for start in range(0, len(review_ids), batch_size):
+                batch = review_ids[start:start + batch_size]
+                Review.objects.filter(id__in=batch).update(**{
+                    f'{counter}_count': F(f'{counter}_count') + Case(
+                        *[When(id=review_id, then=Value(deltas[review_id][index])) for review_id in batch],
+                        default=Value(0),
+                        output_field=IntegerField(),
+                    )
+                    for index, counter in enumerate(COUNTERS)
+                })
+                Review.objects.filter(id__in=batch).update(
+                    helpfulness_score=helpfulness_score_expression(F('helpful_count'), F('not_helpful_count'))
+                )
+                adjust_helpful_votes({review_id: deltas[review_id][0] for review_id in batch})
+        redis.delete(flushing_key, VOTE_DELTAS_FLUSHING_KEY)
+        return len(review_ids)
+    finally:
+        redis.register_script(RELEASE_LOCK_SCRIPT)(keys=[VOTE_FLUSH_LOCK_KEY], args=[token])
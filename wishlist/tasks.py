@@ -5,6 +5,7 @@ Celery tasks for Wishlist app.
 from celery import shared_task
 from django.core.cache import cache
 from django.utils import timezone
+from collections import defaultdict
 from datetime import timedelta
 import logging
 
@@ -66,35 +67,20 @@ def send_price_drop_notifications():
 def send_back_in_stock_notifications():
     """
     Send notifications when out-of-stock wishlisted products are back in stock.
+    
+    Scans every wishlist item; the change feed consumer
+    ``notify_back_in_stock`` handles new changes incrementally.
     """
     from .models import WishlistItem
-    from core.tasks import send_email_notification
+    from products.models import with_product_live_stock
     
     try:
         # Get wishlist items for products that are now in stock
-        wishlist_items = WishlistItem.objects.select_related(
-            'user', 'product'
-        ).filter(product__stock_quantity__gt=0)
-        
-        notifications_sent = 0
+        wishlist_items = with_product_live_stock(
+            WishlistItem.objects.select_related('user')
+        ).filter(product_live_stock__gt=0)
         
-        for item in wishlist_items:
-            # Check if we've already notified about this (use cache)
-            cache_key = f"back_in_stock_notified_{item.id}"
-            
-            if not cache.get(cache_key):
-                # Send notification
-                # send_email_notification.delay(
-                #     f'{item.product.name} is back in stock!',
-                #     f'Good news! {item.product.name} is now available.',
-                #     [item.user.email]
-                # )
-                
-                # Mark as notified (cache for 7 days)
-                cache.set(cache_key, True, timeout=60*60*24*7)
-                notifications_sent += 1
-                
-                logger.info(f"Sent back-in-stock notification to {item.user.username}")
+        notifications_sent = _notify_wishlist_items(wishlist_items)
         
         return f"Sent {notifications_sent} back-in-stock notifications"
     except Exception as e:
@@ -102,6 +88,70 @@ def send_back_in_stock_notifications():
         raise
 
 
+def notify_back_in_stock(events):
+    """
+    Change feed handler: notify wishlists about products back in stock.
+    
+    Only products whose stock went from zero to positive in the given
+    events are checked: restocks via ``product.updated`` and stock returned
+    by ``order.cancelled``.
+    """
+    from .models import WishlistItem
+    from products.models import Product
+    
+    restocked = {}
+    restored = defaultdict(int)
+    for event in events:
+        if event.event_type == 'product.updated':
+            previous_stock = event.payload.get('previous_stock')
+            if previous_stock is not None and previous_stock <= 0:
+                restocked[event.aggregate_id] = True
+        elif event.event_type == 'order.cancelled':
+            for item in event.payload.get('items', []):
+                restored[item['product_id']] += item['quantity']
+    if not restocked and not restored:
+        return 0
+    
+    back_in_stock = [
+        product.id
+        for product in Product.objects.with_live_stock().filter(
+            id__in=set(restocked) | set(restored), live_stock__gt=0
+        )
+        if product.id in restocked or product.live_stock <= restored[product.id]
+    ]
+    wishlist_items = WishlistItem.objects.select_related(
+        'user', 'product'
+    ).filter(product_id__in=back_in_stock)
+    return _notify_wishlist_items(wishlist_items)
+
+
+def _notify_wishlist_items(wishlist_items):
+    """Notify each wishlist item's owner once per week; returns the number sent"""
+    from core.tasks import send_email_notification
+    
+    notifications_sent = 0
+    
+    for item in wishlist_items:
+        # Check if we've already notified about this (use cache)
+        cache_key = f"back_in_stock_notified_{item.id}"
+        
+        if not cache.get(cache_key):
+            # Send notification
+            # send_email_notification.delay(
+            #     f'{item.product.name} is back in stock!',
+            #     f'Good news! {item.product.name} is now available.',
+            #     [item.user.email]
+            # )
+            
+            # Mark as notified (cache for 7 days)
+            cache.set(cache_key, True, timeout=60*60*24*7)
+            notifications_sent += 1
+            
+            logger.info(f"Sent back-in-stock notification to {item.user.username}")
+    
+    return notifications_sent
+
+
 @shared_task
 def calculate_wishlist_statistics():
     """
@@ -10,7 +10,7 @@ from drf_spectacular.utils import extend_schema, OpenApiParameter
 from django.db.models import Q
 from .models import WishlistItem
 from .serializers import WishlistItemSerializer, WishlistSummarySerializer
-from products.models import Product
+from products.models import Product, with_product_live_stock
 
 
 class WishlistListView(generics.ListAPIView):
@@ -21,7 +21,7 @@ class WishlistListView(generics.ListAPIView):
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
-        return WishlistItem.objects.filter(user=self.request.user).select_related('product')
+        return with_product_live_stock(WishlistItem.objects.filter(user=self.request.user))
     
     @extend_schema(
         summary="Get wishlist",
@@ -130,7 +130,7 @@ def clear_wishlist(request):
 def move_to_cart(request, product_id):
     """Move a wishlist item to cart."""
     try:
-        wishlist_item = WishlistItem.objects.get(
+        wishlist_item = with_product_live_stock(WishlistItem.objects.all()).get(
             user=request.user,
             product_id=product_id
         )
@@ -142,22 +142,17 @@ def move_to_cart(request, product_id):
                 'error': 'Product is out of stock'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Add to cart (import here to avoid circular import)
-        from cart.models import Cart, CartItem
-        
-        cart, created = Cart.objects.get_or_create(user=request.user)
-        
-        # Check if already in cart
-        cart_item, created = CartItem.objects.get_or_create(
-            cart=cart,
-            product=wishlist_item.product,
-            defaults={'quantity': 1}
-        )
+        # Add to cart, or one more if already there (import here to avoid
+        # circular import)
+        from cart.store import InsufficientStock, add_item
         
-        if not created:
-            # If already in cart, increment quantity
-            cart_item.quantity += 1
-            cart_item.save()
+        try:
+            cart_item, created = add_item(request.user, wishlist_item.product, 1)
+        except InsufficientStock as e:
+            return Response({
+                'success': False,
+                'error': f'Only {e.stock} units available and all are in your cart'
+            }, status=status.HTTP_400_BAD_REQUEST)
         
         # Remove from wishlist
         wishlist_item.delete()